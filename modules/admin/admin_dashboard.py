@@ -391,6 +391,12 @@ class AdminDashboard:
         """Tab de rendimiento del sistema"""
         st.markdown("## 📊 Monitoreo de Rendimiento del Sistema")
 
+        # Trazas reales de generación de gráficos (activables por sesión)
+        self._render_chart_traces()
+
+        # Estado de los trabajos de precálculo en segundo plano
+        self._render_precompute_jobs()
+
         # Siempre usar datos simulados para el dashboard administrativo
         st.info("📊 Métricas de rendimiento del sistema (datos simulados)")
         self._render_performance_fallback()
@@ -793,6 +799,63 @@ class AdminDashboard:
             st.error(f"❌ Error en procesamiento asíncrono: {str(e)}")
             st.info("💡 Asegúrate de que el módulo de IA esté disponible")
 
+    def _render_chart_traces(self):
+        """Tiempos por etapa de la generación de gráficos (create, theme, sanitize)"""
+        from modules.performance.tracing import get_tracer
+
+        st.markdown("### ⏱️ Trazas de Generación de Gráficos")
+        tracer = get_tracer()
+
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.checkbox(
+                "Activar trazas en esta sesión",
+                key='trace_charts',
+                help="Mide cada etapa de los gráficos generados a partir de la siguiente interacción"
+            )
+        with col2:
+            if st.button("🗑️ Limpiar trazas"):
+                tracer.clear()
+                st.rerun()
+
+        summary = tracer.summary()
+        if not summary:
+            st.caption("Sin trazas registradas. Activa las trazas y genera algún gráfico.")
+            return
+
+        summary_df = pd.DataFrame(summary).rename(columns={
+            'span': 'Etapa', 'count': 'Llamadas', 'mean_ms': 'Media (ms)',
+            'p95_ms': 'P95 (ms)', 'max_ms': 'Máx (ms)', 'total_ms': 'Total (ms)'
+        })
+        st.dataframe(summary_df.round(2), use_container_width=True, hide_index=True)
+
+        recent_df = pd.DataFrame(tracer.recent(limit=50))
+        recent_df['timestamp'] = pd.to_datetime(recent_df['timestamp'], unit='s')
+        with st.expander("📋 Últimos spans"):
+            st.dataframe(recent_df.iloc[::-1], use_container_width=True, hide_index=True)
+
+    def _render_precompute_jobs(self):
+        """Estado, última ejecución y duración de los trabajos de precálculo"""
+        from modules.performance.precompute_scheduler import get_precompute_scheduler
+
+        st.markdown("### 🔄 Precálculo en Segundo Plano")
+        jobs = get_precompute_scheduler().get_status()
+        if not jobs:
+            st.caption("Sin trabajos de precálculo registrados.")
+            return
+
+        status_labels = {'pending': '⏸️ Pendiente', 'queued': '🕒 En cola', 'running': '⚙️ Ejecutando',
+                         'ok': '✅ Completado', 'error': '❌ Error'}
+        jobs_df = pd.DataFrame(jobs)
+        jobs_df['status'] = jobs_df['status'].map(status_labels).fillna(jobs_df['status'])
+        jobs_df['last_run'] = pd.to_datetime(jobs_df['last_run'], unit='s')
+        jobs_df['duration'] = jobs_df['duration'].astype(float).round(3)
+        jobs_df = jobs_df[['job', 'status', 'last_run', 'duration', 'runs', 'error']].rename(columns={
+            'job': 'Trabajo', 'status': 'Estado', 'last_run': 'Última ejecución',
+            'duration': 'Duración (s)', 'runs': 'Ejecuciones', 'error': 'Error'
+        })
+        st.dataframe(jobs_df, use_container_width=True, hide_index=True)
+
     def _render_performance_fallback(self):
         """Renderizar tab de rendimiento del sistema sanitario"""
         st.markdown("### 📊 Rendimiento del Sistema Sanitario")
@@ -13,6 +13,9 @@ import numpy as np
 from typing import Dict, List, Any
 import json
 
+from modules.analytics.demand_projection import DEFAULT_SCENARIOS, project_scenarios, projection_by_municipality
+from modules.analytics.kpi_engine import get_health_kpis
+
 class AdminWidgets:
     """Widgets especializados para administradores del sistema"""
 
@@ -529,32 +532,21 @@ class AdminWidgets:
             st.markdown("##### 📈 Proyección Demográfica 2025-2030")
 
             if 'demografia' in data:
-                # Calcular proyección simple basada en tendencia actual
-                df_demo = data['demografia'].copy()
+                # Proyección del escenario con desaceleración gradual (matriz año × municipio cacheada)
+                projection = project_scenarios(data, {'desaceleracion': DEFAULT_SCENARIOS['desaceleracion']})
+                by_municipality = projection_by_municipality(projection, 'desaceleracion')
 
                 # Seleccionar municipios más grandes
-                top_municipalities = df_demo.nlargest(8, 'poblacion_2025')
+                top_municipalities = data['demografia'].nlargest(8, 'poblacion_2025')['municipio'].astype(str)
 
-                # Simular crecimiento proyectado
-                years = [2025, 2026, 2027, 2028, 2029, 2030]
                 fig = go.Figure()
 
-                for _, muni in top_municipalities.iterrows():
-                    base_pop = muni['poblacion_2025']
-                    growth_rate = muni.get('crecimiento_2024_2025', 0) / muni.get('poblacion_2024', base_pop)
-
-                    # Proyección con ligera desaceleración
-                    projections = []
-                    for i, year in enumerate(years):
-                        adjusted_rate = growth_rate * (0.95 ** i)  # Desaceleración gradual
-                        projection = base_pop * ((1 + adjusted_rate) ** i)
-                        projections.append(projection)
-
+                for municipio in top_municipalities:
                     fig.add_trace(go.Scatter(
-                        x=years,
-                        y=projections,
+                        x=by_municipality.index,
+                        y=by_municipality[municipio],
                         mode='lines+markers',
-                        name=muni['municipio'][:15],  # Truncar nombres largos
+                        name=municipio[:15],  # Truncar nombres largos
                         line=dict(width=2)
                     ))
 
@@ -627,34 +619,21 @@ class AdminWidgets:
 
         try:
             if data and 'hospitales' in data and 'demografia' in data:
-                # Calcular métricas reales basadas en datos
-                total_beds = data['hospitales']['camas_funcionamiento_2025'].sum()
-                total_population = data['demografia']['poblacion_2025'].sum()
-
-                # Ratio camas por 1000 habitantes
-                bed_ratio = (total_beds / total_population) * 1000
-                kpis['bed_ratio_1000'] = bed_ratio
+                # KPIs compartidos, calculados una vez por versión de datos
+                health_kpis = get_health_kpis(data)
 
-                # Cobertura hospitalaria
-                num_hospitals = len(data['hospitales'])
-                num_municipalities = len(data['demografia'])
-                kpis['hospital_coverage'] = (num_hospitals / num_municipalities) * 100
+                kpis['bed_ratio_1000'] = health_kpis.bed_ratio_1000
+                kpis['hospital_coverage'] = health_kpis.hospital_coverage
 
                 # Accesibilidad promedio si está disponible
-                if 'accesibilidad' in data:
-                    avg_access_time = data['accesibilidad']['tiempo_coche_minutos'].mean()
-                    kpis['avg_access_time'] = avg_access_time
-                    # Porcentaje con acceso < 45 min
-                    access_under_45 = len(data['accesibilidad'][data['accesibilidad']['tiempo_coche_minutos'] <= 45])
-                    total_routes = len(data['accesibilidad'])
-                    kpis['coverage_under_45min'] = (access_under_45 / total_routes) * 100
+                if health_kpis.avg_access_time is not None:
+                    kpis['avg_access_time'] = health_kpis.avg_access_time
+                    kpis['coverage_under_45min'] = health_kpis.coverage_under_45min
 
                 # Indicadores de calidad basados en datos de indicadores
-                if 'indicadores' in data:
-                    avg_life_expectancy = data['indicadores']['esperanza_vida_2023'].mean()
-                    avg_doctor_ratio = data['indicadores']['ratio_medico_1000_hab'].mean()
-                    kpis['life_expectancy'] = avg_life_expectancy
-                    kpis['doctor_ratio'] = avg_doctor_ratio
+                if health_kpis.life_expectancy is not None:
+                    kpis['life_expectancy'] = health_kpis.life_expectancy
+                    kpis['doctor_ratio'] = health_kpis.doctor_ratio
 
             else:
                 # Usar valores por defecto realistas si no hay datos
@@ -7,6 +7,14 @@ import re
 import streamlit as st
 from datetime import datetime
 
+from modules.analytics.hospital_registry import CRITICAL_SERVICES, compute_service_coverage, get_hospital_service_table
+from modules.analytics.kpi_engine import get_health_kpis
+from modules.analytics.planning_engine import compute_location_planning, format_planning_summary
+from modules.geo.gazetteer import get_gazetteer
+from modules.geo.routing import get_routing_table
+from modules.performance.compute_service import get_compute_service
+from modules.performance.derived_data_store import get_derived_data_store
+
 class HealthAnalyticsAI:
     def __init__(self):
         self.client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
@@ -15,39 +23,43 @@ class HealthAnalyticsAI:
     def get_dataset_context(self, data: Dict) -> str:
         """Generar contexto detallado de los datasets"""
 
+        # Agregados desde el motor de KPIs (una vez por versión de datos)
+        kpis = get_health_kpis(data)
+        specialties = kpis.specialty_centers
+
         context = f"""
         DATASETS SISTEMA SANITARIO MÁLAGA 2025:
 
-        1. HOSPITALES ({len(data['hospitales'])} centros):
+        1. HOSPITALES ({kpis.total_centers} centros):
            Columnas: {', '.join(data['hospitales'].columns.tolist())}
-           Tipos: {', '.join(data['hospitales']['tipo_centro'].unique())}
-           Total camas: {data['hospitales']['camas_funcionamiento_2025'].sum()}
-           Personal sanitario: {data['hospitales']['personal_sanitario_2025'].sum()}
+           Tipos: {', '.join(kpis.center_types)}
+           Total camas: {kpis.total_beds}
+           Personal sanitario: {kpis.total_staff}
 
-        2. DEMOGRAFÍA ({len(data['demografia'])} municipios):
-           Población total 2025: {data['demografia']['poblacion_2025'].sum():,}
-           Crecimiento medio: {data['demografia']['crecimiento_2024_2025'].mean():.0f} habitantes
-           Municipio más poblado: {data['demografia'].loc[data['demografia']['poblacion_2025'].idxmax(), 'municipio']}
+        2. DEMOGRAFÍA ({kpis.municipalities} municipios):
+           Población total 2025: {kpis.total_population:,}
+           Crecimiento medio: {kpis.mean_growth:.0f} habitantes
+           Municipio más poblado: {kpis.most_populated_municipality}
 
         3. SERVICIOS SANITARIOS:
-           Centros con cardiología: {data['servicios']['cardiologia'].sum()}
-           Centros con neurología: {data['servicios']['neurologia'].sum()}
-           Centros con UCI: {data['servicios']['uci_adultos'].sum()}
-           Total consultas 2024: {data['servicios']['consultas_externas_anuales_2024'].sum():,}
+           Centros con cardiología: {specialties.get('cardiologia', 0)}
+           Centros con neurología: {specialties.get('neurologia', 0)}
+           Centros con UCI: {specialties.get('uci_adultos', 0)}
+           Total consultas 2024: {kpis.total_consultations or 0:,}
 
         4. ACCESIBILIDAD:
-           Rutas analizadas: {len(data['accesibilidad'])}
-           Tiempo medio acceso: {data['accesibilidad']['tiempo_coche_minutos'].mean():.1f} min
-           Score accesibilidad medio: {data['accesibilidad']['accesibilidad_score'].mean():.1f}/10
+           Rutas analizadas: {kpis.routes}
+           Tiempo medio acceso: {kpis.avg_access_time or 0:.1f} min
+           Score accesibilidad medio: {kpis.avg_accessibility_score or 0:.1f}/10
 
         5. INDICADORES SALUD:
            Distritos sanitarios: {len(data['indicadores'])}
-           Ratio médicos promedio: {data['indicadores']['ratio_medico_1000_hab'].mean():.2f}/1000 hab
-           Esperanza vida media: {data['indicadores']['esperanza_vida_2023'].mean():.1f} años
+           Ratio médicos promedio: {kpis.doctor_ratio or 0:.2f}/1000 hab
+           Esperanza vida media: {kpis.life_expectancy or 0:.1f} años
         """
         return context
 
-    def analyze_query_intent(self, query: str) -> Dict[str, str]:
+    def analyze_query_intent(self, query: str, data: Optional[Dict] = None) -> Dict[str, str]:
         """Analizar la intención de la consulta para generar contexto específico"""
         query_lower = query.lower()
 
@@ -70,7 +82,6 @@ class HealthAnalyticsAI:
         # Entidades específicas que se mencionan
         entities = {
             'hospitals': ['hospital', 'centro', 'clínico', 'regional', 'costa del sol', 'axarquía'],
-            'municipalities': ['málaga', 'marbella', 'vélez', 'antequera', 'ronda', 'estepona'],
             'specialties': ['cardiología', 'neurología', 'oncología', 'pediatría', 'ginecología'],
             'districts': ['málaga', 'costa del sol', 'axarquía', 'norte', 'serranía', 'guadalhorce']
         }
@@ -89,6 +100,11 @@ class HealthAnalyticsAI:
                 if entity in query_lower:
                     mentioned_entities.append(f"{entity_type}:{entity}")
 
+        # Municipios y centros concretos: nomenclátor de los datos cargados (sin acentos, por tokens)
+        gazetteer = get_gazetteer(data)
+        mentioned_entities.extend(f"municipalities:{m}" for m in gazetteer.find_municipalities(query))
+        mentioned_entities.extend(f"hospital:{h}" for h in gazetteer.find_hospitals(query))
+
         return {
             'main_analysis': main_analysis,
             'entities': ', '.join(mentioned_entities) if mentioned_entities else 'general',
@@ -122,10 +138,12 @@ class HealthAnalyticsAI:
 
             elif analysis_type == 'personnel':
                 # Datos específicos de personal
-                personal_data = data['hospitales'][['nombre', 'personal_sanitario_2025']].merge(
-                    data['servicios'][['centro_sanitario', 'profesionales_medicos_2025', 'profesionales_enfermeria_2025']],
-                    left_on='nombre', right_on='centro_sanitario', how='left'
-                ).to_string(index=False)
+                service_table = get_hospital_service_table(data)
+                personal_columns = [c for c in ['nombre', 'personal_sanitario_2025', 'profesionales_medicos_2025',
+                                                'profesionales_enfermeria_2025'] if c in service_table.columns]
+                personal_data = service_table.loc[
+                    service_table['hospital_id'].notna(), personal_columns
+                ].to_string(index=False)
                 specific_context = f"DATOS PERSONAL:\n{personal_data}\n"
 
             elif analysis_type == 'services':
@@ -136,13 +154,19 @@ class HealthAnalyticsAI:
             elif analysis_type == 'accessibility':
                 # Datos específicos de accesibilidad
                 access_data = data['accesibilidad'][['municipio_origen', 'hospital_destino', 'tiempo_coche_minutos', 'accesibilidad_score']].to_string(index=False)
-                specific_context = f"DATOS ACCESIBILIDAD:\n{access_data}\n"
+                nearest_data = get_routing_table(data).nearest[['municipio', 'hospital', 'tiempo_coche']].to_string(index=False)
+                specific_context = f"DATOS ACCESIBILIDAD:\n{access_data}\n\nHOSPITAL MÁS CERCANO (caminos mínimos):\n{nearest_data}\n"
 
             elif analysis_type == 'demographics':
                 # Datos específicos demográficos
                 demo_data = data['demografia'][['municipio', 'poblacion_2025', 'crecimiento_2024_2025', 'indice_envejecimiento_2025']].to_string(index=False)
                 specific_context = f"DATOS DEMOGRÁFICOS:\n{demo_data}\n"
 
+            elif analysis_type == 'planning':
+                # Ranking de necesidad de nuevos centros (motor de planificación)
+                planning_data = format_planning_summary(compute_location_planning(data), top_n=10)
+                specific_context = f"DATOS PLANIFICACIÓN (ranking de necesidad):\n{planning_data}\n"
+
             elif analysis_type == 'quality':
                 # Datos específicos de calidad
                 quality_data = data['indicadores'][['distrito_sanitario', 'esperanza_vida_2023', 'mortalidad_infantil_x1000', 'cobertura_vacunal_infantil_pct']].to_string(index=False)
@@ -162,7 +186,7 @@ class HealthAnalyticsAI:
         # Análisis específico de la consulta
         specific_context = ""
         if query:
-            intent = self.analyze_query_intent(query)
+            intent = self.analyze_query_intent(query, data)
             specific_context = self.get_specific_data_context(data, query, intent)
             context += f"\nANÁLISIS ESPECÍFICO PARA: '{query}'\nTipo: {intent['main_analysis']}\nEntidades: {intent['entities']}\n{specific_context}"
 
@@ -319,7 +343,7 @@ class HealthAnalyticsAI:
                     pass
             
             # Fallback con análisis de la consulta
-            intent = self.analyze_query_intent(query)
+            intent = self.analyze_query_intent(query, data)
 
             return {
                 "analysis_type": intent['main_analysis'],
@@ -450,6 +474,16 @@ class HealthMetricsCalculator:
     
     @staticmethod
     def calculate_equity_index(data: Dict) -> pd.DataFrame:
+        """Índice de equidad sanitaria por distrito (precalculado por versión de datos)"""
+        return get_derived_data_store().get_or_compute(
+            'equity_index',
+            data,
+            lambda: get_compute_service().run('equity_index', data),
+            depends_on=('hospitales', 'indicadores')
+        )
+
+    @staticmethod
+    def _build_equity_index(data: Dict) -> pd.DataFrame:
         """Calcular índice de equidad sanitaria"""
         
         try:
@@ -494,6 +528,16 @@ class HealthMetricsCalculator:
     
     @staticmethod
     def analyze_accessibility_gaps(data: Dict) -> pd.DataFrame:
+        """Brechas de accesibilidad por municipio (precalculadas por versión de datos)"""
+        return get_derived_data_store().get_or_compute(
+            'accessibility_gaps',
+            data,
+            lambda: HealthMetricsCalculator._build_accessibility_gaps(data),
+            depends_on=('accesibilidad',)
+        )
+
+    @staticmethod
+    def _build_accessibility_gaps(data: Dict) -> pd.DataFrame:
         """Analizar brechas de accesibilidad"""
         
         try:
@@ -535,38 +579,10 @@ class HealthMetricsCalculator:
         """Identificar brechas en servicios sanitarios"""
         
         try:
-            servicios = data['servicios']
-            hospitales = data['hospitales']
-            
-            # Servicios críticos a analizar
-            critical_services = [
-                'cardiologia', 'neurologia', 'oncologia_medica', 
-                'uci_adultos', 'hemodialisis', 'urgencias_generales'
-            ]
-            
-            gaps = {}
-            
-            for service in critical_services:
-                if service in servicios.columns:
-                    # Centros que SÍ tienen el servicio
-                    with_service = servicios[servicios[service] == True]['centro_sanitario'].tolist()
-                    
-                    # Centros que NO tienen el servicio  
-                    without_service = servicios[servicios[service] == False]['centro_sanitario'].tolist()
-                    
-                    # Población afectada (aproximada)
-                    centers_without = hospitales[hospitales['nombre'].isin([s.replace('Hospital ', '').replace('CAR ', '') for s in without_service])]
-                    affected_population = centers_without['poblacion_referencia_2025'].sum()
-                    
-                    gaps[service] = {
-                        'centros_con_servicio': len(with_service),
-                        'centros_sin_servicio': len(without_service),
-                        'cobertura_porcentaje': (len(with_service) / len(servicios)) * 100,
-                        'poblacion_sin_acceso': affected_population,
-                        'prioridad': 'Alta' if len(without_service) > len(servicios) * 0.6 else 'Media' if len(without_service) > 0 else 'Baja'
-                    }
+            # Matriz servicios críticos × población calculada una vez por versión de datos
+            coverage = compute_service_coverage(data, CRITICAL_SERVICES)
             
-            return gaps
+            return coverage.to_dict(orient='index')
             
         except Exception as e:
             return {'error': f'Error identificando brechas: {str(e)}'}
\ No newline at end of file
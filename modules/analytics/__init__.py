@@ -0,0 +1,10 @@
+"""
+Módulos de Análisis
+- Registro canónico de centros sanitarios
+- Tabla de unión hospital-servicios
+- Cobertura de servicios
+- Planificación de ubicaciones
+- Proyección de demanda por escenarios
+- Redistribución de recursos entre distritos
+- Motor de KPIs compartido
+"""
@@ -0,0 +1,154 @@
+"""
+Motor de Escenarios de Demanda - Copilot Salud Andalucía
+Proyecciones vectorizadas (escenario × año × municipio) de población y demanda sanitaria,
+con ajuste por estructura de edad y desglose por línea de servicio
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from modules.performance.compute_service import get_compute_service
+from modules.performance.derived_data_store import get_derived_data_store
+
+
+BASE_YEAR = 2025
+DEFAULT_YEARS = list(range(2025, 2031))
+
+# Proporción anual de población que demanda atención sanitaria
+DEFAULT_DEMAND_RATE = 0.15
+
+# Escenarios estándar:
+# - growth_multiplier: multiplica la tasa de crecimiento observada 2024-2025
+# - deceleration: factor anual de desaceleración de la tasa (1.0 = tasa constante)
+# - ageing_drift: incremento anual del índice de envejecimiento
+# - ageing_elasticity: sensibilidad de la demanda al índice de envejecimiento
+DEFAULT_SCENARIOS = {
+    'tendencial': {'growth_multiplier': 1.0, 'deceleration': 1.0, 'ageing_drift': 0.015, 'ageing_elasticity': 0.3},
+    'desaceleracion': {'growth_multiplier': 1.0, 'deceleration': 0.95, 'ageing_drift': 0.015, 'ageing_elasticity': 0.3},
+    'crecimiento_alto': {'growth_multiplier': 1.5, 'deceleration': 1.0, 'ageing_drift': 0.01, 'ageing_elasticity': 0.3},
+    'crecimiento_bajo': {'growth_multiplier': 0.5, 'deceleration': 0.95, 'ageing_drift': 0.02, 'ageing_elasticity': 0.3},
+}
+
+# Líneas de servicio: columna de actividad en indicadores, tasa per cápita por defecto
+# y sensibilidad relativa al envejecimiento
+SERVICE_LINES = {
+    'atencion_primaria': {'column': 'consultas_primaria_2024', 'default_rate': 2.0, 'age_weight': 1.0},
+    'urgencias': {'column': 'urgencias_hospitalarias_2024', 'default_rate': 0.3, 'age_weight': 0.8},
+    'hospitalizacion': {'column': 'ingresos_hospitalarios_2024', 'default_rate': 0.04, 'age_weight': 1.5},
+}
+
+
+def _service_line_rates(data: Dict[str, pd.DataFrame]) -> Dict[str, float]:
+    """Tasas de utilización per cápita por línea de servicio (observadas en indicadores)"""
+    indicadores = data.get('indicadores')
+    rates = {}
+    for line, config in SERVICE_LINES.items():
+        rate = config['default_rate']
+        if indicadores is not None and config['column'] in indicadores.columns \
+                and 'poblacion_total_2025' in indicadores.columns:
+            population = indicadores['poblacion_total_2025'].sum()
+            if population > 0:
+                rate = float(indicadores[config['column']].sum() / population)
+        rates[line] = rate
+    return rates
+
+
+def _build_projection(data: Dict[str, pd.DataFrame], scenarios: Dict[str, Dict[str, float]],
+                      years: List[int]) -> Dict[str, Any]:
+    demografia = data['demografia']
+    names = list(scenarios)
+
+    base_population = demografia['poblacion_2025'].to_numpy(dtype=np.float64)
+    previous_population = demografia['poblacion_2024'].to_numpy(dtype=np.float64) \
+        if 'poblacion_2024' in demografia.columns else base_population
+    growth = demografia['crecimiento_2024_2025'].to_numpy(dtype=np.float64)
+    growth_rate = np.divide(growth, previous_population, out=np.zeros_like(growth), where=previous_population > 0)
+
+    if 'indice_envejecimiento_2025' in demografia.columns:
+        ageing = demografia['indice_envejecimiento_2025'].to_numpy(dtype=np.float64)
+        ageing_reference = np.average(ageing, weights=base_population) if base_population.sum() > 0 else ageing.mean()
+    else:
+        ageing = np.full_like(base_population, 100.0)
+        ageing_reference = 100.0
+
+    # Parámetros de escenario como vectores (S, 1, 1) para broadcasting sobre (año, municipio)
+    def scenario_param(key: str) -> np.ndarray:
+        default = DEFAULT_SCENARIOS['tendencial'][key]
+        return np.array([scenarios[n].get(key, default) for n in names], dtype=np.float64)[:, None, None]
+
+    multiplier = scenario_param('growth_multiplier')
+    deceleration = scenario_param('deceleration')
+    drift = scenario_param('ageing_drift')
+    elasticity = scenario_param('ageing_elasticity')
+
+    offsets = (np.asarray(years, dtype=np.float64) - BASE_YEAR)[None, :, None]
+
+    # Población: base × (1 + tasa ajustada)^años, con tasa desacelerada por escenario
+    adjusted_rate = multiplier * growth_rate[None, None, :] * deceleration ** offsets
+    population = base_population[None, None, :] * (1 + adjusted_rate) ** offsets
+
+    # Ajuste por estructura de edad: índice de envejecimiento proyectado relativo a la media provincial
+    relative_ageing = (ageing[None, None, :] * (1 + drift) ** offsets) / ageing_reference
+    age_factor = relative_ageing ** elasticity
+
+    demand = population * DEFAULT_DEMAND_RATE * age_factor
+
+    service_rates = _service_line_rates(data)
+    service_demand = {
+        line: population * service_rates[line] * relative_ageing ** (elasticity * config['age_weight'])
+        for line, config in SERVICE_LINES.items()
+    }
+
+    return {
+        'scenarios': names,
+        'years': np.asarray(years),
+        'municipios': demografia['municipio'].astype(str).to_numpy(),
+        'population': population,
+        'demand': demand,
+        'service_demand': service_demand,
+        'service_rates': service_rates,
+    }
+
+
+def project_scenarios(data: Dict[str, pd.DataFrame], scenarios: Optional[Dict[str, Dict[str, float]]] = None,
+                      years: Optional[List[int]] = None) -> Dict[str, Any]:
+    """Proyectar población y demanda para varios escenarios a la vez (matrices escenario × año × municipio)"""
+    scenarios = scenarios or DEFAULT_SCENARIOS
+    years = list(years or DEFAULT_YEARS)
+    params = {
+        'scenarios': tuple((name, tuple(sorted(config.items()))) for name, config in scenarios.items()),
+        'years': tuple(years),
+    }
+    return get_derived_data_store().get_or_compute(
+        'demand_projection',
+        data,
+        lambda: get_compute_service().run('demand_projection', data, scenarios=scenarios, years=years),
+        depends_on=('demografia', 'indicadores'),
+        params=params
+    )
+
+
+def projection_totals(projection: Dict[str, Any]) -> pd.DataFrame:
+    """Totales provinciales por escenario y año (formato largo para gráficos)"""
+    n_scenarios, n_years = len(projection['scenarios']), len(projection['years'])
+    frame = pd.DataFrame({
+        'escenario': np.repeat(projection['scenarios'], n_years),
+        'año': np.tile(projection['years'], n_scenarios),
+        'poblacion_proyectada': projection['population'].sum(axis=2).ravel(),
+        'demanda_sanitaria': projection['demand'].sum(axis=2).ravel(),
+    })
+    for line, values in projection['service_demand'].items():
+        frame[f'demanda_{line}'] = values.sum(axis=2).ravel()
+    return frame
+
+
+def projection_by_municipality(projection: Dict[str, Any], scenario: str) -> pd.DataFrame:
+    """Matriz año × municipio de población proyectada para un escenario"""
+    index = projection['scenarios'].index(scenario)
+    return pd.DataFrame(
+        projection['population'][index],
+        index=pd.Index(projection['years'], name='año'),
+        columns=projection['municipios']
+    )
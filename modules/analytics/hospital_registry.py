@@ -0,0 +1,225 @@
+"""
+Registro Canónico de Centros Sanitarios - Copilot Salud Andalucía
+Resolución de nombres de centros a un identificador único, tabla de unión hospital-servicios
+compartida por mapas, IA y métricas, y análisis vectorizado de cobertura
+"""
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from modules.performance.derived_data_store import get_derived_data_store
+
+
+# Servicios críticos para el análisis de brechas
+CRITICAL_SERVICES = ['cardiologia', 'neurologia', 'oncologia_medica', 'uci_adultos', 'hemodialisis', 'urgencias_generales']
+
+# Palabras sin valor identificativo
+STOPWORDS = {'de', 'del', 'la', 'las', 'el', 'los', 'y'}
+
+# Abreviaturas habituales en los datasets
+ABBREVIATIONS = {
+    'car': ['centro', 'alta', 'resolucion'],
+}
+
+# Términos genéricos de tipo de centro (no identifican un centro concreto)
+GENERIC_TOKENS = {'hospital', 'universitario', 'clinico', 'comarcal', 'general',
+                  'centro', 'alta', 'resolucion'}
+
+
+def normalize_name(name: str) -> str:
+    """Normalizar nombre: minúsculas, sin acentos ni signos de puntuación"""
+    if name is None or (isinstance(name, float) and np.isnan(name)):
+        return ''
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r'[^a-z0-9]+', ' ', text.lower())
+    return ' '.join(text.split())
+
+
+def name_tokens(name: str) -> List[str]:
+    """Tokens significativos de un nombre (abreviaturas expandidas, sin stopwords)"""
+    tokens = []
+    for token in normalize_name(name).split():
+        if token in STOPWORDS:
+            continue
+        tokens.extend(ABBREVIATIONS.get(token, [token]))
+    return tokens
+
+
+class HospitalRegistry:
+    """Índice de centros con identificador canónico (codigo_sas) y búsqueda por tokens"""
+
+    def __init__(self, hospitales: pd.DataFrame):
+        if 'codigo_sas' in hospitales.columns:
+            ids = hospitales['codigo_sas'].astype(str).to_numpy()
+        else:
+            ids = np.array([f"H{i:05d}" for i in range(len(hospitales))])
+
+        self.ids = ids
+        self.names = hospitales['nombre'].astype(str).to_numpy()
+        self.positions: Dict[str, int] = {hid: pos for pos, hid in enumerate(ids)}
+
+        self._exact: Dict[str, int] = {}
+        self._tokens: List[frozenset] = []
+        self._postings: Dict[str, set] = {}
+        self._resolved: Dict[str, int] = {}
+
+        for pos, (hid, name) in enumerate(zip(ids, self.names)):
+            self._exact.setdefault(normalize_name(name), pos)
+            self._exact.setdefault(normalize_name(hid), pos)
+            tokens = frozenset(name_tokens(name))
+            self._tokens.append(tokens)
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(pos)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def postings(self, token: str) -> set:
+        """Posiciones de los centros cuyo nombre contiene el token"""
+        return self._postings.get(token, set())
+
+    def resolve_position(self, name: str) -> int:
+        """Posición del centro en `hospitales` (-1 si no se puede resolver)"""
+        key = normalize_name(name)
+        if key in self._exact:
+            return self._exact[key]
+        if key in self._resolved:
+            return self._resolved[key]
+
+        tokens = set(name_tokens(name))
+        distinctive = tokens - GENERIC_TOKENS
+        position = -1
+
+        if distinctive:
+            # Candidatos: centros que contienen todos los tokens distintivos
+            candidates = set.intersection(*(self._postings.get(t, set()) for t in distinctive))
+            if candidates:
+                # Desempate por similitud de Jaccard sobre el conjunto completo de tokens
+                position = max(
+                    sorted(candidates),
+                    key=lambda pos: len(tokens & self._tokens[pos]) / len(tokens | self._tokens[pos])
+                )
+
+        self._resolved[key] = position
+        return position
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Identificador canónico del centro (None si no se puede resolver)"""
+        position = self.resolve_position(name)
+        return self.ids[position] if position >= 0 else None
+
+    def resolve_positions(self, names: Iterable[str]) -> np.ndarray:
+        """Resolver una serie de nombres a posiciones (-1 si no se resuelve)"""
+        names = pd.Series(list(names), dtype=object)
+        codes, uniques = pd.factorize(names, use_na_sentinel=False)
+        resolved = np.fromiter((self.resolve_position(name) for name in uniques),
+                               dtype=np.int64, count=len(uniques))
+        return resolved[codes]
+
+
+def get_hospital_registry(data: Dict[str, pd.DataFrame]) -> HospitalRegistry:
+    """Registro de centros de la versión actual de `hospitales` (calculado una vez)"""
+    return get_derived_data_store().get_or_compute(
+        'hospital_registry',
+        data,
+        lambda: HospitalRegistry(data['hospitales']),
+        depends_on=('hospitales',)
+    )
+
+
+# Columnas de hospitales que se propagan a la tabla de unión
+HOSPITAL_COLUMNS = [
+    'nombre', 'tipo_centro', 'municipio', 'distrito_sanitario', 'latitud', 'longitud',
+    'camas_funcionamiento_2025', 'personal_sanitario_2025', 'poblacion_referencia_2025',
+    'urgencias_24h', 'uci_camas'
+]
+
+# Columnas de personal procedentes de servicios
+STAFF_COLUMNS = ['profesionales_medicos_2025', 'profesionales_enfermeria_2025']
+
+
+def _build_hospital_service_table(data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    hospitales = data['hospitales']
+    servicios = data.get('servicios', pd.DataFrame(columns=['centro_sanitario']))
+    registry = get_hospital_registry(data)
+
+    service_flags = servicios.select_dtypes(include='bool').columns.tolist()
+    staff_columns = [c for c in STAFF_COLUMNS if c in servicios.columns]
+
+    left = hospitales[[c for c in HOSPITAL_COLUMNS if c in hospitales.columns]].copy()
+    left.insert(0, 'hospital_id', registry.ids)
+    left['_pos'] = np.arange(len(hospitales))
+
+    right = servicios[['centro_sanitario'] + service_flags + staff_columns].copy()
+    right['_pos'] = registry.resolve_positions(servicios['centro_sanitario'])
+    right['tiene_servicios'] = True
+
+    # Unión externa: centros sin fila de servicios y filas de servicios sin centro resuelto
+    table = left.merge(right, on='_pos', how='outer', sort=False)
+    table['tiene_servicios'] = table['tiene_servicios'].eq(True)
+    for flag in service_flags:
+        table[flag] = table[flag].eq(True)
+
+    table = table.sort_values('_pos', kind='stable').drop(columns='_pos').reset_index(drop=True)
+    table.attrs['service_flags'] = service_flags
+    return table
+
+
+def get_hospital_service_table(data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Tabla de unión hospital-servicios (id, coordenadas, servicios, personal) por versión de datos"""
+    return get_derived_data_store().get_or_compute(
+        'hospital_service_table',
+        data,
+        lambda: _build_hospital_service_table(data),
+        depends_on=('hospitales', 'servicios')
+    )
+
+
+def _build_service_coverage(data: Dict[str, pd.DataFrame], services: List[str]) -> pd.DataFrame:
+    table = get_hospital_service_table(data)
+    centres = table[table['tiene_servicios']]
+    services = [s for s in services if s in table.attrs.get('service_flags', [])]
+
+    # Vector de población de referencia alineado con las filas de servicios
+    if 'poblacion_referencia_2025' in centres.columns:
+        population = centres['poblacion_referencia_2025'].fillna(0).to_numpy(dtype=np.float64)
+    else:
+        population = np.zeros(len(centres), dtype=np.float64)
+
+    # Matriz booleana centros × servicios
+    matrix = centres[services].to_numpy(dtype=bool)
+    n_centres = matrix.shape[0]
+
+    with_service = matrix.sum(axis=0)
+    without_service = n_centres - with_service
+    population_without = (~matrix).T.astype(np.float64) @ population
+
+    coverage = pd.DataFrame({
+        'centros_con_servicio': with_service.astype(int),
+        'centros_sin_servicio': without_service.astype(int),
+        'cobertura_porcentaje': (with_service / n_centres * 100) if n_centres else np.zeros(len(services)),
+        'poblacion_sin_acceso': population_without.astype(np.int64),
+    }, index=pd.Index(services, name='servicio'))
+
+    coverage['prioridad'] = np.select(
+        [coverage['centros_sin_servicio'] > n_centres * 0.6, coverage['centros_sin_servicio'] > 0],
+        ['Alta', 'Media'],
+        default='Baja'
+    )
+    return coverage
+
+
+def compute_service_coverage(data: Dict[str, pd.DataFrame], services: List[str]) -> pd.DataFrame:
+    """Cobertura y población sin acceso para todos los servicios en una sola operación"""
+    return get_derived_data_store().get_or_compute(
+        'service_coverage',
+        data,
+        lambda: _build_service_coverage(data, services),
+        depends_on=('hospitales', 'servicios'),
+        params={'services': tuple(services)}
+    )
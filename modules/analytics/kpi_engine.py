@@ -0,0 +1,243 @@
+"""
+Motor de KPIs - Copilot Salud Andalucía
+Conjunto completo de indicadores (totales, ratios, accesibilidad y desgloses por distrito y
+municipio) calculado una sola vez por versión de datos; fuente única para dashboards, IA e informes
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from modules.performance.derived_data_store import get_derived_data_store
+
+
+KPI_DATASETS = ('hospitales', 'demografia', 'servicios', 'accesibilidad', 'indicadores')
+
+# Umbrales de accesibilidad (minutos en coche)
+ACCESS_TARGET_MINUTES = 45
+ACCESS_LIMIT_MINUTES = 60
+
+# Tipos de centro considerados hospitales principales
+MAIN_HOSPITAL_TYPES = ('Hospital Regional', 'Hospital Universitario')
+
+# Especialidades resumidas en el contexto de la IA
+SPECIALTY_COLUMNS = ('cardiologia', 'neurologia', 'uci_adultos', 'urgencias_generales')
+
+
+@dataclass(frozen=True)
+class HealthKPIs:
+    """KPIs del sistema sanitario para una versión de datos (None si falta el dataset de origen)"""
+    # Red asistencial
+    total_centers: int = 0
+    main_hospitals: int = 0
+    total_beds: int = 0
+    total_staff: int = 0
+    districts: int = 0
+    center_types: Dict[str, int] = field(default_factory=dict)
+
+    # Demografía
+    total_population: int = 0
+    population_2024: int = 0
+    population_growth: int = 0
+    growth_rate_pct: float = 0.0
+    growth_std: float = 0.0
+    mean_growth: float = 0.0
+    municipalities: int = 0
+    growing_municipalities: int = 0
+    most_populated_municipality: Optional[str] = None
+
+    # Ratios
+    bed_ratio_1000: float = 0.0
+    hospital_coverage: float = 0.0
+
+    # Servicios
+    specialty_centers: Dict[str, int] = field(default_factory=dict)
+    total_consultations: Optional[int] = None
+
+    # Accesibilidad
+    routes: int = 0
+    avg_access_time: Optional[float] = None
+    max_access_time: Optional[float] = None
+    min_access_time: Optional[float] = None
+    routes_over_60: int = 0
+    coverage_under_45min: Optional[float] = None
+    avg_accessibility_score: Optional[float] = None
+
+    # Indicadores de salud
+    life_expectancy: Optional[float] = None
+    doctor_ratio: Optional[float] = None
+
+    # Desgloses
+    by_district: pd.DataFrame = field(default_factory=pd.DataFrame)
+    by_municipality: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+
+def _frame(data: Dict[str, pd.DataFrame], name: str) -> Optional[pd.DataFrame]:
+    df = data.get(name)
+    return df if isinstance(df, pd.DataFrame) else None
+
+
+def _column_sum(df: Optional[pd.DataFrame], column: str) -> int:
+    if df is None or column not in df.columns:
+        return 0
+    return int(df[column].to_numpy().sum())
+
+
+def _column_mean(df: Optional[pd.DataFrame], column: str) -> Optional[float]:
+    if df is None or column not in df.columns or df.empty:
+        return None
+    return float(df[column].mean())
+
+
+def _per_1000(numerator, denominator):
+    """Ratio por 1000 habitantes (0 con población nula)"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator * 1000, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def _hospital_totals(hospitales: Optional[pd.DataFrame], key: str) -> pd.DataFrame:
+    """Centros, camas y personal agregados por `key` en una sola agrupación"""
+    columns = ['centros', 'camas', 'personal']
+    if hospitales is None or key not in hospitales.columns:
+        return pd.DataFrame(columns=columns)
+    return (hospitales
+            .assign(**{key: hospitales[key].astype(str)})
+            .groupby(key, observed=True)
+            .agg(centros=('nombre', 'size'),
+                 camas=('camas_funcionamiento_2025', 'sum'),
+                 personal=('personal_sanitario_2025', 'sum')))
+
+
+def _build_by_district(hospitales: Optional[pd.DataFrame], indicadores: Optional[pd.DataFrame]) -> pd.DataFrame:
+    totals = _hospital_totals(hospitales, 'distrito_sanitario')
+    if indicadores is not None and 'distrito_sanitario' in indicadores.columns:
+        district = (indicadores
+                    .drop_duplicates('distrito_sanitario')
+                    .assign(distrito=lambda df: df['distrito_sanitario'].astype(str))
+                    .set_index('distrito'))
+        by_district = pd.DataFrame(index=district.index.union(totals.index))
+        for source, target in (('poblacion_total_2025', 'poblacion'), ('ratio_medico_1000_hab', 'ratio_medico_1000_hab'),
+                               ('esperanza_vida_2023', 'esperanza_vida_2023')):
+            if source in district.columns:
+                by_district[target] = district[source]
+    else:
+        by_district = pd.DataFrame(index=totals.index)
+
+    by_district = by_district.join(totals)
+    by_district[['centros', 'camas', 'personal']] = by_district[['centros', 'camas', 'personal']].fillna(0).astype(np.int64)
+    if 'poblacion' in by_district.columns:
+        by_district['ratio_camas_1000'] = _per_1000(by_district['camas'], by_district['poblacion'].fillna(0))
+    by_district.index.name = 'distrito'
+    return by_district.reset_index()
+
+
+def _build_by_municipality(demografia: Optional[pd.DataFrame], hospitales: Optional[pd.DataFrame],
+                           accesibilidad: Optional[pd.DataFrame]) -> pd.DataFrame:
+    if demografia is None:
+        return pd.DataFrame()
+
+    by_municipality = pd.DataFrame({
+        'municipio': demografia['municipio'].astype(str).to_numpy(),
+        'poblacion': demografia['poblacion_2025'].to_numpy(),
+    })
+    if 'crecimiento_2024_2025' in demografia.columns:
+        by_municipality['crecimiento'] = demografia['crecimiento_2024_2025'].to_numpy()
+
+    totals = _hospital_totals(hospitales, 'municipio')
+    by_municipality = by_municipality.merge(totals, left_on='municipio', right_index=True, how='left')
+    by_municipality[['centros', 'camas', 'personal']] = \
+        by_municipality[['centros', 'camas', 'personal']].fillna(0).astype(np.int64)
+    by_municipality['ratio_camas_1000'] = _per_1000(by_municipality['camas'], by_municipality['poblacion'])
+
+    if accesibilidad is not None and not accesibilidad.empty:
+        access = (accesibilidad
+                  .assign(municipio=accesibilidad['municipio_origen'].astype(str))
+                  .groupby('municipio', observed=True)['tiempo_coche_minutos']
+                  .agg(tiempo_acceso_medio='mean', tiempo_acceso_max='max'))
+        by_municipality = by_municipality.merge(access, left_on='municipio', right_index=True, how='left')
+    return by_municipality
+
+
+def compute_health_kpis(data: Dict[str, pd.DataFrame]) -> HealthKPIs:
+    """Calcular todos los KPIs (sin cache); usar `get_health_kpis` desde la aplicación"""
+    hospitales = _frame(data, 'hospitales')
+    demografia = _frame(data, 'demografia')
+    servicios = _frame(data, 'servicios')
+    accesibilidad = _frame(data, 'accesibilidad')
+    indicadores = _frame(data, 'indicadores')
+
+    kpis = {}
+
+    if hospitales is not None:
+        types = hospitales['tipo_centro'].astype(str).value_counts() if 'tipo_centro' in hospitales.columns \
+            else pd.Series(dtype=np.int64)
+        kpis.update(
+            total_centers=len(hospitales),
+            main_hospitals=int(types.reindex(list(MAIN_HOSPITAL_TYPES)).fillna(0).sum()),
+            total_beds=_column_sum(hospitales, 'camas_funcionamiento_2025'),
+            total_staff=_column_sum(hospitales, 'personal_sanitario_2025'),
+            districts=int(hospitales['distrito_sanitario'].nunique()) if 'distrito_sanitario' in hospitales.columns else 0,
+            center_types={str(name): int(count) for name, count in types.items()},
+        )
+
+    if demografia is not None and not demografia.empty:
+        growth = demografia['crecimiento_2024_2025'] if 'crecimiento_2024_2025' in demografia.columns \
+            else pd.Series(0, index=demografia.index)
+        total_population = _column_sum(demografia, 'poblacion_2025')
+        population_2024 = _column_sum(demografia, 'poblacion_2024')
+        population_growth = int(growth.sum())
+        kpis.update(
+            total_population=total_population,
+            population_2024=population_2024,
+            population_growth=population_growth,
+            growth_rate_pct=population_growth / population_2024 * 100 if population_2024 else 0.0,
+            growth_std=float(growth.std()) if len(growth) > 1 else 0.0,
+            mean_growth=float(growth.mean()),
+            municipalities=len(demografia),
+            growing_municipalities=int((growth > 0).sum()),
+            most_populated_municipality=str(demografia['municipio'].iloc[int(demografia['poblacion_2025'].to_numpy().argmax())]),
+        )
+
+    total_population = kpis.get('total_population', 0)
+    kpis['bed_ratio_1000'] = float(_per_1000(kpis.get('total_beds', 0), total_population))
+    if kpis.get('municipalities'):
+        kpis['hospital_coverage'] = kpis.get('total_centers', 0) / kpis['municipalities'] * 100
+
+    if servicios is not None:
+        kpis['specialty_centers'] = {column: int(servicios[column].to_numpy().sum())
+                                     for column in SPECIALTY_COLUMNS if column in servicios.columns}
+        if 'consultas_externas_anuales_2024' in servicios.columns:
+            kpis['total_consultations'] = _column_sum(servicios, 'consultas_externas_anuales_2024')
+
+    if accesibilidad is not None and not accesibilidad.empty:
+        times = accesibilidad['tiempo_coche_minutos'].to_numpy(dtype=np.float64)
+        kpis.update(
+            routes=len(times),
+            avg_access_time=float(times.mean()),
+            max_access_time=float(times.max()),
+            min_access_time=float(times.min()),
+            routes_over_60=int((times > ACCESS_LIMIT_MINUTES).sum()),
+            coverage_under_45min=float((times <= ACCESS_TARGET_MINUTES).mean() * 100),
+            avg_accessibility_score=_column_mean(accesibilidad, 'accesibilidad_score'),
+        )
+
+    kpis.update(
+        life_expectancy=_column_mean(indicadores, 'esperanza_vida_2023'),
+        doctor_ratio=_column_mean(indicadores, 'ratio_medico_1000_hab'),
+        by_district=_build_by_district(hospitales, indicadores),
+        by_municipality=_build_by_municipality(demografia, hospitales, accesibilidad),
+    )
+    return HealthKPIs(**kpis)
+
+
+def get_health_kpis(data: Dict[str, pd.DataFrame]) -> HealthKPIs:
+    """KPIs para la versión actual de los datos (compartidos por todas las sesiones)"""
+    return get_derived_data_store().get_or_compute(
+        'health_kpis',
+        data,
+        lambda: compute_health_kpis(data),
+        depends_on=KPI_DATASETS
+    )
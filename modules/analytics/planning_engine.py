@@ -0,0 +1,107 @@
+"""
+Motor de Planificación de Ubicaciones - Copilot Salud Andalucía
+Score de necesidad por municipio calculado con una única agregación/merge y ponderación configurable
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from modules.performance.compute_service import get_compute_service
+from modules.performance.derived_data_store import get_derived_data_store
+
+
+# Factores disponibles: nombre -> (columna del resultado, divisor de escala)
+NEED_FACTORS = {
+    'crecimiento': ('crecimiento', 1000),
+    'poblacion': ('poblacion', 10000),
+    'tiempo_acceso': ('tiempo_acceso_promedio', 10),
+    'envejecimiento': ('indice_envejecimiento', 100),
+}
+
+# Ponderación por defecto (equivalente al análisis original de ubicación óptima)
+DEFAULT_NEED_WEIGHTS = {
+    'crecimiento': 0.3,
+    'poblacion': 0.4,
+    'tiempo_acceso': 0.3,
+}
+
+# Tiempo de acceso asumido para municipios sin rutas registradas
+DEFAULT_ACCESS_TIME = 60
+
+# Umbrales de prioridad sobre el score de necesidad
+PRIORITY_THRESHOLDS = {'Alta': 15, 'Media': 8}
+
+
+def _build_location_planning(data: Dict[str, pd.DataFrame], weights: Dict[str, float]) -> pd.DataFrame:
+    demografia = data['demografia']
+    accesibilidad = data.get('accesibilidad')
+
+    planning = pd.DataFrame({
+        'municipio': demografia['municipio'].astype(str).to_numpy(),
+        'poblacion': demografia['poblacion_2025'].to_numpy(),
+        'crecimiento': demografia['crecimiento_2024_2025'].to_numpy(),
+    })
+    if 'indice_envejecimiento_2025' in demografia.columns:
+        planning['indice_envejecimiento'] = demografia['indice_envejecimiento_2025'].to_numpy(dtype=np.float64)
+
+    # Tiempo medio de acceso por municipio: una sola agregación + merge
+    if accesibilidad is not None and not accesibilidad.empty:
+        access = (accesibilidad
+                  .assign(municipio=accesibilidad['municipio_origen'].astype(str))
+                  .groupby('municipio', observed=True)['tiempo_coche_minutos']
+                  .mean()
+                  .rename('tiempo_acceso_promedio'))
+        planning = planning.merge(access, left_on='municipio', right_index=True, how='left')
+    else:
+        planning['tiempo_acceso_promedio'] = np.nan
+    planning['tiempo_acceso_promedio'] = planning['tiempo_acceso_promedio'].fillna(DEFAULT_ACCESS_TIME)
+
+    score = np.zeros(len(planning), dtype=np.float64)
+    for factor, weight in weights.items():
+        column, scale = NEED_FACTORS[factor]
+        if column in planning.columns:
+            score += weight * planning[column].to_numpy(dtype=np.float64) / scale
+    planning['score_necesidad'] = score
+
+    planning['prioridad'] = np.select(
+        [score > PRIORITY_THRESHOLDS['Alta'], score > PRIORITY_THRESHOLDS['Media']],
+        ['Alta', 'Media'],
+        default='Baja'
+    )
+
+    planning = planning.sort_values('score_necesidad', ascending=False, kind='stable').reset_index(drop=True)
+    planning['ranking'] = np.arange(1, len(planning) + 1)
+    return planning
+
+
+def compute_location_planning(data: Dict[str, pd.DataFrame],
+                              weights: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """Ranking de municipios por necesidad de nuevos centros (cacheado por versión de datos y pesos)"""
+    weights = dict(DEFAULT_NEED_WEIGHTS if weights is None else weights)
+    unknown = set(weights) - set(NEED_FACTORS)
+    if unknown:
+        raise ValueError(f"Factores de ponderación desconocidos: {', '.join(sorted(unknown))}")
+    if any(weight < 0 for weight in weights.values()) or sum(weights.values()) <= 0:
+        raise ValueError("La ponderación necesita al menos un factor con peso positivo y ninguno negativo")
+
+    return get_derived_data_store().get_or_compute(
+        'location_planning',
+        data,
+        lambda: get_compute_service().run('location_planning', data, weights=weights),
+        depends_on=('demografia', 'accesibilidad'),
+        params=weights
+    )
+
+
+def format_planning_summary(planning: pd.DataFrame, top_n: int = 5) -> str:
+    """Resumen textual del ranking (contexto IA y reportes)"""
+    lines = []
+    for row in planning.head(top_n).itertuples(index=False):
+        lines.append(
+            f"{row.ranking}. {row.municipio} - Prioridad {row.prioridad} "
+            f"(score {row.score_necesidad:.1f}, población {int(row.poblacion):,}, "
+            f"acceso {row.tiempo_acceso_promedio:.0f} min)"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,169 @@
+"""
+Solver de Redistribución de Recursos - Copilot Salud Andalucía
+Plan de traslados de camas y personal entre distritos sanitarios mediante asignación voraz
+con montículo de prioridades, sujeto a capacidad cedible y tiempo máximo de desplazamiento
+"""
+
+import heapq
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from modules.analytics.hospital_registry import get_hospital_registry
+from modules.performance.derived_data_store import get_derived_data_store
+
+
+# Recursos redistribuibles: nombre -> columna en hospitales
+RESOURCES = {
+    'camas': 'camas_funcionamiento_2025',
+    'personal': 'personal_sanitario_2025',
+}
+
+# Restricciones por defecto
+DEFAULT_MAX_TRAVEL_MINUTES = 90
+DEFAULT_MAX_TRANSFER_FRACTION = 0.15
+
+# Tamaño del lote de cada asignación, como fracción del total del recurso
+# (lotes pequeños reparten el excedente entre receptores en lugar de saturar al primero)
+TRANSFER_STEP_FRACTION = 0.005
+
+
+def _build_redistribution_problem(data: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+    """Datos del problema: recursos por distrito y matriz de tiempos entre distritos"""
+    hospitales = data['hospitales']
+    indicadores = data['indicadores']
+
+    districts = (indicadores[['distrito_sanitario', 'poblacion_total_2025']]
+                 .drop_duplicates('distrito_sanitario')
+                 .reset_index(drop=True))
+    names = districts['distrito_sanitario'].astype(str).to_numpy()
+    district_index = pd.Index(names)
+
+    # Recursos actuales por distrito (una sola agregación)
+    hospital_district = district_index.get_indexer(hospitales['distrito_sanitario'].astype(str))
+    in_district = hospital_district >= 0
+    resources = {}
+    for resource, column in RESOURCES.items():
+        values = hospitales[column].to_numpy(dtype=np.int64)
+        resources[resource] = np.bincount(hospital_district[in_district], weights=values[in_district],
+                                          minlength=len(names)).astype(np.int64)
+
+    # Tiempos entre distritos: distrito del municipio de origen -> distrito del hospital de destino
+    travel = np.full((len(names), len(names)), np.inf)
+    np.fill_diagonal(travel, 0.0)
+    accesibilidad = data.get('accesibilidad')
+    if accesibilidad is not None and not accesibilidad.empty:
+        seats = hospitales.drop_duplicates('municipio')
+        municipality_district = pd.Series(seats['distrito_sanitario'].astype(str).to_numpy(),
+                                          index=seats['municipio'].astype(str).to_numpy())
+        origin = district_index.get_indexer(
+            accesibilidad['municipio_origen'].astype(str).map(municipality_district).fillna(''))
+        positions = get_hospital_registry(data).resolve_positions(accesibilidad['hospital_destino'])
+        destination = np.where(positions >= 0, hospital_district[positions], -1)
+        valid = (origin >= 0) & (destination >= 0)
+        np.minimum.at(travel, (origin[valid], destination[valid]),
+                      accesibilidad['tiempo_coche_minutos'].to_numpy(dtype=np.float64)[valid])
+        # Los traslados son bidireccionales: se toma el trayecto más corto en cualquier sentido
+        travel = np.minimum(travel, travel.T)
+
+    return {
+        'districts': names,
+        'population': districts['poblacion_total_2025'].to_numpy(dtype=np.float64),
+        'resources': resources,
+        'travel': travel,
+    }
+
+
+def get_redistribution_problem(data: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+    """Problema de redistribución precalculado (punto de partida compartido por todas las resoluciones)"""
+    return get_derived_data_store().get_or_compute(
+        'redistribution_problem',
+        data,
+        lambda: _build_redistribution_problem(data),
+        depends_on=('hospitales', 'indicadores', 'accesibilidad')
+    )
+
+
+def _allocate(current: np.ndarray, population: np.ndarray, travel: np.ndarray,
+              max_travel: float, max_fraction: float) -> Dict[tuple, int]:
+    """Asignación voraz: el distrito con mayor déficit por habitante recibe del donante más cercano"""
+    total = current.sum()
+    target = total * population / population.sum()
+    surplus = np.minimum(np.floor(current - target), np.floor(current * max_fraction)).clip(min=0).astype(np.int64)
+    deficit = np.floor(target - current).clip(min=0).astype(np.int64)
+    step = max(1, int(total * TRANSFER_STEP_FRACTION))
+
+    # Montículo de receptores ordenado por déficit pendiente por habitante
+    heap = [(-deficit[i] / population[i], i) for i in np.flatnonzero(deficit)]
+    heapq.heapify(heap)
+    donors_by_distance = np.argsort(travel, axis=1, kind='stable')
+
+    transfers: Dict[tuple, int] = {}
+    while heap:
+        _, receiver = heapq.heappop(heap)
+        donor = next((d for d in donors_by_distance[receiver]
+                      if d != receiver and surplus[d] > 0 and travel[receiver, d] <= max_travel), None)
+        if donor is None:
+            continue
+        amount = int(min(step, deficit[receiver], surplus[donor]))
+        surplus[donor] -= amount
+        deficit[receiver] -= amount
+        transfers[(donor, receiver)] = transfers.get((donor, receiver), 0) + amount
+        if deficit[receiver] > 0:
+            heapq.heappush(heap, (-deficit[receiver] / population[receiver], receiver))
+    return transfers
+
+
+def _solve_redistribution(data: Dict[str, pd.DataFrame], max_travel: float, max_fraction: float) -> Dict[str, Any]:
+    problem = get_redistribution_problem(data)
+    names, population, travel = problem['districts'], problem['population'], problem['travel']
+
+    transfer_rows = []
+    summary_rows = []
+    for resource, current in problem['resources'].items():
+        transfers = _allocate(current, population, travel, max_travel, max_fraction)
+        final = current.copy()
+        for (donor, receiver), amount in transfers.items():
+            final[donor] -= amount
+            final[receiver] += amount
+            transfer_rows.append({
+                'recurso': resource,
+                'origen': names[donor],
+                'destino': names[receiver],
+                'cantidad': amount,
+                'tiempo_minutos': travel[donor, receiver],
+            })
+        summary_rows.append(pd.DataFrame({
+            'distrito': names,
+            'recurso': resource,
+            'poblacion': population,
+            'actual': current,
+            'objetivo': current.sum() * population / population.sum(),
+            'final': final,
+            'ratio_actual_1000hab': current / population * 1000,
+            'ratio_final_1000hab': final / population * 1000,
+        }))
+
+    transfers_df = pd.DataFrame(transfer_rows, columns=['recurso', 'origen', 'destino', 'cantidad', 'tiempo_minutos'])
+    return {
+        'transfers': transfers_df.sort_values(['recurso', 'cantidad'], ascending=[True, False]).reset_index(drop=True),
+        'districts': pd.concat(summary_rows, ignore_index=True),
+    }
+
+
+def solve_redistribution(data: Dict[str, pd.DataFrame], max_travel_minutes: Optional[float] = None,
+                         max_transfer_fraction: Optional[float] = None) -> Dict[str, Any]:
+    """Plan de traslados entre distritos (cacheado por versión de datos y restricciones)"""
+    max_travel = float(DEFAULT_MAX_TRAVEL_MINUTES if max_travel_minutes is None else max_travel_minutes)
+    max_fraction = float(DEFAULT_MAX_TRANSFER_FRACTION if max_transfer_fraction is None else max_transfer_fraction)
+    if not 0 <= max_fraction <= 1:
+        raise ValueError(f"La fracción cedible debe estar entre 0 y 1: {max_fraction}")
+
+    return get_derived_data_store().get_or_compute(
+        'redistribution_plan',
+        data,
+        lambda: _solve_redistribution(data, max_travel, max_fraction),
+        depends_on=('hospitales', 'indicadores', 'accesibilidad'),
+        params={'max_travel': max_travel, 'max_fraction': max_fraction}
+    )
@@ -5,6 +5,9 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from typing import Dict, List
 
+from modules.analytics.kpi_engine import get_health_kpis
+from modules.visualization.figure_cache import get_role_figure
+
 class RoleDashboards:
     """Dashboards personalizados por rol del usuario"""
     
@@ -93,11 +96,12 @@ class RoleDashboards:
 
         # KPIs principales en la parte superior
         st.markdown("### 📊 KPIs Ejecutivos Mejorados")
+        kpis = get_health_kpis(data)
         
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            total_hospitals = len(data['hospitales'])
+            total_hospitals = kpis.total_centers
             st.metric(
                 "🏥 Centros Sanitarios",
                 total_hospitals,
@@ -105,16 +109,14 @@ class RoleDashboards:
             )
         
         with col2:
-            total_population = data['demografia']['poblacion_2025'].sum()
             st.metric(
                 "👥 Población Total",
-                f"{total_population/1000:.0f}K",
-                delta=f"+{data['demografia']['crecimiento_2024_2025'].sum():,}"
+                f"{kpis.total_population/1000:.0f}K",
+                delta=f"+{kpis.population_growth:,}"
             )
         
         with col3:
-            total_beds = data['hospitales']['camas_funcionamiento_2025'].sum()
-            bed_ratio = (total_beds / total_population) * 1000
+            bed_ratio = kpis.bed_ratio_1000
             st.metric(
                 "🛏️ Ratio Camas/1000hab",
                 f"{bed_ratio:.1f}",
@@ -122,8 +124,8 @@ class RoleDashboards:
             )
         
         with col4:
-            if 'accesibilidad' in data:
-                avg_access = data['accesibilidad']['tiempo_coche_minutos'].mean()
+            if kpis.avg_access_time is not None:
+                avg_access = kpis.avg_access_time
                 st.metric(
                     "⏱️ Tiempo Acceso Promedio",
                     f"{avg_access:.0f} min",
@@ -135,27 +137,39 @@ class RoleDashboards:
         
         with col1:
             st.markdown("#### 🏥 Distribución de Centros por Tipo")
-            hospital_types = data['hospitales']['tipo_centro'].value_counts()
-            fig_pie = px.pie(
-                values=hospital_types.values,
-                names=hospital_types.index,
-                color_discrete_sequence=config['colors']
-            )
-            fig_pie.update_layout(height=300)
+
+            def build_pie():
+                hospital_types = data['hospitales']['tipo_centro'].value_counts()
+                fig_pie = px.pie(
+                    values=hospital_types.values,
+                    names=hospital_types.index,
+                    color_discrete_sequence=config['colors']
+                )
+                fig_pie.update_layout(height=300)
+                return fig_pie
+
+            fig_pie = get_role_figure(config['layout'], 'centros_por_tipo', data, build_pie,
+                                      depends_on=('hospitales',), theme=theme)
             st.plotly_chart(fig_pie, use_container_width=True)
         
         with col2:
             st.markdown("#### 📈 Crecimiento Poblacional por Municipio")
-            top_growth = data['demografia'].nlargest(10, 'crecimiento_2024_2025')
-            fig_bar = px.bar(
-                top_growth,
-                x='municipio',
-                y='crecimiento_2024_2025',
-                color='crecimiento_2024_2025',
-                color_continuous_scale=['#1a365d', '#2d3748', '#e53e3e']
-            )
-            fig_bar.update_xaxes(tickangle=45)
-            fig_bar.update_layout(height=300)
+
+            def build_growth():
+                top_growth = data['demografia'].nlargest(10, 'crecimiento_2024_2025')
+                fig_bar = px.bar(
+                    top_growth,
+                    x='municipio',
+                    y='crecimiento_2024_2025',
+                    color='crecimiento_2024_2025',
+                    color_continuous_scale=['#1a365d', '#2d3748', '#e53e3e']
+                )
+                fig_bar.update_xaxes(tickangle=45)
+                fig_bar.update_layout(height=300)
+                return fig_bar
+
+            fig_bar = get_role_figure(config['layout'], 'crecimiento_municipios', data, build_growth,
+                                      depends_on=('demografia',), theme=theme)
             st.plotly_chart(fig_bar, use_container_width=True)
         
         # Tabla resumen ejecutivo
@@ -227,50 +241,55 @@ class RoleDashboards:
         # Generar datos de tendencias para los últimos 3 meses
         months = [(datetime.now() - timedelta(days=30*i)).strftime('%b %Y') for i in range(3, 0, -1)]
 
-        efficiency_trend = [92.1, 93.5, 94.2]
-        digital_trend = [83.2, 85.8, 87.6]
-        compliance_trend = [95.1, 96.0, 96.8]
-
-        fig = go.Figure()
-
-        fig.add_trace(go.Scatter(
-            x=months, y=efficiency_trend,
-            mode='lines+markers',
-            name='Eficiencia Administrativa',
-            line=dict(color='#1a365d', width=3),
-            marker=dict(size=8)
-        ))
-
-        fig.add_trace(go.Scatter(
-            x=months, y=digital_trend,
-            mode='lines+markers',
-            name='Adopción Digital',
-            line=dict(color='#2b6cb0', width=3),
-            marker=dict(size=8)
-        ))
-
-        fig.add_trace(go.Scatter(
-            x=months, y=compliance_trend,
-            mode='lines+markers',
-            name='Cumplimiento Normativo',
-            line=dict(color='#059669', width=3),
-            marker=dict(size=8)
-        ))
-
-        fig.update_layout(
-            title="Evolución de Indicadores Administrativos",
-            xaxis_title="Mes",
-            yaxis_title="Porcentaje (%)",
-            height=350,
-            showlegend=True,
-            legend=dict(
-                yanchor="top",
-                y=0.99,
-                xanchor="left",
-                x=0.01
+        def build_trends():
+            efficiency_trend = [92.1, 93.5, 94.2]
+            digital_trend = [83.2, 85.8, 87.6]
+            compliance_trend = [95.1, 96.0, 96.8]
+
+            fig = go.Figure()
+
+            fig.add_trace(go.Scatter(
+                x=months, y=efficiency_trend,
+                mode='lines+markers',
+                name='Eficiencia Administrativa',
+                line=dict(color='#1a365d', width=3),
+                marker=dict(size=8)
+            ))
+
+            fig.add_trace(go.Scatter(
+                x=months, y=digital_trend,
+                mode='lines+markers',
+                name='Adopción Digital',
+                line=dict(color='#2b6cb0', width=3),
+                marker=dict(size=8)
+            ))
+
+            fig.add_trace(go.Scatter(
+                x=months, y=compliance_trend,
+                mode='lines+markers',
+                name='Cumplimiento Normativo',
+                line=dict(color='#059669', width=3),
+                marker=dict(size=8)
+            ))
+
+            fig.update_layout(
+                title="Evolución de Indicadores Administrativos",
+                xaxis_title="Mes",
+                yaxis_title="Porcentaje (%)",
+                height=350,
+                showlegend=True,
+                legend=dict(
+                    yanchor="top",
+                    y=0.99,
+                    xanchor="left",
+                    x=0.01
+                )
             )
-        )
+            return fig
 
+        # Los meses forman parte de la clave: la figura cambia con el trimestre
+        fig = get_role_figure(config['layout'], 'tendencias_gestion', data, build_trends,
+                              depends_on=(), theme=theme, params={'months': tuple(months)})
         st.plotly_chart(fig, use_container_width=True)
 
         # Panel de alertas administrativas
@@ -309,49 +328,59 @@ class RoleDashboards:
         st.markdown("### ⚙️ Panel de Gestión Operativa")
         
         # Métricas operativas
+        kpis = get_health_kpis(data)
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            total_capacity = data['hospitales']['camas_funcionamiento_2025'].sum()
-            st.metric("🛏️ Capacidad Total", f"{total_capacity:,} camas")
+            st.metric("🛏️ Capacidad Total", f"{kpis.total_beds:,} camas")
         
         with col2:
-            if 'servicios' in data:
-                urgent_centers = data['servicios']['urgencias_generales'].sum()
-                st.metric("🚨 Centros con Urgencias", urgent_centers)
+            if 'urgencias_generales' in kpis.specialty_centers:
+                st.metric("🚨 Centros con Urgencias", kpis.specialty_centers['urgencias_generales'])
         
         with col3:
-            if 'accesibilidad' in data:
-                routes_over_60 = len(data['accesibilidad'][data['accesibilidad']['tiempo_coche_minutos'] > 60])
-                st.metric("⚠️ Rutas >60min", routes_over_60)
+            if kpis.routes:
+                st.metric("⚠️ Rutas >60min", kpis.routes_over_60)
         
         # Gráficos operativos
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("#### 🏥 Capacidad por Hospital")
-            capacity_data = data['hospitales'].nlargest(10, 'camas_funcionamiento_2025')
-            fig_capacity = px.bar(
-                capacity_data,
-                x='nombre',
-                y='camas_funcionamiento_2025',
-                color='tipo_centro',
-                color_discrete_sequence=config['colors']
-            )
-            fig_capacity.update_xaxes(tickangle=45)
-            fig_capacity.update_layout(height=400)
+
+            def build_capacity():
+                capacity_data = data['hospitales'].nlargest(10, 'camas_funcionamiento_2025')
+                fig_capacity = px.bar(
+                    capacity_data,
+                    x='nombre',
+                    y='camas_funcionamiento_2025',
+                    color='tipo_centro',
+                    color_discrete_sequence=config['colors']
+                )
+                fig_capacity.update_xaxes(tickangle=45)
+                fig_capacity.update_layout(height=400)
+                return fig_capacity
+
+            fig_capacity = get_role_figure(config['layout'], 'capacidad_hospitales', data, build_capacity,
+                                           depends_on=('hospitales',), theme=theme)
             st.plotly_chart(fig_capacity, use_container_width=True)
         
         with col2:
             if 'accesibilidad' in data:
                 st.markdown("#### ⏱️ Distribución de Tiempos de Acceso")
-                fig_hist = px.histogram(
-                    data['accesibilidad'],
-                    x='tiempo_coche_minutos',
-                    nbins=20,
-                    color_discrete_sequence=[config['colors'][0]]
-                )
-                fig_hist.update_layout(height=400)
+
+                def build_access():
+                    fig_hist = px.histogram(
+                        data['accesibilidad'],
+                        x='tiempo_coche_minutos',
+                        nbins=20,
+                        color_discrete_sequence=[config['colors'][0]]
+                    )
+                    fig_hist.update_layout(height=400)
+                    return fig_hist
+
+                fig_hist = get_role_figure(config['layout'], 'tiempos_acceso', data, build_access,
+                                           depends_on=('accesibilidad',), theme=theme)
                 st.plotly_chart(fig_hist, use_container_width=True)
     
     def render_analytical_dashboard(self, data: Dict, config: Dict, theme: Dict):
@@ -370,28 +399,33 @@ class RoleDashboards:
             total_records = sum(len(df) for df in data.values() if isinstance(df, pd.DataFrame))
             st.metric("📊 Total Registros", f"{total_records:,}")
         
+        kpis = get_health_kpis(data)
+
         with col3:
-            if 'indicadores' in data:
-                avg_life_exp = data['indicadores']['esperanza_vida_2023'].mean()
-                st.metric("📈 Esperanza Vida Media", f"{avg_life_exp:.1f} años")
+            if kpis.life_expectancy is not None:
+                st.metric("📈 Esperanza Vida Media", f"{kpis.life_expectancy:.1f} años")
         
         with col4:
-            if 'demografia' in data:
-                growth_variance = data['demografia']['crecimiento_2024_2025'].std()
-                st.metric("📏 Varianza Crecimiento", f"{growth_variance:.0f}")
+            if kpis.municipalities:
+                st.metric("📏 Varianza Crecimiento", f"{kpis.growth_std:.0f}")
         
         # Análisis correlacional
         st.markdown("#### 🔗 Matriz de Correlaciones")
         if 'indicadores' in data:
             numeric_cols = data['indicadores'].select_dtypes(include=['float64', 'int64']).columns
             if len(numeric_cols) > 1:
-                corr_matrix = data['indicadores'][numeric_cols].corr()
-                fig_heatmap = px.imshow(
-                    corr_matrix,
-                    color_continuous_scale='RdBu',
-                    aspect='auto'
-                )
-                fig_heatmap.update_layout(height=500)
+                def build_correlations():
+                    corr_matrix = data['indicadores'][numeric_cols].corr()
+                    fig_heatmap = px.imshow(
+                        corr_matrix,
+                        color_continuous_scale='RdBu',
+                        aspect='auto'
+                    )
+                    fig_heatmap.update_layout(height=500)
+                    return fig_heatmap
+
+                fig_heatmap = get_role_figure(config['layout'], 'matriz_correlaciones', data, build_correlations,
+                                              depends_on=('indicadores',), theme=theme)
                 st.plotly_chart(fig_heatmap, use_container_width=True)
         
         # Análisis demográfico detallado
@@ -399,28 +433,38 @@ class RoleDashboards:
         
         with col1:
             st.markdown("#### 👥 Análisis Demográfico")
-            demo_analysis = data['demografia'].copy()
-            fig_scatter = px.scatter(
-                demo_analysis,
-                x='poblacion_2025',
-                y='crecimiento_2024_2025',
-                size='densidad_hab_km2_2025',
-                hover_name='municipio',
-                color='indice_envejecimiento_2025',
-                color_continuous_scale=config['colors']
-            )
-            fig_scatter.update_layout(height=400)
+
+            def build_demography():
+                fig_scatter = px.scatter(
+                    data['demografia'],
+                    x='poblacion_2025',
+                    y='crecimiento_2024_2025',
+                    size='densidad_hab_km2_2025',
+                    hover_name='municipio',
+                    color='indice_envejecimiento_2025',
+                    color_continuous_scale=config['colors']
+                )
+                fig_scatter.update_layout(height=400)
+                return fig_scatter
+
+            fig_scatter = get_role_figure(config['layout'], 'analisis_demografico', data, build_demography,
+                                          depends_on=('demografia',), theme=theme)
             st.plotly_chart(fig_scatter, use_container_width=True)
         
         with col2:
             st.markdown("#### 📊 Distribución de Indicadores")
             if 'indicadores' in data:
-                fig_box = px.box(
-                    data['indicadores'],
-                    y='ratio_medico_1000_hab',
-                    color_discrete_sequence=[config['colors'][0]]
-                )
-                fig_box.update_layout(height=400)
+                def build_ratio_box():
+                    fig_box = px.box(
+                        data['indicadores'],
+                        y='ratio_medico_1000_hab',
+                        color_discrete_sequence=[config['colors'][0]]
+                    )
+                    fig_box.update_layout(height=400)
+                    return fig_box
+
+                fig_box = get_role_figure(config['layout'], 'ratio_medicos', data, build_ratio_box,
+                                          depends_on=('indicadores',), theme=theme)
                 st.plotly_chart(fig_box, use_container_width=True)
     
     def render_basic_dashboard(self, data: Dict, config: Dict, theme: Dict):
@@ -429,33 +473,37 @@ class RoleDashboards:
         st.markdown("### 👁️ Información Pública del Sistema Sanitario")
         
         # Información básica
+        kpis = get_health_kpis(data)
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            public_hospitals = len(data['hospitales'][data['hospitales']['tipo_centro'].isin(['Hospital Regional', 'Hospital Universitario'])])
-            st.metric("🏥 Hospitales Principales", public_hospitals)
+            st.metric("🏥 Hospitales Principales", kpis.main_hospitals)
         
         with col2:
-            total_population = data['demografia']['poblacion_2025'].sum() if 'demografia' in data else 0
-            st.metric("👥 Población Málaga", f"{total_population/1000:.0f}K")
+            st.metric("👥 Población Málaga", f"{kpis.total_population/1000:.0f}K")
         
         with col3:
-            municipalities = len(data['demografia']) if 'demografia' in data else 0
-            st.metric("🏘️ Municipios", municipalities)
+            st.metric("🏘️ Municipios", kpis.municipalities)
         
         # Gráfico simple
         st.markdown("#### 🏥 Centros Sanitarios por Tipo")
-        hospital_types = data['hospitales']['tipo_centro'].value_counts()
-        fig_simple = px.bar(
-            x=hospital_types.index,
-            y=hospital_types.values,
-            color_discrete_sequence=[config['colors'][0]]
-        )
-        fig_simple.update_layout(
-            xaxis_title="Tipo de Centro",
-            yaxis_title="Cantidad",
-            height=300
-        )
+
+        def build_centers():
+            hospital_types = data['hospitales']['tipo_centro'].value_counts()
+            fig_simple = px.bar(
+                x=hospital_types.index,
+                y=hospital_types.values,
+                color_discrete_sequence=[config['colors'][0]]
+            )
+            fig_simple.update_layout(
+                xaxis_title="Tipo de Centro",
+                yaxis_title="Cantidad",
+                height=300
+            )
+            return fig_simple
+
+        fig_simple = get_role_figure(config['layout'], 'centros_por_tipo', data, build_centers,
+                                     depends_on=('hospitales',), theme=theme)
         st.plotly_chart(fig_simple, use_container_width=True)
         
         # Información adicional
@@ -0,0 +1,9 @@
+"""
+Módulos Geoespaciales
+- Grafo de rutas y caminos mínimos precalculados
+- Índice espacial de vecinos más cercanos
+- Matrices de distancias de Haversine
+- Nomenclátor de municipios y centros
+- Rejilla hexagonal de accesibilidad
+- Límites simplificados de municipios y distritos por zoom
+"""
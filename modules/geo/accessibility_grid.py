@@ -0,0 +1,166 @@
+"""
+Rejilla de Accesibilidad - Copilot Salud Andalucía
+Rejilla hexagonal de la provincia con el tiempo estimado en coche al hospital más cercano,
+calculada en el servidor por versión de datos y servida como capa GeoJSON ligera
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules.analytics.hospital_registry import get_hospital_registry
+from modules.geo.distance import haversine_km, haversine_matrix
+from modules.geo.gazetteer import get_gazetteer
+from modules.geo.spatial_index import get_hospital_index
+from modules.performance.derived_data_store import get_derived_data_store
+
+
+# Radio de cada hexágono (km) y distancia máxima a un núcleo de población para incluir la celda
+DEFAULT_CELL_KM = 3.0
+DEFAULT_COVERAGE_KM = 20.0
+
+# Modelo de tiempo por defecto si no hay rutas suficientes: minutos = base + km * minutos_por_km
+DEFAULT_TRAVEL_MODEL = (5.0, 1.0)
+
+# Bandas de tiempo de acceso (límite superior en minutos, color, etiqueta)
+ACCESS_TIME_BANDS = [
+    (30, '#27ae60', '≤ 30 min'),
+    (45, '#f1c40f', '30-45 min'),
+    (60, '#f39c12', '45-60 min'),
+    (np.inf, '#e74c3c', '> 60 min'),
+]
+
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LON = 111.320
+
+
+def fit_travel_time_model(data: Dict[str, pd.DataFrame]) -> Tuple[float, float]:
+    """Ajuste lineal tiempo en coche ~ distancia en línea recta municipio-hospital (base, min/km)"""
+    accesibilidad = data.get('accesibilidad')
+    hospitales = data['hospitales']
+    if accesibilidad is None or accesibilidad.empty or 'tiempo_coche_minutos' not in accesibilidad.columns:
+        return DEFAULT_TRAVEL_MODEL
+
+    origin = get_gazetteer(data).lookup_municipalities(accesibilidad['municipio_origen'].astype(str).tolist())
+    positions = get_hospital_registry(data).resolve_positions(accesibilidad['hospital_destino'])
+    hospital_coords = hospitales[['latitud', 'longitud']].to_numpy(dtype=np.float64)
+    destination = np.where((positions >= 0)[:, None], hospital_coords[np.maximum(positions, 0)], np.nan)
+
+    km = haversine_km(origin[:, 0], origin[:, 1], destination[:, 0], destination[:, 1])
+    minutes = accesibilidad['tiempo_coche_minutos'].to_numpy(dtype=np.float64)
+    valid = np.isfinite(km) & np.isfinite(minutes)
+    if valid.sum() < 2 or np.ptp(km[valid]) == 0:
+        return DEFAULT_TRAVEL_MODEL
+
+    per_km, base = np.polyfit(km[valid], minutes[valid], 1)
+    # Un ajuste degenerado (pendiente no positiva) no sirve como modelo de viaje
+    if per_km <= 0:
+        return DEFAULT_TRAVEL_MODEL
+    return float(max(base, 0.0)), float(per_km)
+
+
+def hex_grid(lat_min: float, lat_max: float, lon_min: float, lon_max: float,
+             cell_km: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Centros de una rejilla de hexágonos (vértice arriba) de radio `cell_km` sobre un rectángulo"""
+    km_per_lon = KM_PER_DEGREE_LON * np.cos(np.radians((lat_min + lat_max) / 2))
+    dy = 1.5 * cell_km / KM_PER_DEGREE_LAT
+    dx = np.sqrt(3) * cell_km / km_per_lon
+
+    rows = np.arange(lat_min, lat_max + dy, dy)
+    cols = np.arange(lon_min, lon_max + dx, dx)
+    lat, lon = np.meshgrid(rows, cols, indexing='ij')
+    # Las filas impares se desplazan medio hexágono
+    lon = lon + (np.arange(len(rows)) % 2)[:, None] * dx / 2
+    return lat.ravel(), lon.ravel()
+
+
+def hexagon_rings(lat: np.ndarray, lon: np.ndarray, cell_km: float) -> np.ndarray:
+    """Anillos cerrados de cada hexágono en [lon, lat], forma (n, 7, 2)"""
+    angles = np.radians(30 + 60 * np.arange(7))
+    km_per_lon = KM_PER_DEGREE_LON * np.cos(np.radians(lat))[:, None]
+    ring_lat = lat[:, None] + cell_km * np.sin(angles)[None, :] / KM_PER_DEGREE_LAT
+    ring_lon = lon[:, None] + cell_km * np.cos(angles)[None, :] / km_per_lon
+    return np.stack([ring_lon, ring_lat], axis=-1)
+
+
+def access_band(minutes) -> np.ndarray:
+    """Índice de banda de ACCESS_TIME_BANDS para cada tiempo"""
+    limits = np.array([limit for limit, _, _ in ACCESS_TIME_BANDS])
+    return np.searchsorted(limits, np.asarray(minutes, dtype=np.float64), side='left')
+
+
+def build_accessibility_grid(data: Dict[str, pd.DataFrame], cell_km: float = DEFAULT_CELL_KM,
+                             coverage_km: float = DEFAULT_COVERAGE_KM) -> pd.DataFrame:
+    """Celdas pobladas de la provincia con distancia y tiempo estimado al hospital más cercano"""
+    gazetteer = get_gazetteer(data)
+    municipalities = gazetteer.municipality_coords
+    hospitales = data['hospitales']
+
+    # Rectángulo que cubre municipios y hospitales con margen de cobertura
+    points = np.vstack([municipalities, hospitales[['latitud', 'longitud']].to_numpy(dtype=np.float64)])
+    points = points[np.isfinite(points).all(axis=1)]
+    margin_lat = coverage_km / KM_PER_DEGREE_LAT
+    margin_lon = coverage_km / (KM_PER_DEGREE_LON * np.cos(np.radians(points[:, 0].mean())))
+    lat, lon = hex_grid(points[:, 0].min() - margin_lat, points[:, 0].max() + margin_lat,
+                        points[:, 1].min() - margin_lon, points[:, 1].max() + margin_lon, cell_km)
+
+    # Solo celdas cercanas a algún núcleo de población (evita colorear el mar y zonas vacías)
+    populated = haversine_matrix(lat, lon, municipalities[:, 0], municipalities[:, 1],
+                                 chunk_size=4096).min(axis=1) <= coverage_km
+    lat, lon = lat[populated], lon[populated]
+
+    index = get_hospital_index(data)
+    km, nearest = index.query(lat, lon, k=1)
+    km, nearest = km[:, 0], nearest[:, 0]
+    base, per_km = fit_travel_time_model(data)
+    positions = index.positions[nearest]
+
+    return pd.DataFrame({
+        'latitud': lat,
+        'longitud': lon,
+        'distancia_km': km,
+        'tiempo_minutos': base + per_km * km,
+        'hospital_id': index.ids[nearest],
+        'hospital': hospitales['nombre'].astype(str).to_numpy()[positions],
+    })
+
+
+def grid_feature_collection(grid: pd.DataFrame, cell_km: float = DEFAULT_CELL_KM) -> dict:
+    """Hexágonos de la rejilla como FeatureCollection con tiempo, banda y hospital"""
+    rings = np.round(hexagon_rings(grid['latitud'].to_numpy(), grid['longitud'].to_numpy(), cell_km), 5).tolist()
+    bands = access_band(grid['tiempo_minutos'])
+    colors = [ACCESS_TIME_BANDS[band][1] for band in bands]
+    minutes = np.round(grid['tiempo_minutos'].to_numpy(), 0).astype(int).tolist()
+    km = np.round(grid['distancia_km'].to_numpy(), 1).tolist()
+
+    return {
+        'type': 'FeatureCollection',
+        'features': [
+            {'type': 'Feature', 'geometry': {'type': 'Polygon', 'coordinates': [ring]},
+             'properties': {'tiempo_minutos': m, 'distancia_km': d, 'hospital': h, 'color': c}}
+            for ring, m, d, h, c in zip(rings, minutes, km, grid['hospital'].tolist(), colors)
+        ]
+    }
+
+
+def get_accessibility_grid(data: Dict[str, pd.DataFrame], cell_km: float = DEFAULT_CELL_KM) -> pd.DataFrame:
+    """Rejilla de accesibilidad para la versión actual de hospitales y accesibilidad"""
+    return get_derived_data_store().get_or_compute(
+        'accessibility_grid',
+        data,
+        lambda: build_accessibility_grid(data, cell_km),
+        depends_on=('accesibilidad', 'hospitales'),
+        params={'cell_km': cell_km}
+    )
+
+
+def get_accessibility_geojson(data: Dict[str, pd.DataFrame], cell_km: float = DEFAULT_CELL_KM) -> dict:
+    """Capa GeoJSON de la rejilla de accesibilidad (cacheada junto a la rejilla)"""
+    return get_derived_data_store().get_or_compute(
+        'accessibility_geojson',
+        data,
+        lambda: grid_feature_collection(get_accessibility_grid(data, cell_km), cell_km),
+        depends_on=('accesibilidad', 'hospitales'),
+        params={'cell_km': cell_km}
+    )
@@ -0,0 +1,304 @@
+"""
+Límites Administrativos - Copilot Salud Andalucía
+Geometrías simplificadas de municipios y distritos sanitarios por nivel de zoom: los bordes
+compartidos se simplifican una sola vez (sin huecos ni solapes entre vecinos) y se publican
+como ficheros GeoJSON estáticos que los mapas cargan ya simplificados. Las capas se generan
+desde una fuente administrativa oficial (no incluida en el repositorio)
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BOUNDARIES_DIR = os.path.join(ROOT_DIR, 'assets', 'geo')
+
+# Niveles de zoom publicados y tolerancia de simplificación en píxeles de pantalla
+ZOOM_LEVELS = (8, 10, 12)
+PIXEL_TOLERANCE = 1.0
+
+BOUNDARY_LAYERS = ('municipios', 'distritos')
+
+Point = Tuple[float, float]
+
+
+def zoom_tolerance(zoom: int, pixels: float = PIXEL_TOLERANCE) -> float:
+    """Tolerancia en grados equivalente a `pixels` píxeles de tesela a ese zoom"""
+    return pixels * 360.0 / (256 * 2 ** zoom)
+
+
+def zoom_precision(zoom: int) -> int:
+    """Decimales suficientes para la tolerancia del zoom"""
+    return int(np.ceil(-np.log10(zoom_tolerance(zoom)))) + 1
+
+
+def douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Máscara de puntos conservados por Douglas-Peucker (extremos siempre conservados)"""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(*segment)
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        farthest = int(distances.argmax())
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.extend([(start, split), (split, end)])
+    return keep
+
+
+def _signed_area(ring: Sequence[Point]) -> float:
+    coords = np.asarray(ring, dtype=np.float64)
+    x, y = coords[:, 0], coords[:, 1]
+    return float((x[:-1] * y[1:] - x[1:] * y[:-1]).sum() / 2)
+
+
+def _point_in_ring(point: Point, ring: Sequence[Point]) -> bool:
+    coords = np.asarray(ring, dtype=np.float64)
+    x0, y0 = coords[:-1, 0], coords[:-1, 1]
+    x1, y1 = coords[1:, 0], coords[1:, 1]
+    crosses = (y0 > point[1]) != (y1 > point[1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = x0 + (point[1] - y0) * (x1 - x0) / (y1 - y0)
+    return bool(np.count_nonzero(crosses & (point[0] < x_cross)) % 2)
+
+
+def _polygons(geometry: dict) -> List[List[List[Point]]]:
+    """Polígonos de una geometría Polygon/MultiPolygon como listas de anillos de tuplas"""
+    polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+    result = []
+    for polygon in polygons:
+        rings = []
+        for position, ring in enumerate(polygon):
+            ring = [(round(float(x), 7), round(float(y), 7)) for x, y in ring]
+            if ring[0] != ring[-1]:
+                ring.append(ring[0])
+            # Orientación uniforme: exteriores antihorarios, huecos horarios
+            if (_signed_area(ring) > 0) != (position == 0):
+                ring.reverse()
+            rings.append(ring)
+        result.append(rings)
+    return result
+
+
+class BoundaryTopology:
+    """Anillos de todas las geometrías descompuestos en arcos compartidos entre vecinos"""
+
+    def __init__(self, features: List[dict]):
+        self.properties = [feature.get('properties', {}) for feature in features]
+        # Anillo: (índice de feature, índice de polígono, es exterior, [(arco, sentido directo)])
+        self.rings: List[Tuple[int, int, bool, List[Tuple[int, bool]]]] = []
+        self.arcs: List[List[Point]] = []
+        self._arc_index: Dict[Tuple[Point, ...], int] = {}
+
+        all_rings = []
+        for feature_idx, feature in enumerate(features):
+            for polygon_idx, polygon in enumerate(_polygons(feature['geometry'])):
+                for ring_idx, ring in enumerate(polygon):
+                    all_rings.append((feature_idx, polygon_idx, ring_idx == 0, ring))
+
+        # Propietarios de cada segmento (sin sentido) para localizar los nodos
+        owners: Dict[Tuple[Point, Point], set] = {}
+        for ring_id, (_, _, _, ring) in enumerate(all_rings):
+            for a, b in zip(ring[:-1], ring[1:]):
+                owners.setdefault((a, b) if a < b else (b, a), set()).add(ring_id)
+
+        def edge_owners(a: Point, b: Point) -> frozenset:
+            return frozenset(owners[(a, b) if a < b else (b, a)])
+
+        for ring_id, (feature_idx, polygon_idx, exterior, ring) in enumerate(all_rings):
+            vertices = ring[:-1]
+            n = len(vertices)
+            # Nodo: vértice donde cambia el conjunto de anillos que comparten el borde
+            nodes = [i for i in range(n)
+                     if edge_owners(vertices[i - 1], vertices[i]) != edge_owners(vertices[i], vertices[(i + 1) % n])]
+            if nodes:
+                rotated = vertices[nodes[0]:] + vertices[:nodes[0]]
+                cuts = [node - nodes[0] for node in nodes] + [n]
+                pieces = [rotated[start:end + 1] if end < n else rotated[start:] + [rotated[0]]
+                          for start, end in zip(cuts[:-1], cuts[1:])]
+            else:
+                pieces = [self._canonical_closed(vertices)]
+            self.rings.append((feature_idx, polygon_idx, exterior, [self._add_arc(piece) for piece in pieces]))
+
+    @staticmethod
+    def _canonical_closed(vertices: List[Point]) -> List[Point]:
+        """Anillo sin nodos con inicio y sentido canónicos (idéntico para los dos anillos que lo comparten)"""
+        start = vertices.index(min(vertices))
+        rotated = vertices[start:] + vertices[:start]
+        return rotated + [rotated[0]]
+
+    def _add_arc(self, points: List[Point]) -> Tuple[int, bool]:
+        forward, backward = tuple(points), tuple(reversed(points))
+        if backward in self._arc_index:
+            return self._arc_index[backward], False
+        if forward not in self._arc_index:
+            self._arc_index[forward] = len(self.arcs)
+            self.arcs.append(points)
+        return self._arc_index[forward], True
+
+    def simplified_arcs(self, tolerance: float) -> List[np.ndarray]:
+        """Cada arco simplificado una sola vez (los vecinos reciben exactamente el mismo borde)"""
+        simplified = []
+        for arc in self.arcs:
+            points = np.asarray(arc, dtype=np.float64)
+            if arc[0] == arc[-1] and len(arc) > 3:
+                # Arco cerrado: se divide por el punto más alejado del inicio
+                split = int(np.hypot(*(points - points[0]).T).argmax())
+                keep = np.concatenate([douglas_peucker(points[:split + 1], tolerance)[:-1],
+                                       douglas_peucker(points[split:], tolerance)])
+            else:
+                keep = douglas_peucker(points, tolerance)
+            simplified.append(points[keep])
+        return simplified
+
+    def _ring_coordinates(self, arcs: List[Tuple[int, bool]], simplified: List[np.ndarray],
+                          precision: int) -> np.ndarray:
+        parts = [simplified[arc] if forward else simplified[arc][::-1] for arc, forward in arcs]
+        return _clean_ring(np.concatenate([parts[0]] + [part[1:] for part in parts[1:]]), precision)
+
+    def features(self, tolerance: float, precision: int) -> List[dict]:
+        """Geometrías simplificadas con sus propiedades originales"""
+        simplified = self.simplified_arcs(tolerance)
+        polygons: Dict[int, Dict[int, list]] = {}
+        for feature_idx, polygon_idx, exterior, arcs in self.rings:
+            rings = polygons.setdefault(feature_idx, {}).setdefault(polygon_idx, [])
+            ring = self._ring_coordinates(arcs, simplified, precision)
+            # Anillos por debajo de la resolución del zoom (menos de 3 vértices distintos) se descartan
+            if len(ring) >= 4:
+                rings.append((exterior, ring.tolist()))
+
+        return [
+            _feature(self.properties[idx], [[ring for _, ring in rings]
+                                            for rings in polygons.get(idx, {}).values() if rings and rings[0][0]])
+            for idx in range(len(self.properties))
+        ]
+
+    def dissolve(self, key: str, tolerance: float, precision: int) -> List[dict]:
+        """Unión de geometrías por una propiedad: se eliminan los arcos interiores del grupo"""
+        simplified = self.simplified_arcs(tolerance)
+        groups: Dict[str, Dict[int, List[bool]]] = {}
+        for feature_idx, _, _, arcs in self.rings:
+            usage = groups.setdefault(str(self.properties[feature_idx].get(key)), {})
+            for arc, forward in arcs:
+                usage.setdefault(arc, []).append(forward)
+
+        features = []
+        for value, usage in groups.items():
+            # Arcos usados una sola vez dentro del grupo, en el sentido de su anillo
+            edges = [simplified[arc] if directions[0] else simplified[arc][::-1]
+                     for arc, directions in usage.items() if len(directions) == 1]
+            rings = [_clean_ring(ring, precision) for ring in _chain_rings(edges)]
+            rings = [ring for ring in rings if len(ring) >= 4]
+            outers = [ring.tolist() for ring in rings if _signed_area(ring) > 0]
+            polygons = [[outer] for outer in outers]
+            for hole in (ring.tolist() for ring in rings if _signed_area(ring) <= 0):
+                container = next((polygon for polygon in polygons if _point_in_ring(hole[0], polygon[0])), None)
+                if container is not None:
+                    container.append(hole)
+            features.append(_feature({key: value}, polygons))
+        return features
+
+
+def _clean_ring(ring: np.ndarray, precision: int) -> np.ndarray:
+    """Redondear y quitar vértices consecutivos repetidos tras el redondeo"""
+    ring = np.round(ring, precision)
+    return ring[np.r_[True, (np.diff(ring, axis=0) != 0).any(axis=1)]]
+
+
+def _chain_rings(edges: List[np.ndarray]) -> List[np.ndarray]:
+    """Encadenar arcos orientados (fin de uno = inicio del siguiente) en anillos cerrados"""
+    by_start: Dict[Point, List[int]] = {}
+    for idx, edge in enumerate(edges):
+        by_start.setdefault(tuple(edge[0]), []).append(idx)
+
+    used = [False] * len(edges)
+    rings = []
+    for first in range(len(edges)):
+        if used[first]:
+            continue
+        used[first] = True
+        parts = [edges[first]]
+        start = tuple(edges[first][0])
+        end = tuple(edges[first][-1])
+        while end != start:
+            candidates = [idx for idx in by_start.get(end, []) if not used[idx]]
+            if not candidates:
+                break
+            used[candidates[0]] = True
+            parts.append(edges[candidates[0]][1:])
+            end = tuple(edges[candidates[0]][-1])
+        if end == start:
+            rings.append(np.concatenate(parts))
+    return rings
+
+
+def _feature(properties: dict, polygons: List[list]) -> dict:
+    if len(polygons) == 1:
+        geometry = {'type': 'Polygon', 'coordinates': polygons[0]}
+    else:
+        geometry = {'type': 'MultiPolygon', 'coordinates': polygons}
+    return {'type': 'Feature', 'properties': properties, 'geometry': geometry}
+
+
+def boundary_asset_path(layer: str, zoom: int, directory: str = BOUNDARIES_DIR) -> str:
+    """Ruta del fichero estático de una capa y nivel de zoom"""
+    return os.path.join(directory, f"{layer}_z{zoom}.geojson")
+
+
+def build_boundary_assets(source: str, output_dir: str = BOUNDARIES_DIR,
+                          district_key: str = 'distrito_sanitario',
+                          zoom_levels: Sequence[int] = ZOOM_LEVELS) -> Dict[str, int]:
+    """Generar las capas simplificadas de municipios y distritos; devuelve bytes escritos por fichero"""
+    with open(source, encoding='utf-8') as f:
+        topology = BoundaryTopology(json.load(f)['features'])
+
+    os.makedirs(output_dir, exist_ok=True)
+    written = {}
+    for zoom in zoom_levels:
+        tolerance, precision = zoom_tolerance(zoom), zoom_precision(zoom)
+        layers = {
+            'municipios': topology.features(tolerance, precision),
+            'distritos': topology.dissolve(district_key, tolerance, precision),
+        }
+        for layer, features in layers.items():
+            path = boundary_asset_path(layer, zoom, output_dir)
+            content = json.dumps({'type': 'FeatureCollection', 'features': features},
+                                 ensure_ascii=False, separators=(',', ':'))
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            written[path] = len(content.encode('utf-8'))
+    return written
+
+
+_boundary_cache: Dict[Tuple[str, int, str], dict] = {}
+_boundary_lock = threading.Lock()
+
+
+def load_boundaries(layer: str, zoom: int, directory: str = BOUNDARIES_DIR) -> Optional[dict]:
+    """Capa publicada más detallada que no supera el zoom pedido (None si no se ha generado)"""
+    available = [level for level in ZOOM_LEVELS if os.path.exists(boundary_asset_path(layer, level, directory))]
+    if not available:
+        return None
+    level = max((level for level in available if level <= zoom), default=min(available))
+
+    key = (layer, level, directory)
+    if key not in _boundary_cache:
+        with _boundary_lock:
+            if key not in _boundary_cache:
+                with open(boundary_asset_path(layer, level, directory), encoding='utf-8') as f:
+                    _boundary_cache[key] = json.load(f)
+    return _boundary_cache[key]
@@ -0,0 +1,44 @@
+"""
+Distancias Geográficas - Copilot Salud Andalucía
+Distancia de Haversine vectorizada: pares elemento a elemento y matrices origen × destino
+completas (municipios × hospitales, hospitales × hospitales) con procesamiento por bloques
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Distancia en km entre pares de puntos (admite escalares o arrays con broadcasting)"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def haversine_matrix(origin_lat, origin_lon, dest_lat=None, dest_lon=None,
+                     dtype=np.float32, chunk_size: Optional[int] = None) -> np.ndarray:
+    """Matriz de distancias (n_origenes, n_destinos) en km; sin destinos, orígenes entre sí"""
+    origin_lat = np.radians(np.asarray(origin_lat, dtype=np.float64).ravel())
+    origin_lon = np.radians(np.asarray(origin_lon, dtype=np.float64).ravel())
+    if dest_lat is None:
+        dest_lat, dest_lon = origin_lat, origin_lon
+    else:
+        dest_lat = np.radians(np.asarray(dest_lat, dtype=np.float64).ravel())
+        dest_lon = np.radians(np.asarray(dest_lon, dtype=np.float64).ravel())
+
+    cos_dest = np.cos(dest_lat)[None, :]
+    result = np.empty((len(origin_lat), len(dest_lat)), dtype=dtype)
+    # Por bloques de orígenes para acotar la memoria intermedia en rejillas grandes
+    step = chunk_size or max(len(origin_lat), 1)
+
+    for start in range(0, len(origin_lat), step):
+        lat = origin_lat[start:start + step, None]
+        lon = origin_lon[start:start + step, None]
+        a = np.sin((dest_lat[None, :] - lat) / 2) ** 2 + \
+            np.cos(lat) * cos_dest * np.sin((dest_lon[None, :] - lon) / 2) ** 2
+        result[start:start + step] = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    return result
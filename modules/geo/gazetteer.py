@@ -0,0 +1,138 @@
+"""
+Nomenclátor Geográfico - Copilot Salud Andalucía
+Coordenadas de municipios y centros sanitarios con índice de nombres normalizados
+(sin acentos, por tokens), cargado una sola vez y compartido por mapas, rutas y la IA
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules.analytics.hospital_registry import GENERIC_TOKENS, get_hospital_registry, name_tokens, normalize_name
+from modules.performance.derived_data_store import get_derived_data_store
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'raw')
+MUNICIPALITIES_FILE = os.path.join(DATA_DIR, 'municipios_coordenadas_malaga_2025.csv')
+HOSPITALS_FILE = os.path.join(DATA_DIR, 'hospitales_malaga_2025.csv')
+
+
+class Gazetteer:
+    """Búsquedas O(1) de coordenadas por nombre normalizado de municipio o centro"""
+
+    def __init__(self, municipios: pd.DataFrame, hospitales: Optional[pd.DataFrame] = None,
+                 data: Optional[Dict[str, pd.DataFrame]] = None):
+        self._municipios_frame = municipios
+        self.municipios = municipios['municipio'].astype(str).to_numpy()
+        self.municipality_coords = municipios[['latitud', 'longitud']].to_numpy(dtype=np.float64)
+        self._municipality_index: Dict[str, int] = {normalize_name(m): i for i, m in enumerate(self.municipios)}
+
+        # Índice de frases por primer token: detección de municipios en texto libre
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], int]]] = {}
+        for position, municipio in enumerate(self.municipios):
+            tokens = tuple(normalize_name(municipio).split())
+            self._phrases.setdefault(tokens[0], []).append((tokens, position))
+        for candidates in self._phrases.values():
+            candidates.sort(key=lambda item: -len(item[0]))
+
+        self.registry = None
+        self.hospital_coords = np.zeros((0, 2))
+        if hospitales is not None and {'latitud', 'longitud'} <= set(hospitales.columns):
+            self.registry = get_hospital_registry(data if data is not None else {'hospitales': hospitales})
+            self.hospital_coords = hospitales[['latitud', 'longitud']].to_numpy(dtype=np.float64)
+
+    def municipality_frame(self) -> pd.DataFrame:
+        """Tabla de municipios del nomenclátor"""
+        return self._municipios_frame
+
+    def municipality_coords_for(self, municipio: str) -> Optional[Tuple[float, float]]:
+        """Coordenadas de un municipio (None si no está en el nomenclátor)"""
+        position = self._municipality_index.get(normalize_name(municipio))
+        return tuple(map(float, self.municipality_coords[position])) if position is not None else None
+
+    def hospital_coords_for(self, hospital: str) -> Optional[Tuple[float, float]]:
+        """Coordenadas de un centro a partir de su código SAS o nombre (resolución por tokens)"""
+        if self.registry is None:
+            return None
+        position = self.registry.resolve_position(hospital)
+        return tuple(map(float, self.hospital_coords[position])) if position >= 0 else None
+
+    def lookup_municipalities(self, names) -> np.ndarray:
+        """Coordenadas (n, 2) de una serie de municipios (NaN si no se conocen)"""
+        coords = np.full((len(names), 2), np.nan)
+        for i, name in enumerate(names):
+            position = self._municipality_index.get(normalize_name(name))
+            if position is not None:
+                coords[i] = self.municipality_coords[position]
+        return coords
+
+    def _match_municipalities(self, tokens: List[str]) -> List[Tuple[int, int, int]]:
+        """Frases de municipio en una secuencia de tokens: (inicio, longitud, posición)"""
+        matches = []
+        i = 0
+        while i < len(tokens):
+            match = next(((phrase, position) for phrase, position in self._phrases.get(tokens[i], [])
+                          if tuple(tokens[i:i + len(phrase)]) == phrase), None)
+            if match:
+                matches.append((i, len(match[0]), match[1]))
+                i += len(match[0])
+            else:
+                i += 1
+        return matches
+
+    def find_municipalities(self, text: str) -> List[str]:
+        """Municipios mencionados en un texto (frase completa más larga en cada posición)"""
+        found = []
+        for _, _, position in self._match_municipalities(normalize_name(text).split()):
+            if self.municipios[position] not in found:
+                found.append(self.municipios[position])
+        return found
+
+    def find_hospitals(self, text: str) -> List[str]:
+        """Centros mencionados por un token distintivo que solo identifica a ese centro"""
+        if self.registry is None:
+            return []
+        # Los tokens dentro de nombres compuestos de municipio no identifican centros
+        tokens = normalize_name(text).split()
+        for start, length, _ in self._match_municipalities(tokens):
+            if length > 1:
+                tokens[start:start + length] = [''] * length
+
+        found = []
+        for token in name_tokens(' '.join(tokens)):
+            positions = self.registry.postings(token) if token not in GENERIC_TOKENS else set()
+            if len(positions) == 1:
+                name = self.registry.names[next(iter(positions))]
+                if name not in found:
+                    found.append(name)
+        return found
+
+
+_default_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+
+
+def _load_default_gazetteer() -> Gazetteer:
+    hospitales = pd.read_csv(HOSPITALS_FILE) if os.path.exists(HOSPITALS_FILE) else None
+    return Gazetteer(pd.read_csv(MUNICIPALITIES_FILE), hospitales)
+
+
+def get_gazetteer(data: Optional[Dict[str, pd.DataFrame]] = None) -> Gazetteer:
+    """Nomenclátor de los datos cargados (o de los ficheros de referencia si no se indican)"""
+    global _default_gazetteer
+    if data is not None and 'hospitales' in data:
+        return get_derived_data_store().get_or_compute(
+            'gazetteer',
+            data,
+            lambda: Gazetteer(get_gazetteer().municipality_frame(), data['hospitales'], data),
+            depends_on=('hospitales',)
+        )
+
+    if _default_gazetteer is None:
+        with _gazetteer_lock:
+            if _default_gazetteer is None:
+                _default_gazetteer = _load_default_gazetteer()
+    return _default_gazetteer
@@ -0,0 +1,169 @@
+"""
+Grafo de Rutas Sanitarias - Copilot Salud Andalucía
+Grafo ponderado municipio-hospital (coche, transporte público, coste) con caminos mínimos
+entre todos los pares precalculados por versión de datos
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from modules.analytics.hospital_registry import get_hospital_registry
+from modules.performance.derived_data_store import get_derived_data_store
+
+
+# Métricas de coste de las aristas: nombre -> columna en accesibilidad
+ROUTE_METRICS = {
+    'tiempo_coche': 'tiempo_coche_minutos',
+    'tiempo_transporte_publico': 'tiempo_transporte_publico_minutos',
+    'coste': 'coste_transporte_euros',
+}
+
+# Umbral de acceso aceptable al hospital más cercano (minutos en coche)
+DEFAULT_ACCESS_THRESHOLD = 60
+
+
+def _floyd_warshall(weights: np.ndarray) -> tuple:
+    """Caminos mínimos entre todos los pares (Floyd–Warshall vectorizado) con matriz de siguiente salto"""
+    n = len(weights)
+    dist = weights.copy()
+    next_hop = np.where(np.isfinite(weights), np.arange(n)[None, :], -1)
+    np.fill_diagonal(next_hop, np.arange(n))
+    for k in range(n):
+        through_k = dist[:, k, None] + dist[None, k, :]
+        better = through_k < dist
+        dist = np.where(better, through_k, dist)
+        next_hop = np.where(better, next_hop[:, k, None], next_hop)
+    return dist, next_hop
+
+
+class RoutingTable:
+    """Tablas de caminos mínimos entre municipios y hospitales (consultas por búsqueda directa)"""
+
+    def __init__(self, data: Dict[str, pd.DataFrame]):
+        accesibilidad = data['accesibilidad']
+        hospitales = data['hospitales']
+        registry = get_hospital_registry(data)
+        self.registry = registry
+
+        positions = registry.resolve_positions(accesibilidad['hospital_destino'])
+        routes = accesibilidad.loc[positions >= 0]
+        hospital_positions = positions[positions >= 0]
+
+        # Nodos: municipios de origen seguidos de los hospitales canónicos
+        self.municipios: List[str] = list(pd.unique(routes['municipio_origen'].astype(str)))
+        self.hospital_ids: List[str] = list(registry.ids)
+        self.hospital_names: List[str] = hospitales['nombre'].astype(str).tolist()
+        self.hospital_coords = hospitales[['latitud', 'longitud']].to_numpy(dtype=np.float64) \
+            if {'latitud', 'longitud'} <= set(hospitales.columns) else np.full((len(hospitales), 2), np.nan)
+        self.nodes = self.municipios + self.hospital_ids
+        self._index = {node: i for i, node in enumerate(self.nodes)}
+        n_municipios = len(self.municipios)
+
+        origin = pd.Index(self.municipios).get_indexer(routes['municipio_origen'].astype(str))
+        destination = n_municipios + hospital_positions
+
+        # Aristas no dirigidas; si hay varias rutas para un par se toma la mínima
+        self.weights: Dict[str, np.ndarray] = {}
+        self.distances: Dict[str, np.ndarray] = {}
+        self._next_hop: Dict[str, np.ndarray] = {}
+        for metric, column in ROUTE_METRICS.items():
+            weights = np.full((len(self.nodes), len(self.nodes)), np.inf)
+            np.fill_diagonal(weights, 0.0)
+            if column in routes.columns:
+                values = routes[column].to_numpy(dtype=np.float64)
+                np.minimum.at(weights, (origin, destination), values)
+                np.minimum.at(weights, (destination, origin), values)
+            self.weights[metric] = weights
+            self.distances[metric], self._next_hop[metric] = _floyd_warshall(weights)
+
+        self.nearest = self._build_nearest_table()
+
+    def _build_nearest_table(self) -> pd.DataFrame:
+        """Hospital más cercano por municipio (en tiempo en coche) con el resto de métricas del camino"""
+        n_municipios = len(self.municipios)
+        car = self.distances['tiempo_coche'][:n_municipios, n_municipios:]
+        best = car.argmin(axis=1) if car.size else np.zeros(0, dtype=np.int64)
+        rows = np.arange(n_municipios)
+        reachable = np.isfinite(car[rows, best]) if car.size else np.zeros(0, dtype=bool)
+
+        nearest = pd.DataFrame({
+            'municipio': self.municipios,
+            'hospital_id': np.where(reachable, np.asarray(self.hospital_ids, dtype=object)[best], None),
+            'hospital': np.where(reachable, np.asarray(self.hospital_names, dtype=object)[best], None),
+        })
+        for metric in ROUTE_METRICS:
+            nearest[metric] = np.where(reachable, self._path_totals(metric, rows, n_municipios + best), np.nan)
+        return nearest
+
+    def _path_totals(self, metric: str, sources: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """Valor de una métrica a lo largo del camino más rápido en coche"""
+        if metric == 'tiempo_coche':
+            return self.distances[metric][sources, targets]
+        return np.array([self._accumulate(metric, self.path_indices(s, t)) for s, t in zip(sources, targets)])
+
+    def _accumulate(self, metric: str, path: List[int]) -> float:
+        if not path:
+            return np.nan
+        weights = self.weights[metric]
+        return float(sum(weights[a, b] for a, b in zip(path[:-1], path[1:])))
+
+    def path_indices(self, source: int, target: int, metric: str = 'tiempo_coche') -> List[int]:
+        """Reconstruir la secuencia de nodos del camino mínimo"""
+        next_hop = self._next_hop[metric]
+        if next_hop[source, target] < 0:
+            return []
+        path = [source]
+        while path[-1] != target:
+            path.append(int(next_hop[path[-1], target]))
+        return path
+
+    def _node(self, name: str) -> Optional[int]:
+        if name in self._index:
+            return self._index[name]
+        position = self.registry.resolve_position(name)
+        return len(self.municipios) + position if position >= 0 else None
+
+    def route(self, origin: str, destination: str, metric: str = 'tiempo_coche') -> Optional[Dict]:
+        """Camino mínimo entre dos nodos (municipio, código SAS o nombre de hospital)"""
+        source, target = self._node(origin), self._node(destination)
+        if source is None or target is None:
+            return None
+        path = self.path_indices(source, target, metric)
+        if not path:
+            return None
+        route = {'ruta': [self.label(i) for i in path]}
+        for name in ROUTE_METRICS:
+            route[name] = self._accumulate(name, path)
+        return route
+
+    def label(self, index: int) -> str:
+        """Nombre legible de un nodo"""
+        n_municipios = len(self.municipios)
+        return self.municipios[index] if index < n_municipios else self.hospital_names[index - n_municipios]
+
+    def nearest_hospital(self, municipio: str) -> Optional[Dict]:
+        """Hospital más cercano a un municipio (búsqueda en la tabla precalculada)"""
+        match = self.nearest[self.nearest['municipio'] == municipio]
+        return match.iloc[0].to_dict() if not match.empty else None
+
+    def access_gaps(self, municipios: Optional[List[str]] = None,
+                    threshold: float = DEFAULT_ACCESS_THRESHOLD,
+                    metric: str = 'tiempo_coche') -> pd.DataFrame:
+        """Municipios sin hospital alcanzable dentro del umbral (incluye los que no tienen ruta registrada)"""
+        nearest = self.nearest
+        if municipios is not None:
+            nearest = pd.DataFrame({'municipio': [str(m) for m in municipios]}).merge(nearest, on='municipio', how='left')
+        gaps = nearest[~(nearest[metric] <= threshold)]
+        return gaps.sort_values(metric, ascending=False, na_position='first').reset_index(drop=True)
+
+
+def get_routing_table(data: Dict[str, pd.DataFrame]) -> RoutingTable:
+    """Tabla de rutas precalculada para la versión actual de accesibilidad y hospitales"""
+    return get_derived_data_store().get_or_compute(
+        'routing_table',
+        data,
+        lambda: RoutingTable(data),
+        depends_on=('accesibilidad', 'hospitales')
+    )
@@ -0,0 +1,88 @@
+"""
+Índice Espacial - Copilot Salud Andalucía
+Búsquedas de k vecinos más cercanos y por radio sobre coordenadas geográficas (centros sanitarios
+y centroides municipales) por fuerza bruta vectorizada con NumPy: matriz haversine consulta × punto
+por bloques, construida una vez por versión de datos
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules.geo.distance import haversine_matrix
+from modules.geo.gazetteer import get_gazetteer
+from modules.performance.derived_data_store import get_derived_data_store
+
+
+class SpatialIndex:
+    """Índice de puntos geográficos con consultas de vecinos más cercanos y por radio"""
+
+    def __init__(self, ids, latitudes, longitudes):
+        ids = np.asarray(ids, dtype=object)
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        valid = np.isfinite(latitudes) & np.isfinite(longitudes)
+
+        self.ids = ids[valid]
+        self.latitudes = latitudes[valid]
+        self.longitudes = longitudes[valid]
+        self.positions = np.flatnonzero(valid)  # posición en el DataFrame de origen
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def query(self, latitudes, longitudes, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """k vecinos más cercanos de cada consulta: (distancias en km, índices), forma (n_consultas, k)"""
+        n_queries = len(np.atleast_1d(latitudes))
+        k = min(k, len(self))
+        if k == 0:
+            empty = np.zeros((n_queries, 0))
+            return empty, empty.astype(np.int64)
+
+        distances = self._distance_matrix(latitudes, longitudes)
+        indices = np.argpartition(distances, k - 1, axis=1)[:, :k] if k < len(self) \
+            else np.tile(np.arange(len(self)), (n_queries, 1))
+        nearest = np.take_along_axis(distances, indices, axis=1)
+        order = np.argsort(nearest, axis=1, kind='stable')
+        return np.take_along_axis(nearest, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+    def query_radius(self, latitudes, longitudes, radius_km: float) -> List[np.ndarray]:
+        """Índices de los puntos a menos de `radius_km` de cada consulta, ordenados por distancia"""
+        distances = self._distance_matrix(latitudes, longitudes)
+        results = []
+        for row in distances:
+            indices = np.flatnonzero(row <= radius_km)
+            results.append(indices[np.argsort(row[indices], kind='stable')])
+        return results
+
+    def _distance_matrix(self, latitudes, longitudes) -> np.ndarray:
+        """Distancias exactas consulta × punto (km)"""
+        return haversine_matrix(np.atleast_1d(latitudes), np.atleast_1d(longitudes),
+                                self.latitudes, self.longitudes, dtype=np.float64, chunk_size=4096)
+
+    def nearest(self, lat: float, lon: float) -> Optional[Tuple[str, float]]:
+        """Identificador y distancia (km) del punto más cercano"""
+        if len(self) == 0:
+            return None
+        distances, indices = self.query(lat, lon, k=1)
+        return self.ids[indices[0, 0]], float(distances[0, 0])
+
+
+def get_hospital_index(data: Dict[str, pd.DataFrame]) -> SpatialIndex:
+    """Índice espacial de centros sanitarios (identificados por código SAS)"""
+    def build() -> SpatialIndex:
+        hospitales = data['hospitales']
+        return SpatialIndex(hospitales['codigo_sas'], hospitales['latitud'], hospitales['longitud'])
+
+    return get_derived_data_store().get_or_compute('hospital_spatial_index', data, build, depends_on=('hospitales',))
+
+
+def get_municipality_index(data: Dict[str, pd.DataFrame]) -> SpatialIndex:
+    """Índice espacial de centroides de los municipios de demografía con coordenadas conocidas"""
+    def build() -> SpatialIndex:
+        municipios = data['demografia']['municipio'].astype(str)
+        coords = get_gazetteer(data).lookup_municipalities(municipios)
+        return SpatialIndex(municipios.to_numpy(), coords[:, 0], coords[:, 1])
+
+    return get_derived_data_store().get_or_compute('municipality_spatial_index', data, build, depends_on=('demografia',))
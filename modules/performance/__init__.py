@@ -3,4 +3,8 @@ Módulos de Rendimiento
 - Optimización de datos
 - Cache inteligente
 - Configuración de rendimiento
+- Almacén de datos derivados por versión
+- Trazas de rendimiento por etapa
+- Planificador de precálculo en segundo plano
+- Servicio de cómputo en procesos (memoria compartida Arrow)
 """
@@ -0,0 +1,232 @@
+"""
+Servicio de Cómputo - Copilot Salud Andalucía
+Ejecuta en procesos aparte los análisis CPU-intensivos (equidad, planificación, escenarios) para
+no bloquear el hilo del script ni competir por el GIL; los DataFrames viajan en memoria compartida
+con formato Arrow en lugar de serializarse con pickle
+"""
+
+import atexit
+import importlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from modules.performance.derived_data_store import compute_dataset_version
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+
+# Procesos de cómputo (COPILOT_COMPUTE_WORKERS=0 ejecuta los trabajos en el propio proceso)
+COMPUTE_WORKERS = int(os.environ.get('COPILOT_COMPUTE_WORKERS', '2'))
+
+# Espera máxima de un trabajo (segundos) antes de calcularlo en el propio proceso
+COMPUTE_TIMEOUT = 120
+
+# Bloques de memoria compartida publicados (uno por dataset y versión)
+MAX_SHARED_FRAMES = 16
+
+# Trabajos disponibles: nombre -> ('modulo:funcion', datasets que necesita)
+# La función se importa en el proceso trabajador y se llama como func(data, **params)
+COMPUTE_JOBS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    'equity_index': ('modules.ai.ai_processor:HealthMetricsCalculator._build_equity_index',
+                     ('hospitales', 'indicadores')),
+    'location_planning': ('modules.analytics.planning_engine:_build_location_planning',
+                          ('demografia', 'accesibilidad')),
+    'demand_projection': ('modules.analytics.demand_projection:_build_projection',
+                          ('demografia', 'indicadores')),
+}
+
+
+def _resolve_job(path: str) -> Callable:
+    """Importar 'modulo:Clase.funcion'"""
+    module_name, attr_path = path.split(':')
+    target = importlib.import_module(module_name)
+    for attr in attr_path.split('.'):
+        target = getattr(target, attr)
+    return target
+
+
+def frame_to_arrow(df: pd.DataFrame) -> 'pa.Buffer':
+    """Serializar un DataFrame como stream IPC de Arrow"""
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def frame_from_arrow(buffer) -> pd.DataFrame:
+    """Reconstruir un DataFrame desde un stream IPC de Arrow"""
+    return pa.ipc.open_stream(buffer).read_pandas()
+
+
+# --- Proceso trabajador ---
+
+# Datasets ya decodificados en este trabajador: nombre del bloque -> DataFrame
+_worker_frames: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+
+
+def _attach_frame(block: str, size: int) -> pd.DataFrame:
+    """DataFrame de un bloque compartido (se decodifica una vez por trabajador y versión)"""
+    cached = _worker_frames.get(block)
+    if cached is not None:
+        _worker_frames.move_to_end(block)
+        return cached
+
+    shm = shared_memory.SharedMemory(name=block)
+    try:
+        # Una copia de bytes y se cierra el bloque: ninguna vista queda apuntando a él
+        view = shm.buf[:size]
+        payload = pa.py_buffer(bytes(view))
+        view.release()
+    finally:
+        shm.close()
+
+    df = frame_from_arrow(payload)
+    _worker_frames[block] = df
+    while len(_worker_frames) > MAX_SHARED_FRAMES:
+        _worker_frames.popitem(last=False)
+    return df
+
+
+def _run_job(job: str, handles: Dict[str, Any], params: Dict[str, Any]) -> Any:
+    """Punto de entrada en el trabajador: reconstruir los datasets y ejecutar el trabajo"""
+    data = {}
+    for name, handle in handles.items():
+        if isinstance(handle, pd.DataFrame):
+            data[name] = handle
+        else:
+            data[name] = _attach_frame(*handle)
+    return _resolve_job(COMPUTE_JOBS[job][0])(data, **params)
+
+
+# --- Proceso principal ---
+
+class ComputeService:
+    """Pool de procesos para trabajos de análisis por nombre y parámetros"""
+
+    def __init__(self, max_workers: int = COMPUTE_WORKERS):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._shared: "OrderedDict[str, Tuple[shared_memory.SharedMemory, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'jobs': 0, 'inline': 0, 'fallbacks': 0, 'shared_frames': 0, 'shared_bytes': 0}
+
+    @property
+    def enabled(self) -> bool:
+        """Trabajos en procesos aparte (False: se ejecutan en el propio proceso)"""
+        return self.max_workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: el proceso de Streamlit tiene varios hilos y fork no es seguro
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def _share_frame(self, name: str, df: pd.DataFrame) -> Any:
+        """Publicar un dataset en memoria compartida (una vez por versión)"""
+        if not ARROW_AVAILABLE:
+            return df
+
+        key = f'{name}:{compute_dataset_version({name: df}, (name,))}'
+        cached = self._shared.get(key)
+        if cached is not None:
+            self._shared.move_to_end(key)
+            return cached[0].name, cached[1]
+
+        payload = frame_to_arrow(df)
+        shm = shared_memory.SharedMemory(create=True, size=max(payload.size, 1))
+        shm.buf[:payload.size] = memoryview(payload).cast('B')
+        self._shared[key] = (shm, payload.size)
+        self.stats['shared_frames'] += 1
+        self.stats['shared_bytes'] += payload.size
+
+        while len(self._shared) > MAX_SHARED_FRAMES:
+            old_shm, _ = self._shared.popitem(last=False)[1]
+            self._release(old_shm)
+        return shm.name, payload.size
+
+    @staticmethod
+    def _release(shm: shared_memory.SharedMemory):
+        try:
+            shm.close()
+            shm.unlink()
+        except (FileNotFoundError, BufferError):
+            pass
+
+    def submit(self, job: str, data: Dict[str, pd.DataFrame], **params) -> Future:
+        """Encolar un trabajo; el Future devuelve el resultado de la función registrada"""
+        if job not in COMPUTE_JOBS:
+            raise ValueError(f"Trabajo de cómputo desconocido: {job}")
+
+        path, datasets = COMPUTE_JOBS[job]
+        with self._lock:
+            self.stats['jobs'] += 1
+            if not self.enabled:
+                self.stats['inline'] += 1
+
+        if not self.enabled:
+            future: Future = Future()
+            future.set_result(_resolve_job(path)(data, **params))
+            return future
+
+        with self._lock:
+            handles = {name: self._share_frame(name, data[name])
+                       for name in datasets if isinstance(data.get(name), pd.DataFrame)}
+            return self._get_executor().submit(_run_job, job, handles, params)
+
+    def run(self, job: str, data: Dict[str, pd.DataFrame], timeout: Optional[float] = COMPUTE_TIMEOUT,
+            **params) -> Any:
+        """Ejecutar un trabajo y esperar su resultado (en el propio proceso si el pool no responde)"""
+        try:
+            return self.submit(job, data, **params).result(timeout=timeout)
+        except (BrokenProcessPool, OSError, TimeoutError) as e:
+            print(f"⚠️ Servicio de cómputo no disponible para '{job}', calculando en proceso: {str(e)}")
+            with self._lock:
+                self.stats['fallbacks'] += 1
+                if isinstance(e, BrokenProcessPool):
+                    self._executor = None
+            return _resolve_job(COMPUTE_JOBS[job][0])(data, **params)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas del servicio"""
+        with self._lock:
+            return {'workers': self.max_workers, 'arrow': ARROW_AVAILABLE,
+                    'active_shared_frames': len(self._shared), **self.stats}
+
+    def shutdown(self):
+        """Detener los procesos y liberar la memoria compartida"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            while self._shared:
+                shm, _ = self._shared.popitem()[1]
+                self._release(shm)
+
+
+_compute_service: Optional[ComputeService] = None
+_service_lock = threading.Lock()
+
+
+def get_compute_service() -> ComputeService:
+    """Obtener instancia compartida del servicio de cómputo"""
+    global _compute_service
+    if _compute_service is None:
+        with _service_lock:
+            if _compute_service is None:
+                _compute_service = ComputeService()
+                atexit.register(_compute_service.shutdown)
+    return _compute_service
@@ -0,0 +1,171 @@
+"""
+Almacén de Datos Derivados - Copilot Salud Andalucía
+Tablas derivadas (índices, matrices, agregados) calculadas una sola vez por versión de datos
+y compartidas entre todas las sesiones del proceso
+"""
+
+import hashlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+
+# Memo de huellas por DataFrame: id -> (weakref, shape, huella)
+# Los datasets se tratan como inmutables una vez cargados
+_frame_fingerprints: Dict[int, Tuple[Any, Tuple[int, int], str]] = {}
+_fingerprint_lock = threading.Lock()
+
+
+def _frame_fingerprint(df: pd.DataFrame) -> str:
+    """Calcular huella estable de un DataFrame (contenido, columnas y tipos)"""
+    key = id(df)
+    with _fingerprint_lock:
+        cached = _frame_fingerprints.get(key)
+        if cached is not None:
+            ref, shape, fingerprint = cached
+            if ref() is df and shape == df.shape:
+                return fingerprint
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(df.columns)).encode())
+    digest.update(repr([str(dtype) for dtype in df.dtypes]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    fingerprint = digest.hexdigest()
+
+    with _fingerprint_lock:
+        try:
+            ref = weakref.ref(df, lambda _, k=key: _frame_fingerprints.pop(k, None))
+            _frame_fingerprints[key] = (ref, df.shape, fingerprint)
+        except TypeError:
+            pass
+    return fingerprint
+
+
+def compute_dataset_version(data: Dict[str, pd.DataFrame], datasets: Optional[Iterable[str]] = None) -> str:
+    """Obtener versión de los datasets (solo los indicados en `datasets` si se especifican)"""
+    keys = sorted(datasets) if datasets is not None else sorted(data.keys())
+
+    digest = hashlib.blake2b(digest_size=8)
+    for key in keys:
+        df = data.get(key)
+        digest.update(key.encode())
+        if isinstance(df, pd.DataFrame):
+            digest.update(_frame_fingerprint(df).encode())
+        else:
+            digest.update(b'<missing>')
+    return digest.hexdigest()
+
+
+class DerivedDataStore:
+    """Cache de tablas derivadas por (nombre, versión de datos, parámetros)"""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'build_time_total': 0.0}
+
+    @staticmethod
+    def _params_key(params: Optional[dict]) -> str:
+        return repr(sorted(params.items())) if params else ''
+
+    def get(self, name: str, version: str, params: Optional[dict] = None) -> Any:
+        """Obtener tabla derivada si existe (None si no está calculada)"""
+        key = (name, version, self._params_key(params))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry['value']
+
+    def put(self, name: str, version: str, value: Any, params: Optional[dict] = None,
+            build_time: float = 0.0) -> None:
+        """Publicar una tabla derivada para una versión de datos"""
+        key = (name, version, self._params_key(params))
+        with self._lock:
+            self._entries[key] = {
+                'value': value,
+                'created_at': time.time(),
+                'build_time': build_time
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def get_or_compute(self, name: str, data: Dict[str, pd.DataFrame], builder: Callable[[], Any],
+                       depends_on: Optional[Iterable[str]] = None, params: Optional[dict] = None) -> Any:
+        """Devolver la tabla derivada de la versión actual, calculándola una sola vez"""
+        version = compute_dataset_version(data, depends_on)
+        key = (name, version, self._params_key(params))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry['value']
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Un único cálculo por clave aunque varias sesiones lo pidan a la vez
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self.stats['hits'] += 1
+                    return entry['value']
+                self.stats['misses'] += 1
+
+            try:
+                start_time = time.perf_counter()
+                value = builder()
+                build_time = time.perf_counter() - start_time
+                self.put(name, version, value, params=params, build_time=build_time)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+            with self._lock:
+                self.stats['build_time_total'] += build_time
+            return value
+
+    def invalidate(self, name: Optional[str] = None, version: Optional[str] = None) -> int:
+        """Eliminar entradas por nombre y/o versión (todas si no se indica nada)"""
+        with self._lock:
+            keys = [k for k in self._entries
+                    if (name is None or k[0] == name) and (version is None or k[1] == version)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtener estadísticas del almacén"""
+        with self._lock:
+            entries_by_name: Dict[str, int] = {}
+            for name, _, _ in self._entries:
+                entries_by_name[name] = entries_by_name.get(name, 0) + 1
+            return {
+                'total_entries': len(self._entries),
+                'entries_by_name': entries_by_name,
+                **self.stats
+            }
+
+
+_derived_data_store: Optional[DerivedDataStore] = None
+_store_lock = threading.Lock()
+
+
+def get_derived_data_store() -> DerivedDataStore:
+    """Obtener instancia compartida del almacén de datos derivados"""
+    global _derived_data_store
+    if _derived_data_store is None:
+        with _store_lock:
+            if _derived_data_store is None:
+                _derived_data_store = DerivedDataStore()
+    return _derived_data_store
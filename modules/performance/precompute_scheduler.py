@@ -0,0 +1,165 @@
+"""
+Planificador de Precálculo - Copilot Salud Andalucía
+Recalcula en segundo plano las tablas derivadas costosas (equidad, brechas, planificación,
+proyecciones...) cuando cambia la versión de los datos y las publica en el almacén compartido
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from modules.performance.derived_data_store import compute_dataset_version
+
+
+# Hilos dedicados al precálculo (los cálculos son NumPy/pandas, que liberan el GIL en gran parte)
+PRECOMPUTE_WORKERS = 2
+
+
+class PrecomputeScheduler:
+    """Trabajos de precálculo con estado, última ejecución y duración"""
+
+    def __init__(self, max_workers: int = PRECOMPUTE_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='precompute')
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, func: Callable[[Dict[str, pd.DataFrame]], Any],
+                 depends_on: Optional[Iterable[str]] = None):
+        """Registrar un trabajo; `func(data)` debe publicar su resultado en el almacén (p. ej. vía get_or_compute)"""
+        with self._lock:
+            self._jobs[name] = {'func': func, 'depends_on': tuple(depends_on) if depends_on is not None else None}
+            self._status.setdefault(name, {
+                'job': name, 'status': 'pending', 'version': None, 'last_run': None,
+                'duration': None, 'runs': 0, 'error': None,
+            })
+
+    def submit(self, data: Dict[str, pd.DataFrame]) -> List[str]:
+        """Encolar los trabajos cuya versión de datos ha cambiado; devuelve los nombres encolados"""
+        if not data:
+            return []
+
+        queued = []
+        with self._lock:
+            for name, job in self._jobs.items():
+                if job['depends_on'] is not None and not all(dataset in data for dataset in job['depends_on']):
+                    continue
+                version = compute_dataset_version(data, job['depends_on'])
+                status = self._status[name]
+                running = self._futures.get(name)
+                if status['version'] == version and (status['status'] == 'ok' or (running and not running.done())):
+                    continue
+                if running is not None and not running.done():
+                    # Ya hay una ejecución en curso: la nueva versión se recoge en el siguiente submit
+                    continue
+
+                status.update(status='queued', version=version, error=None)
+                self._futures[name] = self._executor.submit(self._run, name, job['func'], data)
+                queued.append(name)
+        return queued
+
+    def _run(self, name: str, func: Callable, data: Dict[str, pd.DataFrame]):
+        with self._lock:
+            self._status[name]['status'] = 'running'
+
+        start_time = time.perf_counter()
+        try:
+            func(data)
+            outcome = {'status': 'ok', 'error': None}
+        except Exception as e:
+            outcome = {'status': 'error', 'error': str(e)}
+            print(f"⚠️ Error en precálculo '{name}': {str(e)}")
+
+        with self._lock:
+            status = self._status[name]
+            status.update(outcome, last_run=time.time(), duration=time.perf_counter() - start_time,
+                          runs=status['runs'] + 1)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Esperar a que terminen los trabajos encolados (True si todos han terminado)"""
+        with self._lock:
+            futures = list(self._futures.values())
+        _, not_done = wait(futures, timeout=timeout)
+        return not not_done
+
+    def get_status(self) -> List[Dict[str, Any]]:
+        """Estado de cada trabajo: status, versión, última ejecución, duración (s), ejecuciones y error"""
+        with self._lock:
+            return [dict(status) for status in self._status.values()]
+
+    def shutdown(self, wait_for_jobs: bool = False):
+        """Detener el pool de trabajos"""
+        self._executor.shutdown(wait=wait_for_jobs)
+
+
+def register_default_jobs(scheduler: PrecomputeScheduler):
+    """Trabajos de la aplicación; cada uno llama al getter cacheado que usan las páginas"""
+
+    def hospital_service_table(data):
+        from modules.analytics.hospital_registry import get_hospital_service_table
+        get_hospital_service_table(data)
+
+    def health_kpis(data):
+        from modules.analytics.kpi_engine import get_health_kpis
+        get_health_kpis(data)
+
+    def equity_index(data):
+        from modules.ai.ai_processor import HealthMetricsCalculator
+        HealthMetricsCalculator.calculate_equity_index(data)
+
+    def accessibility_gaps(data):
+        from modules.ai.ai_processor import HealthMetricsCalculator
+        HealthMetricsCalculator.analyze_accessibility_gaps(data)
+
+    def service_gaps(data):
+        from modules.analytics.hospital_registry import CRITICAL_SERVICES, compute_service_coverage
+        compute_service_coverage(data, CRITICAL_SERVICES)
+
+    def location_planning(data):
+        from modules.analytics.planning_engine import compute_location_planning
+        compute_location_planning(data)
+
+    def demand_projection(data):
+        from modules.analytics.demand_projection import DEFAULT_SCENARIOS, project_scenarios
+        # Vistas por defecto del planificador y del panel de administración
+        project_scenarios(data, {'tendencial': DEFAULT_SCENARIOS['tendencial']})
+        project_scenarios(data, {'desaceleracion': DEFAULT_SCENARIOS['desaceleracion']})
+
+    def redistribution_plan(data):
+        from modules.analytics.redistribution_solver import solve_redistribution
+        solve_redistribution(data)
+
+    def accessibility_grid(data):
+        from modules.geo.accessibility_grid import get_accessibility_geojson
+        get_accessibility_geojson(data)
+
+    scheduler.register('hospital_service_table', hospital_service_table, depends_on=('hospitales', 'servicios'))
+    scheduler.register('health_kpis', health_kpis, depends_on=('hospitales', 'demografia', 'servicios',
+                                                               'accesibilidad', 'indicadores'))
+    scheduler.register('equity_index', equity_index, depends_on=('hospitales', 'indicadores'))
+    scheduler.register('accessibility_gaps', accessibility_gaps, depends_on=('accesibilidad',))
+    scheduler.register('service_gaps', service_gaps, depends_on=('hospitales', 'servicios'))
+    scheduler.register('location_planning', location_planning, depends_on=('demografia', 'accesibilidad'))
+    scheduler.register('demand_projection', demand_projection, depends_on=('demografia', 'indicadores'))
+    scheduler.register('redistribution_plan', redistribution_plan, depends_on=('hospitales', 'indicadores', 'accesibilidad'))
+    scheduler.register('accessibility_grid', accessibility_grid, depends_on=('accesibilidad', 'hospitales'))
+
+
+_scheduler: Optional[PrecomputeScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_precompute_scheduler() -> PrecomputeScheduler:
+    """Obtener instancia compartida del planificador (con los trabajos de la aplicación registrados)"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                scheduler = PrecomputeScheduler()
+                register_default_jobs(scheduler)
+                _scheduler = scheduler
+    return _scheduler
@@ -0,0 +1,151 @@
+"""
+Trazas de Rendimiento - Copilot Salud Andalucía
+Spans con la duración de cada etapa (creación, tema y saneado de gráficos); sin coste cuando
+están desactivados, activables por petición o de forma global y visibles en el panel de admin
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, List, Optional
+
+
+# Spans recientes que se conservan para el panel de rendimiento
+TRACE_BUFFER_SIZE = 2000
+
+# COPILOT_TRACE=1 activa las trazas en todo el proceso
+TRACE_ENV_VAR = 'COPILOT_TRACE'
+
+# Activación por petición (cada ejecución del script de Streamlit corre en su propio hilo)
+_request_tracing: contextvars.ContextVar = contextvars.ContextVar('copilot_request_tracing', default=False)
+
+
+class _NoopSpan:
+    """Span vacío compartido: es lo único que se crea con las trazas desactivadas"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    """Span activo: mide con perf_counter y se registra al salir del bloque"""
+    __slots__ = ('tracer', 'name', 'attrs', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ms = (time.perf_counter() - self.start) * 1000
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer._record(self.name, duration_ms, self.attrs)
+        return False
+
+    def set(self, **attrs):
+        """Añadir atributos al span (p. ej. resultados conocidos al final de la etapa)"""
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """Registro en memoria de spans con estadísticas por etapa"""
+
+    def __init__(self, max_spans: int = TRACE_BUFFER_SIZE, enabled: Optional[bool] = None):
+        self.enabled = os.environ.get(TRACE_ENV_VAR, '') == '1' if enabled is None else enabled
+        self._spans: Deque[Dict[str, Any]] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        """Trazas activas para la petición actual"""
+        return self.enabled or _request_tracing.get()
+
+    def span(self, name: str, **attrs):
+        """Context manager que mide la etapa `name` (span vacío si las trazas están desactivadas)"""
+        if not (self.enabled or _request_tracing.get()):
+            return _NOOP_SPAN
+        return _Span(self, name, attrs)
+
+    def _record(self, name: str, duration_ms: float, attrs: Dict[str, Any]):
+        entry = {'span': name, 'duration_ms': duration_ms, 'timestamp': time.time()}
+        entry.update(attrs)
+        with self._lock:
+            self._spans.append(entry)
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Spans registrados, del más antiguo al más reciente"""
+        with self._lock:
+            spans = list(self._spans)
+        return spans[-limit:] if limit else spans
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Estadísticas por etapa (llamadas, media, p95, máximo y total en ms), de mayor a menor total"""
+        durations: Dict[str, List[float]] = {}
+        for entry in self.recent():
+            durations.setdefault(entry['span'], []).append(entry['duration_ms'])
+
+        rows = []
+        for name, values in durations.items():
+            values.sort()
+            rows.append({
+                'span': name,
+                'count': len(values),
+                'mean_ms': sum(values) / len(values),
+                'p95_ms': values[min(len(values) - 1, int(0.95 * len(values)))],
+                'max_ms': values[-1],
+                'total_ms': sum(values),
+            })
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def clear(self):
+        """Vaciar los spans registrados"""
+        with self._lock:
+            self._spans.clear()
+
+
+def set_request_tracing(enabled: bool):
+    """Activar o desactivar las trazas para el resto de la petición actual"""
+    _request_tracing.set(bool(enabled))
+
+
+@contextmanager
+def request_tracing(enabled: bool = True):
+    """Activar las trazas solo dentro del bloque"""
+    token = _request_tracing.set(bool(enabled))
+    try:
+        yield
+    finally:
+        _request_tracing.reset(token)
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Obtener instancia compartida del registro de trazas"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer()
+    return _tracer
@@ -0,0 +1,6 @@
+"""
+Módulos de Informes
+- Motor de informes PDF con estilos compartidos y cache por contenido
+- Constructores de los informes estándar
+- Cola de informes en segundo plano con pregeneración nocturna
+"""
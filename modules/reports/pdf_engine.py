@@ -0,0 +1,483 @@
+"""
+Motor de Informes PDF - Copilot Salud Andalucía
+Estilos y fuentes de ReportLab inicializados una vez por proceso, markdown convertido en
+flowables con un único tokenizador compilado, salida en fichero temporal y cache por contenido
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, List, Optional
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table as RLTable, TableStyle
+    REPORTLAB_AVAILABLE = True
+    REPORTLAB_IMPORT_ERROR = None
+except Exception as e:
+    REPORTLAB_AVAILABLE = False
+    REPORTLAB_IMPORT_ERROR = str(e)
+
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'assets')
+
+# PDFs generados que se conservan (misma entrada -> mismos bytes sin volver a maquetar)
+PDF_CACHE_SIZE = 32
+
+# Por debajo de este tamaño el PDF se escribe en memoria; por encima pasa a disco
+SPOOL_MAX_MEMORY = 4 * 1024 * 1024
+
+# Márgenes de página (mm)
+LEFT_MARGIN_MM = 18
+RIGHT_MARGIN_MM = 18
+TOP_MARGIN_MM = 22
+BOTTOM_MARGIN_MM = 18
+
+# Tokenizador de líneas: un único patrón con un grupo por tipo de bloque (orden = prioridad)
+_LINE_TOKENS = re.compile(r"""
+      (?P<blank>$)
+    | (?P<table>\|.*)
+    | \#[ ](?P<h1>.*)
+    | \#\#[ ](?P<h2>.*)
+    | \#\#\#[ ](?P<h3>.*)
+    | (?P<strong>(?=.*\*\*$)\*\*.*)
+    | [-*][ ](?P<bullet>.*)
+    | (?P<numbered>\d+\.\s+.*)
+    | (?P<text>.+)
+""", re.VERBOSE)
+
+# Markdown en línea
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_ITALIC = re.compile(r"\*(.+?)\*")
+
+# Párrafos destacados por palabras clave: (patrón, icono, estilo)
+_CALLOUTS = (
+    (re.compile('importante|clave|crítico|esencial|alerta|atención'), '⚠️', 'important'),
+    (re.compile('recomendación|sugerencia|mejora|optimización|propuesta'), '💡', 'recommendation'),
+    (re.compile('conclusión|resultado|hallazgo|resumen|balance'), '📋', 'conclusion'),
+)
+
+_TABLE_SEPARATOR_CHARS = set('-: ')
+
+
+def _inline_markdown(text: str) -> str:
+    """Negritas y cursivas de markdown a marcas de ReportLab"""
+    return _ITALIC.sub(r"<i>\1</i>", _BOLD.sub(r"<b>\1</b>", text))
+
+
+def tokenize_markdown(text: str) -> List[tuple]:
+    """Bloques (tipo, contenido) del texto; las filas de tabla consecutivas forman un bloque 'table'"""
+    tokens: List[tuple] = []
+    table: List[str] = []
+    paragraph: List[tuple] = []
+
+    def flush_paragraph():
+        # Sin líneas en blanco al principio ni al final de cada tramo de texto
+        while paragraph and paragraph[0][0] == 'blank':
+            paragraph.pop(0)
+        while paragraph and paragraph[-1][0] == 'blank':
+            paragraph.pop()
+        if paragraph:
+            tokens.extend(paragraph)
+            tokens.append(('end_text', None))
+            paragraph.clear()
+
+    for line in text.split('\n'):
+        match = _LINE_TOKENS.match(line.strip())
+        kind = match.lastgroup
+        if kind == 'table':
+            flush_paragraph()
+            table.append(line)
+            continue
+        if table:
+            tokens.append(('table', list(table)))
+            table.clear()
+        paragraph.append((kind, match.group(kind)))
+
+    if table:
+        tokens.append(('table', list(table)))
+    flush_paragraph()
+    return tokens
+
+
+def _parse_table(lines: List[str]) -> List[List[str]]:
+    rows = [[cell.strip() for cell in line.strip().strip('|').split('|')] for line in lines]
+    # Fila separadora ---|--- de markdown
+    if len(rows) > 1 and all(set(cell) <= _TABLE_SEPARATOR_CHARS for cell in rows[1]):
+        rows.pop(1)
+    return rows
+
+
+class PDFReportEngine:
+    """Generador de informes PDF con recursos de ReportLab compartidos por todo el proceso"""
+
+    def __init__(self, cache_size: int = PDF_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._resources: Optional[Dict[str, Any]] = None
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'renders': 0, 'cache_hits': 0, 'bytes_rendered': 0}
+
+    # --- Recursos compartidos ---
+
+    @staticmethod
+    def _register_font() -> str:
+        """Primera fuente TTF válida de assets/fonts (Helvetica si no hay ninguna)"""
+        fonts_dir = os.path.join(ASSETS_DIR, 'fonts')
+        if not os.path.isdir(fonts_dir):
+            return 'Helvetica'
+        for fname in sorted(os.listdir(fonts_dir)):
+            if fname.lower().endswith('.ttf'):
+                try:
+                    pdfmetrics.registerFont(TTFont('CustomFont', os.path.join(fonts_dir, fname)))
+                    return 'CustomFont'
+                except Exception:
+                    continue
+        return 'Helvetica'
+
+    @staticmethod
+    def _build_styles(font_name: str) -> Dict[str, Any]:
+        base = getSampleStyleSheet()
+        styles = {}
+        styles['main_title'] = ParagraphStyle(
+            'MainTitle', parent=base['Heading1'], fontName=font_name,
+            fontSize=24, leading=28, spaceAfter=16, spaceBefore=8,
+            textColor=colors.white, backColor=colors.HexColor('#3b82f6'),
+            borderWidth=1, borderColor=colors.HexColor('#1e40af'), borderRadius=6,
+            leftIndent=16, rightIndent=16, alignment=1
+        )
+        styles['title'] = ParagraphStyle(
+            'ProfessionalTitle', parent=base['Heading1'], fontName=font_name,
+            fontSize=20, leading=24, spaceAfter=12, spaceBefore=10,
+            textColor=colors.HexColor('#1e40af'), backColor=colors.HexColor('#dbeafe'),
+            borderWidth=1, borderColor=colors.HexColor('#3b82f6'), borderRadius=4,
+            leftIndent=12, rightIndent=12, alignment=0
+        )
+        styles['subtitle'] = ParagraphStyle(
+            'ProfessionalSubtitle', parent=base['Heading2'], fontName=font_name,
+            fontSize=16, leading=20, spaceBefore=12, spaceAfter=8,
+            textColor=colors.HexColor('#1e293b'), backColor=colors.HexColor('#f8fafc'),
+            borderWidth=0, borderColor=colors.HexColor('#e2e8f0'), borderRadius=3,
+            leftIndent=10, rightIndent=10, alignment=0
+        )
+        styles['heading'] = ParagraphStyle(
+            'ProfessionalHeading', parent=base['Heading3'], fontName=font_name,
+            fontSize=14, leading=17, spaceBefore=10, spaceAfter=6,
+            textColor=colors.HexColor('#334155'), backColor=colors.HexColor('#f1f5f9'),
+            leftIndent=8, rightIndent=8
+        )
+        styles['body'] = body = ParagraphStyle(
+            'ProfessionalBody', parent=base['BodyText'], fontName=font_name,
+            fontSize=11, leading=15, spaceBefore=4, spaceAfter=6,
+            textColor=colors.HexColor('#374151'), alignment=4, leftIndent=0, rightIndent=0
+        )
+
+        # Cajas destacadas: (nombre, fondo, borde, texto)
+        for key, name, back, border, text in (
+            ('important', 'ImportantBox', '#fef3c7', '#f59e0b', '#92400e'),
+            ('recommendation', 'RecommendationBox', '#dcfce7', '#16a34a', '#166534'),
+            ('conclusion', 'ConclusionBox', '#eff6ff', '#3b82f6', '#1e40af'),
+        ):
+            styles[key] = ParagraphStyle(
+                name, parent=body, backColor=colors.HexColor(back), borderColor=colors.HexColor(border),
+                borderWidth=1, borderRadius=4, leftIndent=14, rightIndent=14,
+                spaceBefore=8, spaceAfter=8, textColor=colors.HexColor(text)
+            )
+        styles['highlight'] = ParagraphStyle(
+            'HighlightBox', parent=body, backColor=colors.HexColor('#dbeafe'),
+            borderColor=colors.HexColor('#3b82f6'), borderWidth=1, borderRadius=4,
+            leftIndent=12, rightIndent=12, spaceBefore=6, spaceAfter=6,
+            textColor=colors.HexColor('#1e40af'), fontName=font_name
+        )
+        styles['list'] = ParagraphStyle(
+            'ListItem', parent=body, leftIndent=20, rightIndent=0, spaceBefore=2, spaceAfter=2,
+            bulletIndent=12, bulletFontName=font_name, bulletColor=colors.HexColor('#3b82f6')
+        )
+        styles['small'] = small = ParagraphStyle(
+            'SmallText', parent=base['BodyText'], fontName=font_name,
+            fontSize=9, leading=11, textColor=colors.HexColor('#64748b'), spaceBefore=2, spaceAfter=2
+        )
+        styles['footer_separator'] = ParagraphStyle('FooterSeparator', parent=small,
+                                                    textColor=colors.HexColor('#9ca3af'))
+        return styles
+
+    @staticmethod
+    def _build_table_style(font_name: str) -> 'TableStyle':
+        return TableStyle([
+            # Cabecera corporativa
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), font_name),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            # Filas alternadas
+            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8fafc')),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f1f5f9')]),
+            # Contenido
+            ('FONTNAME', (0, 1), (-1, -1), font_name),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#374151')),
+            # Bordes y alineación
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
+            ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor('#1e40af')),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db')),
+        ])
+
+    def _get_resources(self) -> Dict[str, Any]:
+        """Fuente, estilos, estilo de tabla y logo (se inicializan una vez por proceso)"""
+        if self._resources is None:
+            with self._lock:
+                if self._resources is None:
+                    font_name = self._register_font()
+                    logo_path = os.path.join(ASSETS_DIR, 'logo.png')
+                    self._resources = {
+                        'font': font_name,
+                        'styles': self._build_styles(font_name),
+                        'table_style': self._build_table_style(font_name),
+                        'logo': ImageReader(logo_path) if os.path.exists(logo_path) else None,
+                    }
+        return self._resources
+
+    # --- Maquetación ---
+
+    def build_story(self, title: str, text: str, generated_at: datetime) -> list:
+        """Flowables del informe a partir del markdown"""
+        resources = self._get_resources()
+        styles = resources['styles']
+        story = [Paragraph(title, styles['title']), Spacer(1, 6)]
+
+        for kind, content in tokenize_markdown(text):
+            if kind == 'blank':
+                story.append(Spacer(1, 3))
+            elif kind == 'end_text':
+                story.append(Spacer(1, 4))
+            elif kind == 'h1':
+                story += [Paragraph(content.strip(), styles['main_title']), Spacer(1, 6)]
+            elif kind == 'h2':
+                story += [Paragraph(content.strip(), styles['title']), Spacer(1, 4)]
+            elif kind == 'h3':
+                story += [Paragraph(content.strip(), styles['subtitle']), Spacer(1, 3)]
+            elif kind == 'strong':
+                story.append(Paragraph(_BOLD.sub(r"<b>\1</b>", content), styles['highlight']))
+            elif kind == 'bullet':
+                story.append(Paragraph(f"• {_inline_markdown(content.strip())}", styles['list']))
+            elif kind == 'numbered':
+                story.append(Paragraph(_inline_markdown(content), styles['list']))
+            elif kind == 'table':
+                story += self._table_flowables(content, resources)
+            else:
+                story.append(self._text_flowable(content, styles))
+
+        story += self._closing_flowables(styles, generated_at)
+        return story
+
+    @staticmethod
+    def _text_flowable(line: str, styles: Dict[str, Any]) -> 'Paragraph':
+        lowered = line.lower()
+        for pattern, icon, style in _CALLOUTS:
+            if pattern.search(lowered):
+                return Paragraph(_BOLD.sub(r"<b>\1</b>", f"{icon} {line}"), styles[style])
+        return Paragraph(_inline_markdown(line).replace('  ', ' '), styles['body'])
+
+    @staticmethod
+    def _table_flowables(lines: List[str], resources: Dict[str, Any]) -> list:
+        styles = resources['styles']
+        try:
+            table = RLTable(_parse_table(lines), hAlign='CENTER')
+            table.setStyle(resources['table_style'])
+            return [Paragraph("📊 Tabla de Datos", styles['subtitle']), Spacer(1, 4), table, Spacer(1, 10)]
+        except Exception:
+            # Tabla irregular: se inserta como texto
+            return [Paragraph('\n'.join(lines), styles['body']), Spacer(1, 6)]
+
+    @staticmethod
+    def _closing_flowables(styles: Dict[str, Any], generated_at: datetime) -> list:
+        footer_info = f"""
+    <para align="center">
+    <b>📋 Documento generado por Copilot Salud Andalucía</b><br/>
+    Sistema de Análisis Inteligente para la Gestión Sanitaria<br/>
+    <i>Provincia de Málaga - {generated_at.strftime('%d de %B de %Y')}</i><br/>
+    </para>
+    """
+        technical_info = """
+    <para align="center">
+    <font color="#64748b" size="8">
+    Generado con ReportLab • Formato PDF Profesional<br/>
+    © 2025 Sistema Sanitario Andaluz - Uso Interno
+    </font>
+    </para>
+    """
+        return [
+            Spacer(1, 20),
+            Paragraph('<para align="center">═══════════════════════════════════════════════════</para>',
+                      styles['footer_separator']),
+            Spacer(1, 8),
+            Paragraph(footer_info, styles['small']),
+            Spacer(1, 6),
+            Paragraph(technical_info, styles['small']),
+        ]
+
+    def _page_decorator(self, title: str, simple_header: bool, generated_at: datetime):
+        """Cabecera (logo o banner) y pie con número de página"""
+        resources = self._get_resources()
+        font_name = resources['font']
+        left, right = LEFT_MARGIN_MM * mm, RIGHT_MARGIN_MM * mm
+        top, bottom = TOP_MARGIN_MM * mm, BOTTOM_MARGIN_MM * mm
+
+        def draw_banner(canvas, width, height):
+            if simple_header:
+                canvas.setFont(font_name, 12)
+                canvas.setFillColor(colors.HexColor('#FF0000'))
+                canvas.drawString(left, height - top + 12, "VERSIÓN SIMPLE")
+                canvas.setFont(font_name, 14)
+                canvas.drawString(left, height - top + 30, title)
+                canvas.setStrokeColor(colors.red)
+                canvas.setLineWidth(2)
+                canvas.line(left, height - top + 4, width - right, height - top + 4)
+                return
+
+            header_h = 75
+            canvas.setFillColor(colors.HexColor('#1e40af'))
+            canvas.rect(0, height - top - header_h + 4, width, header_h, fill=1, stroke=0)
+            canvas.setFillColor(colors.HexColor('#0ea5e9'))
+            canvas.rect(0, height - top - header_h + 4, 8, header_h, fill=1, stroke=0)
+
+            # Cruz médica
+            canvas.setFillColor(colors.white)
+            cross_x, cross_y = left + 15, height - top - 15
+            canvas.rect(cross_x - 1, cross_y - 8, 2, 16, fill=1, stroke=0)
+            canvas.rect(cross_x - 6, cross_y - 1, 12, 2, fill=1, stroke=0)
+
+            canvas.setFont(font_name, 18)
+            canvas.setFillColor(colors.white)
+            canvas.drawString(left + 35, height - top - 8, title)
+            canvas.setFont(font_name, 11)
+            canvas.setFillColor(colors.HexColor('#bfdbfe'))
+            canvas.drawString(left + 35, height - top - 25, "Sistema de Análisis Sanitario - Copilot Salud Andalucía")
+            canvas.setFont(font_name, 9)
+            canvas.setFillColor(colors.HexColor('#93c5fd'))
+            canvas.drawString(left + 35, height - top - 40,
+                              f"Generado: {generated_at.strftime('%d de %B de %Y - %H:%M')}")
+            canvas.setStrokeColor(colors.HexColor('#0ea5e9'))
+            canvas.setLineWidth(2)
+            canvas.line(left, height - top - header_h + 2, width - right, height - top - header_h + 2)
+
+        def decorate(canvas, doc):
+            canvas.saveState()
+            width, height = A4
+            try:
+                if resources['logo'] is not None:
+                    canvas.drawImage(resources['logo'], left, height - top + 6, width=36, height=36,
+                                     preserveAspectRatio=True, mask='auto')
+            except Exception:
+                # El banner solo se dibuja cuando el logo no puede dibujarse
+                try:
+                    draw_banner(canvas, width, height)
+                except Exception:
+                    canvas.setFont(font_name, 12)
+                    canvas.setFillColor(colors.black)
+                    canvas.drawString(left, height - top + 18, title)
+
+            # Línea separadora y paginado
+            canvas.setStrokeColor(colors.grey)
+            canvas.setLineWidth(0.5)
+            canvas.line(left, height - top + 4, width - right, height - top + 4)
+            canvas.setFont(font_name, 8)
+            canvas.setFillColor(colors.grey)
+            canvas.drawRightString(width - right, bottom - 6, f"Página {canvas.getPageNumber()}")
+            canvas.restoreState()
+
+        return decorate
+
+    def write_pdf(self, output: BinaryIO, title: str, text: str, use_simple_header: bool = False,
+                  generated_at: Optional[datetime] = None):
+        """Maquetar el informe directamente sobre un fichero binario abierto"""
+        if not REPORTLAB_AVAILABLE:
+            raise RuntimeError(f"reportlab no disponible: {REPORTLAB_IMPORT_ERROR}")
+
+        generated_at = generated_at or datetime.now()
+        doc = SimpleDocTemplate(output, pagesize=A4,
+                                rightMargin=RIGHT_MARGIN_MM * mm, leftMargin=LEFT_MARGIN_MM * mm,
+                                topMargin=TOP_MARGIN_MM * mm, bottomMargin=BOTTOM_MARGIN_MM * mm)
+        decorate = self._page_decorator(title, use_simple_header, generated_at)
+        doc.build(self.build_story(title, text, generated_at), onFirstPage=decorate, onLaterPages=decorate)
+
+    # --- Cache por contenido ---
+
+    @staticmethod
+    def content_key(title: str, text: str, use_simple_header: bool, generated_at: datetime) -> str:
+        """Hash de la entrada; incluye el día porque el pie del informe muestra la fecha"""
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (title, text, str(bool(use_simple_header)), generated_at.strftime('%Y-%m-%d')):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    def render(self, title: str, text: str, use_simple_header: bool = False) -> bytes:
+        """Bytes del PDF (desde la cache si ya se generó hoy el mismo contenido)"""
+        generated_at = datetime.now()
+        key = self.content_key(title, text, use_simple_header, generated_at)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.stats['cache_hits'] += 1
+                return cached
+
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+            self.write_pdf(spool, title, text, use_simple_header, generated_at)
+            spool.seek(0)
+            pdf_bytes = spool.read()
+
+        with self._lock:
+            self._cache[key] = pdf_bytes
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self.stats['renders'] += 1
+            self.stats['bytes_rendered'] += len(pdf_bytes)
+        return pdf_bytes
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas del motor"""
+        with self._lock:
+            return {'cached_documents': len(self._cache), **self.stats}
+
+    def clear_cache(self):
+        """Vaciar los PDFs cacheados"""
+        with self._lock:
+            self._cache.clear()
+
+
+_pdf_engine: Optional[PDFReportEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_pdf_engine() -> PDFReportEngine:
+    """Obtener instancia compartida del motor de informes PDF"""
+    global _pdf_engine
+    if _pdf_engine is None:
+        with _engine_lock:
+            if _pdf_engine is None:
+                _pdf_engine = PDFReportEngine()
+    return _pdf_engine
+
+
+def create_pdf_bytes(title: str, text: str, use_simple_header: bool = False) -> bytes:
+    """Genera un PDF profesional del análisis (cabecera corporativa, secciones, tablas y pie)"""
+    return get_pdf_engine().render(title, text, use_simple_header)
@@ -0,0 +1,181 @@
+"""
+Constructores de Informes - Copilot Salud Andalucía
+Contenido markdown de los informes estándar (ejecutivo, infraestructura, demografía y equidad)
+a partir de los KPIs y tablas derivadas compartidas
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+from modules.analytics.kpi_engine import get_health_kpis
+
+
+# Umbral de alerta del índice de equidad (0-100)
+EQUITY_ALERT_THRESHOLD = 50
+
+
+def markdown_table(df: pd.DataFrame, float_format: str = '{:,.1f}') -> str:
+    """Tabla markdown sencilla (el motor PDF la convierte en tabla corporativa)"""
+    def cell(value):
+        if isinstance(value, float):
+            return float_format.format(value)
+        if isinstance(value, int):
+            return f'{value:,}'
+        return str(value)
+
+    lines = ['| ' + ' | '.join(str(column) for column in df.columns) + ' |',
+             '|' + '---|' * len(df.columns)]
+    for row in df.itertuples(index=False):
+        lines.append('| ' + ' | '.join(cell(value) for value in row) + ' |')
+    return '\n'.join(lines)
+
+
+def _signature(role_name: str, author: Optional[str]) -> str:
+    who = author or f"Informe estándar del perfil {role_name}"
+    return f"**{who}**"
+
+
+def build_executive_report(data: Dict[str, pd.DataFrame], role_name: str, author: Optional[str] = None) -> str:
+    """Reporte ejecutivo: indicadores principales, territorio, ubicaciones prioritarias y recomendaciones"""
+    kpis = get_health_kpis(data)
+    try:
+        from modules.analytics.planning_engine import compute_location_planning, format_planning_summary
+        planning_summary = "\n".join(
+            f"- {line}" for line in format_planning_summary(compute_location_planning(data), top_n=5).splitlines()
+        )
+    except Exception as e:
+        planning_summary = f"- No disponible: {str(e)}"
+
+    return f"""# 🏥 REPORTE EJECUTIVO - SISTEMA SANITARIO MÁLAGA
+**Fecha de análisis:** {datetime.now().strftime("%d de %B de %Y")}
+{_signature(role_name, author)}
+
+---
+
+## 📊 INDICADORES PRINCIPALES
+- **Población total atendida:** {kpis.total_population:,} habitantes
+- **Red asistencial:** {kpis.total_centers} centros sanitarios
+- **Capacidad hospitalaria:** {kpis.total_beds:,} camas
+- **Personal sanitario:** {kpis.total_staff:,} profesionales
+- **Ratio camas/1000 hab:** {kpis.bed_ratio_1000:.1f}
+
+## 🗺️ DISTRIBUCIÓN TERRITORIAL
+- **Distritos sanitarios:** {kpis.districts}
+- **Municipios cubiertos:** {kpis.municipalities}
+- **Tiempo medio acceso:** {kpis.avg_access_time or 0:.1f} minutos
+
+## 📍 UBICACIONES PRIORITARIAS (Score de Necesidad)
+{planning_summary}
+
+## 🎯 RECOMENDACIONES ESTRATÉGICAS
+1. **Prioridad Alta:** Evaluar equidad en distritos con menor ratio de recursos
+2. **Accesibilidad:** Mejorar conexiones en municipios con >60 min de acceso
+3. **Capacidad:** Monitorear ocupación en hospitales regionales
+4. **Personal:** Reforzar plantillas en áreas de alta demanda
+
+---
+**Clasificación:** Uso Interno | **Acceso:** {role_name} | **Timestamp:** {datetime.now().isoformat()}
+"""
+
+
+def infrastructure_by_type(data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Camas, personal y población de referencia por tipo de centro"""
+    return data['hospitales'].groupby('tipo_centro', observed=False).agg({
+        'camas_funcionamiento_2025': ['sum', 'mean'],
+        'personal_sanitario_2025': 'sum',
+        'poblacion_referencia_2025': 'sum'
+    }).round(1)
+
+
+def build_infrastructure_report(data: Dict[str, pd.DataFrame], role_name: str, author: Optional[str] = None) -> str:
+    """Reporte de infraestructura: capacidad frente a la referencia OMS y desglose por tipo de centro"""
+    kpis = get_health_kpis(data)
+    status = "✅ Adecuado" if kpis.bed_ratio_1000 >= 3 else "⚠️ Por debajo OMS"
+
+    by_type = infrastructure_by_type(data)
+    by_type.columns = ['Camas', 'Camas por centro', 'Personal', 'Población referencia']
+    by_type = by_type.reset_index().rename(columns={'tipo_centro': 'Tipo de centro'})
+
+    return f"""# 🏥 REPORTE DE INFRAESTRUCTURA
+**Fecha de análisis:** {datetime.now().strftime("%d de %B de %Y")}
+{_signature(role_name, author)}
+
+## 📊 CAPACIDAD
+- **Total camas:** {kpis.total_beds:,}
+- **Ratio camas/1000 hab:** {kpis.bed_ratio_1000:.1f}
+- **Estado frente a la referencia OMS:** {status}
+
+## 🏥 ANÁLISIS POR TIPO DE CENTRO
+{markdown_table(by_type)}
+"""
+
+
+def build_demographic_report(data: Dict[str, pd.DataFrame], role_name: str, author: Optional[str] = None) -> str:
+    """Reporte demográfico: crecimiento 2024-2025 y municipios que más crecen"""
+    kpis = get_health_kpis(data)
+    top_growth = data['demografia'].nlargest(5, 'crecimiento_2024_2025')
+    top_lines = "\n".join(
+        f"- **{row.municipio}**: +{row.crecimiento_2024_2025:,} hab "
+        f"({row.crecimiento_2024_2025 / row.poblacion_2024 * 100:.1f}%)"
+        for row in top_growth.itertuples(index=False)
+    )
+
+    return f"""# 👥 REPORTE DEMOGRÁFICO
+**Fecha de análisis:** {datetime.now().strftime("%d de %B de %Y")}
+{_signature(role_name, author)}
+
+## 📈 CRECIMIENTO 2024-2025
+- **Crecimiento total:** +{kpis.population_growth:,} habitantes
+- **Tasa de crecimiento:** {kpis.growth_rate_pct:.2f}%
+- **Municipios en crecimiento:** {kpis.growing_municipalities}
+
+## 🏆 TOP 5 MUNICIPIOS EN CRECIMIENTO
+{top_lines}
+"""
+
+
+def build_equity_report(data: Dict[str, pd.DataFrame], role_name: str, author: Optional[str] = None) -> str:
+    """Reporte de equidad: índice por distrito y alertas de equidad crítica"""
+    from modules.ai.ai_processor import HealthMetricsCalculator
+
+    equity = HealthMetricsCalculator.calculate_equity_index(data)
+    if equity.empty or 'score_equidad' not in equity.columns:
+        raise ValueError("Índice de equidad no disponible")
+
+    summary = equity[['distrito', 'score_equidad', 'ratio_camas_1000hab', 'ratio_personal_1000hab']].round(2)
+    summary.columns = ['Distrito', 'Score equidad', 'Camas/1000 hab', 'Personal/1000 hab']
+    low_equity = equity[equity['score_equidad'] < EQUITY_ALERT_THRESHOLD]
+    if low_equity.empty:
+        alerts = "Sin distritos por debajo del umbral de equidad."
+    else:
+        alerts = f"**ALERTA**: {len(low_equity)} distritos con equidad crítica (<{EQUITY_ALERT_THRESHOLD} puntos)\n" + \
+            "\n".join(f"- **{row.distrito}**: {row.score_equidad:.0f}/100" for row in low_equity.itertuples(index=False))
+
+    return f"""# ⚖️ REPORTE DE EQUIDAD
+**Fecha de análisis:** {datetime.now().strftime("%d de %B de %Y")}
+{_signature(role_name, author)}
+
+## 📊 ÍNDICES DE EQUIDAD POR DISTRITO
+{markdown_table(summary, float_format='{:.2f}')}
+
+## 🚨 ALERTAS
+{alerts}
+"""
+
+
+# Informes estándar: tipo -> (título, constructor)
+REPORT_TYPES: Dict[str, tuple] = {
+    'executive': ("Reporte Ejecutivo", build_executive_report),
+    'infrastructure': ("Reporte de Infraestructura", build_infrastructure_report),
+    'demographic': ("Reporte Demográfico", build_demographic_report),
+    'equity': ("Reporte de Equidad", build_equity_report),
+}
+
+
+def get_report_builder(report_type: str) -> Callable[..., str]:
+    """Constructor de un tipo de informe"""
+    if report_type not in REPORT_TYPES:
+        raise ValueError(f"Tipo de informe desconocido: {report_type}")
+    return REPORT_TYPES[report_type][1]
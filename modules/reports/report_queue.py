@@ -0,0 +1,220 @@
+"""
+Cola de Informes - Copilot Salud Andalucía
+Genera los informes PDF en un pool de trabajadores, guarda los artefactos con caducidad para
+que la interfaz consulte su estado y los descargue, y pregenera cada noche los informes por rol
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from modules.performance.derived_data_store import compute_dataset_version
+from modules.reports.pdf_engine import REPORTLAB_AVAILABLE, create_pdf_bytes
+from modules.reports.report_builders import REPORT_TYPES, get_report_builder
+
+
+# Trabajadores dedicados a generar informes
+REPORT_WORKERS = 2
+
+# Vida de un artefacto generado (segundos); cubre el día siguiente a la pregeneración nocturna
+REPORT_TTL_SECONDS = 24 * 3600
+
+# Hora local de la pregeneración nocturna
+NIGHTLY_HOUR = 3
+
+# Datasets de los que dependen los informes estándar
+REPORT_DATASETS = ('hospitales', 'demografia', 'servicios', 'accesibilidad', 'indicadores')
+
+# Informes estándar pregenerados por rol: rol -> (nombre del perfil, tipos de informe)
+STANDARD_REPORTS_BY_ROLE = {
+    'admin': ("Administrador del Sistema", ('executive', 'infrastructure', 'demographic', 'equity')),
+    'gestor': ("Gestor Sanitario", ('executive', 'infrastructure', 'demographic')),
+    'analista': ("Analista de Datos", ('executive', 'infrastructure', 'demographic')),
+}
+
+# Estados de un trabajo
+PENDING_STATUSES = ('queued', 'running')
+
+
+class ReportQueue:
+    """Trabajos de informe con estado consultable y artefactos con caducidad"""
+
+    def __init__(self, max_workers: int = REPORT_WORKERS, ttl_seconds: float = REPORT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='reports')
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._by_key: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+        self._nightly_data: Optional[Dict[str, pd.DataFrame]] = None
+        self._nightly_thread: Optional[threading.Thread] = None
+        self.stats = {'submitted': 0, 'reused': 0, 'completed': 0, 'failed': 0, 'expired': 0}
+
+    @staticmethod
+    def job_key(report_type: str, role: str, data: Dict[str, pd.DataFrame], day: Optional[date] = None) -> tuple:
+        """Informe por tipo, rol, día y versión de datos (compartido por los usuarios del mismo rol)
+
+        El día forma parte de la clave: los informes llevan fecha de análisis y la pregeneración
+        nocturna debe producir los del nuevo día aunque los de la noche anterior sigan vigentes
+        """
+        version = compute_dataset_version(data, [name for name in REPORT_DATASETS if name in data])
+        return report_type, role, (day or date.today()).isoformat(), version
+
+    def submit(self, report_type: str, data: Dict[str, pd.DataFrame], role: str,
+               role_name: Optional[str] = None, day: Optional[date] = None) -> str:
+        """Encolar un informe; si ya hay uno vigente (o en curso) para la misma clave se reutiliza"""
+        get_report_builder(report_type)
+        key = self.job_key(report_type, role, data, day)
+
+        with self._lock:
+            self._purge_expired()
+            existing = self._jobs.get(self._by_key.get(key))
+            if existing is not None and existing['status'] != 'error':
+                self.stats['reused'] += 1
+                return existing['id']
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'id': job_id,
+                'report_type': report_type,
+                'title': REPORT_TYPES[report_type][0],
+                'role': role,
+                'status': 'queued',
+                'submitted_at': time.time(),
+                'finished_at': None,
+                'expires_at': None,
+                'duration': None,
+                'pdf': None,
+                'markdown': None,
+                'error': None,
+            }
+            self._by_key[key] = job_id
+            self.stats['submitted'] += 1
+
+        self._executor.submit(self._render, job_id, data, role_name or role)
+        return job_id
+
+    def _render(self, job_id: str, data: Dict[str, pd.DataFrame], role_name: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job['status'] = 'running'
+
+        start_time = time.perf_counter()
+        try:
+            markdown = get_report_builder(job['report_type'])(data, role_name)
+            pdf = create_pdf_bytes(f"{job['title']} - {role_name}", markdown) if REPORTLAB_AVAILABLE else None
+            outcome = {'status': 'ready', 'markdown': markdown, 'pdf': pdf}
+        except Exception as e:
+            outcome = {'status': 'error', 'error': str(e)}
+            print(f"⚠️ Error generando informe '{job['report_type']}': {str(e)}")
+
+        with self._lock:
+            finished_at = time.time()
+            job.update(outcome, finished_at=finished_at, expires_at=finished_at + self.ttl_seconds,
+                       duration=time.perf_counter() - start_time)
+            self.stats['completed' if outcome['status'] == 'ready' else 'failed'] += 1
+
+    def get_job(self, job_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Estado y artefactos de un trabajo (None si no existe o ha caducado)"""
+        if not job_id:
+            return None
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def wait(self, job_id: str, timeout: float = 60.0, interval: float = 0.05) -> Optional[Dict[str, Any]]:
+        """Esperar a que un trabajo termine (uso en scripts y tests)"""
+        deadline = time.monotonic() + timeout
+        job = self.get_job(job_id)
+        while job is not None and job['status'] in PENDING_STATUSES and time.monotonic() < deadline:
+            time.sleep(interval)
+            job = self.get_job(job_id)
+        return job
+
+    def _purge_expired(self):
+        """Eliminar artefactos caducados (llamar con el lock tomado)"""
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['expires_at'] is not None and job['expires_at'] <= now]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if expired:
+            self._by_key = {key: job_id for key, job_id in self._by_key.items() if job_id in self._jobs}
+            self.stats['expired'] += len(expired)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Trabajos vigentes sin los artefactos (panel de administración)"""
+        with self._lock:
+            self._purge_expired()
+            return [{k: v for k, v in job.items() if k not in ('pdf', 'markdown')} for job in self._jobs.values()]
+
+    # --- Pregeneración nocturna ---
+
+    def pregenerate(self, data: Dict[str, pd.DataFrame], day: Optional[date] = None) -> List[str]:
+        """Encolar los informes estándar de todos los roles para el día y la versión actual de los datos"""
+        job_ids = []
+        for role, (role_name, report_types) in STANDARD_REPORTS_BY_ROLE.items():
+            for report_type in report_types:
+                job_ids.append(self.submit(report_type, data, role, role_name, day=day))
+        return job_ids
+
+    def schedule_nightly(self, data: Dict[str, pd.DataFrame], hour: int = NIGHTLY_HOUR):
+        """Registrar los datos vigentes y arrancar (una vez) la pregeneración diaria a la hora indicada"""
+        with self._lock:
+            self._nightly_data = data
+            if self._nightly_thread is not None:
+                return
+            self._nightly_thread = threading.Thread(target=self._nightly_loop, args=(hour,),
+                                                    name='reports-nightly', daemon=True)
+        self._nightly_thread.start()
+
+    @staticmethod
+    def seconds_until(hour: int, now: Optional[datetime] = None) -> float:
+        """Segundos hasta la próxima hora `hour`:00 local"""
+        now = now or datetime.now()
+        target = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+        if target <= now:
+            target += timedelta(days=1)
+        return (target - now).total_seconds()
+
+    def _nightly_loop(self, hour: int):
+        while True:
+            time.sleep(self.seconds_until(hour))
+            with self._lock:
+                data = self._nightly_data
+            if data:
+                try:
+                    self.pregenerate(data)
+                except Exception as e:
+                    print(f"⚠️ Error en la pregeneración nocturna de informes: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas de la cola"""
+        with self._lock:
+            pending = sum(job['status'] in PENDING_STATUSES for job in self._jobs.values())
+            return {'jobs': len(self._jobs), 'pending': pending, **self.stats}
+
+    def shutdown(self, wait_for_jobs: bool = False):
+        """Detener el pool de trabajadores"""
+        self._executor.shutdown(wait=wait_for_jobs)
+
+
+_report_queue: Optional[ReportQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_report_queue() -> ReportQueue:
+    """Obtener instancia compartida de la cola de informes"""
+    global _report_queue
+    if _report_queue is None:
+        with _queue_lock:
+            if _report_queue is None:
+                _report_queue = ReportQueue()
+    return _report_queue
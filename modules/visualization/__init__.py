@@ -3,4 +3,10 @@ Módulos de Visualización
 - Generación de gráficos
 - Mapas interactivos
 - Interfaz de mapas
+- Cache de mapas renderizados
+- Capas GeoJSON con agrupación de marcadores
+- Cache de figuras Plotly
+- Saneado de layout de figuras
+- Política de renderizado para datos grandes
+- Paquetes CSS minificados con hash de contenido
 """
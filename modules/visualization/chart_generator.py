@@ -1,15 +1,25 @@
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import numpy as np
 import pandas as pd
 from typing import Dict, Optional
 import traceback
 import json
 
+from modules.performance.derived_data_store import compute_dataset_version
+from modules.performance.tracing import get_tracer
+from modules.visualization.figure_cache import config_key, get_cached_figure
+from modules.visualization.figure_policy import sanitize_layout
+from modules.visualization.render_policy import (
+    HISTOGRAM_PREBIN_THRESHOLD, MAX_BAR_CATEGORIES, downsample_line, prebin_histogram,
+    sample_points, scatter_render_mode
+)
+
 class SmartChartGenerator:
     def __init__(self):
-        self.debug_mode = False  # Debug desactivado ahora que encontramos el problema
-        self.debug_log = []
+        # Trazas por etapa (create/theme/sanitize): sin coste salvo que se activen
+        self.tracer = get_tracer()
 
         # ========== PALETA DE COLORES PROFESIONAL SAS ANDALUCÍA ==========
         # Colores adaptativos según tema con contraste WCAG AA
@@ -92,205 +102,88 @@ class SmartChartGenerator:
             self.health_colors = self.health_colors_light.copy()
             self.chart_palette = self.chart_palette_light.copy()
 
-        self.debug_log_add(f"✨ Tema actualizado a: {theme_mode}")
-        self.debug_log_add(f"Paleta principal: {self.health_colors['primary']}")
+    def generate_chart(self, chart_config: Dict, data: pd.DataFrame, theme_mode: str = 'light') -> go.Figure:
+        """Generar gráfico basado en configuración de IA con colores adaptativos"""
 
-    def debug_log_add(self, message: str, data=None):
-        """Agregar entrada al log de debug"""
-        if self.debug_mode:
-            entry = {
-                'message': message,
-                'data': str(data)[:200] if data else None
-            }
-            self.debug_log.append(entry)
-            print(f"🔍 DEBUG: {message}")
+        # ✨ ACTUALIZAR TEMA Y COLORES (también en aciertos de cache)
+        self.set_theme(theme_mode)
 
-    def debug_figure_inspection(self, fig: go.Figure, stage: str):
-        """Inspeccionar figura en profundidad"""
-        if not self.debug_mode:
-            return
+        if data is None or data.empty or not isinstance(chart_config, dict):
+            return self._build_chart(chart_config, data, theme_mode)
 
         try:
-            self.debug_log_add(f"=== INSPECCIÓN FIGURA EN {stage.upper()} ===")
-
-            # Verificar layout
-            if hasattr(fig, 'layout'):
-                try:
-                    # Intentar múltiples métodos para obtener el dict del layout
-                    if hasattr(fig.layout, 'to_dict'):
-                        layout_dict = fig.layout.to_dict()
-                    elif hasattr(fig.layout, '_props'):
-                        layout_dict = dict(fig.layout._props)
-                    else:
-                        layout_dict = dict(fig.layout)
-                    self.debug_log_add(f"Layout keys: {list(layout_dict.keys())}")
-                except Exception as layout_error:
-                    self.debug_log_add(f"Error accediendo al layout: {layout_error}")
-                    layout_dict = {}
-
-                # Inspeccionar xaxis específicamente
-                for key in layout_dict.keys():
-                    if 'xaxis' in key:
-                        xaxis_data = layout_dict[key]
-                        self.debug_log_add(f"{key} contenido: {type(xaxis_data)}")
-
-                        if isinstance(xaxis_data, dict):
-                            if 'rangeslider' in xaxis_data:
-                                rangeslider_data = xaxis_data['rangeslider']
-                                self.debug_log_add(f"🚨 ENCONTRADO RANGESLIDER en {key}: {type(rangeslider_data)}")
-                                self.debug_log_add(f"Rangeslider content: {rangeslider_data}")
-
-                                # Verificar si tiene yaxis problemático
-                                if isinstance(rangeslider_data, dict) and 'yaxis' in rangeslider_data:
-                                    yaxis_data = rangeslider_data['yaxis']
-                                    self.debug_log_add(f"🔴 YAXIS EN RANGESLIDER: {type(yaxis_data)} = {yaxis_data}")
-
-            # Verificar data traces
-            if hasattr(fig, 'data'):
-                self.debug_log_add(f"Número de traces: {len(fig.data)}")
-                for i, trace in enumerate(fig.data):
-                    self.debug_log_add(f"Trace {i}: {type(trace).__name__}")
-
-        except Exception as e:
-            self.debug_log_add(f"❌ Error en inspección: {str(e)}")
-
-    def print_debug_report(self):
-        """Imprimir reporte completo de debug"""
-        if self.debug_mode and self.debug_log:
-            print("\n" + "="*60)
-            print("📋 REPORTE DEBUG COMPLETO")
-            print("="*60)
-            for i, entry in enumerate(self.debug_log):
-                print(f"{i+1:2d}. {entry['message']}")
-                if entry['data']:
-                    print(f"    Data: {entry['data']}")
-            print("="*60 + "\n")
-    
-    def generate_chart(self, chart_config: Dict, data: pd.DataFrame, theme_mode: str = 'light') -> go.Figure:
-        """Generar gráfico basado en configuración de IA con colores adaptativos"""
+            compute_dataset_version({'chart': data})
+        except TypeError:
+            # Columnas con listas o diccionarios no tienen huella: gráfico sin cache
+            return self._build_chart(chart_config, data, theme_mode)
+
+        # Figura final cacheada por (configuración, huella de los datos, tema)
+        return get_cached_figure(
+            'smart_chart',
+            {'chart': data},
+            lambda: self._build_chart(chart_config, data, theme_mode),
+            params={'config': config_key(chart_config), 'theme': theme_mode}
+        )
 
-        # RESET del log de debug
-        self.debug_log = []
-        self.debug_log_add("🚀 INICIANDO GENERACIÓN DE GRÁFICO")
+    def _build_chart(self, chart_config: Dict, data: pd.DataFrame, theme_mode: str = 'light') -> go.Figure:
+        """Crear, tematizar y limpiar el gráfico (sin cache)"""
 
         # ✨ ACTUALIZAR TEMA Y COLORES
         self.set_theme(theme_mode)
 
         # Validaciones básicas
         if data is None or data.empty:
-            self.debug_log_add("❌ Datos vacíos o None")
             return self._create_error_chart("Datos vacíos o None")
 
         if not isinstance(chart_config, dict):
-            self.debug_log_add("❌ Configuración de gráfico inválida")
             return self._create_error_chart("Configuración de gráfico inválida")
 
         chart_type = chart_config.get('type', 'bar')
         title = chart_config.get('title', 'Análisis Sanitario')
 
-        self.debug_log_add(f"🎨 Tema activo: {theme_mode}")
-        self.debug_log_add(f"📊 Tipo de gráfico: {chart_type}")
-        self.debug_log_add(f"📝 Título: {title}")
-        self.debug_log_add(f"📋 Datos shape: {data.shape}")
-
-        try:
-            self.debug_log_add(f"🎯 Creando gráfico tipo: {chart_type}")
-
-            if chart_type == 'bar':
-                result = self._create_bar_chart(chart_config, data, theme_mode)
-            elif chart_type == 'line':
-                result = self._create_line_chart(chart_config, data, theme_mode)
-            elif chart_type == 'scatter':
-                result = self._create_scatter_chart(chart_config, data, theme_mode)
-            elif chart_type == 'pie':
-                result = self._create_pie_chart(chart_config, data, theme_mode)
-            elif chart_type == 'heatmap':
-                result = self._create_heatmap(chart_config, data, theme_mode)
-            elif chart_type == 'map':
-                result = self._create_geographic_chart(chart_config, data, theme_mode)
-            elif chart_type == 'histogram':
-                result = self._create_histogram_chart(chart_config, data, theme_mode)
-            else:
-                result = self._create_fallback_chart(title, data, theme_mode)
-
-            self.debug_log_add(f"✅ Gráfico creado exitosamente")
-
-            # INSPECCIÓN POST-CREACIÓN
-            self.debug_figure_inspection(result, "POST-CREACIÓN")
-
-            # Verificar que el resultado no sea None
-            if result is None:
-                self.debug_log_add(f"❌ Método {chart_type} devolvió None")
-                return self._create_error_chart(f"Método {chart_type} devolvió None")
-
-            # LIMPIEZA NUCLEAR ANTI-RANGESLIDER
-            self.debug_log_add("🧨 Aplicando LIMPIEZA NUCLEAR anti-rangeslider")
+        with self.tracer.span('chart', chart_type=chart_type, rows=len(data), theme=theme_mode) as chart_span:
             try:
-                result = self._nuclear_rangeslider_cleaner(result)
-                self.debug_log_add("✅ Limpieza nuclear completada exitosamente")
-            except Exception as e:
-                self.debug_log_add(f"❌ Error en limpieza nuclear: {e}")
-                # Fallback extremo
-                try:
-                    result = go.Figure(data=result.data, layout=dict(
-                        xaxis=dict(rangeslider=dict(visible=False)),
-                        yaxis=dict(),
-                        showlegend=True
-                    ))
-                except:
-                    result = self._create_error_chart("Error en limpieza nuclear")
-
-            # INSPECCIÓN FINAL
-            self.debug_figure_inspection(result, "FINAL")
-
-            # VERIFICACIÓN FINAL ABSOLUTA ANTI-RANGESLIDER
-            try:
-                layout_check = result.to_plotly_json().get('layout', {})
-                problematic_found = False
-
-                for key, value in layout_check.items():
-                    if key.startswith('yaxis') and isinstance(value, dict) and 'rangeslider' in value:
-                        print(f"🚨 INTERCEPTADO rangeslider ilegal en {key} en verificación final!")
-                        problematic_found = True
-
-                if problematic_found:
-                    print("🧨 APLICANDO CORRECCIÓN FINAL DE EMERGENCIA")
-                    # Recrear completamente la figura sin rangeslider problemáticos
-                    safe_layout = {}
-                    for key, value in layout_check.items():
-                        if key.startswith('yaxis') and isinstance(value, dict):
-                            # Crear yaxis sin rangeslider
-                            safe_layout[key] = {k: v for k, v in value.items() if k != 'rangeslider'}
-                        else:
-                            safe_layout[key] = value
-
-                    result = go.Figure(data=result.data, layout=safe_layout)
-                    print("✅ Corrección final aplicada exitosamente")
-
-            except Exception as e:
-                print(f"❌ Error en verificación final: {e}")
-
-            # IMPRIMIR REPORTE COMPLETO
-            self.print_debug_report()
-
-            return result
+                # La etapa de creación incluye el span anidado del tema
+                with self.tracer.span('chart.create', chart_type=chart_type, rows=len(data)):
+                    if chart_type == 'bar':
+                        result = self._create_bar_chart(chart_config, data, theme_mode)
+                    elif chart_type == 'line':
+                        result = self._create_line_chart(chart_config, data, theme_mode)
+                    elif chart_type == 'scatter':
+                        result = self._create_scatter_chart(chart_config, data, theme_mode)
+                    elif chart_type == 'pie':
+                        result = self._create_pie_chart(chart_config, data, theme_mode)
+                    elif chart_type == 'heatmap':
+                        result = self._create_heatmap(chart_config, data, theme_mode)
+                    elif chart_type == 'map':
+                        result = self._create_geographic_chart(chart_config, data, theme_mode)
+                    elif chart_type == 'histogram':
+                        result = self._create_histogram_chart(chart_config, data, theme_mode)
+                    else:
+                        result = self._create_fallback_chart(title, data, theme_mode)
 
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
+                # Verificar que el resultado no sea None
+                if result is None:
+                    chart_span.set(error='None')
+                    return self._create_error_chart(f"Método {chart_type} devolvió None")
 
-            # LOG DE ERROR COMPLETO
-            self.debug_log_add(f"💥 ERROR CRÍTICO: {str(e)}")
-            self.debug_log_add(f"📋 Traceback: {error_details}")
+                # SANEADO DE EJES EN UNA SOLA PASADA (sin serializar la figura)
+                with self.tracer.span('chart.sanitize', chart_type=chart_type):
+                    try:
+                        result = sanitize_layout(result)
+                    except Exception:
+                        result = go.Figure(data=result.data, layout=dict(
+                            xaxis=dict(rangeslider=dict(visible=False)),
+                            showlegend=True
+                        ))
 
-            # Verificar si es específicamente el error de rangeslider
-            if 'rangeslider' in str(e).lower() or 'Rangeslider' in str(e):
-                self.debug_log_add("🎯 ERROR CONFIRMADO: Es el problema de Rangeslider")
+                return result
 
-            self.print_debug_report()
+            except Exception as e:
+                error_details = traceback.format_exc()
+                chart_span.set(error=type(e).__name__)
+                return self._create_error_chart(f"Error generando gráfico tipo {chart_type}: {str(e)}\n{error_details[:200]}...")
 
-            return self._create_error_chart(f"Error generando gráfico tipo {chart_type}: {str(e)}\n{error_details[:200]}...")
-    
     def _create_bar_chart(self, config: Dict, data: pd.DataFrame, theme_mode: str = 'light') -> go.Figure:
         """Crear gráfico de barras inteligente"""
         
@@ -322,25 +215,15 @@ class SmartChartGenerator:
             )
             fig.update_xaxes(tickangle=45)
         
-        # PROTECCIÓN EXTREMA: Eliminar rangeslider antes de aplicar tema
-        self.debug_log_add("🛡️ Aplicando protección extrema anti-rangeslider en método individual")
+        # PROTECCIÓN: Eliminar rangeslider antes de aplicar tema
         try:
             fig.update_layout(
                 xaxis=dict(rangeslider=dict(visible=False))
             )
-            self.debug_log_add("✅ Protección extrema aplicada en método individual")
-        except Exception as e:
-            self.debug_log_add(f"⚠️ Error en protección individual: {e}")
-
-        # INSPECCIÓN ANTES DEL TEMA
-        self.debug_figure_inspection(fig, "ANTES-DEL-TEMA")
+        except Exception:
+            pass
 
-        result = self._apply_health_theme(fig, theme_mode)
-
-        # INSPECCIÓN DESPUÉS DEL TEMA
-        self.debug_figure_inspection(result, "DESPUÉS-DEL-TEMA")
-
-        return result
+        return self._apply_health_theme(fig, theme_mode)
     
     def _create_scatter_chart(self, config: Dict, data: pd.DataFrame, theme_mode: str = 'light') -> go.Figure:
         """Crear gráfico de dispersión con insights"""
@@ -349,6 +232,11 @@ class SmartChartGenerator:
         y_col = config.get('y_axis', data.columns[1] if len(data.columns) > 1 else data.columns[0])
         size_col = config.get('size_by', None)
         color_col = config.get('color_by', None)
+
+        # Puntos acotados y WebGL (Scattergl) en dispersiones grandes
+        with self.tracer.span('chart.downsample', chart_type='scatter', rows=len(data)):
+            data = sample_points(data)
+        render_mode = scatter_render_mode(len(data))
         
         # Detectar si es análisis de correlación
         if size_col and size_col in data.columns:
@@ -360,7 +248,8 @@ class SmartChartGenerator:
                 color=color_col,
                 hover_data=data.columns.tolist()[:5],  # Primeras 5 columnas
                 title=config.get('title', 'Análisis de Correlación'),
-                color_continuous_scale='Viridis'
+                color_continuous_scale='Viridis',
+                render_mode=render_mode
             )
         else:
             fig = px.scatter(
@@ -370,28 +259,19 @@ class SmartChartGenerator:
                 color=color_col,
                 hover_data=data.columns.tolist()[:3],
                 title=config.get('title', 'Análisis de Dispersión'),
-                color_continuous_scale='Plasma'
+                color_continuous_scale='Plasma',
+                render_mode=render_mode
             )
         
-        # PROTECCIÓN EXTREMA: Eliminar rangeslider antes de aplicar tema
-        self.debug_log_add("🛡️ Aplicando protección extrema anti-rangeslider en método individual")
+        # PROTECCIÓN: Eliminar rangeslider antes de aplicar tema
         try:
             fig.update_layout(
                 xaxis=dict(rangeslider=dict(visible=False))
             )
-            self.debug_log_add("✅ Protección extrema aplicada en método individual")
-        except Exception as e:
-            self.debug_log_add(f"⚠️ Error en protección individual: {e}")
-
-        # INSPECCIÓN ANTES DEL TEMA
-        self.debug_figure_inspection(fig, "ANTES-DEL-TEMA")
+        except Exception:
+            pass
 
-        result = self._apply_health_theme(fig, theme_mode)
-
-        # INSPECCIÓN DESPUÉS DEL TEMA
-        self.debug_figure_inspection(result, "DESPUÉS-DEL-TEMA")
-
-        return result
+        return self._apply_health_theme(fig, theme_mode)
     
     def _create_pie_chart(self, config: Dict, data: pd.DataFrame, theme_mode: str = 'light') -> go.Figure:
         """Crear gráfico circular con etiquetas inteligentes"""
@@ -437,25 +317,15 @@ class SmartChartGenerator:
             hoverinfo='none'  # Deshabilitar hover completamente
         )
         
-        # PROTECCIÓN EXTREMA: Eliminar rangeslider antes de aplicar tema
-        self.debug_log_add("🛡️ Aplicando protección extrema anti-rangeslider en método individual")
+        # PROTECCIÓN: Eliminar rangeslider antes de aplicar tema
         try:
             fig.update_layout(
                 xaxis=dict(rangeslider=dict(visible=False))
             )
-            self.debug_log_add("✅ Protección extrema aplicada en método individual")
-        except Exception as e:
-            self.debug_log_add(f"⚠️ Error en protección individual: {e}")
-
-        # INSPECCIÓN ANTES DEL TEMA
-        self.debug_figure_inspection(fig, "ANTES-DEL-TEMA")
-
-        result = self._apply_health_theme(fig, theme_mode)
-
-        # INSPECCIÓN DESPUÉS DEL TEMA
-        self.debug_figure_inspection(result, "DESPUÉS-DEL-TEMA")
+        except Exception:
+            pass
 
-        return result
+        return self._apply_health_theme(fig, theme_mode)
     
     def _create_heatmap(self, config: Dict, data: pd.DataFrame, theme_mode: str = 'light') -> go.Figure:
         """Crear mapa de calor para análisis de correlación o matriz"""
@@ -484,25 +354,15 @@ class SmartChartGenerator:
                 text_auto=True
             )
         
-        # PROTECCIÓN EXTREMA: Eliminar rangeslider antes de aplicar tema
-        self.debug_log_add("🛡️ Aplicando protección extrema anti-rangeslider en método individual")
+        # PROTECCIÓN: Eliminar rangeslider antes de aplicar tema
         try:
             fig.update_layout(
                 xaxis=dict(rangeslider=dict(visible=False))
             )
-            self.debug_log_add("✅ Protección extrema aplicada en método individual")
-        except Exception as e:
-            self.debug_log_add(f"⚠️ Error en protección individual: {e}")
-
-        # INSPECCIÓN ANTES DEL TEMA
-        self.debug_figure_inspection(fig, "ANTES-DEL-TEMA")
-
-        result = self._apply_health_theme(fig, theme_mode)
+        except Exception:
+            pass
 
-        # INSPECCIÓN DESPUÉS DEL TEMA
-        self.debug_figure_inspection(result, "DESPUÉS-DEL-TEMA")
-
-        return result
+        return self._apply_health_theme(fig, theme_mode)
     
     def _create_geographic_chart(self, config: Dict, data: pd.DataFrame, theme_mode: str = 'light') -> go.Figure:
         """Crear visualización geográfica (scatter_mapbox básico)"""
@@ -554,25 +414,15 @@ class SmartChartGenerator:
             # Fallback: crear gráfico de barras
             return self._create_bar_chart(config, data)
         
-        # PROTECCIÓN EXTREMA: Eliminar rangeslider antes de aplicar tema
-        self.debug_log_add("🛡️ Aplicando protección extrema anti-rangeslider en método individual")
+        # PROTECCIÓN: Eliminar rangeslider antes de aplicar tema
         try:
             fig.update_layout(
                 xaxis=dict(rangeslider=dict(visible=False))
             )
-            self.debug_log_add("✅ Protección extrema aplicada en método individual")
-        except Exception as e:
-            self.debug_log_add(f"⚠️ Error en protección individual: {e}")
+        except Exception:
+            pass
 
-        # INSPECCIÓN ANTES DEL TEMA
-        self.debug_figure_inspection(fig, "ANTES-DEL-TEMA")
-
-        result = self._apply_health_theme(fig, theme_mode)
-
-        # INSPECCIÓN DESPUÉS DEL TEMA
-        self.debug_figure_inspection(result, "DESPUÉS-DEL-TEMA")
-
-        return result
+        return self._apply_health_theme(fig, theme_mode)
     
     def _create_equity_dashboard(self, equity_data: pd.DataFrame) -> go.Figure:
         """Dashboard especializado en equidad sanitaria"""
@@ -634,14 +484,36 @@ class SmartChartGenerator:
         
         # Usar la primera columna numérica o la especificada
         col = config.get('x_axis', numeric_cols[0])
-        
-        fig = px.histogram(
-            data,
-            x=col,
-            nbins=20,
-            title=config.get('title', 'Distribución de Datos'),
-            color_discrete_sequence=[self.health_colors['primary']]  # ✨ Color adaptativo
-        )
+
+        # Con muchas filas se agrupa en el servidor: al navegador solo llegan los conteos
+        bins = None
+        if len(data) > HISTOGRAM_PREBIN_THRESHOLD:
+            with self.tracer.span('chart.downsample', chart_type='histogram', rows=len(data)):
+                bins = prebin_histogram(data[col], nbins=20)
+
+        if bins is not None:
+            counts, edges = bins
+            fig = go.Figure(go.Bar(
+                x=(edges[:-1] + edges[1:]) / 2,
+                y=counts,
+                width=np.diff(edges),
+                marker_color=self.health_colors['primary'],  # ✨ Color adaptativo
+                name=col
+            ))
+            fig.update_layout(
+                title=config.get('title', 'Distribución de Datos'),
+                xaxis_title=col,
+                yaxis_title='count',
+                bargap=0
+            )
+        else:
+            fig = px.histogram(
+                data,
+                x=col,
+                nbins=20,
+                title=config.get('title', 'Distribución de Datos'),
+                color_discrete_sequence=[self.health_colors['primary']]  # ✨ Color adaptativo
+            )
         
         # Añadir línea de media
         mean_val = data[col].mean()
@@ -652,25 +524,15 @@ class SmartChartGenerator:
             annotation_text=f"Media: {mean_val:.2f}"
         )
         
-        # PROTECCIÓN EXTREMA: Eliminar rangeslider antes de aplicar tema
-        self.debug_log_add("🛡️ Aplicando protección extrema anti-rangeslider en método individual")
+        # PROTECCIÓN: Eliminar rangeslider antes de aplicar tema
         try:
             fig.update_layout(
                 xaxis=dict(rangeslider=dict(visible=False))
             )
-            self.debug_log_add("✅ Protección extrema aplicada en método individual")
-        except Exception as e:
-            self.debug_log_add(f"⚠️ Error en protección individual: {e}")
-
-        # INSPECCIÓN ANTES DEL TEMA
-        self.debug_figure_inspection(fig, "ANTES-DEL-TEMA")
-
-        result = self._apply_health_theme(fig, theme_mode)
+        except Exception:
+            pass
 
-        # INSPECCIÓN DESPUÉS DEL TEMA
-        self.debug_figure_inspection(result, "DESPUÉS-DEL-TEMA")
-
-        return result
+        return self._apply_health_theme(fig, theme_mode)
     
     def _create_line_chart(self, config: Dict, data: pd.DataFrame, theme_mode: str = 'light') -> go.Figure:
         """Crear gráfico de líneas para tendencias temporales"""
@@ -678,33 +540,28 @@ class SmartChartGenerator:
         x_col = config.get('x_axis', data.columns[0])
         y_col = config.get('y_axis', data.columns[1] if len(data.columns) > 1 else data.columns[0])
 
+        # Series largas reducidas (LTTB o mín-máx) conservando la forma
+        with self.tracer.span('chart.downsample', chart_type='line', rows=len(data)):
+            data = downsample_line(data, x_col, y_col)
+
         fig = px.line(
             data,
             x=x_col,
             y=y_col,
             title=config.get('title', 'Evolución Temporal'),
-            markers=True
+            markers=True,
+            render_mode=scatter_render_mode(len(data))
         )
 
-        # PROTECCIÓN EXTREMA: Eliminar rangeslider antes de aplicar tema
-        self.debug_log_add("🛡️ Aplicando protección extrema anti-rangeslider en método individual")
+        # PROTECCIÓN: Eliminar rangeslider antes de aplicar tema
         try:
             fig.update_layout(
                 xaxis=dict(rangeslider=dict(visible=False))
             )
-            self.debug_log_add("✅ Protección extrema aplicada en método individual")
-        except Exception as e:
-            self.debug_log_add(f"⚠️ Error en protección individual: {e}")
+        except Exception:
+            pass
 
-        # INSPECCIÓN ANTES DEL TEMA
-        self.debug_figure_inspection(fig, "ANTES-DEL-TEMA")
-
-        result = self._apply_health_theme(fig, theme_mode)
-
-        # INSPECCIÓN DESPUÉS DEL TEMA
-        self.debug_figure_inspection(result, "DESPUÉS-DEL-TEMA")
-
-        return result
+        return self._apply_health_theme(fig, theme_mode)
     
     def _create_fallback_chart(self, title: str, data: pd.DataFrame, theme_mode: str = 'light') -> go.Figure:
         """Gráfico por defecto cuando no se puede determinar el tipo"""
@@ -722,25 +579,15 @@ class SmartChartGenerator:
             value_counts = data[cat_col].value_counts()
             fig = px.bar(x=value_counts.index, y=value_counts.values, title=title)
         
-        # PROTECCIÓN EXTREMA: Eliminar rangeslider antes de aplicar tema
-        self.debug_log_add("🛡️ Aplicando protección extrema anti-rangeslider en método individual")
+        # PROTECCIÓN: Eliminar rangeslider antes de aplicar tema
         try:
             fig.update_layout(
                 xaxis=dict(rangeslider=dict(visible=False))
             )
-            self.debug_log_add("✅ Protección extrema aplicada en método individual")
-        except Exception as e:
-            self.debug_log_add(f"⚠️ Error en protección individual: {e}")
-
-        # INSPECCIÓN ANTES DEL TEMA
-        self.debug_figure_inspection(fig, "ANTES-DEL-TEMA")
-
-        result = self._apply_health_theme(fig, theme_mode)
+        except Exception:
+            pass
 
-        # INSPECCIÓN DESPUÉS DEL TEMA
-        self.debug_figure_inspection(result, "DESPUÉS-DEL-TEMA")
-
-        return result
+        return self._apply_health_theme(fig, theme_mode)
     
     def _create_error_chart(self, error_message: str) -> go.Figure:
         """Crear gráfico de error"""
@@ -761,138 +608,13 @@ class SmartChartGenerator:
         
         return fig
     
-    def _nuclear_rangeslider_cleaner(self, fig: go.Figure) -> go.Figure:
-        """LIMPIEZA NUCLEAR: Eliminar TODO rastro de rangeslider problemático"""
-        try:
-            self.debug_log_add("🧨 INICIANDO LIMPIEZA NUCLEAR ANTI-RANGESLIDER")
-
-            # Paso 1: Convertir a diccionario y limpiar COMPLETAMENTE
-            fig_dict = fig.to_plotly_json()
-
-            # Función recursiva para limpiar cualquier rangeslider en cualquier lugar
-            def clean_recursive(obj, path=""):
-                if isinstance(obj, dict):
-                    keys_to_remove = []
-                    for key, value in obj.items():
-                        current_path = f"{path}.{key}" if path else key
-
-                        # Si encontramos rangeslider en yaxis, ELIMINARLO
-                        if key == "rangeslider" and "yaxis" in path:
-                            self.debug_log_add(f"🧨 ELIMINANDO rangeslider PROHIBIDO en {path}")
-                            keys_to_remove.append(key)
-
-                        # Si es un yaxis que contiene rangeslider, LIMPIAR
-                        elif key.startswith("yaxis") and isinstance(value, dict) and "rangeslider" in value:
-                            self.debug_log_add(f"🧨 LIMPIANDO yaxis con rangeslider: {key}")
-                            del value["rangeslider"]
-
-                        # Si es rangeslider que contiene yaxis, ELIMINAR yaxis
-                        elif key == "rangeslider" and isinstance(value, dict) and "yaxis" in value:
-                            self.debug_log_add(f"🧨 ELIMINANDO yaxis de rangeslider en {path}")
-                            del value["yaxis"]
-
-                        # Seguir limpiando recursivamente
-                        else:
-                            clean_recursive(value, current_path)
-
-                    # Eliminar las keys marcadas
-                    for key in keys_to_remove:
-                        del obj[key]
-
-                elif isinstance(obj, list):
-                    for i, item in enumerate(obj):
-                        clean_recursive(item, f"{path}[{i}]")
-
-            # Aplicar limpieza recursiva
-            clean_recursive(fig_dict)
-
-            # Recrear figura limpia
-            fig = go.Figure(data=fig_dict.get('data', []), layout=fig_dict.get('layout', {}))
-
-            # Paso 2: Aplicar configuración segura forzada
-            safe_config = {}
-
-            # Para TODOS los posibles ejes
-            for i in range(20):  # Máximo 20 subplots por seguridad
-                if i == 0:
-                    safe_config['xaxis'] = dict(rangeslider=dict(visible=False))
-                    safe_config['yaxis'] = dict()  # SIEMPRE vacío
-                else:
-                    safe_config[f'xaxis{i+1}'] = dict(rangeslider=dict(visible=False))
-                    safe_config[f'yaxis{i+1}'] = dict()  # SIEMPRE vacío
-
-            fig.update_layout(**safe_config)
-
-            # Paso 3: Verificación final AGRESIVA
-            final_check = fig.to_plotly_json()
-            for key, value in final_check.get('layout', {}).items():
-                if key.startswith('yaxis') and isinstance(value, dict):
-                    if 'rangeslider' in value:
-                        self.debug_log_add(f"🚨 CRÍTICO: Aún hay rangeslider en {key} - ELIMINANDO")
-                        fig.update_layout(**{key: dict()})
-
-            self.debug_log_add("✅ LIMPIEZA NUCLEAR COMPLETADA")
-            return fig
-
-        except Exception as e:
-            self.debug_log_add(f"❌ Error en limpieza nuclear: {e}")
-            # FALLBACK DE EMERGENCIA: Figura básica sin nada
-            try:
-                return go.Figure(data=fig.data, layout=dict(
-                    xaxis=dict(rangeslider=dict(visible=False)),
-                    yaxis=dict(),
-                    showlegend=True
-                ))
-            except:
-                return go.Figure()
-
-    def _validate_plotly_config(self, fig: go.Figure) -> go.Figure:
-        """Validar y corregir configuraciones problemáticas de Plotly para Streamlit"""
-        try:
-            # LIMPIEZA NUCLEAR PRIMERO
-            fig = self._nuclear_rangeslider_cleaner(fig)
-
-            # VERIFICACIÓN ADICIONAL ANTI-RANGESLIDER EN YAXIS
-            layout_dict = fig.to_plotly_json().get('layout', {})
-
-            # Verificar y limpiar cualquier yaxis que tenga rangeslider
-            updates = {}
-            for key, value in layout_dict.items():
-                if key.startswith('yaxis') and isinstance(value, dict):
-                    if 'rangeslider' in value:
-                        print(f"🚨 ENCONTRADO rangeslider ilegal en {key} - ELIMINANDO")
-                        # Crear una copia del yaxis sin rangeslider
-                        clean_yaxis = {k: v for k, v in value.items() if k != 'rangeslider'}
-                        updates[key] = clean_yaxis
-
-            # Aplicar las correcciones
-            if updates:
-                fig.update_layout(**updates)
-                print(f"✅ Corregidos {len(updates)} ejes problemáticos")
-
-            return fig
-
-        except Exception as e:
-            print(f"❌ Error en validación de Plotly: {e}")
-            # Fallback de emergencia
-            try:
-                return go.Figure(data=fig.data, layout=dict(
-                    xaxis=dict(rangeslider=dict(visible=False)),
-                    yaxis=dict(),
-                    showlegend=True
-                ))
-            except:
-                return go.Figure()
-
     def _apply_health_theme(self, fig: go.Figure, theme_mode: str = 'light') -> go.Figure:
         """Aplicar tema sanitario profesional SAS Andalucía con colores adaptativos"""
+        with self.tracer.span('chart.theme', theme=theme_mode, traces=len(fig.data)):
+            return self._style_figure(fig, theme_mode)
 
-        self.debug_log_add("🎨 INICIANDO aplicación de tema sanitario SAS Andalucía")
-
-        # Primero validar configuración
-        self.debug_log_add("🔍 Validando configuración Plotly")
-        fig = self._validate_plotly_config(fig)
-        self.debug_log_add("✅ Configuración validada")
+    def _style_figure(self, fig: go.Figure, theme_mode: str = 'light') -> go.Figure:
+        """Colores, fuentes y fondos del tema sanitario sobre la figura"""
 
         # ========== TEMA PROFESIONAL SAS ANDALUCÍA ==========
         if theme_mode == 'dark':
@@ -1028,7 +750,6 @@ class SmartChartGenerator:
                     base_color = chart_colors[color_index]
                     fig.data[i].fillcolor = f"{base_color}40"  # 25% transparencia
 
-        self.debug_log_add("🎨 TEMA ADAPTATIVO APLICADO exitosamente")
         return fig
 
     def enable_rangeslider(self, fig: go.Figure, enable_buttons: bool = True) -> go.Figure:
@@ -1089,39 +810,7 @@ def emergency_rangeslider_cleaner(fig):
     try:
         if fig is None:
             return go.Figure()
-
-        # Conversión completa y limpieza
-        fig_dict = fig.to_plotly_json()
-
-        # Eliminar TODO rangeslider de yaxis
-        if 'layout' in fig_dict:
-            for key, value in list(fig_dict['layout'].items()):
-                if key.startswith('yaxis') and isinstance(value, dict):
-                    if 'rangeslider' in value:
-                        print(f"🧨 EMERGENCY: Eliminando rangeslider de {key}")
-                        del value['rangeslider']
-
-                elif key.startswith('xaxis') and isinstance(value, dict):
-                    if 'rangeslider' in value and isinstance(value['rangeslider'], dict):
-                        if 'yaxis' in value['rangeslider']:
-                            print(f"🧨 EMERGENCY: Eliminando yaxis de rangeslider en {key}")
-                            del value['rangeslider']['yaxis']
-
-        # Recrear figura
-        clean_fig = go.Figure(data=fig_dict.get('data', []), layout=fig_dict.get('layout', {}))
-
-        # Aplicar configuración segura
-        safe_update = {}
-        for i in range(10):
-            if i == 0:
-                safe_update['xaxis'] = dict(rangeslider=dict(visible=False))
-                safe_update['yaxis'] = dict()
-            else:
-                safe_update[f'xaxis{i+1}'] = dict(rangeslider=dict(visible=False))
-                safe_update[f'yaxis{i+1}'] = dict()
-
-        clean_fig.update_layout(**safe_update)
-        return clean_fig
+        return sanitize_layout(fig)
 
     except Exception as e:
         print(f"❌ Emergency cleaner failed: {e}")
@@ -1198,11 +887,17 @@ class DataAnalyzer:
         elif numeric_cols == 1 and categorical_cols >= 1:
             if total_rows <= 8:
                 return "pie"
+            elif total_rows > MAX_BAR_CATEGORIES:
+                # Demasiadas barras: la distribución se lee mejor agrupada
+                return "histogram"
             else:
                 return "bar"
                 
         elif categorical_cols >= 1:
             return "pie" if total_rows <= 6 else "bar"
+
+        elif numeric_cols == 1 and total_rows > MAX_BAR_CATEGORIES:
+            return "histogram"
         
         return "bar"  # Fallback por defecto
     
@@ -0,0 +1,214 @@
+"""
+Paquetes CSS - Copilot Salud Andalucía
+Concatena y minifica el CSS de cada tema y dispositivo en paquetes con hash de contenido, que se
+publican como estáticos cacheables (un único <link> por rerun) o se inyectan en un solo bloque estable
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ASSETS_DIR = os.path.join(PROJECT_ROOT, 'assets')
+
+# Carpeta servida por Streamlit en /app/static/ (static/ junto al script principal src/app.py)
+STATIC_CSS_DIR = os.path.join(PROJECT_ROOT, 'src', 'static', 'css')
+MANIFEST_FILE = 'manifest.json'
+
+# URL pública de los paquetes publicados (p. ej. "app/static/css"). Vacía: se inyecta el CSS inline.
+# Streamlit sirve los .css de /app/static como text/plain con nosniff, así que el <link> requiere
+# un proxy o CDN que entregue esa ruta como text/css.
+CSS_STATIC_URL = os.getenv('COPILOT_CSS_STATIC_URL', '').rstrip('/')
+
+THEMES = ('light', 'dark')
+
+# Fuentes de escritorio (en un paquete concatenado el @import debe ir al principio)
+DESKTOP_FONTS_IMPORT = ("@import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700"
+                        "&family=Poppins:wght@300;400;500;600;700&display=swap');")
+
+# Cadenas, comentarios, espacios alrededor de separadores y resto de espacios
+_CSS_TOKENS = re.compile(r"""
+    ("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')   # cadenas: se conservan tal cual
+  | (/\*.*?\*/)                             # comentarios
+  | \s*([{};,>])\s*                         # separadores sin espacios alrededor
+  | (\s+)                                   # resto de espacios: uno solo
+""", re.S | re.X)
+_IMPORT_RULE = re.compile(r"""@import\s+(?:"[^"]*"|'[^']*'|[^;"'])+;""")
+
+
+@dataclass(frozen=True)
+class CSSBundle:
+    """Paquete CSS minificado de una variante"""
+    name: str
+    content: str
+    digest: str
+    sources: Tuple[str, ...]
+    source_size: int
+
+    @property
+    def filename(self) -> str:
+        return f"{self.name}.{self.digest}.css"
+
+
+def is_streamlit_cloud() -> bool:
+    """Detectar si la app se ejecuta en Streamlit Cloud"""
+    return any([
+        os.getenv('USER') == 'appuser',
+        os.path.exists('/home/appuser/.streamlit/'),
+        'HOSTNAME' in os.environ and 'streamlit' in os.environ.get('HOSTNAME', '').lower(),
+        os.getenv('STREAMLIT_SERVER_ENABLE_XSRF_PROTECTION') is not None
+    ])
+
+
+def minify_css(css: str) -> str:
+    """Eliminar comentarios y espacios sobrantes sin tocar las cadenas (selectores [style*="..."])"""
+    def replace(match):
+        string, comment, separator, _ = match.groups()
+        if string is not None:
+            return string
+        if separator is not None:
+            return separator
+        return '' if comment is not None else ' '
+
+    return _CSS_TOKENS.sub(replace, css).replace(';}', '}').strip()
+
+
+def bundle_name(theme: str, cloud: bool = False, mobile: bool = False, ios: bool = False) -> str:
+    """Nombre de la variante: dispositivo, tema, entorno y plataforma"""
+    parts = ['mobile' if mobile else 'desktop', theme]
+    if cloud and not mobile:
+        parts.append('cloud')
+    if ios:
+        parts.append('ios')
+    return '-'.join(parts)
+
+
+def bundle_sources(theme: str, cloud: bool = False, mobile: bool = False, ios: bool = False) -> List[str]:
+    """Ficheros de assets de una variante en el orden de la cascada original"""
+    if theme not in THEMES:
+        raise ValueError(f"Tema desconocido: {theme}")
+
+    if mobile:
+        sources = ['critical/mobile_basic.css', f'critical/login_guardian_{theme}.css']
+    else:
+        suffix = '_cloud' if cloud else ''
+        sources = [
+            'common.min.css',
+            f'theme_{theme}{suffix}.min.css',
+            f'critical/login_guardian_{theme}.css',
+            f'extra_styles{suffix}.min.css',
+            'selectbox_fix.css',
+            'critical/layout.css',
+            'force_white_text.css',
+            'critical/selectbox.css',
+        ]
+    sources += ['critical/sidebar_controls.css', f'critical/app_background_{theme}.css']
+    if ios:
+        sources.append('ios_safari_fixes.css')
+    return sources
+
+
+def all_variants() -> List[Dict[str, object]]:
+    """Todas las combinaciones de tema, entorno, dispositivo y plataforma"""
+    variants = []
+    for theme in THEMES:
+        for ios in (False, True):
+            variants.append({'theme': theme, 'mobile': True, 'ios': ios})
+            for cloud in (False, True):
+                variants.append({'theme': theme, 'cloud': cloud, 'mobile': False, 'ios': ios})
+    return variants
+
+
+def build_bundle(theme: str, cloud: bool = False, mobile: bool = False, ios: bool = False,
+                 assets_dir: str = ASSETS_DIR) -> CSSBundle:
+    """Concatenar y minificar los CSS de una variante (los @import pasan al principio)"""
+    sources = tuple(bundle_sources(theme, cloud, mobile, ios))
+    parts = []
+    source_size = 0
+    for source in sources:
+        with open(os.path.join(assets_dir, source), 'r', encoding='utf-8') as f:
+            css = f.read()
+        source_size += len(css.encode('utf-8'))
+        parts.append(minify_css(css))
+
+    content = '\n'.join(parts)
+    imports = _IMPORT_RULE.findall(content)
+    if not mobile:
+        imports.insert(0, DESKTOP_FONTS_IMPORT)
+    content = '\n'.join(list(dict.fromkeys(imports)) + [_IMPORT_RULE.sub('', content)])
+
+    digest = hashlib.blake2b(content.encode('utf-8'), digest_size=6).hexdigest()
+    return CSSBundle(bundle_name(theme, cloud, mobile, ios), content, digest, sources, source_size)
+
+
+_bundle_cache: Dict[tuple, Tuple[tuple, CSSBundle]] = {}
+_cache_lock = threading.Lock()
+
+
+def get_css_bundle(theme: str, cloud: bool = False, mobile: bool = False, ios: bool = False) -> CSSBundle:
+    """Paquete de una variante, reconstruido solo si cambia algún fichero fuente"""
+    sources = bundle_sources(theme, cloud, mobile, ios)
+    mtimes = tuple(os.path.getmtime(os.path.join(ASSETS_DIR, source)) for source in sources)
+    key = (theme, cloud and not mobile, mobile, ios)
+
+    cached = _bundle_cache.get(key)
+    if cached is not None and cached[0] == mtimes:
+        return cached[1]
+    with _cache_lock:
+        cached = _bundle_cache.get(key)
+        if cached is None or cached[0] != mtimes:
+            cached = (mtimes, build_bundle(theme, cloud, mobile, ios))
+            _bundle_cache[key] = cached
+    return cached[1]
+
+
+def publish_bundle(bundle: CSSBundle, output_dir: str = STATIC_CSS_DIR) -> str:
+    """Escribir el paquete en la carpeta de estáticos si aún no existe (nombre inmutable por hash)"""
+    path = os.path.join(output_dir, bundle.filename)
+    if not os.path.exists(path):
+        os.makedirs(output_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(bundle.content)
+        os.replace(tmp_path, path)
+    return path
+
+
+def write_bundles(output_dir: str = STATIC_CSS_DIR, variants: Optional[List[Dict[str, object]]] = None
+                  ) -> Dict[str, CSSBundle]:
+    """Paso de build: publicar todas las variantes, borrar versiones antiguas y escribir el manifiesto"""
+    bundles = {}
+    for variant in variants or all_variants():
+        bundle = build_bundle(**variant)
+        publish_bundle(bundle, output_dir)
+        bundles[bundle.name] = bundle
+
+    current = {bundle.filename for bundle in bundles.values()}
+    for filename in os.listdir(output_dir):
+        name = filename.split('.', 1)[0]
+        if filename.endswith('.css') and name in bundles and filename not in current:
+            os.remove(os.path.join(output_dir, filename))
+
+    manifest = {name: {'file': bundle.filename, 'hash': bundle.digest, 'size': len(bundle.content),
+                       'source_size': bundle.source_size, 'sources': list(bundle.sources)}
+                for name, bundle in sorted(bundles.items())}
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return bundles
+
+
+def bundle_html(bundle: CSSBundle, static_url: str = CSS_STATIC_URL, output_dir: str = STATIC_CSS_DIR) -> str:
+    """Etiqueta única del paquete: <link> al estático publicado o <style> con contenido estable"""
+    if static_url:
+        try:
+            publish_bundle(bundle, output_dir)
+            # ?v= activa la cache de larga duración del servidor de estáticos de Streamlit
+            return f'<link rel="stylesheet" id="app-css" href="{static_url}/{bundle.filename}?v={bundle.digest}">'
+        except OSError as e:
+            print(f"⚠️ No se pudo publicar {bundle.filename}, se inyecta inline: {str(e)}")
+    return f'<style id="app-css-{bundle.digest}">{bundle.content}</style>'
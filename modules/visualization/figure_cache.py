@@ -0,0 +1,101 @@
+"""
+Cache de Figuras - Copilot Salud Andalucía
+Figuras Plotly finales (tema y limpieza aplicados) serializadas a JSON por versión de datos
+y parámetros; los aciertos de cache no crean ni limpian la figura de nuevo
+"""
+
+import base64
+import json
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from modules.performance.derived_data_store import DerivedDataStore
+
+
+# Las figuras tienen su propio almacén para no desalojar las tablas derivadas compartidas
+FIGURE_CACHE_ENTRIES = 256
+
+# Plotly >= 6 serializa los arrays NumPy como arrays tipados base64; en 5.x un float32 se escribe como
+# lista de floats ensanchados (0.10000000149011612) y el JSON compactado ocuparía más
+TYPED_ARRAYS_AVAILABLE = int(plotly.__version__.split('.')[0]) >= 6
+
+
+def config_key(config: Any) -> str:
+    """Clave estable de una configuración de gráfico (orden de claves indiferente)"""
+    return json.dumps(config, sort_keys=True, default=str, ensure_ascii=False)
+
+
+def get_cached_figure(name: str, data: Dict[str, pd.DataFrame], builder: Callable[[], go.Figure],
+                      depends_on: Optional[Iterable[str]] = None, params: Optional[dict] = None) -> go.Figure:
+    """Figura para la versión actual de los datos; cada llamada recibe una copia independiente"""
+    figure_json = get_figure_store().get_or_compute(
+        name,
+        data,
+        lambda: pio.to_json(builder(), validate=False),
+        depends_on=depends_on,
+        params=params
+    )
+    return pio.from_json(figure_json, skip_invalid=True)
+
+
+def _compact_arrays(value: Any) -> Any:
+    """Arrays de floats como float32 (se serializan como arrays tipados base64 `f4`)"""
+    if isinstance(value, dict):
+        if value.get('dtype') == 'f8' and 'bdata' in value:
+            # Array tipado ya codificado por Plotly: se reescribe con la mitad de bytes
+            compact = dict(value, dtype='f4')
+            compact['bdata'] = base64.b64encode(
+                np.frombuffer(base64.b64decode(value['bdata']), dtype='<f8').astype('<f4').tobytes()
+            ).decode('ascii')
+            return compact
+        return {key: _compact_arrays(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        array = np.asarray(value) if not isinstance(value, np.ndarray) else value
+        if array.dtype.kind == 'f' and array.ndim >= 1:
+            return array.astype(np.float32)
+        if array.dtype.kind == 'O' and isinstance(value, (list, tuple)):
+            return [_compact_arrays(item) for item in value]
+    return value
+
+
+def compact_figure_json(fig: go.Figure) -> str:
+    """JSON de la figura con los datos de las trazas redondeados a float32 (sin cambios si no hay arrays tipados)"""
+    if not TYPED_ARRAYS_AVAILABLE:
+        return pio.to_json(fig, validate=False)
+    figure = fig.to_plotly_json()
+    figure['data'] = [_compact_arrays(trace) for trace in figure['data']]
+    return pio.to_json(figure, validate=False)
+
+
+def get_role_figure(scope: str, name: str, data: Dict[str, pd.DataFrame], builder: Callable[[], go.Figure],
+                    depends_on: Optional[Iterable[str]] = None, theme: Any = None,
+                    params: Optional[dict] = None) -> go.Figure:
+    """Figura de dashboard compartida por todas las sesiones de un mismo rol, por versión de datos y tema"""
+    figure_json = get_figure_store().get_or_compute(
+        f'role:{scope}:{name}',
+        data,
+        lambda: compact_figure_json(builder()),
+        depends_on=depends_on,
+        params=dict(params or {}, theme=config_key(theme))
+    )
+    return pio.from_json(figure_json, skip_invalid=True)
+
+
+_figure_store: Optional[DerivedDataStore] = None
+_figure_store_lock = threading.Lock()
+
+
+def get_figure_store() -> DerivedDataStore:
+    """Obtener instancia compartida del almacén de figuras"""
+    global _figure_store
+    if _figure_store is None:
+        with _figure_store_lock:
+            if _figure_store is None:
+                _figure_store = DerivedDataStore(max_entries=FIGURE_CACHE_ENTRIES)
+    return _figure_store
@@ -0,0 +1,38 @@
+"""
+Política de Figuras - Copilot Salud Andalucía
+Saneado del layout y política de hover de las figuras Plotly en una sola pasada,
+sin serializar ni reconstruir la figura
+"""
+
+import plotly.graph_objects as go
+
+
+def sanitize_layout(fig: go.Figure) -> go.Figure:
+    """Rangeslider oculto y sin `yaxis` en todos los ejes X existentes (edición en sitio)"""
+    # Los ejes Y no admiten rangeslider en un go.Figure validado: solo hay que revisar los X
+    with fig.batch_update():
+        for axis in fig.select_xaxes():
+            axis.rangeslider.visible = False
+            if axis.rangeslider.yaxis.to_plotly_json():
+                axis.rangeslider.yaxis = None
+    return fig
+
+
+# Ajustes de hover del layout que se eliminan (el hover queda desactivado)
+HOVER_LAYOUT_RESET = ('hoverlabel', 'hoverdistance', 'spikedistance', 'hoversubplots')
+
+
+def apply_hover_policy(fig: go.Figure) -> go.Figure:
+    """Hover desactivado en trazas y layout y rangeslider oculto, en una única actualización por lotes"""
+    with fig.batch_update():
+        for trace in fig.data:
+            if 'hoverinfo' in trace:
+                trace.hoverinfo = 'none'
+            if 'hovertemplate' in trace:
+                trace.hovertemplate = None
+        fig.layout.hovermode = False
+        for prop in HOVER_LAYOUT_RESET:
+            # update_layout ignora los None; la asignación directa sí vacía el ajuste
+            fig.layout[prop] = None
+        sanitize_layout(fig)
+    return fig
@@ -0,0 +1,129 @@
+"""
+Capas GeoJSON - Copilot Salud Andalucía
+Capas de puntos serializadas como una única FeatureCollection compacta, con agrupación
+en el cliente (MarkerCluster) y popups generados al abrirse a partir de las propiedades;
+leyendas visibles solo mientras su capa está activa
+"""
+
+import json
+from typing import Optional
+
+import folium
+import numpy as np
+import pandas as pd
+from branca.element import MacroElement
+from folium import plugins
+from jinja2 import Template
+
+
+# A partir de este número de puntos la capa se agrupa en el cliente
+CLUSTER_THRESHOLD = 200
+
+# Decimales de las coordenadas (~1 m), suficiente para los marcadores
+COORDINATE_PRECISION = 5
+
+
+def points_feature_collection(latitudes, longitudes, properties: pd.DataFrame,
+                              precision: int = COORDINATE_PRECISION) -> dict:
+    """FeatureCollection de puntos (se descartan los que no tienen coordenadas)"""
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    valid = np.isfinite(latitudes) & np.isfinite(longitudes)
+
+    properties = properties.reset_index(drop=True).loc[valid]
+    # NaN -> null y tipos NumPy -> tipos nativos, de una vez por columna
+    records = properties.astype(object).where(properties.notna(), None).to_dict('records')
+    coordinates = np.round(np.column_stack([longitudes[valid], latitudes[valid]]), precision).tolist()
+
+    return {
+        'type': 'FeatureCollection',
+        'features': [
+            {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': point}, 'properties': record}
+            for point, record in zip(coordinates, records)
+        ]
+    }
+
+
+def _script_json(data: dict) -> str:
+    """JSON compacto seguro para incrustar dentro de <script>"""
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str).replace('</', '<\\/')
+
+
+class GeoJsonPointLayer(MacroElement):
+    """Puntos GeoJSON dibujados como CircleMarker dentro de su capa padre (FeatureGroup o MarkerCluster)"""
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.geoJSON({{ this.data }}, {
+                pointToLayer: function(feature, latlng) {
+                    var p = feature.properties;
+                    return L.circleMarker(latlng, {
+                        radius: p.radius, color: 'white', weight: {{ this.weight }},
+                        fillColor: p.color, fillOpacity: p.opacity
+                    });
+                },
+                onEachFeature: function(feature, layer) {
+                    var popup = {{ this.popup_function }};
+                    var tooltip = {{ this.tooltip_function }};
+                    layer.bindPopup(function() { return popup(feature.properties); }, {maxWidth: {{ this.max_width }}});
+                    layer.bindTooltip(function() { return tooltip(feature.properties); });
+                }
+            });
+            {{ this._parent.get_name() }}.addLayer({{ this.get_name() }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, feature_collection: dict, popup_function: str, tooltip_function: str,
+                 weight: int = 2, max_width: int = 320):
+        super().__init__()
+        self._name = 'GeoJsonPointLayer'
+        self.data = _script_json(feature_collection)
+        self.popup_function = popup_function.strip()
+        self.tooltip_function = tooltip_function.strip()
+        self.weight = weight
+        self.max_width = max_width
+
+
+class LayerLegend(MacroElement):
+    """Leyenda fija del mapa que se muestra y oculta con su capa padre desde el control de capas"""
+
+    _template = Template("""
+        {% macro html(this, kwargs) %}
+            <div id="{{ this.get_name() }}" style="display: {{ 'block' if this._parent.show else 'none' }}; {{ this.style }}">
+                {{ this.content }}
+            </div>
+        {% endmacro %}
+        {% macro script(this, kwargs) %}
+            {{ this._parent.get_name() }}.on('add remove', function(e) {
+                document.getElementById('{{ this.get_name() }}').style.display = e.type === 'add' ? 'block' : 'none';
+            });
+        {% endmacro %}
+    """)
+
+    def __init__(self, content: str, style: str):
+        super().__init__()
+        self._name = 'LayerLegend'
+        self.content = content.strip()
+        self.style = ' '.join(style.split())
+
+
+def build_point_layer(feature_collection: dict, name: str, popup_function: str, tooltip_function: str,
+                      layer_id: Optional[str] = None, cluster: Optional[bool] = None,
+                      weight: int = 2, max_width: int = 320) -> folium.map.Layer:
+    """Capa de control con los puntos; se agrupa en el cliente si hay muchos puntos (o si se indica)"""
+    if cluster is None:
+        cluster = len(feature_collection['features']) > CLUSTER_THRESHOLD
+
+    if cluster:
+        layer = plugins.MarkerCluster(
+            name=name, overlay=True, control=True, show=True,
+            options={'chunkedLoading': True, 'disableClusteringAtZoom': 14, 'spiderfyOnMaxZoom': False}
+        )
+    else:
+        layer = folium.FeatureGroup(name=name, overlay=True, control=True, show=True)
+    if layer_id:
+        layer._name = layer_id
+
+    layer.add_child(GeoJsonPointLayer(feature_collection, popup_function, tooltip_function,
+                                      weight=weight, max_width=max_width))
+    return layer
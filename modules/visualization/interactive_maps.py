@@ -7,6 +7,14 @@ import json
 import streamlit as st
 import plotly.express as px
 
+from modules.analytics.hospital_registry import get_hospital_service_table
+from modules.geo.accessibility_grid import ACCESS_TIME_BANDS, get_accessibility_geojson
+from modules.geo.boundaries import BOUNDARIES_DIR, load_boundaries
+from modules.geo.distance import haversine_km
+from modules.geo.gazetteer import get_gazetteer
+from modules.geo.routing import get_routing_table
+from modules.visualization.geojson_layers import LayerLegend, build_point_layer, points_feature_collection
+
 # Importación opcional de geopy
 try:
     from geopy.distance import geodesic
@@ -15,6 +23,76 @@ except ImportError:
     GEOPY_AVAILABLE = False
     st.warning("⚠️ geopy no disponible - algunas funciones de mapas estarán limitadas")
 
+# Estilos de mapa base: nombre -> (tiles, atribución)
+MAP_STYLES = {
+    'Dark Theme': ('CartoDB dark_matter', None),
+    'OpenStreetMap': ('OpenStreetMap', None),
+    'Satellite': ('https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}',
+                  'Tiles &copy; Esri'),
+    'Terrain': ('https://{s}.tile.opentopomap.org/{z}/{x}/{y}.png', 'Map data &copy; OpenStreetMap contributors, SRTM | &copy; OpenTopoMap'),
+}
+
+# 🎨 POPUPS ÉPICOS: funciones JavaScript que generan el HTML al abrir cada punto
+HOSPITAL_POPUP_JS = """
+function(p) {
+    var fmt = function(v) { return v === null ? 'N/A' : Number(v).toLocaleString('en-US'); };
+    return `
+    <div style="width: 300px; font-family: Arial;">
+        <div style="background: linear-gradient(135deg, ${p.color}, ${p.color}cc); color: white; padding: 10px; border-radius: 10px 10px 0 0;">
+            <h3 style="margin: 0; font-size: 16px;">🏥 ${p.nombre}</h3>
+            <p style="margin: 5px 0; opacity: 0.9;">${p.tipo}</p>
+        </div>
+        <div style="background: white; padding: 15px; border-radius: 0 0 10px 10px; border: 2px solid ${p.color};">
+            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 10px;">
+                <div><strong>📍 Ubicación:</strong><br>${p.municipio}<br><small>${p.distrito}</small></div>
+                <div><strong>🛏️ Capacidad:</strong><br>${p.camas} camas<br><small>${p.personal} profesionales</small></div>
+            </div>
+            <hr style="border: 1px solid ${p.color}; margin: 10px 0;">
+            <div><strong>👥 Población Referencia:</strong><br>${fmt(p.poblacion)} habitantes</div>
+            <div style="margin-top: 10px;"><strong>🚨 Urgencias 24h:</strong> ${p.urgencias ? '✅ SÍ' : '❌ NO'}</div>
+            <div style="margin-top: 10px;"><strong>🏥 UCI:</strong> ${p.uci} camas</div>
+        </div>
+    </div>`;
+}
+"""
+
+HOSPITAL_TOOLTIP_JS = "function(p) { return `🏥 ${p.nombre} | 🛏️ ${p.camas} camas`; }"
+
+MUNICIPALITY_POPUP_JS = """
+function(p) {
+    var fmt = function(v, digits) {
+        return v === null ? 'N/A' : Number(v).toLocaleString('en-US', {minimumFractionDigits: digits || 0, maximumFractionDigits: digits || 0});
+    };
+    return `
+    <div style="width: 280px; font-family: Arial;">
+        <div style="background: linear-gradient(135deg, ${p.color}, ${p.color}aa); color: white; padding: 10px; border-radius: 10px 10px 0 0;">
+            <h3 style="margin: 0;">🏘️ ${p.municipio}</h3>
+            <p style="margin: 5px 0; opacity: 0.9;">Provincia de Málaga</p>
+        </div>
+        <div style="background: white; padding: 15px; border-radius: 0 0 10px 10px; border: 2px solid ${p.color};">
+            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 10px;">
+                <div><strong>👥 Población 2025:</strong><br>${fmt(p.poblacion)} habitantes</div>
+                <div><strong>📈 Crecimiento:</strong><br>${p.crecimiento >= 0 ? '+' : ''}${fmt(p.crecimiento)}</div>
+            </div>
+            <hr style="border: 1px solid ${p.color}; margin: 10px 0;">
+            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 10px;">
+                <div><strong>📊 Densidad:</strong><br>${fmt(p.densidad, 1)} hab/km²</div>
+                <div><strong>💰 Renta:</strong><br>${fmt(p.renta)}€/año</div>
+            </div>
+            <div style="margin-top: 10px;"><strong>👴 Índice Envejecimiento:</strong> ${fmt(p.envejecimiento, 1)}</div>
+        </div>
+    </div>`;
+}
+"""
+
+MUNICIPALITY_TOOLTIP_JS = "function(p) { return `🏘️ ${p.municipio} | 👥 ${Number(p.poblacion).toLocaleString('en-US')} hab`; }"
+
+
+def _column(data: pd.DataFrame, column: str, default) -> pd.Series:
+    """Columna del DataFrame o serie constante si no existe"""
+    return data[column] if column in data.columns else pd.Series(default, index=data.index)
+
+
 class EpicHealthMaps:
     def __init__(self):
         # Coordenadas centrales de Málaga
@@ -39,25 +117,29 @@ class EpicHealthMaps:
             'urgencias_generales': '#f44336'
         }
 
-        # Generador de IDs únicos para evitar conflictos en Folium
-        import time
-        import random
+        # Generador de IDs únicos y deterministas (mismo mapa -> mismos IDs, cacheable)
+        self.reset_ids("epic")
+
+    def reset_ids(self, seed: str):
+        """Reiniciar la secuencia de IDs con una semilla (una por mapa generado)"""
         self._unique_counter = 0
-        self._base_id = f"{int(time.time() * 1000)}_{random.randint(1000, 9999)}"
+        self._base_id = seed
 
     def _get_unique_id(self, prefix="feature_group"):
         """Generar ID único para feature groups"""
         self._unique_counter += 1
         return f"{prefix}_{self._base_id}_{self._unique_counter}"
     
-    def create_epic_base_map(self, style: str = 'OpenStreetMap', zoom_start: int = 9) -> folium.Map:
+    def create_epic_base_map(self, style: str = 'Dark Theme', zoom_start: int = 9) -> folium.Map:
         """Crear mapa base épico de Málaga"""
         
         # Crear mapa con configuración premium
+        tiles, attribution = MAP_STYLES.get(style, MAP_STYLES['Dark Theme'])
         m = folium.Map(
             location=self.malaga_center,
             zoom_start=zoom_start,
-            tiles='CartoDB dark_matter',
+            tiles=tiles,
+            attr=attribution,
             prefer_canvas=True,
             control_scale=True
         )
@@ -105,220 +187,175 @@ class EpicHealthMaps:
     def add_epic_hospitals(self, map_obj: folium.Map, hospitals_data: pd.DataFrame) -> folium.Map:
         """Añadir hospitales con marcadores épicos y popups interactivos"""
 
-        # Crear grupo de capas para hospitales con ID único
-        hospital_layer = folium.FeatureGroup(
+        # Propiedades por columna (sin iterar filas); los popups se generan en el navegador al abrirse
+        camas = pd.to_numeric(_column(hospitals_data, 'camas_funcionamiento_2025', 0), errors='coerce').fillna(0)
+        poblacion = pd.to_numeric(_column(hospitals_data, 'poblacion_referencia_2025', np.nan), errors='coerce')
+        properties = pd.DataFrame({
+            'nombre': _column(hospitals_data, 'nombre', 'N/A'),
+            'tipo': _column(hospitals_data, 'tipo_centro', 'N/A'),
+            'municipio': _column(hospitals_data, 'municipio', 'N/A'),
+            'distrito': _column(hospitals_data, 'distrito_sanitario', 'N/A'),
+            'camas': _column(hospitals_data, 'camas_funcionamiento_2025', 'N/A'),
+            'personal': _column(hospitals_data, 'personal_sanitario_2025', 'N/A'),
+            'poblacion': poblacion,
+            'urgencias': _column(hospitals_data, 'urgencias_24h', False).fillna(False).astype(bool),
+            'uci': _column(hospitals_data, 'uci_camas', 0),
+            'color': _column(hospitals_data, 'tipo_centro', 'Desconocido').map(self.hospital_colors).fillna('#95a5a6'),
+            # Tamaño basado en número de camas
+            'radius': np.select([camas > 1000, camas > 500], [25, 20], default=15),
+            'opacity': 0.9,
+        })
+        latitudes = pd.to_numeric(_column(hospitals_data, 'latitud', 0), errors='coerce')
+        longitudes = pd.to_numeric(_column(hospitals_data, 'longitud', 0), errors='coerce')
+
+        hospital_layer = build_point_layer(
+            points_feature_collection(latitudes, longitudes, properties),
             name="🏥 Hospitales",
-            overlay=True,
-            control=True,
-            show=True
+            popup_function=HOSPITAL_POPUP_JS,
+            tooltip_function=HOSPITAL_TOOLTIP_JS,
+            layer_id=self._get_unique_id("hospitals"),
+            weight=3,
+            max_width=320
         )
-        # Asignar ID único manualmente
-        hospital_layer._name = self._get_unique_id("hospitals")
-        
-        for idx, hospital in hospitals_data.iterrows():
-            # Determinar color y tamaño según tipo
-            color = self.hospital_colors.get(hospital.get('tipo_centro', 'Desconocido'), '#95a5a6')
-            
-            # Tamaño basado en número de camas
-            camas_raw = hospital.get('camas_funcionamiento_2025', 0)
-            camas = int(camas_raw) if isinstance(camas_raw, (int, float)) and camas_raw is not None else 0
-            if camas > 1000:
-                radius = 25
-                icon_size = 'large'
-            elif camas > 500:
-                radius = 20
-                icon_size = 'medium'
-            else:
-                radius = 15
-                icon_size = 'small'
-            
-            # 🎨 POPUP ÉPICO CON INFORMACIÓN COMPLETA
-            popup_html = f"""
-            <div style="width: 300px; font-family: Arial;">
-                <div style="background: linear-gradient(135deg, {color}, {color}cc); color: white; padding: 10px; border-radius: 10px 10px 0 0;">
-                    <h3 style="margin: 0; font-size: 16px;">🏥 {hospital.get('nombre', 'N/A')}</h3>
-                    <p style="margin: 5px 0; opacity: 0.9;">{hospital.get('tipo_centro', 'N/A')}</p>
-                </div>
-                
-                <div style="background: white; padding: 15px; border-radius: 0 0 10px 10px; border: 2px solid {color};">
-                    <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 10px;">
-                        <div>
-                            <strong>📍 Ubicación:</strong><br>
-                            {hospital.get('municipio', 'N/A')}<br>
-                            <small>{hospital.get('distrito_sanitario', 'N/A')}</small>
-                        </div>
-                        <div>
-                            <strong>🛏️ Capacidad:</strong><br>
-                            {hospital.get('camas_funcionamiento_2025', 'N/A')} camas<br>
-                            <small>{hospital.get('personal_sanitario_2025', 'N/A')} profesionales</small>
-                        </div>
-                    </div>
-                    
-                    <hr style="border: 1px solid {color}; margin: 10px 0;">
-                    
-                    <div>
-                        <strong>👥 Población Referencia:</strong><br>
-                        {f"{hospital.get('poblacion_referencia_2025', 0):,}" if isinstance(hospital.get('poblacion_referencia_2025'), (int, float)) and hospital.get('poblacion_referencia_2025') != 'N/A' else 'N/A'} habitantes
-                    </div>
-                    
-                    <div style="margin-top: 10px;">
-                        <strong>🚨 Urgencias 24h:</strong> 
-                        {'✅ SÍ' if hospital.get('urgencias_24h', False) else '❌ NO'}
-                    </div>
-                    
-                    <div style="margin-top: 10px;">
-                        <strong>🏥 UCI:</strong> 
-                        {hospital.get('uci_camas', 0)} camas
-                    </div>
-                </div>
-            </div>
-            """
-            
-            # 🎯 MARCADOR ÉPICO
-            folium.CircleMarker(
-                location=[hospital.get('latitud', 0), hospital.get('longitud', 0)],
-                radius=radius,
-                popup=folium.Popup(popup_html, max_width=320),
-                color='white',
-                weight=3,
-                fillColor=color,
-                fillOpacity=0.9,
-                tooltip=f"🏥 {hospital.get('nombre', 'N/A')} | 🛏️ {hospital.get('camas_funcionamiento_2025', 'N/A')} camas"
+
+        # ⭐ ICONO ADICIONAL PARA HOSPITALES GRANDES
+        for lat, lon in zip(latitudes[camas > 800], longitudes[camas > 800]):
+            folium.Marker(
+                location=[lat, lon],
+                icon=folium.Icon(color='red', icon='plus-sign', prefix='fa'),
+                tooltip="🏥 Hospital Principal"
             ).add_to(hospital_layer)
-            
-            # ⭐ ICONO ADICIONAL PARA HOSPITALES GRANDES
-            if camas > 800:
-                folium.Marker(
-                    location=[hospital.get('latitud', 0), hospital.get('longitud', 0)],
-                    icon=folium.Icon(color='red', icon='plus-sign', prefix='fa'),
-                    tooltip="🏥 Hospital Principal"
-                ).add_to(hospital_layer)
-        
+
         map_obj.add_child(hospital_layer)
         return map_obj
-    
+
     def add_epic_municipalities(self, map_obj: folium.Map, demographics_data: pd.DataFrame) -> folium.Map:
         """Añadir municipios con círculos proporcionales a población"""
 
-        municipalities_layer = folium.FeatureGroup(
+        poblacion = pd.to_numeric(demographics_data['poblacion_2025'], errors='coerce').fillna(0)
+        crecimiento = pd.to_numeric(demographics_data['crecimiento_2024_2025'], errors='coerce').fillna(0)
+        # Coordenadas del nomenclátor (los municipios sin coordenadas se descartan)
+        coords = get_gazetteer().lookup_municipalities(demographics_data['municipio'].astype(str).tolist())
+
+        # Color basado en crecimiento: alto (verde), moderado (naranja) o decrecimiento (rojo)
+        growth_levels = [crecimiento > 1000, crecimiento > 0]
+        properties = pd.DataFrame({
+            'municipio': demographics_data['municipio'].astype(str),
+            'poblacion': poblacion,
+            'crecimiento': crecimiento,
+            'densidad': _column(demographics_data, 'densidad_hab_km2_2025', np.nan),
+            'renta': _column(demographics_data, 'renta_per_capita_2024', np.nan),
+            'envejecimiento': _column(demographics_data, 'indice_envejecimiento_2025', np.nan),
+            'color': np.select(growth_levels, ['#27ae60', '#f39c12'], default='#e74c3c'),
+            'opacity': np.select(growth_levels, [0.8, 0.6], default=0.4),
+            # Tamaño proporcional a población
+            'radius': np.clip(poblacion / 10000, 5, 30),
+        })
+
+        municipalities_layer = build_point_layer(
+            points_feature_collection(coords[:, 0], coords[:, 1], properties),
             name="🏘️ Municipios",
-            overlay=True,
-            control=True,
-            show=True
+            popup_function=MUNICIPALITY_POPUP_JS,
+            tooltip_function=MUNICIPALITY_TOOLTIP_JS,
+            layer_id=self._get_unique_id("municipalities"),
+            weight=2,
+            max_width=300
         )
-        municipalities_layer._name = self._get_unique_id("municipalities")
-        
-        for idx, muni in demographics_data.iterrows():
-            población = muni['poblacion_2025']
-            crecimiento = muni['crecimiento_2024_2025']
-            
-            # Coordenadas aproximadas de municipios principales
-            coords = self.get_municipality_coords(muni['municipio'])
-            if not coords:
-                continue
-            
-            # Tamaño proporcional a población
-            radius = max(5, min(30, población / 10000))
-            
-            # Color basado en crecimiento
-            if crecimiento > 1000:
-                color = '#27ae60'  # Verde para alto crecimiento
-                opacity = 0.8
-            elif crecimiento > 0:
-                color = '#f39c12'  # Naranja para crecimiento moderado
-                opacity = 0.6
-            else:
-                color = '#e74c3c'  # Rojo para decrecimiento
-                opacity = 0.4
-            
-            # 🎨 POPUP MUNICIPAL ÉPICO
-            popup_municipal = f"""
-            <div style="width: 280px; font-family: Arial;">
-                <div style="background: linear-gradient(135deg, {color}, {color}aa); color: white; padding: 10px; border-radius: 10px 10px 0 0;">
-                    <h3 style="margin: 0;">🏘️ {muni['municipio']}</h3>
-                    <p style="margin: 5px 0; opacity: 0.9;">Provincia de Málaga</p>
-                </div>
-                
-                <div style="background: white; padding: 15px; border-radius: 0 0 10px 10px; border: 2px solid {color};">
-                    <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 10px;">
-                        <div>
-                            <strong>👥 Población 2025:</strong><br>
-                            {f"{población:,}" if isinstance(población, (int, float)) else población} habitantes
-                        </div>
-                        <div>
-                            <strong>📈 Crecimiento:</strong><br>
-                            {'+' if crecimiento >= 0 else ''}{crecimiento:,}
-                        </div>
-                    </div>
-                    
-                    <hr style="border: 1px solid {color}; margin: 10px 0;">
-                    
-                    <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 10px;">
-                        <div>
-                            <strong>📊 Densidad:</strong><br>
-                            {muni['densidad_hab_km2_2025']:.1f} hab/km²
-                        </div>
-                        <div>
-                            <strong>💰 Renta:</strong><br>
-                            {muni['renta_per_capita_2024']:,}€/año
-                        </div>
-                    </div>
-                    
-                    <div style="margin-top: 10px;">
-                        <strong>👴 Índice Envejecimiento:</strong> {muni['indice_envejecimiento_2025']:.1f}
-                    </div>
-                </div>
-            </div>
-            """
-            
-            # Círculo proporcional épico
-            folium.CircleMarker(
-                location=coords,
-                radius=radius,
-                popup=folium.Popup(popup_municipal, max_width=300),
-                color='white',
-                weight=2,
-                fillColor=color,
-                fillOpacity=opacity,
-                tooltip=f"🏘️ {muni['municipio']} | 👥 {población:,} hab"
-            ).add_to(municipalities_layer)
-        
+
         map_obj.add_child(municipalities_layer)
         return map_obj
     
-    def create_accessibility_heatmap(self, map_obj: folium.Map, accessibility_data: pd.DataFrame) -> folium.Map:
-        """Crear heatmap épico de accesibilidad"""
-
-        import streamlit as st
+    def create_accessibility_heatmap(self, map_obj: folium.Map, accessibility_data: pd.DataFrame,
+                                     hospitals_data: pd.DataFrame = None, show: bool = True) -> folium.Map:
+        """Crear heatmap épico de accesibilidad (rejilla hexagonal precalculada en el servidor)"""
 
-        # DESACTIVADO TEMPORALMENTE: HeatMap causa error "canvas width is 0" en Streamlit
-        st.warning("⚠️ El heatmap está temporalmente desactivado debido a problemas de compatibilidad con el canvas HTML.")
-        st.info("📊 Puedes ver la accesibilidad mediante las **Rutas Principales** que muestran tiempos de viaje por color.")
+        if hospitals_data is None or hospitals_data.empty:
+            return map_obj
 
-        # Alternativa: Mostrar información de accesibilidad como texto
-        if not accessibility_data.empty:
-            st.markdown("### 📍 Datos de Accesibilidad Disponibles")
+        # Capa vectorial en lugar de HeatMap: sin cálculo en el canvas del navegador
+        grid = get_accessibility_geojson({'accesibilidad': accessibility_data, 'hospitales': hospitals_data})
+        heat_layer = folium.FeatureGroup(
+            name="🔥 Accesibilidad (tiempo al hospital)",
+            overlay=True,
+            control=True,
+            show=show
+        )
+        heat_layer._name = self._get_unique_id("accessibility_grid")
 
-            avg_time = accessibility_data['tiempo_coche_minutos'].mean()
-            max_time = accessibility_data['tiempo_coche_minutos'].max()
-            min_time = accessibility_data['tiempo_coche_minutos'].min()
+        folium.GeoJson(
+            grid,
+            style_function=lambda feature: {
+                'fillColor': feature['properties']['color'],
+                'color': feature['properties']['color'],
+                'weight': 0.5,
+                'fillOpacity': 0.45
+            },
+            tooltip=folium.GeoJsonTooltip(
+                fields=['tiempo_minutos', 'distancia_km', 'hospital'],
+                aliases=['⏱️ Tiempo estimado (min):', '📏 Distancia (km):', '🏥 Hospital más cercano:']
+            )
+        ).add_to(heat_layer)
 
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("⏱️ Tiempo Medio", f"{avg_time:.0f} min")
-            with col2:
-                st.metric("⏱️ Tiempo Máximo", f"{max_time:.0f} min")
-            with col3:
-                st.metric("⏱️ Tiempo Mínimo", f"{min_time:.0f} min")
+        # Leyenda de bandas de tiempo, visible solo con la capa activa
+        legend_items = ''.join(
+            f'<div><span style="display: inline-block; width: 12px; height: 12px; background: {color}; '
+            f'margin-right: 6px;"></span>{label}</div>'
+            for _, color, label in ACCESS_TIME_BANDS
+        )
+        heat_layer.add_child(LayerLegend(
+            f'<strong>⏱️ Tiempo al hospital</strong>{legend_items}',
+            style='''position: fixed; bottom: 30px; right: 10px; z-index: 9999; background: white;
+                     padding: 8px 12px; border-radius: 8px; font-family: Arial; font-size: 12px;
+                     box-shadow: 0 2px 6px rgba(0,0,0,0.3);'''
+        ))
+        map_obj.add_child(heat_layer)
 
         return map_obj
     
+    def add_boundary_layers(self, map_obj: folium.Map, zoom: int, show_municipalities: bool = True,
+                            directory: str = BOUNDARIES_DIR) -> folium.Map:
+        """Añadir límites de municipios y distritos sanitarios precalculados para el zoom del mapa
+
+        No añade ninguna capa hasta publicar los límites desde una fuente administrativa oficial
+        con scripts/build_boundaries.py --source
+        """
+
+        boundaries = [
+            ('distritos', "🗂️ Distritos Sanitarios", 'distrito_sanitario', '🗂️ Distrito:', 2.5, True),
+            ('municipios', "🗺️ Límites Municipales", 'municipio', '🏘️ Municipio:', 1, show_municipalities),
+        ]
+        for layer_name, title, field, alias, weight, show in boundaries:
+            # Ficheros generados por scripts/build_boundaries.py (sin construir polígonos por render)
+            geometries = load_boundaries(layer_name, zoom, directory)
+            if geometries is None:
+                continue
+
+            boundary_layer = folium.FeatureGroup(name=title, overlay=True, control=True, show=show)
+            boundary_layer._name = self._get_unique_id(f"boundaries_{layer_name}")
+            folium.GeoJson(
+                geometries,
+                style_function=lambda feature, weight=weight: {
+                    'color': '#ecf0f1',
+                    'weight': weight,
+                    'fillOpacity': 0.03,
+                    'dashArray': None if weight > 1 else '4 4'
+                },
+                tooltip=folium.GeoJsonTooltip(fields=[field], aliases=[alias])
+            ).add_to(boundary_layer)
+            map_obj.add_child(boundary_layer)
+
+        return map_obj
+
     def add_service_coverage_circles(self, map_obj: folium.Map, hospitals_data: pd.DataFrame, services_data: pd.DataFrame) -> folium.Map:
         """Añadir círculos de cobertura de servicios especializados"""
         
+        service_table = get_hospital_service_table({'hospitales': hospitals_data, 'servicios': services_data})
+        if 'latitud' not in service_table.columns:
+            return map_obj
+        
         # Crear capas para cada especialidad
         for specialty in ['cardiologia', 'neurologia', 'oncologia_medica', 'pediatria']:
-            if specialty not in services_data.columns:
+            if specialty not in service_table.attrs.get('service_flags', []):
                 continue
             
             specialty_layer = folium.FeatureGroup(
@@ -329,36 +366,31 @@ class EpicHealthMaps:
             )
             specialty_layer._name = self._get_unique_id(f"specialty_{specialty}")
             
-            # Hospitales con esta especialidad
-            hospitals_with_specialty = services_data[services_data[specialty] == True].copy()
+            # Hospitales con esta especialidad (tabla de unión precalculada)
+            hospitals_with_specialty = service_table[
+                service_table[specialty] & service_table['latitud'].notna()
+            ]
+            color = self.specialty_colors.get(specialty, '#95a5a6')
             
-            for idx, service_row in hospitals_with_specialty.iterrows():
-                # Encontrar hospital correspondiente
-                hospital_row = hospitals_data[hospitals_data['nombre'].str.contains(
-                    service_row['centro_sanitario'].replace('Hospital ', '').replace('CAR ', ''), na=False
-                )].copy()
-
-                if len(hospital_row) > 0:
-                    hospital = hospital_row.iloc[0]
-                    color = self.specialty_colors.get(specialty, '#95a5a6')
-                    
-                    # Círculo de cobertura (radio de 30km aproximadamente)
-                    folium.Circle(
-                        location=[hospital.get('latitud', 0), hospital.get('longitud', 0)],
-                        radius=30000,  # 30km en metros
-                        popup=f"💊 Cobertura {specialty.replace('_', ' ').title()}<br>🏥 {service_row['centro_sanitario']}",
-                        color=color,
-                        weight=2,
-                        fillColor=color,
-                        fillOpacity=0.1,
-                        tooltip=f"💊 {specialty.replace('_', ' ').title()}"
-                    ).add_to(specialty_layer)
+            for hospital in hospitals_with_specialty.itertuples(index=False):
+                # Círculo de cobertura (radio de 30km aproximadamente)
+                folium.Circle(
+                    location=[hospital.latitud, hospital.longitud],
+                    radius=30000,  # 30km en metros
+                    popup=f"💊 Cobertura {specialty.replace('_', ' ').title()}<br>🏥 {hospital.centro_sanitario}",
+                    color=color,
+                    weight=2,
+                    fillColor=color,
+                    fillOpacity=0.1,
+                    tooltip=f"💊 {specialty.replace('_', ' ').title()}"
+                ).add_to(specialty_layer)
             
             map_obj.add_child(specialty_layer)
         
         return map_obj
     
-    def add_epic_routes(self, map_obj: folium.Map, accessibility_data: pd.DataFrame) -> folium.Map:
+    def add_epic_routes(self, map_obj: folium.Map, accessibility_data: pd.DataFrame,
+                        hospitals_data: pd.DataFrame = None) -> folium.Map:
         """Añadir rutas épicas entre municipios y hospitales"""
 
         routes_layer = folium.FeatureGroup(
@@ -373,75 +405,70 @@ class EpicHealthMaps:
         important_routes = accessibility_data.loc[
             (accessibility_data['tiempo_coche_minutos'] > 45) |
             (accessibility_data['municipio_origen'].isin(['Marbella', 'Vélez-Málaga', 'Antequera', 'Ronda']))
-        ].copy()
+        ]
+
+        # Con datos de hospitales: coordenadas reales y hospital más cercano desde la tabla de rutas
+        routing = None
+        if hospitals_data is not None:
+            routing = get_routing_table({'accesibilidad': accessibility_data, 'hospitales': hospitals_data})
+            positions = routing.registry.resolve_positions(important_routes['hospital_destino'])
+            nearest_ids = routing.nearest.set_index('municipio')['hospital_id']
         
-        for idx, route in important_routes.iterrows():
-            municipio_coords = self.get_municipality_coords(route['municipio_origen'])
-            hospital_coords = self.get_hospital_coords(route['hospital_destino'])
-            
+        # Coordenadas de origen y destino de todas las rutas
+        route_coords = []
+        for i, route in enumerate(important_routes.itertuples(index=False)):
+            municipio_coords = self.get_municipality_coords(route.municipio_origen)
+            if routing is not None:
+                hospital_coords = routing.hospital_coords[positions[i]].tolist() if positions[i] >= 0 else None
+                is_nearest = positions[i] >= 0 and \
+                    nearest_ids.get(route.municipio_origen) == routing.hospital_ids[positions[i]]
+            else:
+                hospital_coords = self.get_hospital_coords(route.hospital_destino)
+                is_nearest = False
             if municipio_coords and hospital_coords:
-                tiempo = route['tiempo_coche_minutos']
-                
-                # Color de ruta según tiempo
-                if tiempo > 60:
-                    color = '#e74c3c'  # Rojo para rutas largas
-                    weight = 4
-                elif tiempo > 45:
-                    color = '#f39c12'  # Naranja para rutas medias
-                    weight = 3
-                else:
-                    color = '#27ae60'  # Verde para rutas cortas
-                    weight = 2
-                
-                # Crear línea de ruta
-                folium.PolyLine(
-                    locations=[municipio_coords, hospital_coords],
-                    weight=weight,
-                    color=color,
-                    opacity=0.7,
-                    popup=f"🛣️ {route['municipio_origen']} → {route['hospital_destino']}<br>⏱️ {tiempo} min<br>💰 {route['coste_transporte_euros']:.2f}€",
-                    tooltip=f"⏱️ {tiempo} min"
-                ).add_to(routes_layer)
+                route_coords.append((route, municipio_coords, hospital_coords, is_nearest))
+
+        # Distancias en línea recta de todas las rutas en una sola operación
+        straight_km = haversine_km(*np.array([list(m) + list(h) for _, m, h, _ in route_coords]).reshape(-1, 4).T)
+
+        for (route, municipio_coords, hospital_coords, is_nearest), distance in zip(route_coords, straight_km):
+            tiempo = route.tiempo_coche_minutos
+            
+            # Color de ruta según tiempo
+            if tiempo > 60:
+                color = '#e74c3c'  # Rojo para rutas largas
+                weight = 4
+            elif tiempo > 45:
+                color = '#f39c12'  # Naranja para rutas medias
+                weight = 3
+            else:
+                color = '#27ae60'  # Verde para rutas cortas
+                weight = 2
+            
+            nearest_label = "<br>⭐ Hospital más cercano" if is_nearest else ""
+            
+            # Crear línea de ruta
+            folium.PolyLine(
+                locations=[municipio_coords, hospital_coords],
+                weight=weight,
+                color=color,
+                opacity=0.7,
+                popup=f"🛣️ {route.municipio_origen} → {route.hospital_destino}<br>⏱️ {tiempo} min<br>📏 {distance:.1f} km en línea recta<br>💰 {route.coste_transporte_euros:.2f}€{nearest_label}",
+                tooltip=f"⏱️ {tiempo} min"
+            ).add_to(routes_layer)
         
         map_obj.add_child(routes_layer)
         return map_obj
     
     def get_municipality_coords(self, municipio: str) -> Tuple[float, float]:
-        """Obtener coordenadas aproximadas de municipios principales"""
-        coords_map = {
-            'Málaga': [36.7213, -4.4214],
-            'Marbella': [36.5108, -4.8856],
-            'Vélez-Málaga': [36.7875, -4.1017],
-            'Fuengirola': [36.5297, -4.6262],
-            'Mijas': [36.5908, -4.6386],
-            'Torremolinos': [36.6201, -4.4996],
-            'Benalmádena': [36.5988, -4.6219],
-            'Antequera': [37.0179, -4.5613],
-            'Ronda': [36.7427, -5.1658],
-            'Estepona': [36.4270, -5.1448],
-            'Nerja': [36.7576, -3.8739],
-            'Rincón de la Victoria': [36.7175, -4.2717],
-            'Coín': [36.6598, -4.7539],
-            'Alhaurín de la Torre': [36.6583, -4.5611]
-        }
-        return coords_map.get(municipio, None)
+        """Obtener coordenadas de un municipio (nomenclátor)"""
+        coords = get_gazetteer().municipality_coords_for(municipio)
+        return list(coords) if coords else None
     
     def get_hospital_coords(self, hospital_name: str) -> Tuple[float, float]:
-        """Obtener coordenadas de hospitales"""
-        hospital_coords = {
-            'Hospital Regional Málaga': [36.7213, -4.4192],
-            'Hospital Costa del Sol': [36.5108, -4.8856],
-            'Hospital Axarquía': [36.7875, -4.1017],
-            'Hospital Antequera': [37.0179, -4.5613],
-            'Hospital Ronda': [36.7427, -5.1658]
-        }
-        
-        # Buscar coincidencias parciales
-        for key, coords in hospital_coords.items():
-            if any(word in hospital_name for word in key.split()):
-                return coords
-        
-        return None
+        """Obtener coordenadas de hospitales (nomenclátor, resolución por código o nombre)"""
+        coords = get_gazetteer().hospital_coords_for(hospital_name)
+        return list(coords) if coords else None
     
     def create_epic_control_panel(self, map_obj: folium.Map) -> folium.Map:
         """Añadir panel de control épico con leyenda"""
@@ -542,20 +569,21 @@ class EpicHealthMaps:
         return map_obj
     
     def create_epic_complete_map(self, hospitals_data: pd.DataFrame, demographics_data: pd.DataFrame, 
-                               services_data: pd.DataFrame, accessibility_data: pd.DataFrame) -> folium.Map:
+                               services_data: pd.DataFrame, accessibility_data: pd.DataFrame,
+                               zoom_start: int = 9, style: str = 'Dark Theme') -> folium.Map:
         """Crear mapa épico completo con todas las funcionalidades"""
         
         # 1. Crear mapa base épico
-        epic_map = self.create_epic_base_map()
+        epic_map = self.create_epic_base_map(style=style, zoom_start=zoom_start)
         
         # 2. Añadir todas las capas épicas
+        epic_map = self.add_boundary_layers(epic_map, zoom_start, show_municipalities=False)
         epic_map = self.add_epic_hospitals(epic_map, hospitals_data)
         epic_map = self.add_epic_municipalities(epic_map, demographics_data)
-        # NOTA: Heatmap desactivado en mapa completo - causa error "canvas width is 0"
-        # El heatmap está disponible en el mapa específico "Heatmap de Accesibilidad"
-        # epic_map = self.create_accessibility_heatmap(epic_map, accessibility_data)
+        # Rejilla de accesibilidad oculta por defecto (activable desde el control de capas)
+        epic_map = self.create_accessibility_heatmap(epic_map, accessibility_data, hospitals_data, show=False)
         epic_map = self.add_service_coverage_circles(epic_map, hospitals_data, services_data)
-        epic_map = self.add_epic_routes(epic_map, accessibility_data)
+        epic_map = self.add_epic_routes(epic_map, accessibility_data, hospitals_data)
         
         # 3. Añadir controles épicos
         epic_map = self.create_epic_control_panel(epic_map)
@@ -1,9 +1,14 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import folium
 from streamlit_folium import st_folium
 import pandas as pd
 from typing import Dict
 
+from modules.geo.distance import haversine_km
+from modules.geo.spatial_index import get_hospital_index, get_municipality_index
+from modules.visualization.map_render_cache import get_cached_map, get_cached_map_html, map_cache_seed
+
 try:
     from modules.visualization.interactive_maps import EpicHealthMaps
     MAPS_AVAILABLE = True
@@ -14,6 +19,16 @@ except ImportError:
     except ImportError:
         MAPS_AVAILABLE = False
 
+# Datasets usados por cada tipo de mapa
+MAP_DATASETS = {
+    'completo': ('hospitales', 'demografia', 'servicios', 'accesibilidad'),
+    'hospitales': ('hospitales',),
+    'municipios': ('demografia',),
+    'heatmap': ('hospitales', 'accesibilidad'),
+    'cobertura': ('hospitales', 'servicios'),
+    'rutas': ('hospitales', 'demografia', 'accesibilidad'),
+}
+
 class MapInterface:
     def __init__(self):
         if MAPS_AVAILABLE:
@@ -100,6 +115,7 @@ class MapInterface:
             st.session_state.current_map_type = selected_map
             st.session_state.filtered_data = filtered_data
             st.session_state.zoom_level = zoom_level
+            st.session_state.map_style = map_style
 
             # Limpiar mapa anterior para forzar regeneración
             if 'current_map' in st.session_state:
@@ -112,37 +128,44 @@ class MapInterface:
         if st.session_state.map_generated:
             st.markdown(f"### 🗺️ {st.session_state.current_map_type}")
 
-            # Generar mapa FRESH cada vez para evitar conflictos de IDs
+            interactive = st.checkbox(
+                "🖱️ Modo interactivo (información al hacer clic)", value=True,
+                help="Muestra la información del punto seleccionado. Desactivado, el mapa estático se sirve desde la cache."
+            )
+            map_data = None
+
             with st.spinner("🎨 Renderizando mapa..."):
                 try:
                     selected_map = st.session_state.current_map_type
                     filtered_data = st.session_state.filtered_data
                     zoom_level = st.session_state.get('zoom_level', 9)
+                    map_style = st.session_state.get('map_style', 'Dark Theme')
+                    role = ','.join(sorted(user_permissions or []))
 
-                    # Crear mapa fresh
-                    if "Completo" in selected_map:
-                        epic_map = self.create_complete_epic_map(filtered_data, zoom_level)
-                    elif "Hospitales" in selected_map or "Ubicaciones Básicas" in selected_map:
-                        epic_map = self.create_hospitals_map(filtered_data, zoom_level)
-                    elif "Municipios" in selected_map or "Análisis Demográfico" in selected_map:
-                        epic_map = self.create_municipalities_map(filtered_data, zoom_level)
-                    elif "Heatmap" in selected_map:
-                        epic_map = self.create_accessibility_heatmap(filtered_data, zoom_level)
-                    elif "Cobertura" in selected_map:
-                        epic_map = self.create_coverage_map(filtered_data, zoom_level)
-                    elif "Rutas" in selected_map:
-                        epic_map = self.create_routes_map(filtered_data, zoom_level)
+                    if interactive:
+                        # Objeto Folium cacheado con la misma clave que el HTML; key estática (IDs deterministas)
+                        epic_map = get_cached_map(
+                            filtered_data,
+                            lambda: self.build_map(selected_map, filtered_data, zoom_level, map_style, role),
+                            selected_map, role, zoom_level, map_style,
+                            depends_on=self.get_map_datasets(selected_map)
+                        )
+                        map_data = st_folium(
+                            epic_map,
+                            width=1200,
+                            height=600,
+                            returned_objects=["last_clicked"],
+                            key="epic_map_display"
+                        )
                     else:
-                        epic_map = self.create_complete_epic_map(filtered_data, zoom_level)
-
-                    # Renderizar con key estática (ya no necesitamos IDs únicos porque el mapa es fresh)
-                    map_data = st_folium(
-                        epic_map,
-                        width=1200,
-                        height=600,
-                        returned_objects=["last_clicked"],
-                        key="epic_map_display"
-                    )
+                        # HTML cacheado por (tipo, rol, zoom, estilo, versión de datos): sin Folium en los aciertos
+                        map_html = get_cached_map_html(
+                            filtered_data,
+                            lambda: self.build_map(selected_map, filtered_data, zoom_level, map_style, role),
+                            selected_map, role, zoom_level, map_style,
+                            depends_on=self.get_map_datasets(selected_map)
+                        )
+                        components.html(map_html, height=600)
 
                 except Exception as e:
                     st.error(f"❌ Error renderizando mapa: {str(e)}")
@@ -168,7 +191,41 @@ class MapInterface:
         # Panel de información
         self.render_map_info_panel(data)
     
-    def create_complete_epic_map(self, data: Dict, zoom_level: int) -> folium.Map:
+    def get_map_kind(self, selected_map: str) -> str:
+        """Tipo de mapa a partir de la opción seleccionada"""
+        if "Completo" in selected_map:
+            return 'completo'
+        if "Hospitales" in selected_map or "Ubicaciones Básicas" in selected_map:
+            return 'hospitales'
+        if "Municipios" in selected_map or "Análisis Demográfico" in selected_map:
+            return 'municipios'
+        if "Heatmap" in selected_map:
+            return 'heatmap'
+        if "Cobertura" in selected_map:
+            return 'cobertura'
+        if "Rutas" in selected_map:
+            return 'rutas'
+        return 'completo'
+
+    def get_map_datasets(self, selected_map: str) -> tuple:
+        """Datasets de los que depende cada tipo de mapa (clave de cache)"""
+        return MAP_DATASETS[self.get_map_kind(selected_map)]
+
+    def build_map(self, selected_map: str, data: Dict, zoom_level: int, style: str = 'Dark Theme',
+                  role: str = '') -> folium.Map:
+        """Construir el mapa Folium seleccionado con IDs deterministas"""
+        self.epic_maps.reset_ids(map_cache_seed(selected_map, role, zoom_level, style))
+        builders = {
+            'completo': self.create_complete_epic_map,
+            'hospitales': self.create_hospitals_map,
+            'municipios': self.create_municipalities_map,
+            'heatmap': self.create_accessibility_heatmap,
+            'cobertura': self.create_coverage_map,
+            'rutas': self.create_routes_map,
+        }
+        return builders[self.get_map_kind(selected_map)](data, zoom_level, style)
+
+    def create_complete_epic_map(self, data: Dict, zoom_level: int, style: str = 'Dark Theme') -> folium.Map:
         """Crear mapa completo con todas las funcionalidades épicas"""
         
         try:
@@ -179,7 +236,7 @@ class MapInterface:
             if missing_datasets:
                 st.warning(f"⚠️ Datasets faltantes para mapa completo: {', '.join(missing_datasets)}")
                 # Crear mapa básico solo con los datos disponibles
-                epic_map = self.epic_maps.create_epic_base_map(zoom_start=zoom_level)
+                epic_map = self.epic_maps.create_epic_base_map(style=style, zoom_start=zoom_level)
                 
                 if 'hospitales' in data and not data['hospitales'].empty:
                     epic_map = self.epic_maps.add_epic_hospitals(epic_map, data['hospitales'])
@@ -195,21 +252,23 @@ class MapInterface:
                 hospitals_data=data['hospitales'],
                 demographics_data=data['demografia'],
                 services_data=data.get('servicios', pd.DataFrame()),
-                accessibility_data=data.get('accesibilidad', pd.DataFrame())
+                accessibility_data=data.get('accesibilidad', pd.DataFrame()),
+                zoom_start=zoom_level,
+                style=style
             )
             
         except Exception as e:
             st.error(f"❌ Error creando mapa completo: {str(e)}")
             # Fallback: crear mapa básico
-            epic_map = self.epic_maps.create_epic_base_map(zoom_start=zoom_level)
+            epic_map = self.epic_maps.create_epic_base_map(style=style, zoom_start=zoom_level)
             if 'hospitales' in data and not data['hospitales'].empty:
                 epic_map = self.epic_maps.add_epic_hospitals(epic_map, data['hospitales'])
             return epic_map
     
-    def create_hospitals_map(self, data: Dict, zoom_level: int) -> folium.Map:
+    def create_hospitals_map(self, data: Dict, zoom_level: int, style: str = 'Dark Theme') -> folium.Map:
         """Crear mapa enfocado en hospitales"""
         
-        epic_map = self.epic_maps.create_epic_base_map(zoom_start=zoom_level)
+        epic_map = self.epic_maps.create_epic_base_map(style=style, zoom_start=zoom_level)
         epic_map = self.epic_maps.add_epic_hospitals(epic_map, data['hospitales'])
         epic_map = self.epic_maps.create_epic_control_panel(epic_map)
         
@@ -227,10 +286,11 @@ class MapInterface:
         
         return epic_map
     
-    def create_municipalities_map(self, data: Dict, zoom_level: int) -> folium.Map:
+    def create_municipalities_map(self, data: Dict, zoom_level: int, style: str = 'Dark Theme') -> folium.Map:
         """Crear mapa enfocado en municipios"""
         
-        epic_map = self.epic_maps.create_epic_base_map(zoom_start=zoom_level)
+        epic_map = self.epic_maps.create_epic_base_map(style=style, zoom_start=zoom_level)
+        epic_map = self.epic_maps.add_boundary_layers(epic_map, zoom_level)
         epic_map = self.epic_maps.add_epic_municipalities(epic_map, data['demografia'])
         epic_map = self.epic_maps.create_epic_control_panel(epic_map)
         
@@ -248,12 +308,12 @@ class MapInterface:
         
         return epic_map
     
-    def create_accessibility_heatmap(self, data: Dict, zoom_level: int) -> folium.Map:
+    def create_accessibility_heatmap(self, data: Dict, zoom_level: int, style: str = 'Dark Theme') -> folium.Map:
         """Crear heatmap de accesibilidad"""
         
-        epic_map = self.epic_maps.create_epic_base_map(zoom_start=zoom_level)
+        epic_map = self.epic_maps.create_epic_base_map(style=style, zoom_start=zoom_level)
         if 'accesibilidad' in data and not data['accesibilidad'].empty:
-            epic_map = self.epic_maps.create_accessibility_heatmap(epic_map, data['accesibilidad'])
+            epic_map = self.epic_maps.create_accessibility_heatmap(epic_map, data['accesibilidad'], data['hospitales'])
         epic_map = self.epic_maps.add_epic_hospitals(epic_map, data['hospitales'])
         
         # Título específico para accesibilidad
@@ -270,10 +330,10 @@ class MapInterface:
         
         return epic_map
     
-    def create_coverage_map(self, data: Dict, zoom_level: int) -> folium.Map:
+    def create_coverage_map(self, data: Dict, zoom_level: int, style: str = 'Dark Theme') -> folium.Map:
         """Crear mapa de cobertura de especialidades"""
         
-        epic_map = self.epic_maps.create_epic_base_map(zoom_start=zoom_level)
+        epic_map = self.epic_maps.create_epic_base_map(style=style, zoom_start=zoom_level)
         epic_map = self.epic_maps.add_epic_hospitals(epic_map, data['hospitales'])
         epic_map = self.epic_maps.add_service_coverage_circles(epic_map, data['hospitales'], data['servicios'])
         epic_map = self.epic_maps.create_epic_control_panel(epic_map)
@@ -292,14 +352,14 @@ class MapInterface:
         
         return epic_map
     
-    def create_routes_map(self, data: Dict, zoom_level: int) -> folium.Map:
+    def create_routes_map(self, data: Dict, zoom_level: int, style: str = 'Dark Theme') -> folium.Map:
         """Crear mapa de rutas principales"""
         
-        epic_map = self.epic_maps.create_epic_base_map(zoom_start=zoom_level)
+        epic_map = self.epic_maps.create_epic_base_map(style=style, zoom_start=zoom_level)
         epic_map = self.epic_maps.add_epic_hospitals(epic_map, data['hospitales'])
         epic_map = self.epic_maps.add_epic_municipalities(epic_map, data['demografia'])
         if 'accesibilidad' in data and not data['accesibilidad'].empty:
-            epic_map = self.epic_maps.add_epic_routes(epic_map, data['accesibilidad'])
+            epic_map = self.epic_maps.add_epic_routes(epic_map, data['accesibilidad'], data['hospitales'])
         epic_map = self.epic_maps.create_epic_control_panel(epic_map)
         
         # Título específico para rutas
@@ -331,12 +391,9 @@ class MapInterface:
                 
                 # Buscar hospital más cercano
                 closest_hospital = self.find_closest_hospital(lat, lng, data['hospitales'])
-                if closest_hospital:
-                    distance = self.calculate_distance(lat, lng, 
-                                                     closest_hospital['latitud'], 
-                                                     closest_hospital['longitud'])
+                if closest_hospital is not None:
                     st.write(f"**Hospital más cercano:** {closest_hospital['nombre']}")
-                    st.write(f"**Distancia:** {distance:.1f} km")
+                    st.write(f"**Distancia:** {closest_hospital['distancia_km']:.1f} km")
             
             with col2:
                 # Buscar municipio más cercano
@@ -581,59 +638,27 @@ class MapInterface:
             """)
     
     def find_closest_hospital(self, lat: float, lng: float, hospitals_data: pd.DataFrame):
-        """Encontrar hospital más cercano a unas coordenadas"""
+        """Encontrar hospital más cercano a unas coordenadas (índice espacial precalculado)"""
         
-        min_distance = float('inf')
-        closest_hospital = None
-        
-        for _, hospital in hospitals_data.iterrows():
-            distance = self.calculate_distance(lat, lng, hospital['latitud'], hospital['longitud'])
-            if distance < min_distance:
-                min_distance = distance
-                closest_hospital = hospital
+        index = get_hospital_index({'hospitales': hospitals_data})
+        if len(index) == 0:
+            return None
         
+        distances, indices = index.query(lat, lng, k=1)
+        closest_hospital = hospitals_data.iloc[index.positions[indices[0, 0]]].copy()
+        closest_hospital['distancia_km'] = float(distances[0, 0])
         return closest_hospital
     
     def find_closest_municipality(self, lat: float, lng: float, demographics_data: pd.DataFrame):
         """Encontrar municipio más cercano"""
         
-        municipality_coords = {
-            'Málaga': [36.7213, -4.4214],
-            'Marbella': [36.5108, -4.8856],
-            'Vélez-Málaga': [36.7875, -4.1017],
-            'Antequera': [37.0179, -4.5613],
-            'Ronda': [36.7427, -5.1658]
-        }
-        
-        min_distance = float('inf')
-        closest_municipality = None
-        
-        for municipality, coords in municipality_coords.items():
-            distance = self.calculate_distance(lat, lng, coords[0], coords[1])
-            if distance < min_distance:
-                min_distance = distance
-                closest_municipality = municipality
-        
-        return closest_municipality
+        closest = get_municipality_index({'demografia': demographics_data}).nearest(lat, lng)
+        return closest[0] if closest else None
     
     def calculate_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
         """Calcular distancia entre dos puntos en km"""
         
-        from math import radians, sin, cos, sqrt, atan2
-        
-        # Convertir a radianes
-        lat1, lng1, lat2, lng2 = map(radians, [lat1, lng1, lat2, lng2])
-        
-        # Fórmula de Haversine
-        dlat = lat2 - lat1
-        dlng = lng2 - lng1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlng/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-        
-        # Radio de la Tierra en km
-        R = 6371
-        
-        return R * c
+        return float(haversine_km(lat1, lng1, lat2, lng2))
     
     def get_maps_by_permissions(self, user_permissions: list) -> list:
         """Obtener mapas disponibles según permisos del usuario"""
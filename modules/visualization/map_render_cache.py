@@ -0,0 +1,97 @@
+"""
+Cache de Mapas Renderizados - Copilot Salud Andalucía
+HTML y objetos de los mapas Folium generados una vez por (tipo de mapa, rol, zoom, estilo, versión de
+datos); los aciertos de cache no construyen ningún objeto Folium
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+
+import folium
+from branca.element import Element
+import pandas as pd
+
+from modules.performance.derived_data_store import DerivedDataStore
+
+
+# El HTML (y el objeto) de un mapa ocupa cientos de KB: almacén propio y pequeño para no desalojar las tablas derivadas
+MAP_HTML_CACHE_ENTRIES = 16
+
+
+def map_cache_seed(map_type: str, role: str, zoom: int, style: str) -> str:
+    """Semilla estable para los identificadores de un mapa"""
+    key = f"{map_type}|{role}|{zoom}|{style}"
+    return hashlib.blake2b(key.encode(), digest_size=4).hexdigest()
+
+
+def assign_deterministic_ids(map_obj: folium.Map, seed: str) -> folium.Map:
+    """Sustituir los identificadores aleatorios de Folium por una secuencia estable"""
+    counter = 0
+    visited = {}
+    pending = [map_obj.get_root()]
+    while pending:
+        element = pending.pop(0)
+        if id(element) in visited:
+            continue
+        visited[id(element)] = (element, element.get_name())
+        element._id = f"{seed}{counter:04x}"
+        counter += 1
+        pending.extend(element._children.values())
+        # Elementos referenciados como atributo (p. ej. la capa del minimapa) sin ser hijos
+        pending.extend(value for value in vars(element).values() if isinstance(value, Element))
+
+    # Las claves de los hijos se usan como nombres de variable en algunas plantillas (popups)
+    for element, _ in visited.values():
+        element._children = OrderedDict(
+            (child.get_name() if id(child) in visited and key == visited[id(child)][1] else key, child)
+            for key, child in element._children.items()
+        )
+    return map_obj
+
+
+def render_map_html(map_obj: folium.Map, seed: str) -> str:
+    """HTML completo del mapa con identificadores deterministas"""
+    return assign_deterministic_ids(map_obj, seed).get_root().render()
+
+
+def get_cached_map_html(data: Dict[str, pd.DataFrame], builder: Callable[[], folium.Map],
+                        map_type: str, role: str, zoom: int, style: str,
+                        depends_on: Optional[Iterable[str]] = None) -> str:
+    """HTML del mapa para la versión actual de los datasets de los que depende"""
+    seed = map_cache_seed(map_type, role, zoom, style)
+    return get_map_html_store().get_or_compute(
+        'map_html',
+        data,
+        lambda: render_map_html(builder(), seed),
+        depends_on=depends_on,
+        params={'map_type': map_type, 'role': role, 'zoom': zoom, 'style': style}
+    )
+
+
+def get_cached_map(data: Dict[str, pd.DataFrame], builder: Callable[[], folium.Map],
+                   map_type: str, role: str, zoom: int, style: str,
+                   depends_on: Optional[Iterable[str]] = None) -> folium.Map:
+    """Objeto Folium del mapa (modo interactivo) con la misma clave que su HTML cacheado"""
+    return get_map_html_store().get_or_compute(
+        'map_object',
+        data,
+        builder,
+        depends_on=depends_on,
+        params={'map_type': map_type, 'role': role, 'zoom': zoom, 'style': style}
+    )
+
+
+_map_html_store: Optional[DerivedDataStore] = None
+_map_html_store_lock = threading.Lock()
+
+
+def get_map_html_store() -> DerivedDataStore:
+    """Obtener instancia compartida del almacén de HTML de mapas"""
+    global _map_html_store
+    if _map_html_store is None:
+        with _map_html_store_lock:
+            if _map_html_store is None:
+                _map_html_store = DerivedDataStore(max_entries=MAP_HTML_CACHE_ENTRIES)
+    return _map_html_store
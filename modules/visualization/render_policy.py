@@ -0,0 +1,119 @@
+"""
+Política de Renderizado - Copilot Salud Andalucía
+Límites de puntos enviados al navegador: WebGL por encima de un umbral, reducción LTTB o
+mín-máx para líneas, muestreo de dispersiones e histogramas pre-agrupados con NumPy
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Por encima de este número de puntos las trazas se dibujan con WebGL (Scattergl)
+WEBGL_POINT_THRESHOLD = 5000
+
+# Puntos máximos por traza enviados al navegador
+MAX_LINE_POINTS = 2000
+MAX_SCATTER_POINTS = 20000
+
+# Los histogramas con más filas se agrupan en el servidor (solo viajan los conteos)
+HISTOGRAM_PREBIN_THRESHOLD = 5000
+
+# Categorías a partir de las cuales una barra por categoría deja de ser legible
+MAX_BAR_CATEGORIES = 50
+
+
+def scatter_render_mode(n_points: int) -> str:
+    """Modo de renderizado de Plotly Express según el número de puntos"""
+    return 'webgl' if n_points >= WEBGL_POINT_THRESHOLD else 'svg'
+
+
+def _as_float(values: pd.Series) -> np.ndarray:
+    """Valores numéricos o temporales como float64 (las fechas en nanosegundos)"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+    return values.to_numpy(dtype=np.float64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Índices elegidos por Largest-Triangle-Three-Buckets (x creciente, sin NaN)"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 cubos entre el primer y el último punto, que siempre se conservan
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        area = np.abs((x[previous] - avg_x) * (bucket_y - y[previous])
+                      - (x[previous] - bucket_x) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Índices del mínimo y el máximo de cada cubo (conserva picos con cualquier eje X)"""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, max(1, n_out // 2) + 1).astype(np.int64)
+    selected = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            bucket = y[start:end]
+            selected.append(start + int(np.argmin(bucket)))
+            selected.append(start + int(np.argmax(bucket)))
+    return np.unique(np.asarray(selected, dtype=np.int64))
+
+
+def downsample_line(data: pd.DataFrame, x_col: str, y_col: str,
+                    max_points: int = MAX_LINE_POINTS) -> pd.DataFrame:
+    """Filas representativas de una serie: LTTB con X numérica o temporal creciente, mín-máx en otro caso"""
+    if len(data) <= max_points or not isinstance(y_col, str) or y_col not in data.columns:
+        return data
+    if not pd.api.types.is_numeric_dtype(data[y_col]):
+        return data
+
+    series = data[data[y_col].notna()]
+    if len(series) <= max_points:
+        return series
+    y = series[y_col].to_numpy(dtype=np.float64)
+
+    x_values = series[x_col] if x_col in series.columns else None
+    sortable = x_values is not None and (pd.api.types.is_numeric_dtype(x_values)
+                                         or pd.api.types.is_datetime64_any_dtype(x_values))
+    if sortable and x_values.notna().all() and x_values.is_monotonic_increasing:
+        indices = lttb_indices(_as_float(x_values), y, max_points)
+    else:
+        indices = minmax_indices(y, max_points)
+    return series.iloc[indices]
+
+
+def sample_points(data: pd.DataFrame, max_points: int = MAX_SCATTER_POINTS) -> pd.DataFrame:
+    """Muestra aleatoria reproducible de una dispersión, en el orden original de las filas"""
+    if len(data) <= max_points:
+        return data
+    return data.sample(n=max_points, random_state=0).sort_index()
+
+
+def prebin_histogram(values: pd.Series, nbins: int = 20) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Conteos y bordes de un histograma calculados con NumPy (None si no hay valores finitos)"""
+    array = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+    array = array[np.isfinite(array)]
+    if array.size == 0:
+        return None
+    counts, edges = np.histogram(array, bins=nbins)
+    return counts, edges
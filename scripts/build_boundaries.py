@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Script para generar los límites simplificados de municipios y distritos sanitarios a partir
+de una fuente administrativa oficial (un GeoJSON estático por capa y nivel de zoom en assets/geo)
+"""
+
+import argparse
+import os
+import sys
+
+# Añadir el directorio raíz al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from modules.geo.boundaries import BOUNDARIES_DIR, ZOOM_LEVELS, build_boundary_assets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generar límites simplificados por nivel de zoom")
+    parser.add_argument('--source', required=True,
+                        help="GeoJSON oficial de municipios (Polygon/MultiPolygon) con la propiedad de distrito")
+    parser.add_argument('--output', default=BOUNDARIES_DIR, help="Directorio de salida")
+    parser.add_argument('--district-key', default='distrito_sanitario', help="Propiedad del distrito sanitario")
+    parser.add_argument('--zoom', type=int, nargs='+', default=list(ZOOM_LEVELS), help="Niveles de zoom")
+    args = parser.parse_args()
+
+    print("🗺️ GENERANDO LÍMITES SIMPLIFICADOS")
+    print("=" * 40)
+    written = build_boundary_assets(args.source, args.output, args.district_key, args.zoom)
+    for path, size in written.items():
+        print(f"✅ {os.path.relpath(path, project_root)}: {size / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
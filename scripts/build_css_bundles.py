@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Script para generar los paquetes CSS minificados con hash de contenido
+(uno por tema, entorno y dispositivo) y su manifiesto en la carpeta de estáticos
+"""
+
+import argparse
+import os
+import sys
+
+# Añadir el directorio raíz al path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from modules.visualization.css_bundles import MANIFEST_FILE, STATIC_CSS_DIR, write_bundles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generar paquetes CSS con hash de contenido")
+    parser.add_argument('--output', default=STATIC_CSS_DIR, help="Directorio de salida (servido en /app/static/css)")
+    args = parser.parse_args()
+
+    print("🎨 GENERANDO PAQUETES CSS")
+    print("=" * 40)
+    bundles = write_bundles(args.output)
+    for bundle in bundles.values():
+        saving = 100 * (1 - len(bundle.content.encode('utf-8')) / bundle.source_size)
+        print(f"✅ {bundle.filename}: {len(bundle.content) / 1024:.1f} KB (-{saving:.0f}%)")
+    print(f"📄 Manifiesto: {os.path.relpath(os.path.join(args.output, MANIFEST_FILE), project_root)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -422,494 +422,8 @@ except ImportError as e:
 # Cargar variables de entorno
 load_dotenv()
 
-# Comprobar si reportlab está disponible para generación de PDF
-try:
-    import reportlab
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas as rl_canvas
-    REPORTLAB_AVAILABLE = True
-    REPORTLAB_IMPORT_ERROR = None
-except Exception as e:
-    REPORTLAB_AVAILABLE = False
-    REPORTLAB_IMPORT_ERROR = str(e)
-
-def create_pdf_bytes(title: str, text: str, use_simple_header: bool = False) -> bytes:
-    """Genera un PDF profesional y elegante usando ReportLab Platypus.
-
-    Características mejoradas:
-    - Diseño profesional con cabecera corporativa
-    - Estilos tipográficos elegantes y consistentes
-    - Detección inteligente de secciones y tablas
-    - Formateo automático de contenido markdown
-    - Espaciado y disposición optimizada
-    - Pie de página con información contextual
-    """
-    if not REPORTLAB_AVAILABLE:
-        raise RuntimeError(f"reportlab no disponible: {REPORTLAB_IMPORT_ERROR}")
-
-    from io import BytesIO
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table as RLTable, TableStyle, PageBreak
-    from reportlab.lib.units import mm
-    from reportlab.lib import colors
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.utils import ImageReader
-    import os
-    import re
-
-    buffer = BytesIO()
-
-    left_margin = 18 * mm
-    right_margin = 18 * mm
-    top_margin = 22 * mm
-    bottom_margin = 18 * mm
-
-    doc = SimpleDocTemplate(buffer, pagesize=A4,
-                            rightMargin=right_margin, leftMargin=left_margin,
-                            topMargin=top_margin, bottomMargin=bottom_margin)
-    # Añadir el modo de header como atributo del documento
-    doc.simple_header = use_simple_header
-
-    # Registrar fuentes TTF si existen en assets/fonts/
-    font_name = 'Helvetica'
-    assets_fonts_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets', 'fonts')
-    try:
-        if os.path.isdir(assets_fonts_dir):
-            # Buscar una fuente preferente
-            for fname in os.listdir(assets_fonts_dir):
-                if fname.lower().endswith('.ttf'):
-                    font_path = os.path.join(assets_fonts_dir, fname)
-                    try:
-                        pdfmetrics.registerFont(TTFont('CustomFont', font_path))
-                        font_name = 'CustomFont'
-                        break
-                    except Exception:
-                        continue
-    except Exception:
-        pass
-
-    styles = getSampleStyleSheet()
-
-    # Estilos profesionales corporativos mejorados
-    main_title_style = ParagraphStyle(
-        'MainTitle', parent=styles['Heading1'],
-        fontName=font_name if font_name else 'Helvetica-Bold',
-        fontSize=24, leading=28,
-        spaceAfter=16, spaceBefore=8,
-        textColor=colors.white,
-        backColor=colors.HexColor('#3b82f6'),
-        borderWidth=1, borderColor=colors.HexColor('#1e40af'),
-        borderRadius=6,
-        leftIndent=16, rightIndent=16,
-        alignment=1  # Center
-    )
-
-    title_style = ParagraphStyle(
-        'ProfessionalTitle', parent=styles['Heading1'],
-        fontName=font_name if font_name else 'Helvetica-Bold',
-        fontSize=20, leading=24,
-        spaceAfter=12, spaceBefore=10,
-        textColor=colors.HexColor('#1e40af'),
-        backColor=colors.HexColor('#dbeafe'),
-        borderWidth=1, borderColor=colors.HexColor('#3b82f6'),
-        borderRadius=4,
-        leftIndent=12, rightIndent=12,
-        alignment=0  # Left align
-    )
-
-    subtitle_style = ParagraphStyle(
-        'ProfessionalSubtitle', parent=styles['Heading2'],
-        fontName=font_name if font_name else 'Helvetica-Bold',
-        fontSize=16, leading=20,
-        spaceBefore=12, spaceAfter=8,
-        textColor=colors.HexColor('#1e293b'),
-        backColor=colors.HexColor('#f8fafc'),
-        borderWidth=0, borderColor=colors.HexColor('#e2e8f0'),
-        borderRadius=3,
-        leftIndent=10, rightIndent=10,
-        alignment=0
-    )
-
-    heading_style = ParagraphStyle(
-        'ProfessionalHeading', parent=styles['Heading3'],
-        fontName=font_name if font_name else 'Helvetica-Bold',
-        fontSize=14, leading=17,
-        spaceBefore=10, spaceAfter=6,
-        textColor=colors.HexColor('#334155'),
-        backColor=colors.HexColor('#f1f5f9'),
-        leftIndent=8, rightIndent=8
-    )
-
-    body_style = ParagraphStyle(
-        'ProfessionalBody', parent=styles['BodyText'],
-        fontName=font_name if font_name else 'Helvetica',
-        fontSize=11, leading=15,
-        spaceBefore=4, spaceAfter=6,
-        textColor=colors.HexColor('#374151'),
-        alignment=4,  # Justify
-        leftIndent=0, rightIndent=0
-    )
-
-    important_style = ParagraphStyle(
-        'ImportantBox', parent=body_style,
-        backColor=colors.HexColor('#fef3c7'),
-        borderColor=colors.HexColor('#f59e0b'),
-        borderWidth=1, borderRadius=4,
-        leftIndent=14, rightIndent=14,
-        spaceBefore=8, spaceAfter=8,
-        textColor=colors.HexColor('#92400e')
-    )
-
-    recommendation_style = ParagraphStyle(
-        'RecommendationBox', parent=body_style,
-        backColor=colors.HexColor('#dcfce7'),
-        borderColor=colors.HexColor('#16a34a'),
-        borderWidth=1, borderRadius=4,
-        leftIndent=14, rightIndent=14,
-        spaceBefore=8, spaceAfter=8,
-        textColor=colors.HexColor('#166534')
-    )
-
-    conclusion_style = ParagraphStyle(
-        'ConclusionBox', parent=body_style,
-        backColor=colors.HexColor('#eff6ff'),
-        borderColor=colors.HexColor('#3b82f6'),
-        borderWidth=1, borderRadius=4,
-        leftIndent=14, rightIndent=14,
-        spaceBefore=8, spaceAfter=8,
-        textColor=colors.HexColor('#1e40af')
-    )
-
-    highlight_style = ParagraphStyle(
-        'HighlightBox', parent=body_style,
-        backColor=colors.HexColor('#dbeafe'),
-        borderColor=colors.HexColor('#3b82f6'),
-        borderWidth=1, borderRadius=4,
-        leftIndent=12, rightIndent=12,
-        spaceBefore=6, spaceAfter=6,
-        textColor=colors.HexColor('#1e40af'),
-        fontName=font_name if font_name else 'Helvetica-Bold'
-    )
-
-    list_style = ParagraphStyle(
-        'ListItem', parent=body_style,
-        leftIndent=20, rightIndent=0,
-        spaceBefore=2, spaceAfter=2,
-        bulletIndent=12,
-        bulletFontName=font_name if font_name else 'Helvetica-Bold',
-        bulletColor=colors.HexColor('#3b82f6')
-    )
-
-    small_style = ParagraphStyle(
-        'SmallText', parent=styles['BodyText'],
-        fontName=font_name if font_name else 'Helvetica',
-        fontSize=9, leading=11,
-        textColor=colors.HexColor('#64748b'),
-        spaceBefore=2, spaceAfter=2
-    )
-
-    story = []
-
-    # Helper: dibujar header/footer
-    def _header_footer(canvas, doc):
-        # Debug print para verificar el modo de header
-        print(f"Generating header with simple_mode: {doc.simple_header}")
-        canvas.saveState()
-        width, height = A4
-        # Logo en la izquierda si existe
-        try:
-            logo_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets', 'logo.png')
-            if os.path.exists(logo_path):
-                img = ImageReader(logo_path)
-                img_w = 36
-                img_h = 36
-                canvas.drawImage(img, left_margin, height - top_margin + 6, width=img_w, height=img_h, preserveAspectRatio=True, mask='auto')
-        except Exception:
-            pass
-
-            # Elegir entre header simple o mejorado
-            try:
-                if doc.simple_header:
-                    # Header simple minimalista en rojo
-                    canvas.setFont(font_name if font_name else 'Helvetica', 12)
-                    canvas.setFillColor(colors.HexColor('#FF0000'))  # Rojo
-                    canvas.drawString(left_margin, height - top_margin + 12, "VERSIÓN SIMPLE")
-                    canvas.setFont(font_name if font_name else 'Helvetica-Bold', 14)
-                    canvas.drawString(left_margin, height - top_margin + 30, title)
-                    
-                    # Línea roja gruesa
-                    canvas.setStrokeColor(colors.red)
-                    canvas.setLineWidth(2)
-                    canvas.line(left_margin, height - top_margin + 4, width - right_margin, height - top_margin + 4)
-                else:
-                    # Header profesional con diseño médico/sanitario
-                    header_h = 75
-
-                    # Fondo degradado azul médico
-                    canvas.setFillColor(colors.HexColor('#1e40af'))  # Azul médico principal
-                    canvas.rect(0, height - top_margin - header_h + 4, width, header_h, fill=1, stroke=0)
-
-                    # Franja decorativa lateral
-                    canvas.setFillColor(colors.HexColor('#0ea5e9'))  # Azul claro
-                    canvas.rect(0, height - top_margin - header_h + 4, 8, header_h, fill=1, stroke=0)
-
-                    # Logo/símbolo médico (cruz)
-                    canvas.setFillColor(colors.white)
-                    cross_x = left_margin + 15
-                    cross_y = height - top_margin - 15
-                    # Cruz médica estilizada
-                    canvas.rect(cross_x - 1, cross_y - 8, 2, 16, fill=1, stroke=0)
-                    canvas.rect(cross_x - 6, cross_y - 1, 12, 2, fill=1, stroke=0)
-
-                    # Título principal con tipografía elegante
-                    canvas.setFont(font_name if font_name else 'Helvetica-Bold', 18)
-                    canvas.setFillColor(colors.white)
-                    canvas.drawString(left_margin + 35, height - top_margin - 8, title)
-
-                    # Subtítulo descriptivo
-                    canvas.setFont(font_name if font_name else 'Helvetica', 11)
-                    canvas.setFillColor(colors.HexColor('#bfdbfe'))
-                    canvas.drawString(left_margin + 35, height - top_margin - 25, "Sistema de Análisis Sanitario - Copilot Salud Andalucía")
-
-                    # Información contextual
-                    canvas.setFont(font_name if font_name else 'Helvetica', 9)
-                    canvas.setFillColor(colors.HexColor('#93c5fd'))
-                    fecha = datetime.now().strftime("%d de %B de %Y - %H:%M")
-                    canvas.drawString(left_margin + 35, height - top_margin - 40, f"Generado: {fecha}")
-
-                    # Línea decorativa inferior
-                    canvas.setStrokeColor(colors.HexColor('#0ea5e9'))
-                    canvas.setLineWidth(2)
-                    canvas.line(left_margin, height - top_margin - header_h + 2, width - right_margin, height - top_margin - header_h + 2)
-            except Exception:
-                # Fallback ultra simple
-                canvas.setFont(font_name if font_name else 'Helvetica-Bold', 12)
-                canvas.setFillColor(colors.black)
-                canvas.drawString(left_margin, height - top_margin + 18, title)        # Línea separadora
-        canvas.setStrokeColor(colors.grey)
-        canvas.setLineWidth(0.5)
-        canvas.line(left_margin, height - top_margin + 4, width - right_margin, height - top_margin + 4)
-
-        # Footer con paginado
-        canvas.setFont(font_name if font_name else 'Helvetica', 8)
-        canvas.setFillColor(colors.grey)
-        page_num_text = f"Página {canvas.getPageNumber()}"
-        canvas.drawRightString(width - right_margin, bottom_margin - 6, page_num_text)
-        canvas.restoreState()
-
-    # Añadir encabezado inicial visual en el story
-    story.append(Paragraph(title, title_style))
-    story.append(Spacer(1, 6))
-
-    # Detectar bloques de tablas Markdown y procesar el texto en bloques intercalados
-    lines = text.split('\n')
-    blocks = []
-    cur_table = []
-    cur_text = []
-    def flush_text():
-        nonlocal cur_text
-        if cur_text:
-            blocks.append(('text', '\n'.join(cur_text).strip()))
-            cur_text = []
-    def flush_table():
-        nonlocal cur_table
-        if cur_table:
-            blocks.append(('table', list(cur_table)))
-            cur_table = []
-
-    for line in lines:
-        if line.strip().startswith('|') and '|' in line:
-            # parte de tabla
-            if cur_text:
-                flush_text()
-            cur_table.append(line)
-        else:
-            if cur_table:
-                flush_table()
-            cur_text.append(line)
-    flush_table()
-    flush_text()
-
-    # Procesar bloques y añadir al story con estilos profesionales
-    for btype, content in blocks:
-        if btype == 'text':
-            # Procesar línea a línea con detección inteligente de contenido
-            for line in content.split('\n'):
-                ln = line.strip()
-                if not ln:
-                    # Espacio entre párrafos
-                    story.append(Spacer(1, 3))
-                    continue
-
-                # Encabezados con estilos específicos
-                if ln.startswith('# '):
-                    content_text = ln[2:].strip()
-                    story.append(Paragraph(content_text, main_title_style))
-                    story.append(Spacer(1, 6))
-                    continue
-                elif ln.startswith('## '):
-                    content_text = ln[3:].strip()
-                    story.append(Paragraph(content_text, title_style))
-                    story.append(Spacer(1, 4))
-                    continue
-                elif ln.startswith('### '):
-                    content_text = ln[4:].strip()
-                    story.append(Paragraph(content_text, subtitle_style))
-                    story.append(Spacer(1, 3))
-                    continue
-
-                # Detección de contenido importante y aplicación de estilos
-                ln_lower = ln.lower()
-
-                # Contenido con formato especial para información importante
-                if ln.startswith('**') and ln.endswith('**'):
-                    content_text = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", ln)
-                    story.append(Paragraph(content_text, highlight_style))
-                    continue
-
-                # Listas con viñetas usando el estilo de lista
-                elif ln.startswith('- ') or ln.startswith('* '):
-                    item = ln[2:].strip()
-                    # Reemplazar markdown en línea
-                    item = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", item)
-                    item = re.sub(r"\*(.+?)\*", r"<i>\1</i>", item)
-                    story.append(Paragraph(f"• {item}", list_style))
-                    continue
-
-                # Listas numeradas
-                elif re.match(r"^\d+\.\s+", ln):
-                    ln_repl = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", ln)
-                    ln_repl = re.sub(r"\*(.+?)\*", r"<i>\1</i>", ln_repl)
-                    story.append(Paragraph(ln_repl, list_style))
-                    continue
-
-                # Contenido importante (alertas)
-                elif any(word in ln_lower for word in ['importante', 'clave', 'crítico', 'esencial', 'alerta', 'atención']):
-                    # Agregar icono de alerta
-                    content_text = f"⚠️ {ln}"
-                    content_text = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", content_text)
-                    story.append(Paragraph(content_text, important_style))
-                    continue
-
-                # Recomendaciones
-                elif any(word in ln_lower for word in ['recomendación', 'sugerencia', 'mejora', 'optimización', 'propuesta']):
-                    content_text = f"💡 {ln}"
-                    content_text = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", content_text)
-                    story.append(Paragraph(content_text, recommendation_style))
-                    continue
-
-                # Conclusiones y resultados
-                elif any(word in ln_lower for word in ['conclusión', 'resultado', 'hallazgo', 'resumen', 'balance']):
-                    content_text = f"📋 {ln}"
-                    content_text = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", content_text)
-                    story.append(Paragraph(content_text, conclusion_style))
-                    continue
-
-                # Párrafo normal con procesamiento de markdown
-                else:
-                    safe = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", ln)
-                    safe = re.sub(r"\*(.+?)\*", r"<i>\1</i>", safe)
-                    # Mejorar espaciado
-                    safe = safe.replace('  ', ' ')
-                    if safe:  # Solo agregar si no está vacío
-                        story.append(Paragraph(safe, body_style))
-
-            story.append(Spacer(1, 4))
-        elif btype == 'table':
-            # Parsear tabla Markdown
-            try:
-                rows = []
-                for r in content:
-                    # eliminar barras iniciales/finales y split
-                    cols = [c.strip() for c in r.strip().strip('|').split('|')]
-                    rows.append(cols)
-                # Si la segunda fila es separador ---|---, quitarla
-                if len(rows) > 1 and all(set(cell) <= set('-: ') for cell in rows[1]):
-                    # eliminar fila 1
-                    rows.pop(1)
-                # Crear tabla profesional con estilo corporativo
-                tbl = RLTable(rows, hAlign='CENTER')
-                tbl.setStyle(TableStyle([
-                    # Cabecera con estilo corporativo
-                    ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#3b82f6')),
-                    ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-                    ('FONTNAME', (0,0), (-1,0), font_name if font_name else 'Helvetica-Bold'),
-                    ('FONTSIZE', (0,0), (-1,0), 12),
-
-                    # Filas alternadas para mejor legibilidad
-                    ('BACKGROUND', (0,1), (-1,-1), colors.HexColor('#f8fafc')),
-                    ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#f1f5f9')]),
-
-                    # Estilo de contenido
-                    ('FONTNAME', (0,1), (-1,-1), font_name if font_name else 'Helvetica'),
-                    ('FONTSIZE', (0,1), (-1,-1), 10),
-                    ('TEXTCOLOR', (0,1), (-1,-1), colors.HexColor('#374151')),
-
-                    # Bordes y alineación
-                    ('GRID', (0,0), (-1,-1), 1, colors.HexColor('#e5e7eb')),
-                    ('LINEBELOW', (0,0), (-1,0), 2, colors.HexColor('#1e40af')),
-                    ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-                    ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-
-                    # Espaciado interno mejorado
-                    ('LEFTPADDING', (0,0), (-1,-1), 8),
-                    ('RIGHTPADDING', (0,0), (-1,-1), 8),
-                    ('TOPPADDING', (0,0), (-1,-1), 6),
-                    ('BOTTOMPADDING', (0,0), (-1,-1), 6),
-
-                    # Sombra sutil para la tabla
-                    ('BOX', (0,0), (-1,-1), 1, colors.HexColor('#d1d5db')),
-                ]))
-
-                # Agregar título para la tabla
-                story.append(Paragraph("📊 Tabla de Datos", subtitle_style))
-                story.append(Spacer(1, 4))
-                story.append(tbl)
-                story.append(Spacer(1, 10))
-            except Exception:
-                # En caso de error, insertar como texto
-                story.append(Paragraph('\n'.join(content), body_style))
-                story.append(Spacer(1, 6))
-
-    # Agregar pie de página profesional al documento
-    story.append(Spacer(1, 20))
-
-    # Línea separadora elegante
-    footer_separator = Paragraph(
-        '<para align="center">═══════════════════════════════════════════════════</para>',
-        ParagraphStyle('FooterSeparator', parent=small_style, textColor=colors.HexColor('#9ca3af'))
-    )
-    story.append(footer_separator)
-    story.append(Spacer(1, 8))
-
-    # Información del documento
-    footer_info = f"""
-    <para align="center">
-    <b>📋 Documento generado por Copilot Salud Andalucía</b><br/>
-    Sistema de Análisis Inteligente para la Gestión Sanitaria<br/>
-    <i>Provincia de Málaga - {datetime.now().strftime('%d de %B de %Y')}</i><br/>
-    </para>
-    """
-    story.append(Paragraph(footer_info, small_style))
-    story.append(Spacer(1, 6))
-
-    # Información técnica
-    technical_info = f"""
-    <para align="center">
-    <font color="#64748b" size="8">
-    Generado con ReportLab • Formato PDF Profesional<br/>
-    © 2025 Sistema Sanitario Andaluz - Uso Interno
-    </font>
-    </para>
-    """
-    story.append(Paragraph(technical_info, small_style))
-
-    # Construir el documento con header/footer profesional
-    doc.build(story, onFirstPage=_header_footer, onLaterPages=_header_footer)
-    buffer.seek(0)
-    return buffer.read()
+# Generación de PDF: estilos y fuentes de ReportLab se inicializan una vez por proceso
+from modules.reports.pdf_engine import REPORTLAB_AVAILABLE, REPORTLAB_IMPORT_ERROR, create_pdf_bytes
 
 def load_health_datasets_optimized(user_role: str = "invitado"):
     """Cargar datasets de salud con optimización avanzada por rol"""
@@ -1257,102 +771,34 @@ def clear_cache_if_needed():
         pass
 
 # Cargar CSS optimizado para el dispositivo
-def load_optimized_css():
-    """Cargar CSS optimizado según el dispositivo con cache"""
+def load_optimized_css(ios: bool = False):
+    """Inyectar el paquete CSS (minificado y con hash) del tema y dispositivo en una sola etiqueta"""
     try:
+        from modules.visualization.css_bundles import bundle_html, get_css_bundle, is_streamlit_cloud
+
         # Detectar si es móvil usando la variable global IS_MOBILE
         is_mobile = IS_MOBILE
+        theme_mode = st.session_state.get('theme_mode', 'light')
+        is_cloud = is_streamlit_cloud()
 
-        # CSS básico y MINIFICADO para móviles (más liviano y optimizado)
-        if is_mobile:
-            mobile_css = """
-            <style>
-            /* CSS Minificado para Móviles - Optimizado para carga rápida */
-            .main .block-container{padding:1rem;max-width:100%}
-            .stSidebar{background:#f8f9fa}
-            .stSelectbox label{font-size:14px}
-            .stButton button{width:100%;margin-bottom:0.5rem;padding:0.5rem}
-            .metric-card{margin-bottom:1rem;padding:1rem}
-            .stProgress .st-bo{height:4px}
-            .js-plotly-plot,.plotly{width:100%!important}
-            /* Optimizaciones adicionales para rendimiento */
-            *{-webkit-tap-highlight-color:transparent}
-            img{max-width:100%;height:auto}
-            .stSpinner>div{border-width:2px}
-            /* Reducir animaciones para mejor rendimiento */
-            *{animation-duration:0.2s!important;transition-duration:0.2s!important}
-            </style>
-            """
-            st.markdown(mobile_css, unsafe_allow_html=True)
-            print("📱 CSS móvil minificado aplicado")
-            return "mobile_basic"
-
-        # CSS completo para desktop - CON CACHE
-        # Detectar si estamos en Streamlit Cloud (método correcto según comunidad)
-        is_cloud = any([
-            os.getenv('USER') == 'appuser',  # Usuario en Streamlit Cloud
-            os.path.exists('/home/appuser/.streamlit/'),  # Directorio de Streamlit Cloud
-            'HOSTNAME' in os.environ and 'streamlit' in os.environ.get('HOSTNAME', '').lower(),
-            os.getenv('STREAMLIT_SERVER_ENABLE_XSRF_PROTECTION') is not None  # Variable específica de Cloud
-        ])
-
-        # OPTIMIZACIÓN FASE 3: Cargar common.css PRIMERO (estilos base compartidos)
-        # Este archivo contiene CSS común que estaba duplicado en múltiples temas
-        # Ahorro: ~7,500 bytes por eliminación de 51 duplicados exactos
-        common_css = load_css_file('assets/common.min.css')
-        if common_css:
-            # Cache buster para common.css
-            import hashlib
-            import time
-            css_hash = hashlib.md5(common_css.encode()).hexdigest()[:8]
-            cache_buster = int(time.time())
-            common_css_versioned = f"/* Common CSS (Fase 3) | Hash: {css_hash} | CB: {cache_buster} */\n{common_css}"
-            st.markdown(f"<style id='common-css-{cache_buster}'>{common_css_versioned}</style>", unsafe_allow_html=True)
-            # print("✅ Common CSS cargado (Fase 3 - Eliminación de duplicados)")
-
-        # Usar versión optimizada para Cloud (sin variables CSS, con !important)
-        if is_cloud:
-            theme_file = f'assets/theme_{st.session_state.theme_mode}_cloud.min.css'
-        else:
-            theme_file = f'assets/theme_{st.session_state.theme_mode}.min.css'
-
-        # print(f"🔍 Intentando cargar: {theme_file} (Cloud: {is_cloud})")
-        # print(f"📁 Project root: {project_root}")
-        # print(f"📂 Ruta absoluta: {os.path.join(project_root, theme_file)}")
-        # print(f"✅ Existe archivo: {os.path.exists(os.path.join(project_root, theme_file))}")
+        # Un único paquete por variante: base común, tema, guardián del login, componentes,
+        # CSS crítico, fuentes y (en iOS) los fixes de Safari, en el orden de la cascada
+        bundle = get_css_bundle(theme_mode, cloud=is_cloud, mobile=is_mobile, ios=ios)
 
         # Guardar info de debug en session_state para mostrarla después
         st.session_state['css_debug_info'] = {
-            'tema': st.session_state.theme_mode,
+            'tema': theme_mode,
             'is_cloud': is_cloud,
-            'theme_file': theme_file,
-            'user_env': os.getenv("USER", "N/A"),
-            'hostname_env': os.getenv("HOSTNAME", "N/A"),
-            'appuser_path_exists': os.path.exists('/home/appuser/.streamlit/')
+            'bundle_file': bundle.filename,
+            'bundle_size': len(bundle.content),
+            'source_size': bundle.source_size,
         }
 
-        theme_css = load_css_file(theme_file)
-        if theme_css:
-            # print(f"✅ CSS cargado exitosamente: {len(theme_css)} caracteres")
-
-            # Agregar hash del contenido + timestamp para cache-busting AGRESIVO
-            import hashlib
-            import time
-            css_hash = hashlib.md5(theme_css.encode()).hexdigest()[:8]
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            cache_buster = int(time.time())  # Unix timestamp para forzar recarga
-
-            # Comentario con timestamp Y hash para romper caché del navegador
-            css_with_version = f"/* CSS Version: {timestamp} | Hash: {css_hash} | CB: {cache_buster} */\n{theme_css}"
-
-            # print(f"🎨 CSS aplicado - Tema: {st.session_state.theme_mode} | Hash: {css_hash} | CB: {cache_buster}")
-            # Usar ID único en el style tag para forzar re-render
-            st.markdown(f"<style id='theme-css-{cache_buster}'>{css_with_version}</style>", unsafe_allow_html=True)
-            return f"theme_{st.session_state.theme_mode}_{'cloud' if is_cloud else 'local'}"
-        else:
-            # Fallback inmediato si no se puede cargar el tema
-            # print(f"❌ No se pudo cargar {theme_file}")
-            raise Exception(f"No se pudo cargar el tema principal: {theme_file}")
+        # Contenido estable entre reruns (sin timestamps): el navegador no re-aplica estilos idénticos
+        st.markdown(bundle_html(bundle), unsafe_allow_html=True)
+        if is_mobile:
+            return "mobile_basic"
+        return f"theme_{theme_mode}_{'cloud' if is_cloud else 'local'}"
 
     except Exception as e:
         # Fallback con cache
@@ -1475,12 +921,11 @@ clear_cache_if_needed()
 def load_ios_fixes():
     """Cargar fixes de iOS solo cuando sea necesario - VERSIÓN SEGURA"""
     try:
-        # Leer archivos CSS y JS primero
-        ios_fixes_css = load_css_file('assets/ios_safari_fixes.css')
+        # El CSS (ios_safari_fixes.css) va en el paquete CSS de la variante iOS (ver load_optimized_css)
         safari_js = load_css_file('assets/safari_detector.js')
 
-        # Si no se cargan los archivos, usar un fix mínimo y seguro
-        if not ios_fixes_css or not safari_js:
+        # Si no se carga el detector, usar un fix mínimo y seguro
+        if not safari_js:
             print("⚠️ Archivos iOS no disponibles - usando fixes mínimos")
             minimal_ios_fix = """
             <script>
@@ -1512,14 +957,10 @@ def load_ios_fixes():
             st.markdown(minimal_ios_fix, unsafe_allow_html=True)
             return
 
-        # Procesar archivos cargados de forma segura
-        # 1. Escapar CSS para template literals
-        ios_fixes_css_escaped = ios_fixes_css.replace('\\', '\\\\').replace('`', '\\`').replace('${', '\\${')
-
-        # 2. NO intentar extraer el IIFE de safari_js, usarlo directamente en el HTML
+        # NO intentar extraer el IIFE de safari_js, usarlo directamente en el HTML
         # El safari_js ya viene con su propia estructura IIFE completa
 
-        # Crear script seguro con CSS inline y JS separado
+        # Crear script seguro con meta tags y JS separado
         safe_ios_script = f"""
         <script>
         (function() {{
@@ -1533,12 +974,6 @@ def load_ios_fixes():
                 if (isIOS && isSafari) {{
                     console.log('iOS Safari detectado - Cargando fixes específicos...');
 
-                    // Inyectar CSS de forma segura
-                    const style = document.createElement('style');
-                    style.id = 'ios-safari-fixes';
-                    style.textContent = `{ios_fixes_css_escaped}`;
-                    document.head.appendChild(style);
-
                     // Meta tags específicos
                     let viewport = document.querySelector('meta[name="viewport"]');
                     if (!viewport) {{
@@ -1908,6 +1343,21 @@ class SecureHealthAnalyticsApp:
                 
                 # Cargar datos
                 self.data = self._load_datasets_static()
+
+                # Precálculo en segundo plano de las tablas derivadas (solo si cambió la versión de datos)
+                if self.data:
+                    try:
+                        from modules.performance.precompute_scheduler import get_precompute_scheduler
+                        get_precompute_scheduler().submit(self.data)
+                    except Exception as e:
+                        print(f"⚠️ Error encolando precálculo: {str(e)}")
+
+                    # Pregeneración nocturna de los informes estándar por rol
+                    try:
+                        from modules.reports.report_queue import get_report_queue
+                        get_report_queue().schedule_nightly(self.data)
+                    except Exception as e:
+                        print(f"⚠️ Error programando informes nocturnos: {str(e)}")
                 
                 # Registrar acceso a datos
                 if self.security_auditor:
@@ -2131,10 +1581,13 @@ class SecureHealthAnalyticsApp:
             
             # Información del sistema personalizada por rol
             if self.data and self.has_permission('ver_datos'):
+                from modules.analytics.kpi_engine import get_health_kpis
+                kpis = get_health_kpis(self.data)
+
                 if sidebar_style == 'expanded':
                     st.markdown("### 📊 KPIs Ejecutivos")
-                    total_hospitales = len(self.data['hospitales'])
-                    total_poblacion = self.data['demografia']['poblacion_2025'].sum()
+                    total_hospitales = kpis.total_centers
+                    total_poblacion = kpis.total_population
                     
                     st.metric("🏥 Centros", total_hospitales)
                     st.metric("👥 Población", f"{total_poblacion/1000:.0f}K")
@@ -2142,19 +1595,17 @@ class SecureHealthAnalyticsApp:
                     
                 elif sidebar_style == 'compact':
                     st.markdown("### ⚙️ Métricas Operativas")
-                    if 'accesibilidad' in self.data:
-                        avg_time = self.data['accesibilidad']['tiempo_coche_minutos'].mean()
-                        st.metric("⏱️ Tiempo Medio", f"{avg_time:.0f} min")
+                    if kpis.avg_access_time is not None:
+                        st.metric("⏱️ Tiempo Medio", f"{kpis.avg_access_time:.0f} min")
                     
                 elif sidebar_style == 'detailed':
                     st.markdown("### 📈 Indicadores Analíticos")
-                    if 'indicadores' in self.data:
-                        avg_ratio = self.data['indicadores']['ratio_medico_1000_hab'].mean()
-                        st.metric("👨‍⚕️ Ratio Médicos", f"{avg_ratio:.1f}/1K")
+                    if kpis.doctor_ratio is not None:
+                        st.metric("👨‍⚕️ Ratio Médicos", f"{kpis.doctor_ratio:.1f}/1K")
                 
                 else:  # minimal
                     st.markdown("### 📋 Info Básica")
-                    st.info(f"🏥 {len(self.data['hospitales'])} centros disponibles")
+                    st.info(f"🏥 {kpis.total_centers} centros disponibles")
                 
                 # Indicador de acceso a IA
                 if self.ai_processor:
@@ -2183,109 +1634,9 @@ class SecureHealthAnalyticsApp:
 def fix_plotly_hover_issues(fig):
     """Aplicar correcciones EXTREMAS a gráficos de Plotly para eliminar TODOS los errores de hover"""
     try:
-        # PASO 1: Deshabilitar COMPLETAMENTE hover en todas las trazas
-        for trace in fig.data:
-            try:
-                trace.update(hoverinfo='none', hovertemplate=None)
-                # Eliminar atributos problemáticos si existen
-                if hasattr(trace, 'hoversubplots'):
-                    delattr(trace, 'hoversubplots')
-            except:
-                pass
-
-        # PASO 2: RECREAR COMPLETAMENTE la figura sin hover
-        try:
-            # Obtener layout limpio
-            layout_dict = dict(fig.layout)
-
-            # Eliminar TODAS las configuraciones de hover del layout
-            hover_keys = [
-                'hovermode', 'hoversubplots', 'hoverdistance', 'spikedistance',
-                'hoverlabel', 'hovertemplate', 'hoverformat'
-            ]
-
-            clean_layout = {}
-            for k, v in layout_dict.items():
-                if k not in hover_keys:
-                    if isinstance(v, dict):
-                        # Limpiar diccionarios anidados
-                        clean_v = {sk: sv for sk, sv in v.items() if sk not in hover_keys}
-                        clean_layout[k] = clean_v
-                    else:
-                        clean_layout[k] = v
-
-            # Forzar configuración segura
-            clean_layout.update({
-                'hovermode': False
-            })
-
-            # Si hay ejes, limpiarlos también
-            for axis in ['xaxis', 'yaxis']:
-                if axis in clean_layout:
-                    if isinstance(clean_layout[axis], dict):
-                        clean_layout[axis].update({
-                            'rangeslider': dict(visible=False)
-                        })
-                        # Eliminar hover de ejes
-                        hover_axis_keys = ['hoverformat']
-                        for hk in hover_axis_keys:
-                            if hk in clean_layout[axis]:
-                                del clean_layout[axis][hk]
-
-            # Crear nueva figura completamente limpia
-            new_fig = go.Figure(layout=clean_layout)
-
-            # Agregar traces uno por uno para evitar problemas de estructura
-            for trace in fig.data:
-                try:
-                    # Crear un nuevo trace limpio sin hover
-                    new_trace = type(trace)()
-                    # Copiar propiedades del trace original excepto hover
-                    for key in dir(trace):
-                        if not key.startswith('_') and key not in ['hoverinfo', 'hovertemplate', 'hoverlabel', 'hovertext']:
-                            try:
-                                value = getattr(trace, key)
-                                # Solo copiar atributos de datos, no métodos
-                                if not callable(value):
-                                    setattr(new_trace, key, value)
-                            except:
-                                pass
-                    new_fig.add_trace(new_trace)
-                except Exception as trace_error:
-                    print(f"Error agregando trace: {trace_error}")
-                    # Fallback: agregar el trace original
-                    try:
-                        new_fig.add_trace(trace)
-                    except:
-                        continue
-
-            fig = new_fig
-
-        except Exception as recreation_error:
-            print(f"Error recreando figura: {recreation_error}")
-            print(f"Tipo de error: {type(recreation_error).__name__}")
-            if hasattr(recreation_error, 'args'):
-                print(f"Argumentos del error: {recreation_error.args}")
-
-            # Fallback a método original
-            try:
-                fig.update_layout(hovermode=False)
-            except Exception as fallback_error:
-                print(f"Error en fallback: {fallback_error}")
-                # Crear figura básica nueva si todo falla
-                fig = go.Figure()
-
-        # PASO 3: Protección para subplots múltiples
-        for i in range(1, 11):  # xaxis1 hasta xaxis10
-            try:
-                axis_updates = {
-                    f'xaxis{i}': dict(
-                        rangeslider=dict(visible=False)
-                    )
-                }
-                fig.update_layout(**axis_updates)
-            except:
-                pass
+        # Hover desactivado y rangeslider oculto en una única actualización (sin clonar trazas)
+        from modules.visualization.figure_policy import apply_hover_policy
+        return apply_hover_policy(fig)
 
     except Exception as e:
         print(f"Error CRÍTICO en fix_plotly_hover_issues: {e}")
@@ -2302,10 +1653,9 @@ def fix_plotly_hover_issues(fig):
 def add_resource_hints():
     """
     Agregar resource hints para optimizar carga de recursos críticos
-    OPTIMIZACIÓN FASE 3: Preload, prefetch y preconnect
+    OPTIMIZACIÓN FASE 3: DNS prefetch y preconnect
 
     Resource hints:
-    - preload: Cargar recursos críticos con alta prioridad
     - dns-prefetch: Resolver DNS de dominios externos anticipadamente
     - preconnect: Establecer conexiones tempranas a orígenes externos
     """
@@ -2313,13 +1663,7 @@ def add_resource_hints():
         hints_html = """
         <!-- OPTIMIZACIÓN FASE 3: Resource Hints para carga rápida -->
 
-        <!-- Preload de CSS crítico (carga con alta prioridad) -->
-        <link rel="preload" href="assets/style.min.css" as="style">
-        <link rel="preload" href="assets/login.min.css" as="style">
-
-        <!-- Preload de temas (según modo) -->
-        <link rel="preload" href="assets/theme_light_cloud.min.css" as="style">
-        <link rel="preload" href="assets/theme_dark_cloud.min.css" as="style">
+        <!-- El CSS de la app llega en un único paquete con hash (ver load_optimized_css) -->
 
         <!-- DNS prefetch para recursos externos potenciales -->
         <link rel="dns-prefetch" href="https://fonts.googleapis.com">
@@ -2377,6 +1721,10 @@ def main():
         render_login_page()
         return
 
+    # Trazas de gráficos para esta petición (se activan desde el panel de rendimiento)
+    from modules.performance.tracing import set_request_tracing
+    set_request_tracing(st.session_state.get('trace_charts', False))
+
     # === A PARTIR DE AQUÍ: USUARIO AUTENTICADO ===
 
     # Mostrar indicador de carga para dispositivos móviles
@@ -2398,136 +1746,34 @@ def main():
     </script>
     """, unsafe_allow_html=True)
 
-    # FORZAR LAYOUT WIDE CON CSS (set_page_config no siempre funciona en Cloud)
-    st.markdown("""
-    <style>
-    /* FORZAR WIDE MODE - Versión mejorada para Streamlit Cloud */
-
-    /* Contenedor principal de la app */
-    [data-testid="stAppViewContainer"] {
-        max-width: 100vw !important;
-        width: 100vw !important;
-    }
-
-    /* Sección principal */
-    section[data-testid="stMain"] {
-        max-width: 100% !important;
-        width: 100% !important;
-    }
-
-    /* Contenedor interno */
-    .main {
-        max-width: 100% !important;
-        width: 100% !important;
-    }
-
-    /* Block container - el contenedor de contenido */
-    .main .block-container {
-        max-width: 100% !important;
-        width: 100% !important;
-        padding-left: 2rem !important;
-        padding-right: 2rem !important;
-    }
-
-    /* Contenedor de bloques principal */
-    div[data-testid="stMainBlockContainer"] {
-        max-width: 100% !important;
-        width: 100% !important;
-    }
-
-    /* Contenedor vertical de elementos */
-    div[data-testid="stVerticalBlock"] {
-        max-width: 100% !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-
     # OPTIMIZACIÓN FASE 3: Agregar resource hints antes de cargar CSS
     add_resource_hints()
 
-    # ===== ORDEN DE CARGA DE CSS (Optimizado Fase 3) =====
-    # IMPORTANTE: El orden de carga afecta el rendimiento y la correcta aplicación de estilos
-    #
-    # 1. RESOURCE HINTS (preload/preconnect) - Se cargan PRIMERO con add_resource_hints()
-    #    └─ Prepara el navegador para cargar recursos críticos de forma anticipada
-    #
-    # 2. CSS BASE/RESET (login.min.css o style.min.css)
-    #    └─ Define estilos base y reset CSS para normalizar navegadores
-    #    └─ Se carga con load_optimized_css()
-    #
-    # 3. CSS DE TEMA (theme_light.min.css o theme_dark.min.css)
-    #    └─ Define la paleta de colores y estilos del tema seleccionado
-    #    └─ Se carga automáticamente dentro de load_optimized_css()
-    #
-    # 4. CSS GUARDIÁN (guardian reset)
-    #    └─ CSS protector que permite resetear estilos en el login
-    #
-    # 5. CSS DE COMPONENTES (extra_styles*.min.css) - Solo en desktop
-    #    └─ Estilos adicionales para componentes específicos
-    #    └─ Optimización Fase 2: NO se carga en móviles para ahorrar tiempo
-    #
-    # 6. CSS CRÍTICO INLINE
-    #    └─ Estilos críticos que deben sobrescribir todo lo anterior
-    #    └─ Sidebar, tarjetas, comportamientos dinámicos
+    # ===== CARGA DE CSS: UN ÚNICO PAQUETE POR VARIANTE =====
+    # Los resource hints (add_resource_hints) preparan antes las conexiones de fuentes.
+    # El resto del CSS va en un paquete concatenado, minificado y con hash de contenido
+    # (modules/visualization/css_bundles.py, build: scripts/build_css_bundles.py) que respeta
+    # el orden de la cascada:
     #
+    # 1. CSS BASE (common.min.css) y CSS DE TEMA (theme_*[_cloud].min.css)
+    # 2. CSS GUARDIÁN del login (assets/critical/login_guardian_*.css)
+    # 3. CSS DE COMPONENTES (extra_styles*, selectbox_fix) - Solo en desktop
+    # 4. CSS CRÍTICO (layout con el wide mode, force_white_text, selectbox) - Solo en desktop
+    # 5. Controles del sidebar y fuentes (sistema en móvil, Inter/Poppins en desktop)
+    # 6. Fondo, contraste de texto y badges del tema (assets/critical/app_background_*.css)
     # 7. CSS ESPECÍFICO DE PLATAFORMA (ios_safari_fixes.css) - Solo iOS
-    #    └─ Se carga después de autenticación con load_ios_fixes()
-    #    └─ Optimización Fase 3: Lazy loading después del DOMContentLoaded
     #
-    # Este orden minimiza reflows, reduce CLS y optimiza el First Contentful Paint (FCP)
+    # Se inyecta una sola etiqueta por rerun (<link> al estático publicado o <style> estable)
     # =====================================================
 
     # CARGAR CSS DE LA APLICACIÓN (Solo para usuarios autenticados)
-    css_loaded = load_optimized_css()
+    css_loaded = load_optimized_css(ios=is_ios_device())
 
-    # Obtener tema actual ANTES del CSS Guardián
+    # Obtener tema actual para el script guardián del login
     current_theme = st.session_state.get('theme_mode', 'light')
 
-    # CSS GUARDIÁN: Asegurar que SIEMPRE se puede resetear en login
-    # Este CSS se carga DESPUÉS del tema y tiene timestamp único
-    guardian_css_timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    # CSS GUARDIÁN: incluido en el paquete CSS; aquí solo el script que fuerza los colores del login
     st.markdown(f"""
-    <style id="guardian-reset-{guardian_css_timestamp}">
-    /* CSS GUARDIÁN - Se carga DESPUÉS del tema para permitir reset en login */
-    /* CRÍTICO: Proteger login-container de CUALQUIER CSS de tema */
-
-    /* RESET: MÁXIMA PRIORIDAD para login */
-    /* Este CSS se carga DESPUÉS de theme_*.css y SOBRESCRIBE TODO */
-
-    /* COLORES ESPECÍFICOS PARA CLASES DE LOGIN */
-    .login-title-main {{
-        color: {'#ffffff' if current_theme == 'dark' else '#1a202c'} !important;
-        font-size: 32px !important;
-        font-weight: 700 !important;
-        margin-bottom: 8px !important;
-    }}
-    .login-title-sub {{
-        color: {'#ffffff' if current_theme == 'dark' else '#4a5568'} !important;
-        font-size: 18px !important;
-        font-weight: 500 !important;
-        margin: 8px 0 !important;
-    }}
-    .login-title-location {{
-        color: {'#ffffff' if current_theme == 'dark' else '#718096'} !important;
-        font-size: 14px !important;
-        margin-top: 8px !important;
-    }}
-
-    /* FORZAR colores para elementos de login (por si acaso) */
-    .login-container h4,
-    .login-container p:not(input *),
-    .login-container span:not(input *),
-    .login-container label {{
-        color: {'#f9fafb' if current_theme == 'dark' else '#1a202c'} !important;
-    }}
-
-    /* Botones del login */
-    .login-form-container button,
-    .login-form-container .stButton button {{
-        color: #ffffff !important;
-    }}
-    </style>
-
     <script>
     // JAVASCRIPT FINAL: Forzar colores del login con máxima prioridad
     (function() {{
@@ -2599,317 +1845,6 @@ def main():
     </script>
     """, unsafe_allow_html=True)
 
-    # Cargar CSS extra solo en desktop (Optimización Fase 2: evitar carga en móvil)
-    if css_loaded != "mobile_basic" and not IS_MOBILE:
-        # Detectar si estamos en Cloud
-        is_cloud = any([
-            os.getenv('USER') == 'appuser',
-            os.path.exists('/home/appuser/.streamlit/'),
-            'HOSTNAME' in os.environ and 'streamlit' in os.environ.get('HOSTNAME', '').lower(),
-            os.getenv('STREAMLIT_SERVER_ENABLE_XSRF_PROTECTION') is not None
-        ])
-
-        # Usar versión Cloud si está en Cloud
-        extra_css_file = 'assets/extra_styles_cloud.min.css' if is_cloud else 'assets/extra_styles.min.css'
-        extra_css = load_css_file(extra_css_file)
-        if extra_css:
-            # Agregar timestamp para romper caché del navegador
-            extra_css_with_version = f"/* Extra CSS Version: {datetime.now().strftime('%Y%m%d_%H%M%S')} */\n{extra_css}"
-            st.markdown(f"<style>{extra_css_with_version}</style>", unsafe_allow_html=True)
-
-            # Guardar info de extra CSS en debug
-            if 'css_debug_info' in st.session_state:
-                st.session_state['css_debug_info']['extra_css_file'] = extra_css_file
-                st.session_state['css_debug_info']['extra_css_size'] = len(extra_css)
-
-        # IMPORTANTE: Cargar selectbox fix CSS DESPUÉS de extra_styles para que sobrescriba
-        selectbox_fix_css = load_css_file('assets/selectbox_fix.css')
-        if selectbox_fix_css:
-            selectbox_fix_with_version = f"/* Selectbox Fix CSS - CARGA FINAL - Version: {datetime.now().strftime('%Y%m%d_%H%M%S')} */\n{selectbox_fix_css}"
-            st.markdown(f"<style>{selectbox_fix_with_version}</style>", unsafe_allow_html=True)
-
-        # NO USAR JAVASCRIPT - CSS puro solamente
-        # El selectbox fix se maneja completamente via CSS crítico más abajo
-
-        # CSS crítico inline para tarjeta de sidebar Y comportamiento dinámico
-        # IMPORTANTE: Este CSS se carga DESPUÉS de los temas para sobrescribirlos
-        critical_css = """
-        <style>
-        /* CRÍTICO: ELIMINAR PADDING SUPERIOR DEL MAIN - TODAS LAS VARIANTES */
-        .main,
-        .main > div,
-        .main .block-container,
-        .stMain,
-        .stMain > div,
-        section[data-testid="stMain"],
-        section[data-testid="stMain"] > div,
-        section[data-testid="stMain"] .main,
-        section[data-testid="stMain"] .main > div,
-        section[data-testid="stMain"] .main .block-container,
-        div[data-testid="stMainBlockContainer"],
-        div[class*="block-container"],
-        .appview-container > section > div {
-            padding-top: 0 !important;
-            margin-top: 0 !important;
-        }
-
-        /* CRÍTICO: Texto blanco en tarjeta de sidebar */
-        .sidebar-user-card,
-        .sidebar-user-card *,
-        .sidebar-user-card strong,
-        .sidebar-user-card small,
-        section[data-testid="stSidebar"] .sidebar-user-card *,
-        section[data-testid="stSidebar"] strong,
-        section[data-testid="stSidebar"] small,
-        .sidebar-user-name,
-        strong.sidebar-user-name,
-        section[data-testid="stSidebar"] .sidebar-user-name,
-        section[data-testid="stSidebar"] strong.sidebar-user-name,
-        .sidebar-user-role,
-        small.sidebar-user-role,
-        section[data-testid="stSidebar"] .sidebar-user-role,
-        section[data-testid="stSidebar"] small.sidebar-user-role {
-            color: #ffffff !important;
-            text-shadow: 0 2px 4px rgba(0,0,0,0.6) !important;
-        }
-
-        /* CRÍTICO: Comportamiento dinámico del sidebar - COMPLETO */
-        /* Forzar el sidebar a colapsarse completamente cuando está cerrado */
-        section[data-testid="stSidebar"][aria-expanded="false"] {
-            width: 0 !important;
-            min-width: 0 !important;
-            max-width: 0 !important;
-            overflow: hidden !important;
-            padding: 0 !important;
-            margin: 0 !important;
-        }
-
-        section[data-testid="stSidebar"][aria-expanded="false"] > div {
-            width: 0 !important;
-            min-width: 0 !important;
-            overflow: hidden !important;
-        }
-
-        /* Cuando el sidebar está COLAPSADO - expandir la app al 100% */
-        section[data-testid="stSidebar"][aria-expanded="false"] ~ section[data-testid="stMain"] {
-            margin-left: 0 !important;
-            width: 100% !important;
-            max-width: 100% !important;
-        }
-
-        section[data-testid="stSidebar"][aria-expanded="false"] ~ section[data-testid="stMain"] .main {
-            max-width: 100% !important;
-            width: 100% !important;
-        }
-
-        section[data-testid="stSidebar"][aria-expanded="false"] ~ section[data-testid="stMain"] .main .block-container {
-            max-width: calc(100vw - 4rem) !important;
-            width: calc(100vw - 4rem) !important;
-            margin-left: 0 !important;
-            margin-right: 0 !important;
-            padding-left: 2rem !important;
-            padding-right: 2rem !important;
-        }
-
-        /* Forzar expansión completa de todos los contenedores cuando sidebar colapsado */
-        section[data-testid="stSidebar"][aria-expanded="false"] ~ section[data-testid="stMain"] > div,
-        section[data-testid="stSidebar"][aria-expanded="false"] ~ section[data-testid="stMain"] > div > div,
-        section[data-testid="stSidebar"][aria-expanded="false"] ~ section[data-testid="stMain"] .stMainBlockContainer {
-            max-width: 100% !important;
-            width: 100% !important;
-        }
-
-        /* Cuando el sidebar está EXPANDIDO - reducir el ancho de la app */
-        section[data-testid="stSidebar"][aria-expanded="true"] {
-            width: 21rem !important;
-            min-width: 21rem !important;
-            max-width: 21rem !important;
-        }
-
-        section[data-testid="stSidebar"][aria-expanded="true"] ~ section[data-testid="stMain"] .main .block-container {
-            max-width: calc(100vw - 21rem - 4rem) !important;
-            width: calc(100vw - 21rem - 4rem) !important;
-        }
-
-        /* Transiciones suaves */
-        section[data-testid="stSidebar"],
-        section[data-testid="stMain"],
-        .main,
-        .main .block-container {
-            transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1) !important;
-        }
-        </style>
-        """
-        st.markdown(critical_css, unsafe_allow_html=True)
-
-        # FORZAR TEXTO BLANCO - Carga final con máxima prioridad
-        # Este archivo se carga AL FINAL para sobrescribir TODOS los temas
-        force_white_css = load_css_file('assets/force_white_text.css')
-        if force_white_css:
-            force_white_with_version = f"/* Force White Text CSS | Version: {datetime.now().strftime('%Y%m%d_%H%M%S')} */\n{force_white_css}"
-            st.markdown(f"<style>{force_white_with_version}</style>", unsafe_allow_html=True)
-
-        # CSS CRÍTICO SELECTBOX - VERSIÓN 8.3 - FORZAR ESPACIADO COMPACTO
-        # Este CSS se carga AL FINAL con máxima especificidad para sobrescribir TODO
-        critical_selectbox_css = """
-        <style id="selectbox-ultra-critical">
-        /* ========== SELECTBOX FIX - VERSIÓN 8.3 - ESPACIADO COMPACTO FORZADO ========== */
-
-        /* CONTENEDOR LISTBOX - ELIMINAR GAPS */
-        html body .stApp ul[role="listbox"],
-        html body .stApp div[role="listbox"],
-        html body ul[role="listbox"],
-        html body div[role="listbox"],
-        ul[role="listbox"],
-        div[role="listbox"] {
-            padding: 0 !important;
-            margin: 0 !important;
-            gap: 0 !important;
-            row-gap: 0 !important;
-            column-gap: 0 !important;
-            display: block !important;
-        }
-
-        /* OPCIONES - PADDING Y MARGIN CERO ABSOLUTO */
-        html body .stApp ul[role="listbox"] li,
-        html body .stApp div[role="listbox"] li,
-        html body .stApp li[role="option"],
-        html body ul[role="listbox"] li,
-        html body div[role="listbox"] li,
-        html body li[role="option"],
-        ul[role="listbox"] li,
-        div[role="listbox"] li,
-        li[role="option"],
-        li[role="option"][aria-selected="true"],
-        li[role="option"]:hover,
-        li[role="option"]:focus {
-            padding: 0 !important;
-            padding-top: 0 !important;
-            padding-right: 0 !important;
-            padding-bottom: 0 !important;
-            padding-left: 0 !important;
-            margin: 0 !important;
-            margin-top: 0 !important;
-            margin-right: 0 !important;
-            margin-bottom: 0 !important;
-            margin-left: 0 !important;
-            border: none !important;
-            border-width: 0 !important;
-            outline: none !important;
-            box-shadow: none !important;
-            min-height: 0 !important;
-            height: auto !important;
-            line-height: normal !important;
-            display: block !important;
-            position: relative !important;
-            top: 0 !important;
-            left: 0 !important;
-        }
-
-        /* ELEMENTOS HIJOS - PADDING Y MARGIN CERO */
-        html body .stApp li[role="option"] > *,
-        html body li[role="option"] > *,
-        li[role="option"] > *,
-        li[role="option"] span,
-        li[role="option"] div,
-        li[role="option"] p {
-            padding: 0 !important;
-            margin: 0 !important;
-            border: none !important;
-            background-color: transparent !important;
-        }
-
-        /* PSEUDO-ELEMENTOS - ELIMINAR */
-        li[role="option"]::before,
-        li[role="option"]::after {
-            display: none !important;
-            content: none !important;
-            padding: 0 !important;
-            margin: 0 !important;
-            height: 0 !important;
-        }
-
-        /* COLORES - MODO LIGHT */
-        [data-theme="light"] li[role="option"],
-        html body [data-theme="light"] li[role="option"] {
-            background-color: #ffffff !important;
-            color: #0f172a !important;
-        }
-
-        [data-theme="light"] li[role="option"]:hover:not([aria-selected="true"]),
-        html body [data-theme="light"] li[role="option"]:hover:not([aria-selected="true"]) {
-            background-color: #f3f4f6 !important;
-            color: #0f172a !important;
-        }
-
-        [data-theme="light"] li[role="option"][aria-selected="true"],
-        html body [data-theme="light"] li[role="option"][aria-selected="true"] {
-            background-color: #10b981 !important;
-            color: #ffffff !important;
-        }
-
-        /* COLORES - MODO DARK */
-        [data-theme="dark"] li[role="option"],
-        html body [data-theme="dark"] li[role="option"] {
-            background-color: #475569 !important;
-            color: #ffffff !important;
-        }
-
-        [data-theme="dark"] li[role="option"]:hover:not([aria-selected="true"]),
-        html body [data-theme="dark"] li[role="option"]:hover:not([aria-selected="true"]) {
-            background-color: #334155 !important;
-            color: #ffffff !important;
-        }
-
-        [data-theme="dark"] li[role="option"][aria-selected="true"],
-        html body [data-theme="dark"] li[role="option"][aria-selected="true"] {
-            background-color: #2563eb !important;
-            color: #ffffff !important;
-        }
-
-        /* TEXTO DENTRO - HEREDAR COLOR DEL PADRE */
-        [data-theme="light"] li[role="option"] span,
-        [data-theme="light"] li[role="option"] div,
-        html body [data-theme="light"] li[role="option"] span,
-        html body [data-theme="light"] li[role="option"] div {
-            color: inherit !important;
-        }
-
-        [data-theme="dark"] li[role="option"] span,
-        [data-theme="dark"] li[role="option"] div,
-        html body [data-theme="dark"] li[role="option"] span,
-        html body [data-theme="dark"] li[role="option"] div {
-            color: inherit !important;
-        }
-        </style>
-        """
-        st.markdown(critical_selectbox_css, unsafe_allow_html=True)
-
-        # NOTA: JavaScript no funciona en Cloud (filtrado por Streamlit)
-        # Toda la solución de estilos se hace via CSS puro en theme_dark_cloud.css
-        # con selectores específicos para Emotion CSS y máxima especificidad
-
-    # Aplicar estilos adicionales según dispositivo
-    if css_loaded == "mobile_basic":
-        # Estilos básicos para móviles - no cargar fuentes pesadas
-        st.markdown("""
-        <style>
-        /* Usar fuente del sistema en móviles para mejor performance */
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', system-ui, sans-serif;
-            font-size: 16px; /* Prevenir zoom en iOS */
-        }
-        </style>
-        """, unsafe_allow_html=True)
-    else:
-        # Estilos completos para desktop
-        st.markdown("""
-        <style>
-        /* Importar fuentes modernas */
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&family=Poppins:wght@300;400;500;600;700&display=swap');
-        </style>
-        """, unsafe_allow_html=True)
-
     # DEBUG INFO deshabilitado (descomentar solo para debugging)
     # with st.sidebar:
     #     if 'css_debug_info' in st.session_state:
@@ -2917,81 +1852,13 @@ def main():
     #             info = st.session_state['css_debug_info']
     #             st.write(f"**Tema:** `{info.get('tema', 'N/A')}`")
     #             st.write(f"**Cloud detectado:** `{info.get('is_cloud', 'N/A')}`")
-    #             st.write(f"**Archivo tema:** `{info.get('theme_file', 'N/A')}`")
-    #             st.write(f"**Archivo extra:** `{info.get('extra_css_file', 'N/A')}`")
-    #             st.write(f"**USER env:** `{info.get('user_env', 'N/A')}`")
-    #             st.write(f"**HOSTNAME:** `{info.get('hostname_env', 'N/A')}`")
-    #             st.write(f"**Path /home/appuser:** `{info.get('appuser_path_exists', 'N/A')}`")
+    #             st.write(f"**Paquete CSS:** `{info.get('bundle_file', 'N/A')}`")
+    #             st.write(f"**Tamaño:** `{info.get('bundle_size', 0):,}` de `{info.get('source_size', 0):,}` bytes")
 
     # Inicializar tema
     if 'theme_mode' not in st.session_state:
         st.session_state.theme_mode = 'light'
 
-    # CSS para reducir padding superior y mejorar visibilidad de iconos sidebar
-    collapse_icon_css = """
-    <style>
-    /* Reducir padding superior del contenedor principal */
-    .main .block-container {
-        padding-top: 1rem !important;
-    }
-
-    /* Reducir espacio del primer elemento */
-    .main .block-container > div:first-child {
-        padding-top: 0 !important;
-        margin-top: 0 !important;
-    }
-
-    /* Icono << dentro del sidebar (para colapsar) - modo oscuro */
-    [data-testid="stSidebar"] button[kind="header"],
-    [data-testid="stSidebar"] button[kind="headerNoPadding"],
-    [data-testid="collapsedControl"] {
-        background-color: rgba(255, 255, 255, 0.15) !important;
-        border-radius: 6px !important;
-        transition: all 0.2s ease !important;
-    }
-
-    [data-testid="stSidebar"] button[kind="header"]:hover,
-    [data-testid="stSidebar"] button[kind="headerNoPadding"]:hover,
-    [data-testid="collapsedControl"]:hover {
-        background-color: rgba(255, 255, 255, 0.25) !important;
-    }
-
-    [data-testid="stSidebar"] button[kind="header"] svg,
-    [data-testid="stSidebar"] button[kind="headerNoPadding"] svg,
-    [data-testid="collapsedControl"] svg {
-        fill: #ffffff !important;
-        color: #ffffff !important;
-    }
-
-    /* Icono >> en la barra superior blanca (para expandir) - modo oscuro */
-    .stApp > header button[kind="header"],
-    .stApp > header button[kind="headerNoPadding"],
-    section[data-testid="stHeader"] button[kind="header"],
-    section[data-testid="stHeader"] button[kind="headerNoPadding"] {
-        background-color: rgba(0, 0, 0, 0.1) !important;
-        border-radius: 6px !important;
-        transition: all 0.2s ease !important;
-    }
-
-    .stApp > header button[kind="header"]:hover,
-    .stApp > header button[kind="headerNoPadding"]:hover,
-    section[data-testid="stHeader"] button[kind="header"]:hover,
-    section[data-testid="stHeader"] button[kind="headerNoPadding"]:hover {
-        background-color: rgba(0, 0, 0, 0.2) !important;
-    }
-
-    .stApp > header button[kind="header"] svg,
-    .stApp > header button[kind="headerNoPadding"] svg,
-    section[data-testid="stHeader"] button[kind="header"] svg,
-    section[data-testid="stHeader"] button[kind="headerNoPadding"] svg {
-        fill: #0f172a !important;
-        color: #0f172a !important;
-    }
-    </style>
-    """
-
-    st.markdown(collapse_icon_css, unsafe_allow_html=True)
-
     # === OPCIÓN 1: Botones en Sidebar (Implementación Simple) ===
     # Los botones se agregarán en render_secure_sidebar() más abajo
 
@@ -3004,296 +1871,11 @@ def main():
     # TODO el manejo de tema se hace vía CSS puro cargado en load_optimized_css()
     # No se usa JavaScript para evitar problemas con iframes en Cloud
 
-    # === CSS EMBEBIDO CRÍTICO PARA STREAMLIT CLOUD ===
-    # Aplicar inmediatamente para garantizar visibilidad
-
-    # Colores de texto principales según tema
-    if current_theme == 'light':
-        text_color = '#0f172a'  # Texto muy oscuro para modo claro
-        secondary_text = '#334155'  # Texto secundario
-        muted_text = '#64748b'  # Texto tenue
-    else:
-        text_color = '#f8fafc'  # Texto muy claro para modo oscuro
-        secondary_text = '#cbd5e1'  # Texto secundario
-        muted_text = '#94a3b8'  # Texto tenue
-
-    # FORZAR sidebar text color - SIEMPRE NEGRO
-    sidebar_text_color = '#0f172a'
-
-    # ========== ESTILOS ESPECÍFICOS PARA BADGES SEGÚN TEMA ==========
-    if current_theme == 'dark':
-        badge_css = """
-        /* MODO OSCURO: Badges con fondos BRILLANTES y texto oscuro */
-
-        /* Success badges - Verde esmeralda brillante */
-        div[data-testid="stAlert"],
-        div[data-baseweb="notification"],
-        .stAlert {
-            background-color: #10b981 !important;
-            background: #10b981 !important;
-            border-left: 4px solid #059669 !important;
-        }
-
-        /* FORZAR texto oscuro en todos los badges */
-        div[data-testid="stAlert"],
-        div[data-testid="stAlert"] *,
-        div[data-testid="stAlert"] p,
-        div[data-testid="stAlert"] div,
-        div[data-testid="stAlert"] span,
-        div[data-baseweb="notification"],
-        div[data-baseweb="notification"] *,
-        div[data-baseweb="notification"] p,
-        div[data-baseweb="notification"] div,
-        div[data-baseweb="notification"] span,
-        .stAlert,
-        .stAlert * {
-            color: #0f172a !important;
-            background-color: transparent !important;
-        }
-
-        /* Restaurar fondo de contenedores principales */
-        div[data-testid="stAlert"],
-        div[data-baseweb="notification"],
-        .stAlert {
-            background-color: #10b981 !important;
-        }
-
-        /* Warning badges - Amarillo oro brillante */
-        div[data-baseweb="notification"][kind="warning"],
-        div[data-testid="stAlert"][kind="warning"] {
-            background-color: #fbbf24 !important;
-            background: #fbbf24 !important;
-            border-left: 4px solid #f59e0b !important;
-        }
-
-        /* Error badges - Rojo coral brillante */
-        div[data-baseweb="notification"][kind="error"],
-        div[data-testid="stAlert"][kind="error"] {
-            background-color: #fca5a5 !important;
-            background: #fca5a5 !important;
-            border-left: 4px solid #f87171 !important;
-        }
-
-        /* Info badges - Azul cielo brillante */
-        div[data-baseweb="notification"][kind="info"],
-        div[data-testid="stAlert"][kind="info"] {
-            background-color: #7dd3fc !important;
-            background: #7dd3fc !important;
-            border-left: 4px solid #38bdf8 !important;
-        }
-        """
-    else:
-        badge_css = """
-        /* MODO CLARO: Texto oscuro en badges para contraste */
-        div[data-testid="stAlert"],
-        div[data-testid="stAlert"] *,
-        div[data-baseweb="notification"],
-        div[data-baseweb="notification"] *,
-        .stAlert,
-        .stAlert * {
-            color: #0f172a !important;
-        }
-        """
-
-    # Generar timestamp único para forzar recarga de CSS
-    import time
-    css_timestamp = int(time.time())
-
-    # Aplicar colores de fondo según tema
-    if current_theme == 'dark':
-        bg_color = '#0f172a'
-        bg_secondary = '#1e293b'
-    else:
-        bg_color = '#ffffff'
-        bg_secondary = '#f8f9fa'
+    # Fondo, contraste de texto y badges por tema: assets/critical/app_background_*.css (paquete CSS)
+    # Aquí solo el script que marca data-theme con el color de texto del tema
+    text_color = '#0f172a' if current_theme == 'light' else '#f8fafc'
 
     st.markdown(f"""
-    <style data-timestamp="{css_timestamp}">
-    /* CRITICAL CSS v10-BACKGROUND - TIMESTAMP: {css_timestamp} */
-    /* TEMA: {current_theme} - TEXT: {text_color} - BG: {bg_color} */
-
-    /* ========== CAMBIAR FONDO DE LA APLICACIÓN ========== */
-    .stApp {{
-        background-color: {bg_color} !important;
-    }}
-
-    .main, .main > div, [data-testid="stAppViewContainer"] {{
-        background-color: {bg_color} !important;
-    }}
-
-    /* ========== REDIMENSIONAMIENTO DINÁMICO DEL SIDEBAR ========== */
-    /* Transición suave para todos los cambios */
-    .main,
-    .main .block-container,
-    section[data-testid="stMain"],
-    div[data-testid="stMainBlockContainer"],
-    [data-testid="stAppViewContainer"] > section.main {{
-        transition: margin-left 0.3s ease, max-width 0.3s ease, width 0.3s ease !important;
-    }}
-
-    /* Estado por defecto del contenedor principal */
-    .main .block-container {{
-        transition: all 0.3s ease !important;
-    }}
-
-    /* ========== FORZAR COLOR DE TEXTO GLOBAL (EXCEPTO LOGIN Y SIDEBAR) ========== */
-    /* Aplicar SOLO cuando NO hay login en la página */
-    .main:not(:has(.login-container)) {{
-        color: {text_color} !important;
-    }}
-
-    /* Aplicar a elementos específicos del dashboard, NUNCA al login */
-    .main:not(:has(.login-container)) * {{
-        color: {text_color} !important;
-    }}
-
-    /* ========== LOGIN: FORZAR TEXTO CLARO EN MODO OSCURO ========== */
-    /* Aplicar después de todas las reglas con máxima prioridad */
-
-    /* Sidebar buttons styling */
-    .stSidebar .stButton > button {{
-        background: linear-gradient(135deg, #10b981 0%, #059669 100%) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 12px !important;
-        padding: 0.75rem 1rem !important;
-        font-weight: 500 !important;
-        width: 100% !important;
-        margin-bottom: 0.5rem !important;
-        box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1) !important;
-    }}
-
-    /* SIDEBAR TEXT VISIBILITY - SIEMPRE NEGRO */
-    .stSidebar h1, .stSidebar h2, .stSidebar h3, .stSidebar h4, .stSidebar h5, .stSidebar h6,
-    [data-testid="stSidebar"] h1, [data-testid="stSidebar"] h2, [data-testid="stSidebar"] h3,
-    [data-testid="stSidebar"] h4, [data-testid="stSidebar"] h5, [data-testid="stSidebar"] h6,
-    .stSidebar p:not(.stButton p), .stSidebar span:not(.stButton span),
-    [data-testid="stSidebar"] p:not(.stButton p), [data-testid="stSidebar"] span:not(.stButton span),
-    .stSidebar .stMarkdown p, .stSidebar .stMarkdown h1, .stSidebar .stMarkdown h2, .stSidebar .stMarkdown h3,
-    .stSidebar .stMarkdown h4, .stSidebar .stMarkdown h5, .stSidebar .stMarkdown h6,
-    .stSidebar .stMarkdown strong, .stSidebar .stMarkdown em,
-    [data-testid="stSidebar"] .stMarkdown p, [data-testid="stSidebar"] .stMarkdown h1,
-    [data-testid="stSidebar"] .stMarkdown h2, [data-testid="stSidebar"] .stMarkdown h3,
-    [data-testid="stSidebar"] .stMarkdown h4, [data-testid="stSidebar"] .stMarkdown h5,
-    [data-testid="stSidebar"] .stMarkdown h6,
-    [data-testid="stSidebar"] .stMarkdown strong, [data-testid="stSidebar"] .stMarkdown em,
-    .stSidebar .stMetric label, .stSidebar .stMetric div,
-    [data-testid="stSidebar"] .stMetric label, [data-testid="stSidebar"] .stMetric div,
-    .stSidebar label:not(.stButton label),
-    [data-testid="stSidebar"] label:not(.stButton label) {{
-        color: {sidebar_text_color} !important;
-    }}
-
-    /* SIDEBAR BUTTONS - Keep green background with white text */
-    .stSidebar .stButton > button,
-    [data-testid="stSidebar"] .stButton > button {{
-        background: linear-gradient(135deg, #10b981 0%, #059669 100%) !important;
-        color: white !important;
-    }}
-
-    /* SIDEBAR ALERTS - SIEMPRE NEGRO */
-    .stSidebar .stAlert p, .stSidebar .stAlert span, .stSidebar .stAlert div:not([role="alert"]),
-    [data-testid="stSidebar"] .stAlert p, [data-testid="stSidebar"] .stAlert span,
-    [data-testid="stSidebar"] .stAlert div:not([role="alert"]),
-    .stSidebar [data-testid="stAlertContentInfo"] p,
-    .stSidebar [data-testid="stAlertContentSuccess"] p,
-    [data-testid="stSidebar"] [data-testid="stAlertContentInfo"] p,
-    [data-testid="stSidebar"] [data-testid="stAlertContentSuccess"] p {{
-        color: {sidebar_text_color} !important;
-    }}
-
-    /* ========== CONTRASTE DASHBOARD (NO TOCAR LOGIN) ========== */
-
-    /* Solo aplicar cuando NO hay login */
-    .main:not(:has(.login-container)) .stMarkdown,
-    .main:not(:has(.login-container)) .element-container,
-    .main:not(:has(.login-container)) [data-testid="stMarkdownContainer"] {{
-        color: {text_color} !important;
-    }}
-
-    /* Métricas - FORZAR contraste fuerte con máxima especificidad */
-    div[data-testid="stMetric"],
-    div[data-testid="stMetric"] div,
-    div[data-testid="stMetric"] label,
-    div[data-testid="stMetric"] span,
-    div[data-testid="stMetric"] p,
-    div[data-testid="stMetric"] *,
-    [data-testid="stMetricLabel"],
-    [data-testid="stMetricLabel"] *,
-    [data-testid="stMetricValue"],
-    [data-testid="stMetricValue"] *,
-    [data-testid="stMetricDelta"],
-    [data-testid="stMetricDelta"] *,
-    .stMetric,
-    .stMetric * {{
-        color: {text_color} !important;
-    }}
-
-    /* Labels y texto general */
-    label:not(.stButton label) {{
-        color: {text_color} !important;
-    }}
-
-    /* ========== Texto blanco en fondos oscuros/verdes ========== */
-    .stButton > button,
-    .stButton > button *,
-    .main-header-secure,
-    .main-header-secure *,
-    [style*="background: linear-gradient(135deg, #22c55e"] *,
-    [style*="background: linear-gradient(135deg, #4CAF50"] *,
-    [style*="background: linear-gradient(135deg, #10b981"] *,
-    [style*="background: linear-gradient(135deg, #1e3a8a"] *,
-    [style*="background: linear-gradient(135deg, #1e40af"] * {{
-        color: white !important;
-    }}
-
-    /* ========== EXPANDERS - CONTRASTE FORZADO CON MÁXIMA PRIORIDAD ========== */
-    /* Expanders: texto visible en modo oscuro */
-    div[data-testid="stExpander"],
-    div[data-testid="stExpander"] *,
-    div[data-testid="stExpander"] summary,
-    div[data-testid="stExpander"] summary *,
-    div[data-testid="stExpander"] details,
-    div[data-testid="stExpander"] details *,
-    div[data-testid="stExpander"] p,
-    div[data-testid="stExpander"] span,
-    div[data-testid="stExpander"] div,
-    div[data-testid="stExpander"] label,
-    .streamlit-expanderHeader,
-    .streamlit-expanderHeader *,
-    details[data-testid="stExpander"],
-    details[data-testid="stExpander"] * {{
-        color: {text_color} !important;
-        background-color: transparent !important;
-    }}
-
-    /* Asegurar fondo del expander */
-    div[data-testid="stExpander"] {{
-        background-color: var(--bg-surface, transparent) !important;
-    }}
-
-    /* ========== BADGES DINÁMICOS SEGÚN TEMA ACTIVO ========== */
-    {badge_css}
-
-    /* ========== DEBUG INFO ========== */
-    /* TEMA ACTUAL: {current_theme} */
-    /* TEXT COLOR: {text_color} */
-    /* SIDEBAR COLOR: {sidebar_text_color} */
-
-    /* ========== LOGIN FINAL OVERRIDE - MÁXIMA ESPECIFICIDAD ========== */
-    /* NO forzar colores en login - dejar que los estilos inline y JavaScript manejen */
-    /* Los estilos inline en auth_system.py ya tienen los colores correctos */
-
-    /* Solo asegurar que elementos SIN estilos inline tengan color legible */
-    .login-container h4:not([style*="color"]),
-    .login-container p:not([style*="color"]):not(input *),
-    .login-container span:not([style*="color"]):not(input *),
-    .login-container [data-testid="stMarkdown"]:not([style*="color"]) {{
-        color: {'#f9fafb' if current_theme == 'dark' else '#1a202c'} !important;
-    }}
-
-    </style>
-
     <script>
     // APLICAR data-theme INMEDIATAMENTE - SIN DELAYS
     (function() {{
@@ -4320,6 +2902,7 @@ def render_secure_chat(app):
                                     from reportlab.lib.styles import getSampleStyleSheet
                                     from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
                                     from reportlab.lib.units import mm
+                                    from reportlab.lib.pagesizes import A4
 
                                     buffer = BytesIO()
                                     doc = SimpleDocTemplate(buffer, pagesize=A4,
@@ -4564,21 +3147,18 @@ def render_secure_dashboard(app):
         """, unsafe_allow_html=True)
     
     # Métricas básicas (todos los roles con ver_datos)
+    from modules.analytics.kpi_engine import get_health_kpis
+    kpis = get_health_kpis(app.data)
     col1, col2, col3, col4 = st.columns(4)
     
-    total_pop = app.data['demografia']['poblacion_2025'].sum()
-    total_hospitals = len(app.data['hospitales'])
-    total_beds = app.data['hospitales']['camas_funcionamiento_2025'].sum()
-    
     with col1:
-        st.metric("👥 Población", f"{total_pop/1000:.0f}K")
+        st.metric("👥 Población", f"{kpis.total_population/1000:.0f}K")
     with col2:
-        st.metric("🏥 Centros", total_hospitals)
+        st.metric("🏥 Centros", kpis.total_centers)
     with col3:
-        st.metric("🛏️ Camas", f"{total_beds:,}")
+        st.metric("🛏️ Camas", f"{kpis.total_beds:,}")
     with col4:
-        bed_ratio = (total_beds / total_pop) * 1000
-        st.metric("Camas/1000 hab", f"{bed_ratio:.1f}")
+        st.metric("Camas/1000 hab", f"{kpis.bed_ratio_1000:.1f}")
     
     # Contenido adicional basado en permisos
     if app.has_permission('analisis_ia'):
@@ -4729,41 +3309,15 @@ def render_executive_report_secure(app):
     """Reporte ejecutivo con auditoría"""
     st.markdown("#### 📈 Reporte Ejecutivo Seguro")
     
-    report_date = datetime.now().strftime("%d de %B de %Y")
     user_info = f"Generado por: {app.user['name']} ({app.role_info['name']}) - {app.user['organization']}"
     
     if not app.data:
         st.error("❌ Datos no disponibles")
         return
     
-    executive_summary = f"""
-    # 🏥 REPORTE EJECUTIVO - SISTEMA SANITARIO MÁLAGA
-    **Fecha de análisis:** {report_date}  
-    **{user_info}**
-    
-    ---
-    
-    ## 📊 INDICADORES PRINCIPALES
-    - **Población total atendida:** {app.data['demografia']['poblacion_2025'].sum():,} habitantes
-    - **Red asistencial:** {len(app.data['hospitales'])} centros sanitarios  
-    - **Capacidad hospitalaria:** {app.data['hospitales']['camas_funcionamiento_2025'].sum():,} camas
-    - **Personal sanitario:** {app.data['hospitales']['personal_sanitario_2025'].sum():,} profesionales
-    - **Ratio camas/1000 hab:** {(app.data['hospitales']['camas_funcionamiento_2025'].sum() / app.data['demografia']['poblacion_2025'].sum() * 1000):.1f}
-    
-    ## 🗺️ DISTRIBUCIÓN TERRITORIAL
-    - **Distritos sanitarios:** {len(app.data['hospitales']['distrito_sanitario'].unique())}
-    - **Municipios cubiertos:** {len(app.data['demografia'])}
-    - **Tiempo medio acceso:** {app.data['accesibilidad']['tiempo_coche_minutos'].mean():.1f} minutos
-    
-    ## 🎯 RECOMENDACIONES ESTRATÉGICAS
-    1. **Prioridad Alta:** Evaluar equidad en distritos con menor ratio de recursos
-    2. **Accesibilidad:** Mejorar conexiones en municipios con >60 min de acceso
-    3. **Capacidad:** Monitorear ocupación en hospitales regionales
-    4. **Personal:** Reforzar plantillas en áreas de alta demanda
-    
-    ---
-    **Clasificación:** Uso Interno | **Acceso:** {app.role_info['name']} | **Timestamp:** {datetime.now().isoformat()}
-    """
+    # Mismo contenido que el PDF estándar del rol, firmado por el usuario
+    from modules.reports.report_builders import build_executive_report
+    executive_summary = build_executive_report(app.data, app.role_info['name'], author=user_info)
     
     st.markdown(executive_summary)
     
@@ -4775,6 +3329,8 @@ def render_executive_report_secure(app):
         mime="text/plain"
     )
 
+    render_report_job(app, 'executive')
+
 def render_infrastructure_report_secure(app):
     """Reporte de infraestructura con permisos"""
     st.markdown("#### 🏥 Reporte de Infraestructura")
@@ -4783,9 +3339,10 @@ def render_infrastructure_report_secure(app):
         return
     
     # Análisis básico
-    total_beds = app.data['hospitales']['camas_funcionamiento_2025'].sum()
-    total_population = app.data['demografia']['poblacion_2025'].sum()
-    bed_ratio = (total_beds / total_population) * 1000
+    from modules.analytics.kpi_engine import get_health_kpis
+    kpis = get_health_kpis(app.data)
+    total_beds = kpis.total_beds
+    bed_ratio = kpis.bed_ratio_1000
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -4797,15 +3354,14 @@ def render_infrastructure_report_secure(app):
         st.metric("🎯 Estado vs OMS", status)
     
     # Gráfico de distribución
-    tipo_analysis = app.data['hospitales'].groupby('tipo_centro', observed=False).agg({
-        'camas_funcionamiento_2025': ['sum', 'mean'],
-        'personal_sanitario_2025': 'sum',
-        'poblacion_referencia_2025': 'sum'
-    }).round(1)
+    from modules.reports.report_builders import infrastructure_by_type
+    tipo_analysis = infrastructure_by_type(app.data)
     
     st.markdown("##### 📊 Análisis por Tipo de Centro")
     st.dataframe(tipo_analysis, use_container_width=True)
 
+    render_report_job(app, 'infrastructure')
+
 def render_demographic_report_secure(app):
     """Reporte demográfico seguro"""
     st.markdown("#### 👥 Reporte Demográfico")
@@ -4814,18 +3370,16 @@ def render_demographic_report_secure(app):
         return
     
     # Estadísticas de crecimiento
-    total_growth = app.data['demografia']['crecimiento_2024_2025'].sum()
-    total_pop_2024 = app.data['demografia']['poblacion_2024'].sum()
-    growth_rate = (total_growth / total_pop_2024) * 100
+    from modules.analytics.kpi_engine import get_health_kpis
+    kpis = get_health_kpis(app.data)
     
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("📈 Crecimiento 2024-2025", f"+{total_growth:,}")
+        st.metric("📈 Crecimiento 2024-2025", f"+{kpis.population_growth:,}")
     with col2:
-        st.metric("📊 Tasa Crecimiento", f"{growth_rate:.2f}%")
+        st.metric("📊 Tasa Crecimiento", f"{kpis.growth_rate_pct:.2f}%")
     with col3:
-        growing_munic = len(app.data['demografia'][app.data['demografia']['crecimiento_2024_2025'] > 0])
-        st.metric("🏘️ Municipios en Crecimiento", growing_munic)
+        st.metric("🏘️ Municipios en Crecimiento", kpis.growing_municipalities)
     
     # Top municipios
     st.markdown("##### 🏆 Top 5 Municipios en Crecimiento")
@@ -4835,6 +3389,8 @@ def render_demographic_report_secure(app):
         growth_pct = (row['crecimiento_2024_2025'] / row['poblacion_2024']) * 100
         st.write(f"• **{row['municipio']}**: +{row['crecimiento_2024_2025']:,} hab ({growth_pct:.1f}%)")
 
+    render_report_job(app, 'demographic')
+
 def render_equity_report_secure(app):
     """Reporte de equidad (solo usuarios autorizados)"""
     st.markdown("#### ⚖️ Reporte de Equidad")
@@ -4858,9 +3414,64 @@ def render_equity_report_secure(app):
                     st.error(f"🚨 **ALERTA**: {len(low_equity)} distritos con equidad crítica (<50 puntos)")
                     for _, district in low_equity.iterrows():
                         st.write(f"• **{district['distrito']}**: {district['score_equidad']:.0f}/100")
+
+                render_report_job(app, 'equity')
         except Exception as e:
             st.error(f"Error calculando equidad: {str(e)}")
 
+def render_report_job(app, report_type: str):
+    """PDF del informe generado en segundo plano: solicitar, consultar estado y descargar"""
+    from modules.reports.report_queue import PENDING_STATUSES, get_report_queue
+
+    queue = get_report_queue()
+    state_key = f"report_job_{report_type}"
+    job = queue.get_job(st.session_state.get(state_key))
+
+    st.markdown("##### 📄 Informe PDF")
+    if job is None:
+        if st.button("📄 Generar informe PDF", key=f"generate_report_{report_type}",
+                     help="El informe se genera en segundo plano; puedes seguir navegando"):
+            st.session_state[state_key] = queue.submit(report_type, app.data, app.user['role'], app.role_info['name'])
+            st.rerun()
+        return
+
+    if job['status'] in PENDING_STATUSES:
+        def poll_report():
+            current = queue.get_job(job['id'])
+            if current is None or current['status'] not in PENDING_STATUSES:
+                st.rerun()
+            st.info("⏳ Generando informe en segundo plano...")
+
+        # Consulta periódica solo de este bloque hasta que el informe esté listo
+        st.fragment(poll_report, run_every=2)()
+        return
+
+    if job['status'] == 'error':
+        st.error(f"❌ Error generando el informe: {job['error']}")
+        if st.button("🔄 Reintentar", key=f"retry_report_{report_type}"):
+            st.session_state[state_key] = queue.submit(report_type, app.data, app.user['role'], app.role_info['name'])
+            st.rerun()
+        return
+
+    generated = datetime.fromtimestamp(job['finished_at']).strftime('%d/%m/%Y %H:%M')
+    st.caption(f"✅ Informe listo (generado {generated})")
+    if job['pdf']:
+        st.download_button(
+            "📥 Descargar informe PDF",
+            data=job['pdf'],
+            file_name=f"{report_type}_{app.user['role']}_{datetime.fromtimestamp(job['finished_at']).strftime('%Y%m%d_%H%M')}.pdf",
+            mime='application/pdf',
+            key=f"download_report_{report_type}"
+        )
+    else:
+        st.download_button(
+            "📥 Descargar informe (Markdown)",
+            data=job['markdown'],
+            file_name=f"{report_type}_{app.user['role']}.md",
+            mime='text/markdown',
+            key=f"download_report_{report_type}"
+        )
+
 def render_secure_planificacion(app):
     """Módulo de planificación con permisos"""
     st.markdown("### 📍 Planificación Estratégica Segura")
@@ -4909,35 +3520,28 @@ def render_location_planificacion(app):
     """Análisis de ubicación óptima"""
     st.markdown("#### 🏥 Análisis de Ubicación Óptima")
 
-    # Simular análisis de planificación
-    planificacion_metrics = []
-    
-    for _, municipio_data in app.data['demografia'].iterrows():
-        municipio = municipio_data['municipio']
-        pop_growth = municipio_data['crecimiento_2024_2025']
-        population = municipio_data['poblacion_2025']
-        
-        # Tiempo de acceso promedio
-        access_data = app.data['accesibilidad'][app.data['accesibilidad']['municipio_origen'] == municipio]
-        avg_access_time = access_data['tiempo_coche_minutos'].mean() if not access_data.empty else 60
-        
-        # Score de necesidad
-        need_score = (
-            (pop_growth / 1000) * 0.3 +
-            (population / 10000) * 0.4 +
-            (avg_access_time / 10) * 0.3
-        )
-        
-        planificacion_metrics.append({
-            'municipio': municipio,
-            'poblacion': population,
-            'crecimiento': pop_growth,
-            'tiempo_acceso_promedio': avg_access_time,
-            'score_necesidad': need_score,
-            'prioridad': 'Alta' if need_score > 15 else 'Media' if need_score > 8 else 'Baja'
+    from modules.analytics.planning_engine import compute_location_planning, DEFAULT_NEED_WEIGHTS
+
+    # Ponderación configurable del score de necesidad
+    with st.expander("⚙️ Ponderación del Score de Necesidad", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            w_crecimiento = st.slider("📈 Crecimiento", 0.0, 1.0, DEFAULT_NEED_WEIGHTS['crecimiento'], 0.05)
+        with col2:
+            w_poblacion = st.slider("👥 Población", 0.0, 1.0, DEFAULT_NEED_WEIGHTS['poblacion'], 0.05)
+        with col3:
+            w_tiempo = st.slider("⏱️ Tiempo de acceso", 0.0, 1.0, DEFAULT_NEED_WEIGHTS['tiempo_acceso'], 0.05)
+
+    # Ranking cacheado por versión de datos y pesos
+    try:
+        planificacion_df = compute_location_planning(app.data, {
+            'crecimiento': w_crecimiento,
+            'poblacion': w_poblacion,
+            'tiempo_acceso': w_tiempo
         })
-    
-    planificacion_df = pd.DataFrame(planificacion_metrics).sort_values('score_necesidad', ascending=False)
+    except ValueError as e:
+        st.warning(f"⚠️ {str(e)}")
+        return
     
     # Visualización
     fig_planificacion = px.scatter(
@@ -4973,138 +3577,169 @@ def render_demand_projection(app):
     """Proyección de demanda"""
     st.markdown("#### 📈 Proyección de Demanda Sanitaria")
     
-    # Proyección basada en crecimiento poblacional
-    current_pop = app.data['demografia']['poblacion_2025'].sum()
-    growth_rate = (app.data['demografia']['crecimiento_2024_2025'].sum() / app.data['demografia']['poblacion_2024'].sum()) * 100
-    
-    years = [2025, 2026, 2027, 2028, 2029, 2030]
-    projected_pop = []
-    projected_demand = []
+    from modules.analytics.demand_projection import DEFAULT_SCENARIOS, project_scenarios, projection_totals
     
-    for year in years:
-        years_ahead = year - 2025
-        pop_projection = current_pop * ((1 + growth_rate/100) ** years_ahead)
-        demand_projection = pop_projection * 0.15  # Estimación 15% necesita atención sanitaria anual
-        
-        projected_pop.append(pop_projection)
-        projected_demand.append(demand_projection)
+    # Comparación de escenarios (proyección vectorizada escenario × año × municipio, cacheada)
+    selected_scenarios = st.multiselect(
+        "🎯 Escenarios a comparar:",
+        list(DEFAULT_SCENARIOS.keys()),
+        default=['tendencial']
+    ) or ['tendencial']
     
-    projection_df = pd.DataFrame({
-        'año': years,
-        'poblacion_proyectada': projected_pop,
-        'demanda_sanitaria': projected_demand
-    })
+    projection = project_scenarios(app.data, {name: DEFAULT_SCENARIOS[name] for name in selected_scenarios})
+    projection_df = projection_totals(projection)
     
     fig_projection = px.line(
-        projection_df,
+        projection_df.melt(
+            id_vars=['escenario', 'año'],
+            value_vars=['poblacion_proyectada', 'demanda_sanitaria'],
+            var_name='serie', value_name='valor'
+        ),
         x='año',
-        y=['poblacion_proyectada', 'demanda_sanitaria'],
+        y='valor',
+        color='serie',
+        line_dash='escenario',
         title="📈 Proyección de Población y Demanda Sanitaria 2025-2030"
     )
     fig_projection = fix_plotly_hover_issues(fig_projection)
     st.plotly_chart(fig_projection, use_container_width=True)
     
-    # Métricas de proyección
+    # Métricas de proyección (primer escenario seleccionado)
+    main_projection = projection_df[projection_df['escenario'] == selected_scenarios[0]]
+    current_pop = main_projection['poblacion_proyectada'].iloc[0]
+    
     col1, col2, col3 = st.columns(3)
     with col1:
-        pop_2030 = projected_pop[-1]
+        pop_2030 = main_projection['poblacion_proyectada'].iloc[-1]
         st.metric("👥 Población 2030", f"{pop_2030/1000:.0f}K")
     with col2:
-        demand_2030 = projected_demand[-1]
+        demand_2030 = main_projection['demanda_sanitaria'].iloc[-1]
         st.metric("🏥 Demanda 2030", f"{demand_2030/1000:.0f}K")
     with col3:
         growth_total = ((pop_2030 - current_pop) / current_pop) * 100
         st.metric("📊 Crecimiento Total", f"{growth_total:.1f}%")
+    
+    # Demanda por línea de servicio en el último año proyectado
+    service_columns = [c for c in projection_df.columns if c.startswith('demanda_') and c != 'demanda_sanitaria']
+    last_year = projection_df[projection_df['año'] == projection_df['año'].max()]
+    fig_services = px.bar(
+        last_year.melt(id_vars='escenario', value_vars=service_columns, var_name='linea_servicio', value_name='actividad'),
+        x='linea_servicio',
+        y='actividad',
+        color='escenario',
+        barmode='group',
+        title=f"🏥 Actividad Proyectada por Línea de Servicio ({int(projection_df['año'].max())})"
+    )
+    fig_services = fix_plotly_hover_issues(fig_services)
+    st.plotly_chart(fig_services, use_container_width=True)
 
 def render_resource_redistribution(app):
     """Análisis de redistribución de recursos"""
     st.markdown("#### ⚖️ Redistribución Óptima de Recursos")
     
-    if app.metrics_calculator:
-        try:
-            equity_data = app.metrics_calculator.calculate_equity_index(app.data)
-            if not equity_data.empty:
-                # Identificar distritos con desequilibrios
-                avg_ratio_camas = equity_data['ratio_camas_1000hab'].mean()
-                avg_ratio_personal = equity_data['ratio_personal_1000hab'].mean()
-                
-                redistribution_needs = []
-                for _, district in equity_data.iterrows():
-                    camas_deficit = avg_ratio_camas - district['ratio_camas_1000hab']
-                    personal_deficit = avg_ratio_personal - district['ratio_personal_1000hab']
-                    
-                    redistribution_needs.append({
-                        'distrito': district['distrito'],
-                        'deficit_camas': camas_deficit,
-                        'deficit_personal': personal_deficit,
-                        'prioridad_redistribucion': abs(camas_deficit) + abs(personal_deficit)
-                    })
-                
-                redistrib_df = pd.DataFrame(redistribution_needs).sort_values('prioridad_redistribucion', ascending=False)
-                
-                # Visualizar necesidades de redistribución
-                fig_redistrib = px.bar(
-                    redistrib_df,
-                    x='distrito',
-                    y=['deficit_camas', 'deficit_personal'],
-                    title="⚖️ Déficits por Distrito (valores negativos = exceso)",
-                    barmode='group'
-                )
-                fig_redistrib = fix_plotly_hover_issues(fig_redistrib)
-                st.plotly_chart(fig_redistrib, use_container_width=True)
-                
-                # Recomendaciones de redistribución
-                st.markdown("##### 🎯 Recomendaciones de Redistribución")
-                top_needs = redistrib_df.head(3)
-                
-                for _, row in top_needs.iterrows():
-                    if row['deficit_camas'] > 0:
-                        st.warning(f"**{row['distrito']}**: Necesita +{row['deficit_camas']:.1f} camas/1000 hab")
-                    if row['deficit_personal'] > 0:
-                        st.info(f"**{row['distrito']}**: Necesita +{row['deficit_personal']:.1f} personal/1000 hab")
+    try:
+        from modules.analytics.redistribution_solver import (
+            DEFAULT_MAX_TRANSFER_FRACTION, DEFAULT_MAX_TRAVEL_MINUTES, solve_redistribution
+        )
         
-        except Exception as e:
-            st.error(f"Error en análisis de redistribución: {str(e)}")
+        # Restricciones del plan (cada combinación se resuelve una vez y queda cacheada)
+        col1, col2 = st.columns(2)
+        with col1:
+            max_travel = st.slider("🚗 Tiempo máximo de traslado (min)", 30, 180, DEFAULT_MAX_TRAVEL_MINUTES, 5)
+        with col2:
+            max_fraction = st.slider("📦 Capacidad cedible por distrito (%)", 0, 50,
+                                     int(DEFAULT_MAX_TRANSFER_FRACTION * 100), 5) / 100
+        
+        plan = solve_redistribution(app.data, max_travel, max_fraction)
+        districts = plan['districts']
+        transfers = plan['transfers']
+        
+        # Ratios por distrito antes y después del plan
+        fig_redistrib = px.bar(
+            districts.melt(
+                id_vars=['distrito', 'recurso'],
+                value_vars=['ratio_actual_1000hab', 'ratio_final_1000hab'],
+                var_name='situacion', value_name='ratio_1000hab'
+            ),
+            x='distrito',
+            y='ratio_1000hab',
+            color='situacion',
+            facet_row='recurso',
+            barmode='group',
+            title="⚖️ Recursos por 1000 hab: Situación Actual vs Plan de Redistribución"
+        )
+        fig_redistrib = fix_plotly_hover_issues(fig_redistrib)
+        st.plotly_chart(fig_redistrib, use_container_width=True)
+        
+        # Plan de traslados
+        st.markdown("##### 🎯 Plan de Traslados")
+        if transfers.empty:
+            st.info("ℹ️ No hay traslados posibles con las restricciones actuales")
+        else:
+            st.dataframe(transfers, use_container_width=True)
+            for row in transfers.head(3).itertuples(index=False):
+                st.warning(f"**{row.destino}**: +{row.cantidad} {row.recurso} desde {row.origen} ({row.tiempo_minutos:.0f} min)")
+    
+    except Exception as e:
+        st.error(f"Error en análisis de redistribución: {str(e)}")
 
 def render_route_optimization(app):
     """Optimización de rutas de acceso"""
     st.markdown("#### 🚗 Optimización de Rutas de Acceso")
     
-    # Análisis de tiempos de acceso
-    access_analysis = app.data['accesibilidad'].groupby('municipio_origen', observed=False).agg({
-        'tiempo_coche_minutos': ['mean', 'min', 'max'],
-        'coste_transporte_euros': 'mean'
-    }).round(1)
+    from modules.geo.routing import DEFAULT_ACCESS_THRESHOLD, get_routing_table
+    
+    # Caminos mínimos precalculados por versión de datos: las consultas son búsquedas en tabla
+    routing = get_routing_table(app.data)
+    threshold = st.slider("⏱️ Tiempo máximo aceptable al hospital más cercano (min)", 15, 120, DEFAULT_ACCESS_THRESHOLD, 5)
     
-    access_analysis.columns = ['tiempo_promedio', 'tiempo_minimo', 'tiempo_maximo', 'coste_promedio']
-    access_analysis = access_analysis.reset_index()
+    st.markdown("##### 🏥 Hospital Más Cercano por Municipio")
+    st.dataframe(routing.nearest.round(1), use_container_width=True)
     
-    # Identificar rutas problemáticas
-    problematic_routes = access_analysis[access_analysis['tiempo_promedio'] > 60]
+    # Identificar municipios sin acceso adecuado (incluye los que no tienen ruta registrada)
+    problematic_routes = routing.access_gaps(app.data['demografia']['municipio'], threshold)
     
     if not problematic_routes.empty:
-        st.error(f"🚨 **{len(problematic_routes)} municipios** con tiempo de acceso >60 minutos")
+        st.error(f"🚨 **{len(problematic_routes)} municipios** sin hospital a menos de {threshold} minutos")
         
-        fig_routes = px.bar(
-            problematic_routes,
-            x='municipio_origen',
-            y='tiempo_promedio',
-            title="⚠️ Municipios con Acceso Deficiente (>60 min)",
-            color='tiempo_promedio',
-            color_continuous_scale='Reds'
-        )
-        fig_routes = fix_plotly_hover_issues(fig_routes)
-        st.plotly_chart(fig_routes, use_container_width=True)
+        reachable = problematic_routes.dropna(subset=['tiempo_coche'])
+        if not reachable.empty:
+            fig_routes = px.bar(
+                reachable,
+                x='municipio',
+                y='tiempo_coche',
+                title=f"⚠️ Municipios con Acceso Deficiente (>{threshold} min)",
+                color='tiempo_coche',
+                color_continuous_scale='Reds'
+            )
+            fig_routes = fix_plotly_hover_issues(fig_routes)
+            st.plotly_chart(fig_routes, use_container_width=True)
         
         # Recomendaciones de mejora
         st.markdown("##### 🛣️ Recomendaciones de Mejora")
-        for _, route in problematic_routes.iterrows():
-            st.write(f"• **{route['municipio_origen']}**: Mejorar conexión (actual: {route['tiempo_promedio']:.0f} min)")
+        for route in problematic_routes.itertuples(index=False):
+            if pd.isna(route.tiempo_coche):
+                st.write(f"• **{route.municipio}**: Sin ruta registrada a ningún hospital")
+            else:
+                st.write(f"• **{route.municipio}**: Mejorar conexión con {route.hospital} (actual: {route.tiempo_coche:.0f} min)")
     else:
-        st.success("✅ Todos los municipios tienen acceso adecuado (<60 min)")
-
-
-
+        st.success(f"✅ Todos los municipios tienen acceso adecuado (<{threshold} min)")
+    
+    # Consulta de ruta óptima entre un municipio y un hospital
+    st.markdown("##### 🧭 Ruta Óptima")
+    col1, col2 = st.columns(2)
+    with col1:
+        origin = st.selectbox("📍 Municipio de origen", routing.municipios)
+    with col2:
+        destination = st.selectbox("🏥 Hospital de destino", routing.hospital_ids,
+                                   format_func=lambda code: routing.hospital_names[routing.hospital_ids.index(code)])
+    route = routing.route(origin, destination)
+    if route:
+        st.info(f"🛣️ {' → '.join(route['ruta'])}\n\n"
+                f"⏱️ {route['tiempo_coche']:.0f} min coche | 🚌 {route['tiempo_transporte_publico']:.0f} min transporte público | "
+                f"💰 {route['coste']:.2f}€")
+    else:
+        st.warning("⚠️ No existe ruta registrada entre el origen y el destino seleccionados")
 
 
 def render_complete_analysis_secure(app):
@@ -5124,6 +3759,10 @@ def render_complete_analysis_secure(app):
     if not app.data:
         st.error("❌ No hay datos disponibles para el análisis")
         return
+
+    # KPIs compartidos por todas las pestañas (una vez por versión de datos)
+    from modules.analytics.kpi_engine import get_health_kpis
+    kpis = get_health_kpis(app.data)
     
     # Análisis integral de todos los componentes
     tab1, tab2, tab3, tab4, tab5 = st.tabs([
@@ -5137,18 +3776,16 @@ def render_complete_analysis_secure(app):
         # Métricas clave
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            total_hospitals = len(app.data['hospitales'])
-            st.metric("🏥 Total Hospitales", total_hospitals)
+            st.metric("🏥 Total Hospitales", kpis.total_centers)
         with col2:
-            total_beds = app.data['hospitales']['camas_funcionamiento_2025'].sum()
-            st.metric("🛏️ Camas Totales", f"{total_beds:,}")
+            st.metric("🛏️ Camas Totales", f"{kpis.total_beds:,}")
         with col3:
-            total_staff = app.data['hospitales']['personal_sanitario_2025'].sum()
-            st.metric("👨‍⚕️ Personal Sanitario", f"{total_staff:,}")
+            st.metric("👨‍⚕️ Personal Sanitario", f"{kpis.total_staff:,}")
         with col4:
-            total_population = app.data['demografia']['poblacion_2025'].sum()
-            bed_ratio = (total_beds / total_population) * 1000
-            st.metric("Camas/1000 hab", f"{bed_ratio:.1f}")
+            st.metric("Camas/1000 hab", f"{kpis.bed_ratio_1000:.1f}")
+
+        # Recursos por distrito sanitario (desglose del motor de KPIs)
+        st.dataframe(kpis.by_district.round(2), use_container_width=True, hide_index=True)
         
         # Distribución por tipo de centro
         tipo_dist = app.data['hospitales']['tipo_centro'].value_counts()
@@ -5161,17 +3798,13 @@ def render_complete_analysis_secure(app):
         st.markdown("##### 👥 Análisis Demográfico Detallado")
         
         # Proyecciones demográficas
-        total_pop_2025 = app.data['demografia']['poblacion_2025'].sum()
-        total_growth = app.data['demografia']['crecimiento_2024_2025'].sum()
-        
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("👥 Población 2025", f"{total_pop_2025:,}")
+            st.metric("👥 Población 2025", f"{kpis.total_population:,}")
         with col2:
-            st.metric("📈 Crecimiento 2024-25", f"+{total_growth:,}")
+            st.metric("📈 Crecimiento 2024-25", f"+{kpis.population_growth:,}")
         with col3:
-            growth_rate = (total_growth / total_pop_2025) * 100
-            st.metric("📊 Tasa Crecimiento", f"{growth_rate:.2f}%")
+            st.metric("📊 Tasa Crecimiento", f"{kpis.growth_rate_pct:.2f}%")
         
         # Top municipios por crecimiento
         top_growth = app.data['demografia'].nlargest(10, 'crecimiento_2024_2025')
@@ -5224,19 +3857,15 @@ def render_complete_analysis_secure(app):
     with tab4:
         st.markdown("##### 🗺️ Análisis de Accesibilidad")
         
-        if 'accesibilidad' in app.data:
+        if kpis.avg_access_time is not None:
             # Tiempos de acceso promedio
-            avg_time = app.data['accesibilidad']['tiempo_coche_minutos'].mean()
-            max_time = app.data['accesibilidad']['tiempo_coche_minutos'].max()
-            min_time = app.data['accesibilidad']['tiempo_coche_minutos'].min()
-            
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("⏱️ Tiempo Promedio", f"{avg_time:.1f} min")
+                st.metric("⏱️ Tiempo Promedio", f"{kpis.avg_access_time:.1f} min")
             with col2:
-                st.metric("⏱️ Tiempo Máximo", f"{max_time:.1f} min")
+                st.metric("⏱️ Tiempo Máximo", f"{kpis.max_access_time:.1f} min")
             with col3:
-                st.metric("⏱️ Tiempo Mínimo", f"{min_time:.1f} min")
+                st.metric("⏱️ Tiempo Mínimo", f"{kpis.min_access_time:.1f} min")
             
             # Distribución de tiempos de acceso
             fig_access = px.histogram(app.data['accesibilidad'], x='tiempo_coche_minutos',
@@ -5253,20 +3882,15 @@ def render_complete_analysis_secure(app):
         
         # Verificar ratios críticos
         alerts = []
-        total_population = app.data['demografia']['poblacion_2025'].sum()
-        total_beds = app.data['hospitales']['camas_funcionamiento_2025'].sum()
-        bed_ratio = (total_beds / total_population) * 1000
-        avg_time = app.data['accesibilidad']['tiempo_coche_minutos'].mean()
         
-        if bed_ratio < 3.0:
+        if kpis.bed_ratio_1000 < 3.0:
             alerts.append("⚠️ Ratio de camas por habitante por debajo del estándar (3.0/1000)")
         
-        if avg_time > 45:
+        if (kpis.avg_access_time or 0) > 45:
             alerts.append("⚠️ Tiempo de acceso promedio superior a 45 minutos")
         
-        long_access = app.data['accesibilidad'][app.data['accesibilidad']['tiempo_coche_minutos'] > 60]
-        if not long_access.empty:
-            alerts.append(f"⚠️ {len(long_access)} rutas con tiempo de acceso superior a 60 minutos")
+        if kpis.routes_over_60:
+            alerts.append(f"⚠️ {kpis.routes_over_60} rutas con tiempo de acceso superior a 60 minutos")
         
         if alerts:
             for alert in alerts:
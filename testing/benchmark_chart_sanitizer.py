@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark del saneado de layout de SmartChartGenerator
+Compara la limpieza anterior (serialización completa, reconstrucción de la figura y
+40 actualizaciones de ejes, repetida en validación y verificación final) con el
+saneado en una sola pasada sobre los ejes, en figuras de 10k-100k puntos
+"""
+
+import sys
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.visualization.figure_policy import sanitize_layout
+
+
+def legacy_nuclear_cleaner(fig: go.Figure) -> go.Figure:
+    """Limpieza anterior: to_plotly_json + recorrido recursivo + go.Figure + 40 ejes + to_plotly_json"""
+    fig_dict = fig.to_plotly_json()
+
+    def clean_recursive(obj, path=""):
+        if isinstance(obj, dict):
+            for key, value in list(obj.items()):
+                current_path = f"{path}.{key}" if path else key
+                if key == "rangeslider" and "yaxis" in path:
+                    del obj[key]
+                elif key.startswith("yaxis") and isinstance(value, dict) and "rangeslider" in value:
+                    del value["rangeslider"]
+                elif key == "rangeslider" and isinstance(value, dict) and "yaxis" in value:
+                    del value["yaxis"]
+                else:
+                    clean_recursive(value, current_path)
+        elif isinstance(obj, list):
+            for i, item in enumerate(obj):
+                clean_recursive(item, f"{path}[{i}]")
+
+    clean_recursive(fig_dict)
+    fig = go.Figure(data=fig_dict.get('data', []), layout=fig_dict.get('layout', {}))
+
+    safe_config = {}
+    for i in range(20):
+        suffix = '' if i == 0 else str(i + 1)
+        safe_config[f'xaxis{suffix}'] = dict(rangeslider=dict(visible=False))
+        safe_config[f'yaxis{suffix}'] = dict()
+    fig.update_layout(**safe_config)
+
+    for key, value in fig.to_plotly_json().get('layout', {}).items():
+        if key.startswith('yaxis') and isinstance(value, dict) and 'rangeslider' in value:
+            fig.update_layout(**{key: dict()})
+    return fig
+
+
+def legacy_pipeline(fig: go.Figure) -> go.Figure:
+    """Validación en el tema + limpieza nuclear + verificación final (flujo anterior de generate_chart)"""
+    fig = legacy_nuclear_cleaner(fig)
+    fig.to_plotly_json()
+    fig = legacy_nuclear_cleaner(fig)
+    fig.to_plotly_json()
+    return fig
+
+
+def sample_figures(n_points: int):
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({
+        'x': rng.normal(size=n_points),
+        'y': rng.normal(size=n_points),
+        'fecha': pd.date_range('2020-01-01', periods=n_points, freq='h'),
+        'distrito': rng.choice(['Málaga', 'Costa del Sol', 'Axarquía'], size=n_points),
+    })
+    return {
+        'scatter': px.scatter(data, x='x', y='y', color='distrito'),
+        'line': px.line(data, x='fecha', y='y'),
+        'histogram': px.histogram(data, x='x', facet_col='distrito'),
+    }
+
+
+def time_call(func, fig: go.Figure, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        copy = go.Figure(fig)
+        start = time.perf_counter()
+        func(copy)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(sizes=(10_000, 50_000, 100_000)):
+    results = []
+    for n_points in sizes:
+        for name, fig in sample_figures(n_points).items():
+            legacy = time_call(legacy_pipeline, fig)
+            single_pass = time_call(sanitize_layout, fig)
+            results.append({'figura': name, 'puntos': n_points, 'anterior_ms': legacy * 1000,
+                            'una_pasada_ms': single_pass * 1000, 'mejora_x': legacy / single_pass})
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    print("⏱️ BENCHMARK SANEADO DE LAYOUT")
+    print("=" * 60)
+    print(run_benchmark().to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la política de hover de las figuras del dashboard
+Compara la corrección anterior (hoverinfo por traza, reconstrucción del layout, clonado de
+cada traza por dir()/getattr y 10 actualizaciones de ejes) con la actualización por lotes
+"""
+
+import sys
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.visualization.figure_policy import apply_hover_policy
+
+
+def legacy_fix_hover(fig: go.Figure) -> go.Figure:
+    """Corrección anterior de fix_plotly_hover_issues (clonado de trazas)"""
+    for trace in fig.data:
+        trace.update(hoverinfo='none', hovertemplate=None)
+
+    layout_dict = fig.layout.to_plotly_json()
+    for key in ('hovermode', 'hoverlabel', 'hoverdistance', 'spikedistance'):
+        layout_dict.pop(key, None)
+    layout_dict['hovermode'] = False
+    fig.layout = go.Layout(layout_dict)
+
+    new_traces = []
+    for trace in fig.data:
+        trace_dict = {}
+        for attr in dir(trace):
+            if attr.startswith('_') or 'hover' in attr:
+                continue
+            try:
+                value = getattr(trace, attr)
+            except Exception:
+                continue
+            if callable(value) or value is None:
+                continue
+            trace_dict[attr] = value
+        new_trace = type(trace)()
+        for attr, value in trace_dict.items():
+            try:
+                setattr(new_trace, attr, value)
+            except Exception:
+                pass
+        new_trace.hoverinfo = 'none'
+        new_traces.append(new_trace)
+    fig.data = []
+    for trace in new_traces:
+        fig.add_trace(trace)
+
+    for i in range(1, 11):
+        suffix = '' if i == 1 else str(i)
+        fig.update_layout(**{f'xaxis{suffix}': dict(rangeslider=dict(visible=False))})
+    return fig
+
+
+def sample_figures(n_points: int):
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({
+        'x': rng.normal(size=n_points),
+        'y': rng.normal(size=n_points),
+        'fecha': pd.date_range('2020-01-01', periods=n_points, freq='h'),
+        'distrito': rng.choice(['Málaga', 'Costa del Sol', 'Axarquía'], size=n_points),
+    })
+    totals = data.groupby('distrito', as_index=False)['y'].count()
+    subplots = make_subplots(rows=1, cols=2)
+    subplots.add_scatter(x=data['x'], y=data['y'], mode='markers', row=1, col=1)
+    subplots.add_bar(x=totals['distrito'], y=totals['y'], row=1, col=2)
+    return {
+        'scatter': px.scatter(data, x='x', y='y', color='distrito'),
+        'line': px.line(data, x='fecha', y='y'),
+        'bar': px.bar(totals, x='distrito', y='y'),
+        'pie': px.pie(totals, names='distrito', values='y'),
+        'subplots': subplots,
+    }
+
+
+def time_call(func, fig: go.Figure, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        copy = go.Figure(fig)
+        start = time.perf_counter()
+        func(copy)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(sizes=(10_000, 100_000)):
+    results = []
+    for n_points in sizes:
+        for name, fig in sample_figures(n_points).items():
+            legacy = time_call(legacy_fix_hover, fig)
+            batched = time_call(apply_hover_policy, fig)
+            results.append({'figura': name, 'puntos': n_points, 'anterior_ms': legacy * 1000,
+                            'por_lotes_ms': batched * 1000, 'mejora_x': legacy / batched})
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    print("⏱️ BENCHMARK POLÍTICA DE HOVER")
+    print("=" * 60)
+    print(run_benchmark().to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test de la rejilla hexagonal de accesibilidad
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.geo.accessibility_grid import (ACCESS_TIME_BANDS, access_band, fit_travel_time_model,
+                                            get_accessibility_geojson, get_accessibility_grid, hex_grid)
+from modules.geo.distance import haversine_km
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw')
+
+
+def load_data():
+    return {
+        'hospitales': pd.read_csv(os.path.join(DATA_DIR, 'hospitales_malaga_2025.csv')),
+        'accesibilidad': pd.read_csv(os.path.join(DATA_DIR, 'accesibilidad_sanitaria_2025.csv')),
+    }
+
+
+def test_hex_grid_spacing():
+    """Centros vecinos a sqrt(3) * radio en la misma fila"""
+    lat, lon = hex_grid(36.5, 36.6, -4.5, -4.3, cell_km=2.0)
+    same_row = lat == lat[0]
+    spacing = haversine_km(lat[same_row][:-1], lon[same_row][:-1], lat[same_row][1:], lon[same_row][1:])
+    assert np.allclose(spacing, np.sqrt(3) * 2.0, rtol=0.01)
+
+
+def test_grid_matches_nearest_hospital():
+    """Cada celda apunta al hospital más cercano y su tiempo sigue el modelo ajustado"""
+    data = load_data()
+    grid = get_accessibility_grid(data)
+    hospitales = data['hospitales']
+    assert len(grid) > 0
+
+    distances = haversine_km(grid['latitud'].to_numpy()[:, None], grid['longitud'].to_numpy()[:, None],
+                             hospitales['latitud'].to_numpy()[None, :], hospitales['longitud'].to_numpy()[None, :])
+    assert np.allclose(grid['distancia_km'], distances.min(axis=1), atol=1e-3)
+    assert (grid['hospital'].to_numpy() == hospitales['nombre'].to_numpy()[distances.argmin(axis=1)]).all()
+
+    base, per_km = fit_travel_time_model(data)
+    assert per_km > 0
+    assert np.allclose(grid['tiempo_minutos'], base + per_km * grid['distancia_km'])
+
+
+def test_geojson_is_cached_per_version():
+    """Misma versión de datos: misma capa; datos distintos: capa nueva"""
+    data = load_data()
+    layer = get_accessibility_geojson(data)
+    assert get_accessibility_geojson(load_data()) is layer
+    assert len(layer['features']) == len(get_accessibility_grid(data))
+
+    feature = layer['features'][0]
+    ring = feature['geometry']['coordinates'][0]
+    assert len(ring) == 7 and ring[0] == ring[-1]
+    band = access_band([feature['properties']['tiempo_minutos']])[0]
+    assert feature['properties']['color'] == ACCESS_TIME_BANDS[band][1]
+
+    changed = dict(data, hospitales=data['hospitales'].head(3))
+    assert get_accessibility_geojson(changed) is not layer
+
+
+def test_legend_follows_layer_visibility():
+    """La leyenda de bandas solo se ve con la capa activa (oculta en el mapa completo)"""
+    from modules.visualization.interactive_maps import EpicHealthMaps
+
+    data = load_data()
+    for show, display in [(False, 'none'), (True, 'block')]:
+        maps = EpicHealthMaps()
+        epic_map = maps.create_accessibility_heatmap(maps.create_epic_base_map(), data['accesibilidad'],
+                                                     data['hospitales'], show=show)
+        html = epic_map.get_root().render()
+        assert html.count('Tiempo al hospital') == 1
+        assert f'style="display: {display}; position: fixed;' in html
+        assert ".on('add remove'" in html
+
+
+if __name__ == "__main__":
+    test_hex_grid_spacing()
+    test_grid_matches_nearest_hospital()
+    test_geojson_is_cached_per_version()
+    test_legend_follows_layer_visibility()
+    print("✅ Tests de la rejilla de accesibilidad completados")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test de la generación de límites simplificados (geometrías de prueba, sin red)
+"""
+
+import sys
+import os
+import json
+import tempfile
+from collections import Counter
+
+import numpy as np
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.geo.boundaries import (ZOOM_LEVELS, BoundaryTopology, build_boundary_assets, douglas_peucker,
+                                    load_boundaries, zoom_precision, zoom_tolerance)
+
+# Teselación escalonada de los 20 municipios de referencia: solo para tests (no son límites reales)
+SAMPLE_MUNICIPALITIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures',
+                                          'municipios_malaga_muestra.geojson')
+
+
+def load_sample():
+    with open(SAMPLE_MUNICIPALITIES_FILE, encoding='utf-8') as f:
+        return json.load(f)['features']
+
+
+def rings_of(feature):
+    geometry = feature['geometry']
+    polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+    return [ring for polygon in polygons for ring in polygon]
+
+
+def test_douglas_peucker_keeps_corners():
+    """Puntos casi colineales se eliminan; las esquinas se conservan"""
+    points = np.array([[0, 0], [1, 0.001], [2, 0], [2, 1], [2, 2]], dtype=float)
+    keep = douglas_peucker(points, tolerance=0.01)
+    assert keep.tolist() == [True, False, True, False, True]
+
+
+def test_shared_borders_stay_identical():
+    """Tras simplificar, cada borde compartido aparece una vez en cada sentido (sin huecos ni solapes)"""
+    topology = BoundaryTopology(load_sample())
+    vertex_counts = []
+    for zoom in ZOOM_LEVELS:
+        features = topology.features(zoom_tolerance(zoom), zoom_precision(zoom))
+        segments = Counter()
+        for feature in features:
+            assert rings_of(feature), feature['properties']
+            for ring in rings_of(feature):
+                assert ring[0] == ring[-1]
+                segments.update((tuple(a), tuple(b)) for a, b in zip(ring[:-1], ring[1:]))
+        assert max(segments.values()) == 1
+        vertex_counts.append(sum(len(ring) for feature in features for ring in rings_of(feature)))
+
+    # Menos detalle cuanto menor es el zoom
+    assert vertex_counts == sorted(vertex_counts)
+    assert vertex_counts[0] < sum(len(ring) for feature in load_sample() for ring in rings_of(feature))
+
+
+def wavy_features():
+    """Dos municipios con un borde común detallado (ondulaciones a varias escalas)"""
+    x = np.linspace(-4.6, -4.1, 2001)
+    y = 36.7 + 0.004 * np.sin(x * 60) + 0.001 * np.sin(x * 700) + 0.0002 * np.sin(x * 5000)
+    border = [[float(a), float(b)] for a, b in zip(x, y)]
+    north = border + [[-4.1, 36.9], [-4.6, 36.9], border[0]]
+    south = border + [[-4.1, 36.5], [-4.6, 36.5], border[0]]
+    return [
+        {'type': 'Feature', 'properties': {'municipio': 'Norte', 'distrito_sanitario': 'A'},
+         'geometry': {'type': 'Polygon', 'coordinates': [north]}},
+        {'type': 'Feature', 'properties': {'municipio': 'Sur', 'distrito_sanitario': 'A'},
+         'geometry': {'type': 'Polygon', 'coordinates': [south]}},
+    ]
+
+
+def test_each_zoom_level_simplifies_differently():
+    """Con bordes detallados cada nivel de zoom publica menos vértices que el siguiente"""
+    topology = BoundaryTopology(wavy_features())
+    vertex_counts = [sum(len(ring) for feature in topology.features(zoom_tolerance(zoom), zoom_precision(zoom))
+                         for ring in rings_of(feature))
+                     for zoom in ZOOM_LEVELS]
+    assert all(low < high for low, high in zip(vertex_counts[:-1], vertex_counts[1:])), vertex_counts
+    assert vertex_counts[-1] < 2 * 2001
+
+
+def test_build_and_load_assets():
+    """La generación escribe una capa por nivel y la carga elige el nivel adecuado"""
+    features = load_sample()
+    with tempfile.TemporaryDirectory() as output_dir:
+        written = build_boundary_assets(SAMPLE_MUNICIPALITIES_FILE, output_dir)
+        assert len(written) == 2 * len(ZOOM_LEVELS)
+
+        districts = load_boundaries('distritos', 9, output_dir)
+        expected = {feature['properties']['distrito_sanitario'] for feature in features}
+        assert {feature['properties']['distrito_sanitario'] for feature in districts['features']} == expected
+
+        municipalities = load_boundaries('municipios', 11, output_dir)
+        assert len(municipalities['features']) == len(features)
+        assert load_boundaries('municipios', 11, output_dir) is municipalities
+        assert load_boundaries('municipios', 5, output_dir) is load_boundaries('municipios', 8, output_dir)
+
+    assert load_boundaries('municipios', 10, os.path.join(tempfile.gettempdir(), 'sin_limites')) is None
+
+
+def test_boundary_layers_only_with_assets():
+    """Los mapas solo muestran límites cuando se han publicado las capas"""
+    import folium
+    from modules.visualization.interactive_maps import EpicHealthMaps
+
+    def boundary_layers(directory):
+        epic_map = EpicHealthMaps().add_boundary_layers(folium.Map(), 10, directory=directory)
+        return [child for child in epic_map._children.values() if isinstance(child, folium.FeatureGroup)]
+
+    assert boundary_layers(os.path.join(tempfile.gettempdir(), 'sin_limites')) == []
+    with tempfile.TemporaryDirectory() as output_dir:
+        build_boundary_assets(SAMPLE_MUNICIPALITIES_FILE, output_dir)
+        assert [layer.layer_name for layer in boundary_layers(output_dir)] == [
+            "🗂️ Distritos Sanitarios", "🗺️ Límites Municipales"]
+
+
+if __name__ == "__main__":
+    test_douglas_peucker_keeps_corners()
+    test_shared_borders_stay_identical()
+    test_each_zoom_level_simplifies_differently()
+    test_build_and_load_assets()
+    test_boundary_layers_only_with_assets()
+    print("✅ Tests de límites simplificados completados")
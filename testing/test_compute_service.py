@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test del servicio de cómputo en procesos
+"""
+
+import sys
+import os
+
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.ai.ai_processor import HealthMetricsCalculator
+from modules.analytics.demand_projection import DEFAULT_SCENARIOS, DEFAULT_YEARS, _build_projection
+from modules.analytics.planning_engine import DEFAULT_NEED_WEIGHTS, _build_location_planning
+from modules.performance.compute_service import (
+    ARROW_AVAILABLE, ComputeService, frame_from_arrow, frame_to_arrow
+)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw')
+
+
+def load_data():
+    return {
+        'hospitales': pd.read_csv(os.path.join(DATA_DIR, 'hospitales_malaga_2025.csv')),
+        'demografia': pd.read_csv(os.path.join(DATA_DIR, 'demografia_malaga_2025.csv')),
+        'accesibilidad': pd.read_csv(os.path.join(DATA_DIR, 'accesibilidad_sanitaria_2025.csv')),
+        'indicadores': pd.read_csv(os.path.join(DATA_DIR, 'indicadores_salud_2025.csv')),
+    }
+
+
+def test_arrow_roundtrip():
+    """Los datasets se reconstruyen igual desde el stream Arrow"""
+    if not ARROW_AVAILABLE:
+        return
+    df = load_data()['hospitales']
+    df['tipo_centro'] = df['tipo_centro'].astype('category')
+    restored = frame_from_arrow(frame_to_arrow(df))
+    pd.testing.assert_frame_equal(restored, df)
+
+
+def test_process_jobs_match_direct_build():
+    """Los trabajos en procesos devuelven lo mismo que el cálculo directo"""
+    data = load_data()
+    service = ComputeService(max_workers=1)
+    try:
+        weights = dict(DEFAULT_NEED_WEIGHTS)
+        planning = service.run('location_planning', data, weights=weights)
+        pd.testing.assert_frame_equal(planning, _build_location_planning(data, weights))
+
+        equity = service.run('equity_index', data)
+        pd.testing.assert_frame_equal(equity, HealthMetricsCalculator._build_equity_index(data))
+
+        projection = service.run('demand_projection', data, scenarios=DEFAULT_SCENARIOS, years=DEFAULT_YEARS)
+        expected = _build_projection(data, DEFAULT_SCENARIOS, DEFAULT_YEARS)
+        assert (projection['demand'] == expected['demand']).all()
+
+        # Cada dataset se publica una sola vez por versión
+        stats = service.get_stats()
+        assert stats['jobs'] == 3 and stats['fallbacks'] == 0
+        if ARROW_AVAILABLE:
+            assert stats['shared_frames'] == 4
+    finally:
+        service.shutdown()
+    assert service.get_stats()['active_shared_frames'] == 0
+
+
+def test_inline_mode_and_unknown_jobs():
+    """Sin procesos los trabajos se calculan en el propio proceso; los nombres desconocidos fallan"""
+    data = load_data()
+    service = ComputeService(max_workers=0)
+    equity = service.run('equity_index', data)
+    assert len(equity) > 0 and service.get_stats()['inline'] == 1
+
+    try:
+        service.run('desconocido', data)
+        assert False, "Debería fallar con un trabajo desconocido"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_arrow_roundtrip()
+    test_process_jobs_match_direct_build()
+    test_inline_mode_and_unknown_jobs()
+    print("✅ Tests del servicio de cómputo completados")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test de los paquetes CSS con hash de contenido
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.visualization.css_bundles import (
+    DESKTOP_FONTS_IMPORT, MANIFEST_FILE, all_variants, build_bundle, bundle_html, get_css_bundle,
+    minify_css, write_bundles
+)
+
+
+def test_minify_keeps_strings():
+    """La minificación quita comentarios y espacios pero respeta las cadenas de los selectores"""
+    css = '/* tarjeta */\n[style*="background: linear-gradient(135deg, #22c55e"] * {\n    color: white ;\n}\na > b , c { x: y; }'
+    minified = minify_css(css)
+    assert minified == '[style*="background: linear-gradient(135deg, #22c55e"] *{color: white}a>b,c{x: y}'
+
+
+def test_bundles_are_deterministic():
+    """Cada variante tiene un hash estable, menor tamaño que sus fuentes y el @import al principio"""
+    first = build_bundle('light')
+    assert build_bundle('light').digest == first.digest
+    assert first.content.startswith(DESKTOP_FONTS_IMPORT)
+    assert first.content.count('@import') == 1
+    assert len(first.content.encode('utf-8')) < first.source_size
+
+    digests = {build_bundle(**variant).digest for variant in all_variants()}
+    assert len(digests) == len(all_variants())
+    assert 'ios_safari_fixes.css' in build_bundle('dark', mobile=True, ios=True).sources
+    assert 'critical/app_background_dark.css' in build_bundle('dark', mobile=True).sources
+    assert get_css_bundle('dark') is get_css_bundle('dark')
+
+
+def test_write_bundles_and_html():
+    """El build publica ficheros con hash y manifiesto; la etiqueta es un <link> o un <style> estable"""
+    bundle = build_bundle('light', mobile=True)
+    with tempfile.TemporaryDirectory() as output_dir:
+        stale = os.path.join(output_dir, 'mobile-light.000000000000.css')
+        open(stale, 'w').close()
+        bundles = write_bundles(output_dir, variants=[{'theme': 'light', 'mobile': True}])
+        assert not os.path.exists(stale)
+        assert os.path.exists(os.path.join(output_dir, bundle.filename))
+        with open(os.path.join(output_dir, MANIFEST_FILE), encoding='utf-8') as f:
+            assert json.load(f)['mobile-light']['hash'] == bundles['mobile-light'].digest
+
+        link = bundle_html(bundle, static_url='app/static/css', output_dir=output_dir)
+        assert link == f'<link rel="stylesheet" id="app-css" href="app/static/css/{bundle.filename}?v={bundle.digest}">'
+
+    inline = bundle_html(bundle, static_url='')
+    assert inline == bundle_html(bundle, static_url='') and inline.startswith(f'<style id="app-css-{bundle.digest}">')
+
+
+if __name__ == "__main__":
+    test_minify_keeps_strings()
+    test_bundles_are_deterministic()
+    test_write_bundles_and_html()
+    print("✅ Tests de los paquetes CSS completados")
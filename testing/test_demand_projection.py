@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test del motor de escenarios de proyección de demanda
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.analytics.demand_projection import (
+    DEFAULT_DEMAND_RATE, DEFAULT_SCENARIOS, DEFAULT_YEARS, SERVICE_LINES,
+    project_scenarios, projection_by_municipality, projection_totals
+)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw')
+
+
+def load_data():
+    return {
+        'demografia': pd.read_csv(os.path.join(DATA_DIR, 'demografia_malaga_2025.csv')),
+        'indicadores': pd.read_csv(os.path.join(DATA_DIR, 'indicadores_salud_2025.csv')),
+    }
+
+
+def test_projection_shapes():
+    """Las matrices tienen forma escenario × año × municipio"""
+    data = load_data()
+    projection = project_scenarios(data)
+    shape = (len(DEFAULT_SCENARIOS), len(DEFAULT_YEARS), len(data['demografia']))
+
+    assert projection['population'].shape == shape
+    assert projection['demand'].shape == shape
+    assert set(projection['service_demand']) == set(SERVICE_LINES)
+
+    # El año base reproduce la población actual en todos los escenarios
+    base = data['demografia']['poblacion_2025'].to_numpy(dtype=np.float64)
+    assert np.allclose(projection['population'][:, 0, :], base[None, :])
+
+    totals = projection_totals(projection)
+    assert len(totals) == shape[0] * shape[1]
+    print(totals.head(len(DEFAULT_YEARS)))
+
+
+def test_deceleration_matches_reference():
+    """El escenario de desaceleración coincide con la proyección original por municipio"""
+    data = load_data()
+    by_municipality = projection_by_municipality(project_scenarios(data), 'desaceleracion')
+
+    for _, muni in data['demografia'].iterrows():
+        base_pop = muni['poblacion_2025']
+        growth_rate = muni['crecimiento_2024_2025'] / muni['poblacion_2024']
+        for i, year in enumerate(DEFAULT_YEARS):
+            expected = base_pop * ((1 + growth_rate * (0.95 ** i)) ** i)
+            assert abs(by_municipality.loc[year, muni['municipio']] - expected) < 1e-6
+
+
+def test_demand_without_ageing_adjustment():
+    """Sin elasticidad al envejecimiento la demanda es el 15% de la población"""
+    data = load_data()
+    scenarios = {'plano': dict(DEFAULT_SCENARIOS['tendencial'], ageing_elasticity=0.0)}
+    projection = project_scenarios(data, scenarios)
+
+    assert np.allclose(projection['demand'], projection['population'] * DEFAULT_DEMAND_RATE)
+    assert project_scenarios(data, scenarios) is projection
+    assert project_scenarios(data, scenarios, years=[2025, 2035]) is not projection
+
+
+if __name__ == "__main__":
+    test_projection_shapes()
+    test_deceleration_matches_reference()
+    test_demand_without_ageing_adjustment()
+    print("✅ Tests del motor de escenarios completados")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test de las matrices de distancias de Haversine
+"""
+
+import sys
+import os
+import math
+
+import numpy as np
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.geo.distance import haversine_km, haversine_matrix
+
+
+def reference_distance(lat1, lng1, lat2, lng2):
+    """Cálculo escalar original con math"""
+    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 6371 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def test_matrix_matches_scalar_formula():
+    """La matriz origen × destino coincide con el cálculo par a par"""
+    rng = np.random.default_rng(7)
+    origins = rng.uniform([36.0, -7.5], [38.7, -1.6], size=(40, 2))
+    destinations = rng.uniform([36.0, -7.5], [38.7, -1.6], size=(15, 2))
+
+    matrix = haversine_matrix(origins[:, 0], origins[:, 1], destinations[:, 0], destinations[:, 1])
+    assert matrix.shape == (40, 15)
+    assert matrix.dtype == np.float32
+
+    for i in range(0, 40, 7):
+        for j in range(0, 15, 4):
+            expected = reference_distance(*origins[i], *destinations[j])
+            assert abs(matrix[i, j] - expected) < 1e-3
+
+    # Malaga - Marbella (aprox. 50 km)
+    assert 45 < haversine_km(36.7213, -4.4214, 36.5108, -4.8856) < 50
+
+
+def test_chunked_and_square_matrices():
+    """El procesamiento por bloques no altera el resultado; sin destinos la matriz es simétrica"""
+    rng = np.random.default_rng(11)
+    lat, lon = rng.uniform(36.0, 38.7, 103), rng.uniform(-7.5, -1.6, 103)
+
+    full = haversine_matrix(lat, lon, dtype=np.float64)
+    chunked = haversine_matrix(lat, lon, dtype=np.float64, chunk_size=10)
+    assert np.array_equal(full, chunked)
+    assert np.allclose(full, full.T)
+    assert np.allclose(np.diag(full), 0)
+
+
+if __name__ == "__main__":
+    test_matrix_matches_scalar_formula()
+    test_chunked_and_square_matrices()
+    print("✅ Tests de distancias completados")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test de la cache de figuras de SmartChartGenerator
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.visualization.chart_generator import SmartChartGenerator
+from modules.visualization import figure_cache
+from modules.visualization.figure_cache import compact_figure_json, config_key, get_role_figure
+
+
+class CountingGenerator(SmartChartGenerator):
+    def __init__(self):
+        super().__init__()
+        self.builds = 0
+
+    def _build_chart(self, chart_config, data, theme_mode='light'):
+        self.builds += 1
+        return super()._build_chart(chart_config, data, theme_mode)
+
+
+def sample_data(scale=1):
+    return pd.DataFrame({
+        'distrito': ['Norte', 'Sur', 'Este', 'Oeste', 'Centro'],
+        'camas_funcionamiento_2025': [250 * scale, 180, 320, 210, 280],
+        'personal_sanitario_2025': [450, 320, 580, 410, 520],
+    })
+
+
+def test_config_key_ignores_order():
+    assert config_key({'type': 'bar', 'title': 'A'}) == config_key({'title': 'A', 'type': 'bar'})
+
+
+def test_unchanged_chart_is_not_rebuilt():
+    """Misma configuración, mismos datos y mismo tema: una sola construcción"""
+    generator = CountingGenerator()
+    config = {'type': 'bar', 'title': 'Camas por distrito (cache)', 'x_axis': 'distrito',
+              'y_axis': 'camas_funcionamiento_2025'}
+
+    first = generator.generate_chart(config, sample_data())
+    second = generator.generate_chart(dict(config), sample_data())
+    assert generator.builds == 1
+    assert first.to_plotly_json() == second.to_plotly_json()
+
+    # Cada llamada recibe una figura independiente
+    first.update_layout(title='Modificado')
+    assert generator.generate_chart(config, sample_data()).layout.title.text == 'Camas por distrito (cache)'
+
+    generator.generate_chart(config, sample_data(), theme_mode='dark')
+    generator.generate_chart(config, sample_data(scale=2))
+    generator.generate_chart(dict(config, type='line'), sample_data())
+    assert generator.builds == 4
+    assert generator.current_theme == 'light'
+
+
+def test_unhashable_columns_skip_cache():
+    """Datos con listas en una columna generan el gráfico sin cache en lugar de fallar"""
+    generator = CountingGenerator()
+    data = pd.DataFrame({'a': ['x', 'y'], 'b': [1, 2], 'c': [[1], [2]]})
+    config = {'type': 'bar', 'title': 'Columnas no hashables', 'x_axis': 'a', 'y_axis': 'b'}
+
+    assert generator.generate_chart(config, data) is not None
+    generator.generate_chart(config, data)
+    assert generator.builds == 2
+
+
+def test_compact_json_rounds_to_float32():
+    """Los arrays de floats viajan como float32; textos y enteros no cambian"""
+    if not figure_cache.TYPED_ARRAYS_AVAILABLE:
+        return
+    fig = px.bar(x=['Norte', 'Sur'], y=[0.1, 2.25])
+    figure = pio.from_json(compact_figure_json(fig), skip_invalid=True).to_plotly_json()
+    assert list(figure['data'][0]['x']) == ['Norte', 'Sur']
+    assert figure['data'][0]['y']['dtype'] == 'f4'
+    heatmap = px.imshow(np.random.default_rng(0).random((40, 40)))
+    assert len(compact_figure_json(heatmap)) < len(pio.to_json(heatmap, validate=False))
+
+
+def test_compact_json_without_typed_arrays():
+    """Sin arrays tipados (Plotly 5.x) la figura se serializa sin compactar"""
+    heatmap = px.imshow(np.random.default_rng(0).random((10, 10)))
+    available = figure_cache.TYPED_ARRAYS_AVAILABLE
+    figure_cache.TYPED_ARRAYS_AVAILABLE = False
+    try:
+        assert compact_figure_json(heatmap) == pio.to_json(heatmap, validate=False)
+    finally:
+        figure_cache.TYPED_ARRAYS_AVAILABLE = available
+
+
+def test_role_figure_shared_across_sessions():
+    """Misma figura de rol para todas las sesiones hasta que cambian los datos o el tema"""
+    builds = []
+
+    def build():
+        builds.append(1)
+        return px.bar(data['hospitales'], x='distrito', y='camas_funcionamiento_2025')
+
+    data = {'hospitales': sample_data(), 'demografia': pd.DataFrame({'municipio': ['Ronda']})}
+    theme = {'primary_gradient': 'linear-gradient(#1a365d, #2d3748)'}
+    first = get_role_figure('management', 'test_capacidad', data, build, depends_on=('hospitales',), theme=theme)
+    second = get_role_figure('management', 'test_capacidad', dict(data), build, depends_on=('hospitales',), theme=dict(theme))
+    assert len(builds) == 1 and first is not second
+
+    # Otro dataset del diccionario no invalida la figura; otro rol u otros datos sí
+    data['demografia'] = pd.DataFrame({'municipio': ['Antequera']})
+    get_role_figure('management', 'test_capacidad', data, build, depends_on=('hospitales',), theme=theme)
+    assert len(builds) == 1
+    get_role_figure('basic', 'test_capacidad', data, build, depends_on=('hospitales',), theme=theme)
+    data['hospitales'] = sample_data(scale=2)
+    get_role_figure('management', 'test_capacidad', data, build, depends_on=('hospitales',), theme=theme)
+    assert len(builds) == 3
+
+
+if __name__ == "__main__":
+    test_config_key_ignores_order()
+    test_unchanged_chart_is_not_rebuilt()
+    test_unhashable_columns_skip_cache()
+    test_compact_json_rounds_to_float32()
+    test_compact_json_without_typed_arrays()
+    test_role_figure_shared_across_sessions()
+    print("✅ Tests de la cache de figuras completados")
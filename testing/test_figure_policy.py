@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test del saneado de layout en una sola pasada
+"""
+
+import sys
+import os
+
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.visualization.chart_generator import SmartChartGenerator
+from modules.visualization.figure_policy import apply_hover_policy, sanitize_layout
+
+
+def test_sanitize_all_x_axes_in_place():
+    """Todos los ejes X quedan sin rangeslider visible ni `yaxis`; datos intactos"""
+    fig = make_subplots(rows=2, cols=1)
+    fig.add_scatter(x=[1, 2, 3], y=[3, 1, 2], row=1, col=1)
+    fig.add_scatter(x=[1, 2, 3], y=[1, 2, 3], row=2, col=1)
+    fig.update_layout(xaxis=dict(rangeslider=dict(visible=True, yaxis=dict(rangemode='auto'))),
+                      xaxis2=dict(rangeslider=dict(visible=True)))
+    data_before = [trace.to_plotly_json() for trace in fig.data]
+
+    result = sanitize_layout(fig)
+    assert result is fig
+    for name in ('xaxis', 'xaxis2'):
+        rangeslider = fig.layout[name].rangeslider
+        assert rangeslider.visible is False
+        assert not rangeslider.yaxis.to_plotly_json()
+    assert [trace.to_plotly_json() for trace in fig.data] == data_before
+    assert 'xaxis3' not in fig.to_plotly_json()['layout']
+
+
+def test_generated_charts_have_no_rangeslider():
+    """Los gráficos generados no llevan rangeslider visible ni ejes fantasma"""
+    generator = SmartChartGenerator()
+    data = pd.DataFrame({'distrito': ['Norte', 'Sur', 'Este'], 'camas': [250, 180, 320]})
+    for chart_type, x_axis in (('bar', 'distrito'), ('line', 'distrito'), ('scatter', 'distrito'), ('histogram', 'camas')):
+        fig = generator.generate_chart({'type': chart_type, 'title': f'Saneado {chart_type}',
+                                        'x_axis': x_axis, 'y_axis': 'camas'}, data)
+        assert fig.layout.title.text == f'Saneado {chart_type}'
+        layout = fig.to_plotly_json()['layout']
+        assert layout['xaxis']['rangeslider']['visible'] is False
+        assert not any(key.startswith('xaxis') and key != 'xaxis' for key in layout)
+
+
+def test_hover_policy_keeps_traces():
+    """Hover desactivado en trazas y layout sin clonar trazas ni crear ejes"""
+    fig = make_subplots(rows=1, cols=2, specs=[[{'type': 'xy'}, {'type': 'domain'}]])
+    fig.add_trace(go.Scatter(x=[1, 2, 3], y=[3, 1, 2], name='camas', hovertemplate='%{y}'), row=1, col=1)
+    fig.add_trace(go.Pie(labels=['Norte', 'Sur'], values=[2, 3]), row=1, col=2)
+    fig.update_layout(hovermode='x unified', hoverlabel=dict(bgcolor='white'))
+    traces_before = list(fig.data)
+
+    result = apply_hover_policy(fig)
+    assert result is fig
+    assert all(after is before for after, before in zip(fig.data, traces_before))
+    assert all(trace.hoverinfo == 'none' for trace in fig.data)
+    assert fig.data[0].hovertemplate is None and fig.data[0].name == 'camas'
+    layout = fig.to_plotly_json()['layout']
+    assert layout['hovermode'] is False and not layout.get('hoverlabel')
+    assert layout['xaxis']['rangeslider']['visible'] is False
+    assert 'xaxis2' not in layout
+
+
+if __name__ == "__main__":
+    test_sanitize_all_x_axes_in_place()
+    test_generated_charts_have_no_rangeslider()
+    test_hover_policy_keeps_traces()
+    print("✅ Tests del saneado de layout completados")
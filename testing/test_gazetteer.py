@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test del nomenclátor de municipios y centros sanitarios
+"""
+
+import sys
+import os
+
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.geo.gazetteer import get_gazetteer
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw')
+
+
+def test_every_municipality_has_coordinates():
+    """Todos los municipios de demografía están en el nomenclátor, con o sin acentos"""
+    gazetteer = get_gazetteer()
+    demografia = pd.read_csv(os.path.join(DATA_DIR, 'demografia_malaga_2025.csv'))
+
+    coords = gazetteer.lookup_municipalities(demografia['municipio'])
+    assert not pd.isna(coords).any()
+    assert gazetteer.municipality_coords_for('velez malaga') == gazetteer.municipality_coords_for('Vélez-Málaga')
+    assert gazetteer.municipality_coords_for('Municipio Inexistente') is None
+
+
+def test_hospital_coordinates_are_not_collapsed():
+    """Cada centro resuelve a sus propias coordenadas (no al primer nombre con una palabra en común)"""
+    hospitales = pd.read_csv(os.path.join(DATA_DIR, 'hospitales_malaga_2025.csv'))
+    gazetteer = get_gazetteer({'hospitales': hospitales})
+
+    for name, code in [('Hospital Costa del Sol', 'H.U.C.S.'), ('Hospital Axarquía', 'H.A.V.M.'),
+                       ('Hospital Antequera', 'H.A.A.'), ('Hospital Ronda', 'H.R.R.')]:
+        row = hospitales.loc[hospitales['codigo_sas'] == code].iloc[0]
+        assert gazetteer.hospital_coords_for(name) == (row['latitud'], row['longitud'])
+
+    regional = gazetteer.hospital_coords_for('Hospital Regional Málaga')
+    assert gazetteer.hospital_coords_for('Hospital Ronda') != regional
+    assert gazetteer.hospital_coords_for('Hospital Inexistente') is None
+    assert get_gazetteer({'hospitales': hospitales}) is gazetteer
+
+
+def test_entity_detection_in_text():
+    """Detección de municipios y centros mencionados en una consulta"""
+    gazetteer = get_gazetteer()
+    query = "¿Cómo es el acceso desde Rincón de la Victoria y Velez-Malaga al hospital de Ronda?"
+
+    assert gazetteer.find_municipalities(query) == ['Rincón de la Victoria', 'Vélez-Málaga', 'Ronda']
+    assert gazetteer.find_hospitals(query) == ['Hospital de Ronda (Serranía de Ronda)']
+
+    # Con los datos cargados solo se reconocen sus centros
+    hospitales = pd.read_csv(os.path.join(DATA_DIR, 'hospitales_malaga_2025.csv'))
+    loaded = get_gazetteer({'hospitales': hospitales.loc[hospitales['codigo_sas'] != 'H.R.R.']})
+    assert loaded.find_municipalities(query) == ['Rincón de la Victoria', 'Vélez-Málaga', 'Ronda']
+    assert loaded.find_hospitals(query) == []
+
+
+if __name__ == "__main__":
+    test_every_municipality_has_coordinates()
+    test_hospital_coordinates_are_not_collapsed()
+    test_entity_detection_in_text()
+    print("✅ Tests del nomenclátor completados")
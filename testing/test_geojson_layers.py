@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test de las capas GeoJSON con agrupación de marcadores
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from folium import plugins
+
+from modules.visualization.geojson_layers import CLUSTER_THRESHOLD, build_point_layer, points_feature_collection
+from modules.visualization.interactive_maps import EpicHealthMaps
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw')
+
+POPUP_JS = "function(p) { return p.nombre; }"
+
+
+def test_feature_collection_is_compact():
+    """Un punto por fila con coordenadas; NaN se serializa como null"""
+    properties = pd.DataFrame({'nombre': ['A', 'B', 'C'], 'camas': [10.0, np.nan, 30.0]})
+    collection = points_feature_collection([36.7, np.nan, 36.5], [-4.4, -4.0, -4.9], properties)
+
+    assert len(collection['features']) == 2
+    first, second = collection['features']
+    assert first['geometry']['coordinates'] == [-4.4, 36.7]
+    assert second['properties'] == {'nombre': 'C', 'camas': 30.0}
+
+    properties = pd.DataFrame({'nombre': ['A'], 'camas': [np.nan]})
+    collection = points_feature_collection([36.7], [-4.4], properties)
+    assert collection['features'][0]['properties']['camas'] is None
+
+
+def test_large_layer_is_clustered_in_one_script():
+    """Decenas de miles de puntos: una sola capa agrupada con una única FeatureCollection"""
+    n = 20000
+    rng = np.random.default_rng(0)
+    properties = pd.DataFrame({'nombre': [f'Centro {i}' for i in range(n)], 'color': '#e74c3c',
+                               'radius': 5, 'opacity': 0.8})
+    collection = points_feature_collection(rng.uniform(36.3, 37.2, n), rng.uniform(-5.5, -3.8, n), properties)
+
+    layer = build_point_layer(collection, 'Centros', POPUP_JS, POPUP_JS)
+    assert isinstance(layer, plugins.MarkerCluster)
+    assert len(layer._children) == 1
+
+    small = build_point_layer({'type': 'FeatureCollection', 'features': collection['features'][:CLUSTER_THRESHOLD]},
+                              'Centros', POPUP_JS, POPUP_JS)
+    assert not isinstance(small, plugins.MarkerCluster)
+
+
+def test_epic_layers_use_geojson():
+    """Hospitales y municipios se añaden como una capa GeoJSON cada uno, sin popups por fila"""
+    hospitales = pd.read_csv(os.path.join(DATA_DIR, 'hospitales_malaga_2025.csv'))
+    demografia = pd.read_csv(os.path.join(DATA_DIR, 'demografia_malaga_2025.csv'))
+    maps = EpicHealthMaps()
+
+    epic_map = maps.create_epic_base_map()
+    epic_map = maps.add_epic_hospitals(epic_map, hospitales)
+    epic_map = maps.add_epic_municipalities(epic_map, demografia)
+    html = epic_map.get_root().render()
+
+    assert html.count('L.geoJSON(') == 2
+    assert 'L.popup' not in html
+    assert hospitales['nombre'].iloc[0] in html
+
+
+if __name__ == "__main__":
+    test_feature_collection_is_compact()
+    test_large_layer_is_clustered_in_one_script()
+    test_epic_layers_use_geojson()
+    print("✅ Tests de capas GeoJSON completados")
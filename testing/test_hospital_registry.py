@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test del registro canónico de centros y del análisis de brechas de servicios
+"""
+
+import sys
+import os
+
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.analytics.hospital_registry import (
+    HospitalRegistry, compute_service_coverage, get_hospital_service_table, normalize_name
+)
+from modules.ai.ai_processor import HealthMetricsCalculator
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw')
+
+
+def load_data():
+    return {
+        'hospitales': pd.read_csv(os.path.join(DATA_DIR, 'hospitales_malaga_2025.csv')),
+        'servicios': pd.read_csv(os.path.join(DATA_DIR, 'servicios_sanitarios_2025.csv')),
+    }
+
+
+def test_normalize_name():
+    """Los nombres se normalizan sin acentos ni puntuación"""
+    assert normalize_name("Hospital de la Axarquía (Vélez-Málaga)") == "hospital de la axarquia velez malaga"
+    assert normalize_name(None) == ''
+
+
+def test_registry_resolves_service_names():
+    """Todos los centros de servicios se resuelven a su código SAS"""
+    data = load_data()
+    registry = HospitalRegistry(data['hospitales'])
+
+    expected = {
+        'Hospital Regional Málaga': 'H.R.U.M.',
+        'Hospital Virgen Victoria': 'H.C.U.V.V.',
+        'Hospital Costa del Sol': 'H.U.C.S.',
+        'Hospital Axarquía': 'H.A.V.M.',
+        'Hospital Antequera': 'H.A.A.',
+        'Hospital Ronda': 'H.R.R.',
+        'CAR Estepona': 'C.A.R.E.',
+        'CAR Benalmádena': 'C.A.R.B.',
+        'CAR Coín': 'C.A.R.C.',
+        'Hospital Vélez-Málaga': 'H.A.V.M.',
+    }
+    for name, code in expected.items():
+        resolved = registry.resolve(name)
+        print(f"  {name} -> {resolved}")
+        assert resolved == code
+
+    assert registry.resolve("Hospital Inexistente") is None
+
+
+def test_service_gaps_matrix():
+    """La cobertura vectorizada coincide con el recuento por servicio"""
+    data = load_data()
+    services = ['cardiologia', 'neurologia', 'uci_adultos', 'servicio_inexistente']
+    coverage = compute_service_coverage(data, services)
+
+    assert list(coverage.index) == ['cardiologia', 'neurologia', 'uci_adultos']
+    for service in coverage.index:
+        expected_with = int(data['servicios'][service].sum())
+        assert coverage.loc[service, 'centros_con_servicio'] == expected_with
+        assert coverage.loc[service, 'centros_sin_servicio'] == len(data['servicios']) - expected_with
+
+    # Población sin acceso: suma de la población de referencia de los centros sin servicio
+    registry = HospitalRegistry(data['hospitales'])
+    without = data['servicios'].loc[~data['servicios']['neurologia'], 'centro_sanitario']
+    codes = [registry.resolve(name) for name in without]
+    expected_population = data['hospitales'].set_index('codigo_sas').loc[codes, 'poblacion_referencia_2025'].sum()
+    assert coverage.loc['neurologia', 'poblacion_sin_acceso'] == expected_population
+    assert expected_population > 0
+
+    gaps = HealthMetricsCalculator.identify_service_gaps(data)
+    assert 'error' not in gaps
+    assert gaps['neurologia']['poblacion_sin_acceso'] == expected_population
+    print(f"✅ Brechas calculadas: {list(gaps.keys())}")
+
+
+def test_hospital_service_table():
+    """La tabla de unión contiene un centro por fila con coordenadas, servicios y personal"""
+    data = load_data()
+    table = get_hospital_service_table(data)
+
+    assert table['hospital_id'].notna().sum() == len(data['hospitales'])
+    assert table['tiene_servicios'].sum() == len(data['servicios'])
+    assert table['hospital_id'].is_unique
+
+    regional = table.set_index('hospital_id').loc['H.R.U.M.']
+    assert regional['centro_sanitario'] == 'Hospital Regional Málaga'
+    assert regional['profesionales_medicos_2025'] == 485
+    assert bool(regional['cardiologia'])
+
+    # Centro sin fila de servicios: sin especialidades
+    car_velez = table.set_index('hospital_id').loc['C.A.R.V.M.']
+    assert not car_velez['tiene_servicios']
+    assert not car_velez['cardiologia']
+
+    # Misma versión de datos: misma tabla (calculada una vez)
+    assert get_hospital_service_table(data) is table
+
+
+def test_coverage_circles_use_join_table():
+    """Los círculos de cobertura se generan para todos los centros con la especialidad"""
+    import folium
+    from modules.visualization.interactive_maps import EpicHealthMaps
+
+    data = load_data()
+    maps = EpicHealthMaps()
+    epic_map = maps.add_service_coverage_circles(folium.Map(), data['hospitales'], data['servicios'])
+
+    circles = [c for layer in epic_map._children.values() for c in layer._children.values()
+               if isinstance(c, folium.Circle)]
+    expected = sum(int(data['servicios'][s].sum()) for s in ['cardiologia', 'neurologia', 'oncologia_medica', 'pediatria'])
+    assert len(circles) == expected
+
+
+if __name__ == "__main__":
+    test_normalize_name()
+    test_registry_resolves_service_names()
+    test_service_gaps_matrix()
+    test_hospital_service_table()
+    test_coverage_circles_use_join_table()
+    print("✅ Tests del registro de centros completados")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test del motor de KPIs compartido
+"""
+
+import sys
+import os
+
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.analytics.kpi_engine import compute_health_kpis, get_health_kpis
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw')
+
+
+def load_data():
+    return {
+        'hospitales': pd.read_csv(os.path.join(DATA_DIR, 'hospitales_malaga_2025.csv')),
+        'demografia': pd.read_csv(os.path.join(DATA_DIR, 'demografia_malaga_2025.csv')),
+        'servicios': pd.read_csv(os.path.join(DATA_DIR, 'servicios_sanitarios_2025.csv')),
+        'accesibilidad': pd.read_csv(os.path.join(DATA_DIR, 'accesibilidad_sanitaria_2025.csv')),
+        'indicadores': pd.read_csv(os.path.join(DATA_DIR, 'indicadores_salud_2025.csv')),
+    }
+
+
+def test_kpis_match_direct_aggregates():
+    """Los KPIs coinciden con los agregados que calculaba cada consumidor"""
+    data = load_data()
+    kpis = compute_health_kpis(data)
+    total_beds = data['hospitales']['camas_funcionamiento_2025'].sum()
+    total_population = data['demografia']['poblacion_2025'].sum()
+    times = data['accesibilidad']['tiempo_coche_minutos']
+
+    assert kpis.total_centers == len(data['hospitales'])
+    assert kpis.total_beds == total_beds and kpis.total_population == total_population
+    assert abs(kpis.bed_ratio_1000 - total_beds / total_population * 1000) < 1e-9
+    assert abs(kpis.avg_access_time - times.mean()) < 1e-9
+    assert kpis.routes_over_60 == int((times > 60).sum())
+    assert abs(kpis.coverage_under_45min - (times <= 45).mean() * 100) < 1e-9
+    assert kpis.specialty_centers['cardiologia'] == data['servicios']['cardiologia'].sum()
+    assert kpis.most_populated_municipality == 'Málaga'
+    assert isinstance(kpis.total_beds, int) and isinstance(kpis.bed_ratio_1000, float)
+
+
+def test_breakdowns_add_up():
+    """Los desgloses por distrito y municipio suman los totales"""
+    kpis = compute_health_kpis(load_data())
+    assert kpis.by_district['camas'].sum() == kpis.total_beds
+    assert kpis.by_district['centros'].sum() == kpis.total_centers
+    assert len(kpis.by_municipality) == kpis.municipalities
+    assert kpis.by_municipality['poblacion'].sum() == kpis.total_population
+    malaga = kpis.by_municipality.set_index('municipio').loc['Málaga']
+    assert malaga['camas'] == 2720 and malaga['tiempo_acceso_medio'] > 0
+
+
+def test_kpis_cached_per_version():
+    """Una sola instancia por versión de datos; datasets ausentes dan None"""
+    data = load_data()
+    assert get_health_kpis(data) is get_health_kpis(dict(data))
+    partial = {'hospitales': data['hospitales'], 'demografia': data['demografia']}
+    kpis = get_health_kpis(partial)
+    assert kpis.avg_access_time is None and kpis.life_expectancy is None
+    assert kpis.total_beds == data['hospitales']['camas_funcionamiento_2025'].sum()
+
+
+if __name__ == "__main__":
+    test_kpis_match_direct_aggregates()
+    test_breakdowns_add_up()
+    test_kpis_cached_per_version()
+    print("✅ Tests del motor de KPIs completados")
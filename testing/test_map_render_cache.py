@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test de la cache de mapas renderizados
+"""
+
+import sys
+import os
+
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.visualization.interactive_maps import EpicHealthMaps
+from modules.performance.derived_data_store import get_derived_data_store
+from modules.visualization.map_render_cache import (
+    MAP_HTML_CACHE_ENTRIES, get_cached_map, get_cached_map_html, get_map_html_store, map_cache_seed, render_map_html
+)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw')
+
+
+def load_data():
+    return {
+        'hospitales': pd.read_csv(os.path.join(DATA_DIR, 'hospitales_malaga_2025.csv')),
+        'demografia': pd.read_csv(os.path.join(DATA_DIR, 'demografia_malaga_2025.csv')),
+    }
+
+
+def build_hospitals_map(maps, data, seed):
+    maps.reset_ids(seed)
+    epic_map = maps.create_epic_base_map(zoom_start=10)
+    epic_map = maps.add_epic_hospitals(epic_map, data['hospitales'])
+    return maps.create_epic_control_panel(epic_map)
+
+
+def test_rendered_html_is_deterministic():
+    """Dos construcciones del mismo mapa producen exactamente el mismo HTML"""
+    data = load_data()
+    seed = map_cache_seed('hospitales', 'admin', 10, 'Dark Theme')
+
+    first = render_map_html(build_hospitals_map(EpicHealthMaps(), data, seed), seed)
+    second = render_map_html(build_hospitals_map(EpicHealthMaps(), data, seed), seed)
+    assert first == second
+    assert seed in first
+
+
+def test_cache_hit_skips_folium():
+    """Los aciertos de cache no vuelven a construir el mapa"""
+    data = load_data()
+    maps = EpicHealthMaps()
+    builds = []
+
+    def builder():
+        builds.append(1)
+        return build_hospitals_map(maps, data, map_cache_seed('hospitales', 'gestor', 9, 'OpenStreetMap'))
+
+    html = get_cached_map_html(data, builder, 'hospitales', 'gestor', 9, 'OpenStreetMap', depends_on=('hospitales',))
+    again = get_cached_map_html(data, builder, 'hospitales', 'gestor', 9, 'OpenStreetMap', depends_on=('hospitales',))
+    assert again is html
+    assert len(builds) == 1
+
+    # Otro zoom u otros datos: nueva entrada
+    get_cached_map_html(data, builder, 'hospitales', 'gestor', 11, 'OpenStreetMap', depends_on=('hospitales',))
+    changed = dict(data, hospitales=data['hospitales'].head(5))
+    get_cached_map_html(changed, builder, 'hospitales', 'gestor', 9, 'OpenStreetMap', depends_on=('hospitales',))
+    assert len(builds) == 3
+
+    # El HTML vive en su propio almacén acotado, no en el de tablas derivadas
+    assert 'map_html' not in get_derived_data_store().get_stats()['entries_by_name']
+    assert get_map_html_store().get_stats()['entries_by_name']['map_html'] >= 3
+    assert get_map_html_store().max_entries == MAP_HTML_CACHE_ENTRIES
+
+
+def test_interactive_map_object_is_cached():
+    """El modo interactivo reutiliza el objeto Folium construido para la misma clave"""
+    data = load_data()
+    maps = EpicHealthMaps()
+    builds = []
+
+    def builder():
+        builds.append(1)
+        return build_hospitals_map(maps, data, map_cache_seed('hospitales', 'analista', 9, 'Dark Theme'))
+
+    epic_map = get_cached_map(data, builder, 'hospitales', 'analista', 9, 'Dark Theme', depends_on=('hospitales',))
+    again = get_cached_map(data, builder, 'hospitales', 'analista', 9, 'Dark Theme', depends_on=('hospitales',))
+    assert again is epic_map
+    assert len(builds) == 1
+
+    get_cached_map(data, builder, 'hospitales', 'analista', 12, 'Dark Theme', depends_on=('hospitales',))
+    assert len(builds) == 2
+
+
+if __name__ == "__main__":
+    test_rendered_html_is_deterministic()
+    test_cache_hit_skips_folium()
+    test_interactive_map_object_is_cached()
+    print("✅ Tests de la cache de mapas completados")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test del motor de informes PDF
+"""
+
+import sys
+import os
+import io
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.reports.pdf_engine import (
+    REPORTLAB_AVAILABLE, PDFReportEngine, create_pdf_bytes, tokenize_markdown
+)
+
+SAMPLE_ANALYSIS = """# Análisis de Capacidad
+## Situación actual
+
+El distrito tiene **alta** ocupación y *tendencia* creciente.
+- Camas por 1000 hab: **2,1**
+1. Revisar plantillas
+**Resumen ejecutivo**
+Es importante reforzar urgencias.
+
+| Distrito | Camas |
+|---|---|
+| Málaga | 1200 |
+Texto tras la tabla
+"""
+
+
+def test_tokenizer_blocks():
+    """Cada línea se clasifica con el tokenizador y las filas de tabla se agrupan"""
+    kinds = [kind for kind, _ in tokenize_markdown(SAMPLE_ANALYSIS)]
+    assert kinds[:3] == ['h1', 'h2', 'blank']
+    assert kinds.count('table') == 1 and kinds.count('end_text') == 2
+    for kind in ('text', 'bullet', 'numbered', 'strong'):
+        assert kind in kinds
+
+    table = next(content for kind, content in tokenize_markdown(SAMPLE_ANALYSIS) if kind == 'table')
+    assert len(table) == 3
+
+
+def test_render_and_content_cache():
+    """El mismo contenido se sirve desde la cache; un cambio vuelve a maquetar"""
+    if not REPORTLAB_AVAILABLE:
+        return
+    engine = PDFReportEngine(cache_size=2)
+    first = engine.render("Informe", SAMPLE_ANALYSIS)
+    assert first.startswith(b'%PDF')
+    assert engine.render("Informe", SAMPLE_ANALYSIS) is first
+    assert engine.get_stats()['renders'] == 1 and engine.get_stats()['cache_hits'] == 1
+
+    engine.render("Informe", SAMPLE_ANALYSIS + "\nNueva línea")
+    engine.render("Otro informe", SAMPLE_ANALYSIS)
+    stats = engine.get_stats()
+    assert stats['renders'] == 3 and stats['cached_documents'] == 2
+
+
+def test_write_pdf_to_stream():
+    """El informe puede escribirse directamente sobre un fichero abierto"""
+    if not REPORTLAB_AVAILABLE:
+        return
+    output = io.BytesIO()
+    PDFReportEngine().write_pdf(output, "Informe", SAMPLE_ANALYSIS, use_simple_header=True)
+    assert output.getvalue().startswith(b'%PDF')
+    assert create_pdf_bytes("Informe", "Texto simple").startswith(b'%PDF')
+
+
+if __name__ == "__main__":
+    test_tokenizer_blocks()
+    test_render_and_content_cache()
+    test_write_pdf_to_stream()
+    print("✅ Tests del motor de informes PDF completados")
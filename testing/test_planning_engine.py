@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test del motor de planificación de ubicaciones
+"""
+
+import sys
+import os
+
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.analytics.planning_engine import compute_location_planning, format_planning_summary
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw')
+
+
+def load_data():
+    return {
+        'demografia': pd.read_csv(os.path.join(DATA_DIR, 'demografia_malaga_2025.csv')),
+        'accesibilidad': pd.read_csv(os.path.join(DATA_DIR, 'accesibilidad_sanitaria_2025.csv')),
+    }
+
+
+def reference_scores(data):
+    """Cálculo original fila a fila (referencia)"""
+    scores = {}
+    for _, row in data['demografia'].iterrows():
+        access = data['accesibilidad'][data['accesibilidad']['municipio_origen'] == row['municipio']]
+        avg_access_time = access['tiempo_coche_minutos'].mean() if not access.empty else 60
+        scores[row['municipio']] = (
+            (row['crecimiento_2024_2025'] / 1000) * 0.3 +
+            (row['poblacion_2025'] / 10000) * 0.4 +
+            (avg_access_time / 10) * 0.3
+        )
+    return scores
+
+
+def test_planning_matches_reference():
+    """El score vectorizado coincide con el cálculo original"""
+    data = load_data()
+    planning = compute_location_planning(data)
+    expected = reference_scores(data)
+
+    assert len(planning) == len(data['demografia'])
+    for row in planning.itertuples(index=False):
+        assert abs(row.score_necesidad - expected[row.municipio]) < 1e-9
+
+    assert planning['score_necesidad'].is_monotonic_decreasing
+    assert list(planning['ranking']) == list(range(1, len(planning) + 1))
+    assert planning.iloc[0]['municipio'] == 'Málaga'
+    print(format_planning_summary(planning, top_n=3))
+
+
+def test_custom_weights_are_cached_separately():
+    """Cada conjunto de pesos produce (y cachea) su propio ranking"""
+    data = load_data()
+    default = compute_location_planning(data)
+    access_only = compute_location_planning(data, {'tiempo_acceso': 1.0})
+
+    assert access_only is not default
+    assert compute_location_planning(data, {'tiempo_acceso': 1.0}) is access_only
+    assert access_only.iloc[0]['tiempo_acceso_promedio'] == access_only['tiempo_acceso_promedio'].max()
+
+    try:
+        compute_location_planning(data, {'factor_inexistente': 1.0})
+        assert False, "Debería rechazar factores desconocidos"
+    except ValueError:
+        pass
+
+
+def test_empty_or_zero_weights_are_rejected():
+    """Sin pesos positivos no hay ranking (ni se sustituyen en silencio por los de defecto)"""
+    data = load_data()
+    for weights in ({}, {'crecimiento': 0.0, 'poblacion': 0.0}, {'poblacion': 1.0, 'tiempo_acceso': -0.5}):
+        try:
+            compute_location_planning(data, weights)
+            assert False, f"Debería rechazar la ponderación {weights}"
+        except ValueError:
+            pass
+
+
+if __name__ == "__main__":
+    test_planning_matches_reference()
+    test_custom_weights_are_cached_separately()
+    test_empty_or_zero_weights_are_rejected()
+    print("✅ Tests del motor de planificación completados")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test del planificador de precálculo en segundo plano
+"""
+
+import sys
+import os
+
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.performance.derived_data_store import get_derived_data_store
+from modules.performance.precompute_scheduler import PrecomputeScheduler, register_default_jobs
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw')
+
+
+def load_data():
+    return {
+        'hospitales': pd.read_csv(os.path.join(DATA_DIR, 'hospitales_malaga_2025.csv')),
+        'demografia': pd.read_csv(os.path.join(DATA_DIR, 'demografia_malaga_2025.csv')),
+        'servicios': pd.read_csv(os.path.join(DATA_DIR, 'servicios_sanitarios_2025.csv')),
+        'accesibilidad': pd.read_csv(os.path.join(DATA_DIR, 'accesibilidad_sanitaria_2025.csv')),
+        'indicadores': pd.read_csv(os.path.join(DATA_DIR, 'indicadores_salud_2025.csv')),
+    }
+
+
+def test_jobs_rerun_only_on_new_version():
+    """Un trabajo solo se vuelve a ejecutar cuando cambia la versión de sus datasets"""
+    calls = []
+    scheduler = PrecomputeScheduler(max_workers=1)
+    scheduler.register('conteo', lambda data: calls.append(len(data['demografia'])), depends_on=('demografia',))
+
+    data = {'demografia': pd.DataFrame({'municipio': ['A', 'B'], 'poblacion_2025': [10, 20]})}
+    assert scheduler.submit(data) == ['conteo']
+    assert scheduler.wait(timeout=10)
+    assert scheduler.submit(data) == []
+    assert scheduler.wait(timeout=10)
+    assert calls == [2]
+
+    # Otro dataset no afecta; uno nuevo de demografía sí
+    data['hospitales'] = pd.DataFrame({'nombre': ['H']})
+    assert scheduler.submit(data) == []
+    data['demografia'] = pd.DataFrame({'municipio': ['A', 'B', 'C'], 'poblacion_2025': [10, 20, 30]})
+    assert scheduler.submit(data) == ['conteo']
+    assert scheduler.wait(timeout=10)
+    assert calls == [2, 3]
+
+    status = scheduler.get_status()[0]
+    assert status['status'] == 'ok' and status['runs'] == 2
+    assert status['last_run'] is not None and status['duration'] >= 0
+    scheduler.shutdown()
+
+
+def test_job_errors_are_recorded():
+    """Los errores quedan en el estado del trabajo sin detener el planificador"""
+    def failing(data):
+        raise ValueError("fallo de prueba")
+
+    scheduler = PrecomputeScheduler(max_workers=1)
+    scheduler.register('fallo', failing)
+    scheduler.submit({'demografia': pd.DataFrame({'a': [1]})})
+    assert scheduler.wait(timeout=10)
+
+    status = scheduler.get_status()[0]
+    assert status['status'] == 'error' and 'fallo de prueba' in status['error']
+    scheduler.shutdown()
+
+
+def test_default_jobs_publish_to_store():
+    """Los trabajos de la aplicación dejan sus tablas en el almacén compartido"""
+    data = load_data()
+    scheduler = PrecomputeScheduler()
+    register_default_jobs(scheduler)
+    scheduler.submit(data)
+    assert scheduler.wait(timeout=120)
+
+    statuses = {status['job']: status for status in scheduler.get_status()}
+    for name in ('hospital_service_table', 'health_kpis', 'equity_index', 'accessibility_gaps'):
+        assert statuses[name]['status'] == 'ok', statuses[name]
+
+    entries = get_derived_data_store().get_stats()['entries_by_name']
+    for name in ('health_kpis', 'equity_index', 'accessibility_gaps'):
+        assert name in entries
+    scheduler.shutdown()
+
+
+if __name__ == "__main__":
+    test_jobs_rerun_only_on_new_version()
+    test_job_errors_are_recorded()
+    test_default_jobs_publish_to_store()
+    print("✅ Tests del planificador de precálculo completados")
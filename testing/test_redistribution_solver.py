@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test del solver de redistribución de recursos entre distritos
+"""
+
+import sys
+import os
+
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.analytics.redistribution_solver import get_redistribution_problem, solve_redistribution
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw')
+
+
+def load_data():
+    return {
+        'hospitales': pd.read_csv(os.path.join(DATA_DIR, 'hospitales_malaga_2025.csv')),
+        'indicadores': pd.read_csv(os.path.join(DATA_DIR, 'indicadores_salud_2025.csv')),
+        'accesibilidad': pd.read_csv(os.path.join(DATA_DIR, 'accesibilidad_sanitaria_2025.csv')),
+    }
+
+
+def test_plan_respects_constraints():
+    """Los traslados respetan el tiempo máximo y la capacidad cedible, y conservan el total"""
+    data = load_data()
+    max_travel, max_fraction = 90, 0.15
+    plan = solve_redistribution(data, max_travel, max_fraction)
+    transfers, districts = plan['transfers'], plan['districts']
+    print(transfers)
+
+    assert not transfers.empty
+    assert (transfers['tiempo_minutos'] <= max_travel).all()
+    assert (transfers['origen'] != transfers['destino']).all()
+
+    for resource, summary in districts.groupby('recurso'):
+        assert summary['final'].sum() == summary['actual'].sum()
+        given = transfers[transfers['recurso'] == resource].groupby('origen')['cantidad'].sum()
+        current = summary.set_index('distrito')['actual']
+        assert (given <= (current[given.index] * max_fraction)).all()
+
+    # El plan reduce la dispersión de camas por habitante
+    beds = districts[districts['recurso'] == 'camas']
+    assert beds['ratio_final_1000hab'].std() < beds['ratio_actual_1000hab'].std()
+
+
+def test_constraints_and_cache():
+    """Sin capacidad cedible no hay traslados; cada combinación de restricciones se cachea"""
+    data = load_data()
+    assert solve_redistribution(data, 90, 0.0)['transfers'].empty
+
+    plan = solve_redistribution(data, 120, 0.2)
+    assert solve_redistribution(data, 120, 0.2) is plan
+    assert get_redistribution_problem(data) is get_redistribution_problem(data)
+
+    try:
+        solve_redistribution(data, 90, 1.5)
+        assert False, "Debería rechazar fracciones fuera de rango"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_plan_respects_constraints()
+    test_constraints_and_cache()
+    print("✅ Tests del solver de redistribución completados")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test de la política de renderizado para datos grandes
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.visualization.chart_generator import DataAnalyzer, SmartChartGenerator
+from modules.visualization.render_policy import (
+    MAX_LINE_POINTS, MAX_SCATTER_POINTS, downsample_line, lttb_indices, minmax_indices, prebin_histogram
+)
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    """LTTB conserva extremos, el pico aislado y el número de puntos pedido"""
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 500)
+    y[4321] = 25.0
+    indices = lttb_indices(x, y, 500)
+    assert len(indices) == 500 and indices[0] == 0 and indices[-1] == 9_999
+    assert np.all(np.diff(indices) > 0)
+    assert 4321 in indices
+
+
+def test_minmax_and_line_downsampling():
+    """Mín-máx para X no ordenable y LTTB para fechas; las series cortas no cambian"""
+    y = np.random.default_rng(0).normal(size=50_000)
+    indices = minmax_indices(y, 1000)
+    assert len(indices) <= 1000 and y.argmax() in indices and y.argmin() in indices
+
+    series = pd.DataFrame({'fecha': pd.date_range('2020-01-01', periods=50_000, freq='min'), 'ingresos': y})
+    reduced = downsample_line(series, 'fecha', 'ingresos')
+    assert len(reduced) == MAX_LINE_POINTS
+    assert reduced['fecha'].is_monotonic_increasing
+    short = series.head(100)
+    assert downsample_line(short, 'fecha', 'ingresos') is short
+
+
+def test_prebin_matches_numpy():
+    values = pd.Series([1.0, 2.0, np.nan, 3.0, np.inf, 4.0])
+    counts, edges = prebin_histogram(values, nbins=3)
+    assert counts.sum() == 4 and len(edges) == 4
+    assert prebin_histogram(pd.Series([np.nan])) is None
+
+
+def test_large_charts_have_bounded_payload():
+    """Dispersión en WebGL, línea reducida e histograma pre-agrupado con 200k filas"""
+    rng = np.random.default_rng(1)
+    data = pd.DataFrame({
+        'fecha': pd.date_range('2020-01-01', periods=200_000, freq='min'),
+        'tiempo_acceso': rng.gamma(2.0, 10.0, size=200_000),
+        'poblacion': rng.integers(100, 50_000, size=200_000),
+    })
+    generator = SmartChartGenerator()
+
+    scatter = generator._build_chart({'type': 'scatter', 'x_axis': 'poblacion', 'y_axis': 'tiempo_acceso'}, data)
+    assert scatter.data[0].type == 'scattergl'
+    assert sum(len(trace.x) for trace in scatter.data) == MAX_SCATTER_POINTS
+
+    line = generator._build_chart({'type': 'line', 'x_axis': 'fecha', 'y_axis': 'tiempo_acceso'}, data)
+    assert len(line.data[0].x) == MAX_LINE_POINTS
+
+    histogram = generator._build_chart({'type': 'histogram', 'x_axis': 'tiempo_acceso'}, data)
+    assert histogram.data[0].type == 'bar' and len(histogram.data[0].y) == 20
+    assert int(np.sum(histogram.data[0].y)) == len(data)
+
+
+def test_suggestion_considers_size():
+    municipios = pd.DataFrame({'municipio': [f'M{i}' for i in range(500)], 'poblacion': range(500)})
+    assert DataAnalyzer.suggest_chart_type(municipios) == 'histogram'
+    assert DataAnalyzer.suggest_chart_type(municipios.head(20)) == 'bar'
+
+
+if __name__ == "__main__":
+    test_lttb_keeps_endpoints_and_peaks()
+    test_minmax_and_line_downsampling()
+    test_prebin_matches_numpy()
+    test_large_charts_have_bounded_payload()
+    test_suggestion_considers_size()
+    print("✅ Tests de la política de renderizado completados")
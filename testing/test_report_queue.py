@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test de la cola de informes en segundo plano
+"""
+
+import sys
+import os
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.reports.pdf_engine import REPORTLAB_AVAILABLE
+from modules.reports.report_builders import REPORT_TYPES, get_report_builder
+from modules.reports.report_queue import STANDARD_REPORTS_BY_ROLE, ReportQueue
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw')
+
+
+def load_data():
+    return {
+        'hospitales': pd.read_csv(os.path.join(DATA_DIR, 'hospitales_malaga_2025.csv')),
+        'demografia': pd.read_csv(os.path.join(DATA_DIR, 'demografia_malaga_2025.csv')),
+        'servicios': pd.read_csv(os.path.join(DATA_DIR, 'servicios_sanitarios_2025.csv')),
+        'accesibilidad': pd.read_csv(os.path.join(DATA_DIR, 'accesibilidad_sanitaria_2025.csv')),
+        'indicadores': pd.read_csv(os.path.join(DATA_DIR, 'indicadores_salud_2025.csv')),
+    }
+
+
+def test_builders_produce_markdown():
+    """Cada informe estándar genera su markdown con título y secciones"""
+    data = load_data()
+    for report_type in REPORT_TYPES:
+        markdown = get_report_builder(report_type)(data, "Gestor Sanitario")
+        assert markdown.startswith('# ') and '## ' in markdown
+    assert '| Distrito |' in get_report_builder('equity')(data, "Administrador del Sistema")
+
+
+def test_queue_renders_and_reuses_artifacts():
+    """El informe se genera en segundo plano y se reutiliza para el mismo rol y versión de datos"""
+    data = load_data()
+    queue = ReportQueue(max_workers=1)
+    job_id = queue.submit('executive', data, 'gestor', "Gestor Sanitario")
+    job = queue.wait(job_id, timeout=60)
+    assert job['status'] == 'ready', job['error']
+    assert 'REPORTE EJECUTIVO' in job['markdown']
+    if REPORTLAB_AVAILABLE:
+        assert job['pdf'].startswith(b'%PDF')
+
+    assert queue.submit('executive', data, 'gestor') == job_id
+    assert queue.submit('executive', data, 'analista') != job_id
+    assert queue.get_stats()['reused'] == 1
+
+    # Con nuevos datos se genera otro informe
+    changed = dict(data, demografia=data['demografia'].iloc[:-1])
+    assert queue.submit('executive', changed, 'gestor') != job_id
+    queue.shutdown(wait_for_jobs=True)
+
+
+def test_artifacts_expire():
+    """Los artefactos caducados desaparecen y el informe vuelve a generarse"""
+    data = load_data()
+    queue = ReportQueue(max_workers=1, ttl_seconds=0.2)
+    job_id = queue.submit('demographic', data, 'analista')
+    assert queue.wait(job_id, timeout=60)['status'] == 'ready'
+    time.sleep(0.3)
+    assert queue.get_job(job_id) is None
+    assert queue.submit('demographic', data, 'analista') != job_id
+    queue.shutdown(wait_for_jobs=True)
+
+
+def test_nightly_pregeneration():
+    """La pregeneración encola los informes estándar de cada rol y calcula la próxima ejecución"""
+    data = load_data()
+    queue = ReportQueue(max_workers=2)
+    job_ids = queue.pregenerate(data)
+    assert len(job_ids) == sum(len(reports) for _, reports in STANDARD_REPORTS_BY_ROLE.values())
+    for job_id in job_ids:
+        assert queue.wait(job_id, timeout=120)['status'] == 'ready'
+
+    assert queue.seconds_until(3, datetime(2025, 1, 1, 2, 30)) == 1800
+    assert queue.seconds_until(3, datetime(2025, 1, 1, 3, 0)) == 24 * 3600
+    queue.shutdown(wait_for_jobs=True)
+
+
+def test_nightly_boundary_regenerates():
+    """La pregeneración del día siguiente no reutiliza los informes de la noche anterior aún vigentes"""
+    data = load_data()
+    queue = ReportQueue(max_workers=1)
+    yesterday = queue.submit('demographic', data, 'analista', day=date(2025, 1, 1))
+    assert queue.wait(yesterday, timeout=60)['status'] == 'ready'
+
+    # 03:00 del día siguiente: el artefacto anterior sigue vigente (TTL 24 h) pero se genera uno nuevo
+    today = queue.pregenerate(data, day=date(2025, 1, 2))
+    assert yesterday not in today
+    assert queue.get_job(yesterday) is not None
+    assert queue.submit('demographic', data, 'analista', day=date(2025, 1, 2)) in today
+    queue.shutdown(wait_for_jobs=True)
+
+
+if __name__ == "__main__":
+    test_builders_produce_markdown()
+    test_queue_renders_and_reuses_artifacts()
+    test_artifacts_expire()
+    test_nightly_pregeneration()
+    test_nightly_boundary_regenerates()
+    print("✅ Tests de la cola de informes completados")
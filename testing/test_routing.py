@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test del grafo de rutas y de los caminos mínimos precalculados
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.geo.routing import get_routing_table
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw')
+
+
+def load_data():
+    return {
+        'hospitales': pd.read_csv(os.path.join(DATA_DIR, 'hospitales_malaga_2025.csv')),
+        'demografia': pd.read_csv(os.path.join(DATA_DIR, 'demografia_malaga_2025.csv')),
+        'accesibilidad': pd.read_csv(os.path.join(DATA_DIR, 'accesibilidad_sanitaria_2025.csv')),
+    }
+
+
+def test_nearest_hospital_matches_direct_routes():
+    """El hospital más cercano coincide con la ruta directa más corta de cada municipio"""
+    data = load_data()
+    routing = get_routing_table(data)
+    accesibilidad = data['accesibilidad']
+
+    for municipio, routes in accesibilidad.groupby('municipio_origen'):
+        nearest = routing.nearest_hospital(municipio)
+        best = routes.loc[routes['tiempo_coche_minutos'].idxmin()]
+        assert nearest['tiempo_coche'] == best['tiempo_coche_minutos']
+        assert nearest['hospital_id'] == routing.registry.resolve(best['hospital_destino'])
+        assert nearest['coste'] == best['coste_transporte_euros']
+
+    assert get_routing_table(data) is routing
+
+
+def test_shortest_paths():
+    """Los caminos mínimos combinan aristas y nunca superan la ruta directa"""
+    data = load_data()
+    routing = get_routing_table(data)
+
+    direct = routing.route('Marbella', 'Hospital Regional Málaga')
+    assert direct['ruta'][0] == 'Marbella' and len(direct['ruta']) == 2
+    assert direct['tiempo_coche'] == 70
+
+    # Ronda no tiene ruta directa al Hospital de la Axarquía: se encadenan tramos
+    chained = routing.route('Ronda', 'H.A.V.M.')
+    print(chained)
+    assert len(chained['ruta']) > 2
+    assert chained['tiempo_coche'] == 120 + 55 + 12
+
+    car = routing.distances['tiempo_coche']
+    assert np.allclose(car, car.T)
+    assert routing.route('Ronda', 'Hospital Inexistente') is None
+
+
+def test_access_gaps_include_unrouted_municipalities():
+    """Las brechas de acceso incluyen municipios sin ninguna ruta registrada"""
+    data = load_data()
+    routing = get_routing_table(data)
+    gaps = routing.access_gaps(data['demografia']['municipio'], threshold=60)
+
+    routed = set(data['accesibilidad']['municipio_origen'])
+    assert set(gaps['municipio']) == set(data['demografia']['municipio']) - routed
+    assert routing.access_gaps(threshold=10)['municipio'].tolist() == ['Málaga', 'Marbella', 'Vélez-Málaga']
+
+
+if __name__ == "__main__":
+    test_nearest_hospital_matches_direct_routes()
+    test_shortest_paths()
+    test_access_gaps_include_unrouted_municipalities()
+    print("✅ Tests del grafo de rutas completados")
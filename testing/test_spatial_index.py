@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test del índice espacial de vecinos más cercanos
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.geo.spatial_index import SpatialIndex, get_hospital_index, get_municipality_index
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw')
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distancia de referencia punto a punto"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * np.arcsin(np.sqrt(a))
+
+
+def test_knn_and_radius_match_brute_force():
+    """Las consultas k-NN y por radio coinciden con el cálculo exhaustivo"""
+    rng = np.random.default_rng(42)
+    lat = rng.uniform(36.0, 38.7, 2000)
+    lon = rng.uniform(-7.5, -1.6, 2000)
+    index = SpatialIndex(np.arange(2000), lat, lon)
+
+    query_lat, query_lon = rng.uniform(36.5, 37.5, 50), rng.uniform(-5.0, -3.0, 50)
+    distances, indices = index.query(query_lat, query_lon, k=3)
+    assert distances.shape == indices.shape == (50, 3)
+
+    reference = haversine_km(query_lat[:, None], query_lon[:, None], lat[None, :], lon[None, :])
+    expected = np.sort(reference, axis=1)[:, :3]
+    assert np.allclose(distances, expected, atol=1e-6)
+    assert np.array_equal(indices[:, 0], reference.argmin(axis=1))
+
+    within = index.query_radius(query_lat, query_lon, 10.0)
+    for row, found in zip(reference, within):
+        assert set(found) == set(np.flatnonzero(row <= 10.0))
+
+    # Índice vacío (sin coordenadas válidas)
+    empty = SpatialIndex(['x'], [np.nan], [np.nan])
+    assert empty.nearest(36.7, -4.4) is None
+    assert empty.query(query_lat, query_lon, k=3)[1].shape == (50, 0)
+
+
+def test_hospital_and_municipality_lookups():
+    """El hospital y el municipio más cercanos a un punto se resuelven desde los índices"""
+    data = {
+        'hospitales': pd.read_csv(os.path.join(DATA_DIR, 'hospitales_malaga_2025.csv')),
+        'demografia': pd.read_csv(os.path.join(DATA_DIR, 'demografia_malaga_2025.csv')),
+    }
+    hospital_index = get_hospital_index(data)
+
+    code, distance = hospital_index.nearest(36.74, -5.16)
+    assert code == 'H.R.R.'
+    assert distance < 5
+    assert get_municipality_index(data).nearest(36.51, -4.88)[0] == 'Marbella'
+
+    # Posición en el DataFrame original para recuperar la fila completa
+    _, indices = hospital_index.query(36.72, -4.42, k=2)
+    nearby = data['hospitales'].iloc[hospital_index.positions[indices[0]]]
+    assert set(nearby['municipio']) == {'Málaga'}
+
+    assert get_hospital_index(data) is hospital_index
+
+
+if __name__ == "__main__":
+    test_knn_and_radius_match_brute_force()
+    test_hospital_and_municipality_lookups()
+    print("✅ Tests del índice espacial completados")
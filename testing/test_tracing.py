@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test de las trazas de rendimiento por etapa
+"""
+
+import sys
+import os
+
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.performance.tracing import Tracer, request_tracing
+from modules.visualization.chart_generator import SmartChartGenerator
+
+
+def test_disabled_tracer_records_nothing():
+    """Desactivadas: siempre el mismo span vacío y ningún registro"""
+    tracer = Tracer(enabled=False)
+    span = tracer.span('chart', rows=10)
+    assert span is tracer.span('chart.theme')
+    with span as active:
+        active.set(error='x')
+    assert tracer.recent() == [] and tracer.summary() == []
+
+
+def test_request_tracing_is_scoped():
+    """La activación por petición solo afecta al bloque"""
+    tracer = Tracer(enabled=False)
+    with request_tracing():
+        assert tracer.active
+        with tracer.span('chart.create', chart_type='bar'):
+            pass
+    assert not tracer.active
+    with tracer.span('chart.create'):
+        pass
+
+    spans = tracer.recent()
+    assert len(spans) == 1 and spans[0]['chart_type'] == 'bar'
+    summary = tracer.summary()
+    assert summary[0]['span'] == 'chart.create' and summary[0]['count'] == 1
+
+
+def test_chart_stages_are_traced():
+    """Un gráfico construido registra chart, create, theme y sanitize"""
+    generator = SmartChartGenerator()
+    generator.tracer = Tracer(enabled=True)
+    data = pd.DataFrame({'distrito': ['Norte', 'Sur', 'Este'], 'camas': [250, 180, 320]})
+    generator._build_chart({'type': 'bar', 'x_axis': 'distrito', 'y_axis': 'camas'}, data)
+
+    spans = {entry['span']: entry for entry in generator.tracer.recent()}
+    assert set(spans) == {'chart', 'chart.create', 'chart.theme', 'chart.sanitize'}
+    assert spans['chart']['rows'] == 3 and 'error' not in spans['chart']
+    assert spans['chart']['duration_ms'] >= spans['chart.create']['duration_ms'] >= spans['chart.theme']['duration_ms']
+
+
+if __name__ == "__main__":
+    test_disabled_tracer_records_nothing()
+    test_request_tracing_is_scoped()
+    test_chart_stages_are_traced()
+    print("✅ Tests de trazas de rendimiento completados")